@@ -43,6 +43,10 @@ def create_app():
     except Exception:
         pass
 
+    # Structured, queue-backed logging for the recognition path
+    from app.utils.logger import configure_logging
+    configure_logging(app)
+
     # ─────────────────────────────────────────────
     # CORS (for API endpoints called by React)
     # ─────────────────────────────────────────────
@@ -65,7 +69,11 @@ def create_app():
     login_manager.init_app(app)
     login_manager.login_view = "auth.login"
     csrf.init_app(app)
-    socketio.init_app(app)
+    socketio.init_app(
+        app,
+        async_mode=app.config.get("SOCKETIO_ASYNC_MODE"),
+        max_http_buffer_size=app.config.get("CAMERA_FRAME_MAX_BYTES", 1_000_000),
+    )
 
     # ─────────────────────────────────────────────
     # Flask-Login: API routes return JSON, not redirect
@@ -131,6 +139,8 @@ def create_app():
     # ─────────────────────────────────────────────
     try:
         from app import socket_events  # noqa: F401
+        from app.services import frame_relay
+        frame_relay.configure(app)
     except Exception:
         pass
 
@@ -148,6 +158,12 @@ def create_app():
         # Create tables
         db.create_all()
 
+    # ─────────────────────────────────────────────
+    # Background services: not in the reloader's watcher process
+    # ─────────────────────────────────────────────
+    if not _in_reloader_parent():
+        _start_services(app)
+
     # ─────────────────────────────────────────────
     # Root route
     # ─────────────────────────────────────────────
@@ -156,3 +172,65 @@ def create_app():
         return redirect(url_for("auth.login"))
 
     return app
+
+
+def _in_reloader_parent():
+    """
+    True in the werkzeug reloader's watcher process (run.py with
+    FLASK_DEBUG=1). It builds the app but only restarts the server on code
+    changes; the child it spawns (WERKZEUG_RUN_MAIN set) serves requests,
+    so background services start there and only there.
+    """
+    return os.environ.get("HEIMDALL_RELOADER") == "1" and os.environ.get("WERKZEUG_RUN_MAIN") != "true"
+
+
+def _start_services(app):
+    """Start the background threads and worker processes the app relies on."""
+    # ─────────────────────────────────────────────
+    # Recognition gallery warm start (background)
+    # ─────────────────────────────────────────────
+    try:
+        from app.routes.recognition_api import start_gallery_warmup
+        start_gallery_warmup(app)
+    except Exception as e:
+        app.logger.warning(f"Could not start gallery warm-up: {e}")
+
+    # ─────────────────────────────────────────────
+    # Process pool for augmentation / matching (RECOGNITION_PROCESS_WORKERS)
+    # ─────────────────────────────────────────────
+    try:
+        from app.services.recognition_pool import start_pool
+        start_pool(app)
+    except Exception as e:
+        app.logger.warning(f"Could not start recognition process pool: {e}")
+
+    # ─────────────────────────────────────────────
+    # Write-behind alert / match persistence, notification dispatch
+    # ─────────────────────────────────────────────
+    try:
+        from app.services import dedup_index
+        from app.services.alert_manager import start_alert_writer
+        from app.services.notification_dispatcher import start_dispatcher
+        start_alert_writer(app)
+        dedup_index.configure(app)
+        start_dispatcher(app)
+    except Exception as e:
+        app.logger.warning(f"Could not start alert writer / dispatcher: {e}")
+
+    # ─────────────────────────────────────────────
+    # Server-side camera ingestion (RTSP / USB / video files)
+    # ─────────────────────────────────────────────
+    try:
+        from app.utils.camera_stream import start_camera_streams
+        start_camera_streams(app)
+    except Exception as e:
+        app.logger.warning(f"Could not start camera streams: {e}")
+
+    # ─────────────────────────────────────────────
+    # Offline recording indexer
+    # ─────────────────────────────────────────────
+    try:
+        from app.services.recording_indexer import start_indexer
+        start_indexer(app)
+    except Exception as e:
+        app.logger.warning(f"Could not start recording indexer: {e}")
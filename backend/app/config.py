@@ -9,6 +9,94 @@ class DevelopmentConfig:
     # Store database in the backend folder (not migrations which was deleted)
     SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(basedir, '../instance/heimdall.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Memory-mapped embedding gallery shared by all worker processes
+    GALLERY_DIR = os.environ.get('GALLERY_DIR') or os.path.join(basedir, '../instance/gallery')
+    # How often each worker checks the database for gallery changes
+    GALLERY_REFRESH_SECONDS = 30
+    # Load the gallery snapshot in a background thread at startup
+    GALLERY_WARM_START = True
+    # Optional in-memory copy for coarse scoring: None, 'float16' or 'int8'
+    GALLERY_QUANTIZATION = os.environ.get('GALLERY_QUANTIZATION') or None
+    # Inmates re-scored in float32 from the mmap after a quantized pass
+    GALLERY_RERANK_CANDIDATES = 32
+    # Score per-inmate centroids first, then only the top N inmates exactly (None = off,
+    # exhaustive). Off until scripts/benchmark_centroid_prefilter.py shows a safe N on real data
+    GALLERY_SHORTLIST = int(os.environ.get('GALLERY_SHORTLIST') or 0) or None
+    # Score escaped inmates whose escape point is near the detecting camera first.
+    # Radius around the escape point: base + speed * hours since escape, capped
+    GEO_TIER_ENABLED = True
+    GEO_TIER_BASE_RADIUS_KM = 10
+    GEO_TIER_SPEED_KMH = 30
+    GEO_TIER_MAX_RADIUS_KM = 300
+    # Reuse /match results for near-identical frames from the same camera
+    FRAME_CACHE_ENABLED = True
+    FRAME_CACHE_MAX_DISTANCE = 5  # dHash bits (of 64) that may differ
+    FRAME_CACHE_MAX_AGE_SECONDS = 10  # Re-run recognition at least this often
+    # Process only the newest pending /match frame per camera
+    LATEST_FRAME_WINS = True
+    FRAME_SLOT_WAIT_SECONDS = 60
+    # Background recognition jobs (async=true on the recognition endpoints)
+    RECOGNITION_JOB_WORKERS = 2  # Worker threads
+    RECOGNITION_JOB_QUEUE_SIZE = 16  # Queued + running jobs before 503
+    RECOGNITION_JOB_RESULT_TTL_SECONDS = 300
+    # Worker processes for query augmentation and matching (0 = in-process).
+    # serve.py defaults this to the CPU count (app/services/recognition_pool.py)
+    RECOGNITION_PROCESS_WORKERS = int(os.environ.get('RECOGNITION_PROCESS_WORKERS') or 0)
+    # Socket.IO async mode: 'threading' for run.py, serve.py sets 'gevent'
+    SOCKETIO_ASYNC_MODE = os.environ.get('SOCKETIO_ASYNC_MODE') or 'threading'
+    # Binary frames over the '/camera' Socket.IO namespace (app/services/frame_ingest.py).
+    # A frame arriving while another waits: 'latest' replaces it, 'reject' refuses the new one
+    CAMERA_INGEST_DROP_POLICY = 'latest'
+    CAMERA_FRAME_MAX_BYTES = 4 * 1024 * 1024  # Also the Socket.IO message size limit
+    # Live view relay (app/services/frame_relay.py): viewers subscribe per camera
+    RELAY_DEFAULT_MAX_WIDTH = 640  # Pixels, when a subscription does not ask for a size
+    RELAY_DEFAULT_FPS = 5
+    RELAY_MAX_FPS = 15
+    RELAY_JPEG_QUALITY = 70  # Re-encoded (downscaled) frames
+    RELAY_ACK_TIMEOUT_SECONDS = 5  # Unacknowledged frame after which a viewer gets frames again
+    # Server-side RTSP / USB / video-file camera ingestion (app/utils/camera_stream.py)
+    # Run streams in this process (one process per host runs them: CAMERA_STREAM_LOCK_FILE).
+    # Off by default: run.py / serve.py turn it on
+    CAMERA_STREAM_AUTOSTART = os.environ.get('CAMERA_STREAM_AUTOSTART', '0') != '0'
+    CAMERA_STREAM_LOCK_FILE = None  # Default: instance/camera_streams.lock
+    CAMERA_STREAM_SYNC_SECONDS = 30  # Re-read the camera table (edits made through other processes)
+    CAMERA_STREAM_SAMPLE_FPS = 2.0  # Frames per camera handed to recognition
+    CAMERA_STREAM_RECONNECT_MIN_SECONDS = 1.0  # Doubled after every failed reconnect
+    CAMERA_STREAM_RECONNECT_MAX_SECONDS = 30.0
+    CAMERA_STREAM_OPEN_TIMEOUT_SECONDS = 10  # Network sources: open / read timeout
+    # Directories 'file' cameras may play from (os.pathsep-separated; empty disables them)
+    CAMERA_STREAM_FILE_DIRS = [d for d in os.environ.get('CAMERA_STREAM_FILE_DIRS', '').split(os.pathsep) if d]
+    # Offline recognition index of stored recordings (app/services/recording_indexer.py)
+    # Processes; 0 disables. Off by default: run.py / serve.py default it to 1
+    RECORDING_INDEX_WORKERS = int(os.environ.get('RECORDING_INDEX_WORKERS') or 0)
+    RECORDING_INDEX_SAMPLE_FPS = 1.0  # Frames sampled per second of video
+    RECORDING_INDEX_SCENE_THRESHOLD = 6.0  # Thumbnail gray-level change that counts as a new scene
+    RECORDING_INDEX_MAX_GAP_SECONDS = 10.0  # Analyse a sample at least this often anyway
+    RECORDING_INDEX_CHUNK_SECONDS = 30.0  # Video committed (and resumable) per chunk
+    RECORDING_INDEX_BATCH_SIZE = 16  # Face crops per embedding service request
+    RECORDING_INDEX_MAX_ATTEMPTS = 3
+    RECORDING_INDEX_POLL_SECONDS = 30
+    RECORDING_INDEX_LEASE_SECONDS = 120  # A claim not renewed for this long is taken over
+    # Chunked recording uploads (app/services/recording_uploads.py)
+    RECORDING_UPLOAD_CHUNK_BYTES = 8 * 1024 * 1024  # Largest chunk accepted per request
+    RECORDING_UPLOAD_SESSION_TTL_HOURS = 24  # Idle sessions and their partial files are deleted after this
+    RECORDING_STREAM_BLOCK_BYTES = 256 * 1024  # Read size when serving recordings
+    # Write-behind Alert / ActiveRecognition / Match persistence (app/services/alert_manager.py)
+    ALERT_FLUSH_INTERVAL_SECONDS = 1.0
+    ALERT_BATCH_SIZE = 100  # Queued writes that trigger an early flush
+    # In-memory dedup index: write last_detected_at at most this often per sighting
+    DEDUP_TOUCH_INTERVAL_SECONDS = 60
+    # Socket.IO notification dispatcher (app/services/notification_dispatcher.py)
+    DISPATCH_QUEUE_SIZE = 1000  # Events beyond this are sent on the request thread
+    DISPATCH_MAX_ATTEMPTS = 3
+    DISPATCH_RETRY_DELAY_SECONDS = 0.5
+    # Round facility distances to this step so more facilities share one emit (0 = exact)
+    DISPATCH_DISTANCE_STEP_KM = 0.0
+    # Logging (app/utils/logger.py): console plus a size-rotated JSON-lines file
+    LOG_LEVEL = os.environ.get('LOG_LEVEL') or 'INFO'
+    LOG_FILE = os.environ.get('LOG_FILE', 'recognition_debug.log')  # '' = console only
+    LOG_MAX_BYTES = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT = 5
 
 
 class ProductionConfig(DevelopmentConfig):
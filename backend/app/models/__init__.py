@@ -1,25 +1,31 @@
 # app/models/__init__.py
 """
 Export all models for easy importing.
-Usage: from app.models import User, Inmate, Camera, Alert, Match, FacialEmbedding, ActiveRecognition, Recording
+Usage: from app.models import User, Inmate, InmateEmbedding, Camera, Alert, Match, FacialEmbedding, ActiveRecognition, Recording,
+       RecordingIndex, RecordingDetection
 """
 
 from app.models.user import User
 from app.models.inmate import Inmate
+from app.models.inmate_embedding import InmateEmbedding
 from app.models.camera import Camera
 from app.models.alert import Alert
 from app.models.match import Match
 from app.models.facial_embedding import FacialEmbedding
 from app.models.active_recognition import ActiveRecognition
 from app.models.recording import Recording
+from app.models.recording_index import RecordingIndex, RecordingDetection
 
 __all__ = [
     "User",
     "Inmate",
+    "InmateEmbedding",
     "Camera",
     "Alert",
     "Match",
     "FacialEmbedding",
     "ActiveRecognition",
     "Recording",
+    "RecordingIndex",
+    "RecordingDetection",
 ]
@@ -10,9 +10,9 @@ class Camera(db.Model):
     location = db.Column(db.String(150), nullable=False)
     status = db.Column(db.Boolean, default=True)  # Active/Inactive
 
-    # Camera type: 'webcam', 'rtsp', 'usb'
+    # Camera type: 'webcam', 'rtsp', 'usb', 'file' (local video, for offline testing)
     camera_type = db.Column(db.String(50), default='webcam')
-    # RTSP stream URL (e.g., rtsp://ip:port/stream)
+    # RTSP stream URL (e.g., rtsp://ip:port/stream), or the video path for 'file'
     stream_url = db.Column(db.String(500), nullable=True)
     # USB device ID for selecting specific camera
     device_id = db.Column(db.String(100), nullable=True)
@@ -1,8 +1,7 @@
 # models/inmate.py
 from app.extensions import db
+from app.models.inmate_embedding import InmateEmbedding, KIND_FACE, EMBEDDING_MODEL_VERSION
 from datetime import datetime, timedelta
-import json
-import numpy as np
 
 
 class Inmate(db.Model):
@@ -20,9 +19,9 @@ class Inmate(db.Model):
     sentence_duration_days = db.Column(db.Integer, default=365)
     status = db.Column(db.String(50), default='Incarcerated')  # Incarcerated, Released, Escaped
     last_seen = db.Column(db.DateTime, default=datetime.utcnow)
-    face_encoding = db.Column(db.PickleType, nullable=True)  # Single embedding (legacy)
-    face_encodings_json = db.Column(db.Text, nullable=True)  # Multiple embeddings as JSON array
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped on any change (including re-enrolment); drives incremental gallery rebuilds
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     # Track who registered this inmate
     registered_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
@@ -35,6 +34,10 @@ class Inmate(db.Model):
 
     alerts = db.relationship('Alert', backref='inmate', lazy=True)
 
+    # Enrolled face/periocular embeddings (binary float32 rows)
+    encodings = db.relationship('InmateEmbedding', backref='inmate', lazy=True,
+                                cascade='all, delete-orphan', order_by='InmateEmbedding.id')
+
     def expected_release_date(self):
         return self.sentence_start + timedelta(days=self.sentence_duration_days)
 
@@ -62,49 +65,30 @@ class Inmate(db.Model):
             'escapeDate': self.escape_date.isoformat() if self.escape_date else None,
         }
 
-    def get_all_encodings(self):
+    def get_all_encodings(self, kind=KIND_FACE):
         """
-        Get all face encodings for this inmate.
-        Returns list of numpy arrays (includes both legacy and multi-embeddings).
+        Get all encodings of one kind ('face' or 'periocular') for this inmate.
+        Returns list of L2-normalized float32 numpy arrays.
         """
-        encodings = []
-
-        # Add legacy single encoding if exists
-        if self.face_encoding is not None:
-            if isinstance(self.face_encoding, np.ndarray):
-                encodings.append(self.face_encoding)
-            elif isinstance(self.face_encoding, list):
-                encodings.append(np.array(self.face_encoding))
-
-        # Add multi-embeddings if exists
-        if self.face_encodings_json:
-            try:
-                multi_encodings = json.loads(self.face_encodings_json)
-                for enc in multi_encodings:
-                    if enc is not None:
-                        encodings.append(np.array(enc))
-            except (json.JSONDecodeError, TypeError):
-                pass
+        return [row.to_array() for row in self.encodings if row.kind == kind]
 
-        return encodings
-
-    def set_multi_encodings(self, encodings_list):
+    def set_multi_encodings(self, encodings_list, kind=KIND_FACE, model_version=EMBEDDING_MODEL_VERSION):
         """
-        Set multiple face encodings for robust matching.
+        Replace this inmate's encodings of one kind.
         Args:
             encodings_list: List of numpy arrays or lists (512-dim embeddings)
+            kind: 'face' or 'periocular'
+            model_version: Identifier of the model that produced the embeddings
         """
-        # Convert numpy arrays to lists for JSON serialization
-        json_encodings = []
-        for enc in encodings_list:
-            if enc is not None:
-                if isinstance(enc, np.ndarray):
-                    json_encodings.append(enc.tolist())
-                else:
-                    json_encodings.append(enc)
-        self.face_encodings_json = json.dumps(json_encodings)
+        kept = [row for row in self.encodings if row.kind != kind]
+        new_rows = [
+            InmateEmbedding.from_vector(enc, kind=kind, model_version=model_version)
+            for enc in encodings_list
+            if enc is not None
+        ]
+        self.encodings = kept + new_rows
+        self.updated_at = datetime.utcnow()
 
     def has_encodings(self):
         """Check if inmate has any face encodings."""
-        return self.face_encoding is not None or self.face_encodings_json is not None
-
+        return any(row.kind == KIND_FACE for row in self.encodings)
@@ -0,0 +1,70 @@
+# backend/app/models/inmate_embedding.py
+"""
+InmateEmbedding model: one enrolled embedding per row.
+
+Vectors are stored as raw little-endian float32 bytes, L2-normalized at write
+time, so the gallery loads with np.frombuffer instead of parsing JSON floats or
+unpickling numpy objects (which breaks across NumPy versions).
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+from app.extensions import db
+
+# Identifies the network that produced the vectors (FaceNet InceptionResnetV1, vggface2 weights)
+EMBEDDING_MODEL_VERSION = 'facenet-vggface2'
+
+KIND_FACE = 'face'
+KIND_PERIOCULAR = 'periocular'
+
+
+def encode_vector(vector):
+    """
+    Convert an embedding (list or numpy array) to L2-normalized float32 bytes.
+
+    Returns:
+        tuple: (bytes, dim)
+    """
+    arr = np.asarray(vector, dtype=np.float32).ravel()
+    norm = np.linalg.norm(arr)
+    if norm > 0:
+        arr = arr / norm
+    return arr.astype('<f4').tobytes(), int(arr.shape[0])
+
+
+def decode_vectors(blobs, dim):
+    """Decode a sequence of same-dimension vector blobs into an (N, dim) float32 matrix."""
+    if not blobs:
+        return np.zeros((0, dim), dtype=np.float32)
+    return np.frombuffer(b''.join(blobs), dtype='<f4').reshape(-1, dim)
+
+
+class InmateEmbedding(db.Model):
+    __tablename__ = "inmate_embedding"
+
+    id = db.Column(db.Integer, primary_key=True)
+    inmate_id = db.Column(db.Integer, db.ForeignKey('inmate.id', ondelete='CASCADE'),
+                          nullable=False, index=True)
+
+    # 'face' or 'periocular'
+    kind = db.Column(db.String(20), nullable=False, default=KIND_FACE)
+    dim = db.Column(db.Integer, nullable=False)
+    model_version = db.Column(db.String(50), nullable=False, default=EMBEDDING_MODEL_VERSION)
+
+    # Raw L2-normalized float32 bytes (dim * 4 bytes)
+    vector = db.Column(db.LargeBinary, nullable=False)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<InmateEmbedding {self.id} inmate={self.inmate_id} {self.kind} dim={self.dim}>'
+
+    @classmethod
+    def from_vector(cls, vector, kind=KIND_FACE, model_version=EMBEDDING_MODEL_VERSION):
+        blob, dim = encode_vector(vector)
+        return cls(kind=kind, dim=dim, model_version=model_version, vector=blob)
+
+    def to_array(self):
+        return np.frombuffer(self.vector, dtype='<f4')
@@ -0,0 +1,110 @@
+# backend/app/models/recording_index.py
+"""
+Offline recognition index of stored recordings (app/services/recording_indexer.py).
+
+RecordingIndex tracks how far a recording has been analysed, so indexing
+resumes where it stopped; RecordingDetection is one face found in it.
+"""
+
+from datetime import datetime
+from app.extensions import db
+
+
+class RecordingIndex(db.Model):
+    __tablename__ = "recording_index"
+
+    recording_id = db.Column(db.Integer, db.ForeignKey('recording.id'), primary_key=True)
+
+    # pending, indexing, indexed, error
+    status = db.Column(db.String(20), default='pending', nullable=False, index=True)
+
+    # Seconds of video analysed and committed (indexing resumes from here)
+    processed_seconds = db.Column(db.Float, default=0.0, nullable=False)
+    frames_sampled = db.Column(db.Integer, default=0, nullable=False)
+    frames_analyzed = db.Column(db.Integer, default=0, nullable=False)  # Scene changes
+    faces = db.Column(db.Integer, default=0, nullable=False)
+
+    # Gallery version the detections were matched against
+    gallery_version = db.Column(db.String(50), nullable=True)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    error = db.Column(db.String(500), nullable=True)
+
+    # Indexer process that claimed the recording, and when it last reported;
+    # a claim whose heartbeat is older than RECORDING_INDEX_LEASE_SECONDS can be taken over
+    owner = db.Column(db.String(100), nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    recording = db.relationship('Recording', backref=db.backref('index', uselist=False, cascade='all, delete-orphan'))
+
+    def __repr__(self):
+        return f'<RecordingIndex recording={self.recording_id} {self.status} {self.processed_seconds:.0f}s>'
+
+    def to_dict(self):
+        return {
+            'recording_id': self.recording_id,
+            'status': self.status,
+            'processed_seconds': round(self.processed_seconds or 0.0, 2),
+            'frames_sampled': self.frames_sampled,
+            'frames_analyzed': self.frames_analyzed,
+            'faces': self.faces,
+            'gallery_version': self.gallery_version,
+            'attempts': self.attempts,
+            'error': self.error,
+            'owner': self.owner,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class RecordingDetection(db.Model):
+    __tablename__ = "recording_detection"
+    __table_args__ = (
+        db.Index('ix_recording_detection_inmate_time', 'inmate_id', 'detected_at'),
+        db.Index('ix_recording_detection_camera_time', 'camera_id', 'detected_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    recording_id = db.Column(db.Integer, db.ForeignKey('recording.id'), nullable=False, index=True)
+    camera_id = db.Column(db.Integer, db.ForeignKey('camera.id'), nullable=False)
+
+    # Position in the recording, and the wall-clock time it corresponds to
+    offset_seconds = db.Column(db.Float, nullable=False)
+    detected_at = db.Column(db.DateTime, nullable=False)
+
+    # Face bounding box in the frame (pixels)
+    bbox_x = db.Column(db.Integer, nullable=False)
+    bbox_y = db.Column(db.Integer, nullable=False)
+    bbox_width = db.Column(db.Integer, nullable=False)
+    bbox_height = db.Column(db.Integer, nullable=False)
+
+    # Closest inmate in the gallery and its cosine distance (None if the gallery was empty)
+    inmate_id = db.Column(db.Integer, db.ForeignKey('inmate.id'), nullable=True)
+    distance = db.Column(db.Float, nullable=True)
+
+    recording = db.relationship('Recording', backref=db.backref('detections', lazy='dynamic', cascade='all, delete-orphan'))
+    inmate = db.relationship('Inmate')
+
+    def __repr__(self):
+        return f'<RecordingDetection recording={self.recording_id} t={self.offset_seconds:.1f} inmate={self.inmate_id}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'recording_id': self.recording_id,
+            'camera_id': self.camera_id,
+            'offset_seconds': round(self.offset_seconds, 2),
+            'detected_at': self.detected_at.isoformat() if self.detected_at else None,
+            'bbox': {'x': self.bbox_x, 'y': self.bbox_y, 'width': self.bbox_width, 'height': self.bbox_height},
+            'inmate_id': self.inmate_id,
+            'inmate': {
+                'id': self.inmate.id,
+                'inmate_id': self.inmate.inmate_id,
+                'name': self.inmate.name,
+                'status': self.inmate.status,
+            } if self.inmate else None,
+            'distance': round(self.distance, 4) if self.distance is not None else None,
+        }
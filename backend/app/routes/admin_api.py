@@ -327,11 +327,12 @@ def create_inmate():
         risk_level=risk_level,
         location=location,
         status=status,
-        face_encoding=face_encoding,
         registered_by=current_user.id,
         created_at=datetime.utcnow(),
         last_seen=datetime.utcnow()
     )
+    if face_encoding is not None:
+        inmate.set_multi_encodings([face_encoding])
 
     db.session.add(inmate)
     db.session.commit()
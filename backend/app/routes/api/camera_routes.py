@@ -2,7 +2,10 @@ from flask import Blueprint, request, jsonify
 from flask_login import current_user
 from app import db, socketio
 from app.models.camera import Camera
-from app.utils.auth_helpers import login_or_jwt_required
+from app.services import frame_relay
+from app.utils import camera_stream
+from app.utils.auth_helpers import login_or_jwt_required, request_is_admin, request_user_id
+from app.utils.geolocation import invalidate_camera_location
 
 api_camera = Blueprint('api_camera', __name__, url_prefix='/api/cameras')
 api_camera.strict_slashes = False  # Allow both /api/cameras and /api/cameras/
@@ -21,7 +24,11 @@ def list_cameras():
 @api_camera.route('/', methods=['POST'])
 @login_or_jwt_required
 def create_camera():
-    data = request.get_json()
+    data = request.get_json() or {}
+    error = camera_stream.validate_source(data.get('camera_type', 'webcam'), data.get('stream_url'),
+                                          data.get('device_id'), request_is_admin())
+    if error:
+        return jsonify({'error': error}), 400
     new_camera = Camera(
         name=data.get('name', 'Webcam'),
         location=data.get('location', 'Local Device'),
@@ -31,10 +38,12 @@ def create_camera():
         device_id=data.get('device_id'),
         latitude=data.get('latitude'),
         longitude=data.get('longitude'),
-        user_id=current_user.id  # Associate with current user
+        user_id=request_user_id()  # Associate with current user
     )
     db.session.add(new_camera)
     db.session.commit()
+    invalidate_camera_location(new_camera.id)
+    camera_stream.sync_camera(new_camera)
     socketio.emit('camera_created', new_camera.to_dict())
     return jsonify({'message': 'Camera created successfully', 'camera': new_camera.to_dict()}), 201
 
@@ -49,8 +58,13 @@ def get_camera(id):
 @api_camera.route('/<int:id>', methods=['PUT'])
 @login_or_jwt_required
 def update_camera(id):
-    camera = Camera.query.filter_by(id=id, user_id=current_user.id).first_or_404()
-    data = request.get_json()
+    camera = Camera.query.filter_by(id=id, user_id=request_user_id()).first_or_404()
+    data = request.get_json() or {}
+    error = camera_stream.validate_source(data.get('camera_type', camera.camera_type),
+                                          data.get('stream_url', camera.stream_url),
+                                          data.get('device_id', camera.device_id), request_is_admin())
+    if error:
+        return jsonify({'error': error}), 400
     camera.name = data.get('name', camera.name)
     camera.location = data.get('location', camera.location)
     camera.camera_type = data.get('camera_type', camera.camera_type)
@@ -62,6 +76,8 @@ def update_camera(id):
     if 'longitude' in data:
         camera.longitude = data.get('longitude')
     db.session.commit()
+    invalidate_camera_location(id)
+    camera_stream.sync_camera(camera)
     socketio.emit('camera_updated', camera.to_dict())
     return jsonify({'message': 'Camera updated successfully', 'camera': camera.to_dict()})
 
@@ -72,6 +88,8 @@ def delete_camera(id):
     camera = Camera.query.filter_by(id=id, user_id=current_user.id).first_or_404()
     db.session.delete(camera)
     db.session.commit()
+    invalidate_camera_location(id)
+    camera_stream.stop_camera(id)
     socketio.emit('camera_deleted', {'id': id})
     return jsonify({'message': 'Camera deleted successfully'})
 
@@ -82,5 +100,21 @@ def toggle_camera_status(id):
     camera = Camera.query.filter_by(id=id, user_id=current_user.id).first_or_404()
     camera.status = not camera.status
     db.session.commit()
+    camera_stream.sync_camera(camera)
     socketio.emit('camera_status_toggled', camera.to_dict())
     return jsonify({'message': 'Camera status toggled', 'camera': camera.to_dict()})
+
+# Live view relay throughput (admins: every subscriber; users: their own)
+@api_camera.route('/relay/status', methods=['GET'])
+@login_or_jwt_required
+def relay_status():
+    return jsonify(frame_relay.relay_stats(None if request_is_admin() else request_user_id()))
+
+# Server-side camera streams (admins: every camera; users: their own)
+@api_camera.route('/streams/status', methods=['GET'])
+@login_or_jwt_required
+def streams_status():
+    camera_ids = None
+    if not request_is_admin():
+        camera_ids = {c.id for c in Camera.query.filter_by(user_id=request_user_id()).all()}
+    return jsonify(camera_stream.stream_stats(camera_ids))
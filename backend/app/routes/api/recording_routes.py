@@ -4,14 +4,17 @@ API routes for video recording management.
 Handles upload, listing, streaming, and deletion of surveillance recordings.
 """
 
-from flask import Blueprint, request, jsonify, send_file, current_app
+from flask import Blueprint, Response, request, jsonify, current_app
 from flask_login import current_user
 from app.extensions import db
 from app.models.recording import Recording
+from app.models.recording_index import RecordingDetection, RecordingIndex
 from app.models.camera import Camera
+from app.services import recording_indexer, recording_uploads
 from app.utils.auth_helpers import login_or_jwt_required
 from datetime import datetime
 from werkzeug.utils import secure_filename
+import cv2
 import os
 
 recording_api_bp = Blueprint('recording_api', __name__, url_prefix='/recordings')
@@ -31,6 +34,40 @@ def get_recordings_dir():
     return base_dir
 
 
+MAX_PROBED_DURATION = 7 * 24 * 3600  # Longer container durations are bogus (e.g. MediaRecorder WebM)
+
+
+def _probe_duration(path):
+    """Duration in seconds from the video container, or None if it does not say."""
+    capture = cv2.VideoCapture(path)
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        frames = capture.get(cv2.CAP_PROP_FRAME_COUNT)
+    finally:
+        capture.release()
+    if fps > 0 and frames > 0 and frames / fps < MAX_PROBED_DURATION:
+        return int(round(frames / fps))
+    return None
+
+
+def _finish_recording(recording, full_path, duration=None):
+    """
+    Mark a recording completed once its file is in place.
+    Size comes from the file; duration from the container, else the client's
+    value, else the wall-clock time since the recording started.
+    """
+    recording.file_size = os.path.getsize(full_path)
+    recording.end_time = datetime.utcnow()
+    recording.status = 'completed'
+
+    recording.duration = _probe_duration(full_path) or duration
+    if not recording.duration and recording.start_time:
+        recording.duration = int((recording.end_time - recording.start_time).total_seconds())
+
+    db.session.commit()
+    recording_indexer.wake()
+
+
 @recording_api_bp.route('/', methods=['GET'])
 @login_or_jwt_required
 def list_recordings():
@@ -157,7 +194,8 @@ def start_recording():
 @login_or_jwt_required
 def upload_recording(recording_id):
     """
-    Upload the video file for a recording.
+    Upload the video file for a recording in one request (long recordings
+    should use the chunked upload session below).
     Body (multipart/form-data):
         - video: Video file
         - duration: Duration in seconds (optional)
@@ -180,19 +218,126 @@ def upload_recording(recording_id):
     full_path = os.path.join(full_dir, recording.filename)
     video_file.save(full_path)
 
-    # Update recording metadata
-    recording.file_size = os.path.getsize(full_path)
-    recording.end_time = datetime.utcnow()
-    recording.status = 'completed'
+    _finish_recording(recording, full_path, request.form.get('duration', type=int))
 
-    # Duration from form or calculate
-    duration = request.form.get('duration', type=int)
-    if duration:
-        recording.duration = duration
-    elif recording.start_time:
-        recording.duration = int((recording.end_time - recording.start_time).total_seconds())
+    return jsonify({
+        'status': 'uploaded',
+        'recording': recording.to_dict()
+    })
+
+
+# ─────────────────────────────────────────────
+# Chunked, resumable uploads (app/services/recording_uploads.py)
+# ─────────────────────────────────────────────
+def _upload_error(e):
+    body = {'error': str(e)}
+    if e.session:
+        body.update(recording_uploads.session_state(e.session))
+    return jsonify(body), e.status
 
-    db.session.commit()
+
+def _session_response(recording_id, session, **extra):
+    state = recording_uploads.session_state(session)
+    base = f"/api/recordings/{recording_id}/uploads/{session['session_id']}"
+    return dict(state, chunk_url=base + '/chunks/{index}', complete_url=base + '/complete', **extra)
+
+
+@recording_api_bp.route('/<int:recording_id>/uploads', methods=['POST'])
+@login_or_jwt_required
+def create_upload_session(recording_id):
+    """
+    Open a chunked upload session for a recording's video file.
+    Body (JSON, optional):
+        - size: Total size in bytes (checked when completing)
+        - mime_type: Video MIME type (default video/webm)
+    Then PUT each chunk (raw bytes, at most chunk_size) to chunk_url with
+    index 0, 1, 2, ... and POST complete_url. A chunk may be re-sent safely;
+    after a failure, GET the session for next_chunk and resume from there.
+    """
+    recording = Recording.query.get_or_404(recording_id)
+    data = request.get_json(silent=True) or {}
+    size = data.get('size')
+    if size is not None and (not isinstance(size, int) or size <= 0):
+        return jsonify({'error': 'size must be a positive integer'}), 400
+    mime_type = data.get('mime_type')
+    if mime_type and not str(mime_type).startswith('video/'):
+        return jsonify({'error': 'mime_type must be a video type'}), 400
+
+    recordings_dir = get_recordings_dir()
+    ttl_hours = current_app.config.get('RECORDING_UPLOAD_SESSION_TTL_HOURS', 24)
+    recording_uploads.expire_sessions(recordings_dir, ttl_hours * 3600)
+
+    session = recording_uploads.create_session(
+        recordings_dir, recording,
+        chunk_size=current_app.config.get('RECORDING_UPLOAD_CHUNK_BYTES', recording_uploads.DEFAULT_CHUNK_BYTES),
+        expected_size=size,
+    )
+    if mime_type:
+        recording.mime_type = mime_type
+        db.session.commit()
+
+    return jsonify(_session_response(recording.id, session)), 201
+
+
+@recording_api_bp.route('/<int:recording_id>/uploads/<session_id>', methods=['GET'])
+@login_or_jwt_required
+def get_upload_session(recording_id, session_id):
+    """Progress of an upload session (next_chunk is where to resume)."""
+    try:
+        session = recording_uploads.load_session(get_recordings_dir(), session_id, recording_id)
+    except recording_uploads.UploadError as e:
+        return _upload_error(e)
+    return jsonify(_session_response(recording_id, session))
+
+
+@recording_api_bp.route('/<int:recording_id>/uploads/<session_id>/chunks/<int:index>', methods=['PUT'])
+@login_or_jwt_required
+def upload_chunk(recording_id, session_id, index):
+    """
+    Append one chunk to the session's file.
+    Body: the chunk's raw bytes (Content-Length required).
+    A chunk that was already received is acknowledged again (duplicate=true)
+    if its content matches; a chunk beyond next_chunk is refused with 409.
+    """
+    try:
+        session, duplicate = recording_uploads.write_chunk(
+            get_recordings_dir(), session_id, recording_id, index,
+            request.stream, request.content_length,
+        )
+    except recording_uploads.UploadError as e:
+        return _upload_error(e)
+    return jsonify(_session_response(recording_id, session, duplicate=duplicate))
+
+
+@recording_api_bp.route('/<int:recording_id>/uploads/<session_id>/complete', methods=['POST'])
+@login_or_jwt_required
+def complete_upload_session(recording_id, session_id):
+    """
+    Finish a chunked upload: the file is moved into place and the recording
+    marked completed with its size and duration.
+    Body (JSON, optional):
+        - chunks: Number of chunks sent (checked)
+        - size: Total bytes sent (checked)
+        - duration: Duration in seconds (used if the file does not record one)
+    """
+    recording = Recording.query.get_or_404(recording_id)
+    data = request.get_json(silent=True) or {}
+    recordings_dir = get_recordings_dir()
+
+    try:
+        full_path = recording_uploads.finish_session(
+            recordings_dir, session_id, recording.id,
+            total_chunks=data.get('chunks'), total_size=data.get('size'),
+        )
+    except recording_uploads.UploadError as e:
+        # A retried completion whose first response was lost
+        if e.status == 404 and recording.status == 'completed' \
+                and os.path.exists(os.path.join(recordings_dir, recording.file_path)):
+            return jsonify({'status': 'uploaded', 'recording': recording.to_dict()})
+        return _upload_error(e)
+
+    duration = data.get('duration')
+    _finish_recording(recording, full_path, int(duration) if isinstance(duration, (int, float)) else None)
 
     return jsonify({
         'status': 'uploaded',
@@ -227,10 +372,29 @@ def get_recording(recording_id):
     return jsonify({'recording': recording.to_dict()})
 
 
+def _read_range(path, start, end, block_size):
+    """Yield bytes start..end (inclusive) of a file in blocks."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            data = f.read(min(block_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
 @recording_api_bp.route('/<int:recording_id>/stream', methods=['GET'])
 @login_or_jwt_required
 def stream_recording(recording_id):
-    """Stream the video file."""
+    """
+    Stream the video file.
+    Honours a single-range 'Range: bytes=...' header with 206 Partial Content
+    (416 if it lies outside the file), so players can seek without
+    downloading the whole recording; If-Range falls back to the full file
+    when the recording changed.
+    """
     recording = Recording.query.get_or_404(recording_id)
 
     if recording.status != 'completed':
@@ -242,11 +406,39 @@ def stream_recording(recording_id):
     if not os.path.exists(full_path):
         return jsonify({'error': 'Recording file not found'}), 404
 
-    return send_file(
-        full_path,
-        mimetype=recording.mime_type or 'video/webm',
-        as_attachment=False
-    )
+    stat = os.stat(full_path)
+    size = stat.st_size
+    etag = f'"{recording.id}-{size}-{int(stat.st_mtime)}"'
+    headers = {
+        'Accept-Ranges': 'bytes',
+        'ETag': etag,
+        'Cache-Control': 'private, max-age=3600',
+    }
+    mimetype = recording.mime_type or 'video/webm'
+    block_size = current_app.config.get('RECORDING_STREAM_BLOCK_BYTES', 256 * 1024)
+
+    byte_range = request.range
+    if_range = request.headers.get('If-Range')
+    if byte_range is not None and if_range and if_range != etag:
+        byte_range = None  # Changed since the client's earlier request: send it all
+    if byte_range is not None and (byte_range.units != 'bytes' or len(byte_range.ranges) != 1):
+        byte_range = None  # Multi-range requests get the whole file
+
+    if byte_range is None or size == 0:
+        headers['Content-Length'] = str(size)
+        return Response(_read_range(full_path, 0, size - 1, block_size), 200,
+                        headers=headers, mimetype=mimetype, direct_passthrough=True)
+
+    span = byte_range.range_for_length(size)
+    if span is None:
+        headers['Content-Range'] = f'bytes */{size}'
+        return Response(status=416, headers=headers)
+
+    start, stop = span
+    headers['Content-Range'] = f'bytes {start}-{stop - 1}/{size}'
+    headers['Content-Length'] = str(stop - start)
+    return Response(_read_range(full_path, start, stop - 1, block_size), 206,
+                    headers=headers, mimetype=mimetype, direct_passthrough=True)
 
 
 @recording_api_bp.route('/<int:recording_id>', methods=['DELETE'])
@@ -320,3 +512,101 @@ def get_recording_dates():
             for d in dates
         ]
     })
+
+
+# ─────────────────────────────────────────────
+# Offline recognition index (app/services/recording_indexer.py)
+# ─────────────────────────────────────────────
+DEFAULT_DETECTION_DISTANCE = 0.45  # Same as SIMILARITY_THRESHOLD in recognition_api.py
+
+
+def _parse_time(value):
+    """ISO date or datetime from a query arg (None if missing or invalid)."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+@recording_api_bp.route('/detections', methods=['GET'])
+@login_or_jwt_required
+def search_detections():
+    """
+    Faces found in indexed recordings.
+    Query params:
+        - inmate_id: Detections matched to this inmate (database id)
+        - camera_id: Detections on this camera
+        - start, end: Time range (ISO date / datetime)
+        - max_distance: Largest match distance (default 0.45; with inmate_id)
+        - limit: Max results (default 200)
+        - offset: Pagination offset
+    """
+    inmate_id = request.args.get('inmate_id', type=int)
+    camera_id = request.args.get('camera_id', type=int)
+    start = _parse_time(request.args.get('start'))
+    end = _parse_time(request.args.get('end'))
+    max_distance = request.args.get('max_distance', DEFAULT_DETECTION_DISTANCE, type=float)
+    limit = min(request.args.get('limit', 200, type=int), 1000)
+    offset = request.args.get('offset', 0, type=int)
+
+    if inmate_id is None and camera_id is None:
+        return jsonify({'error': 'inmate_id or camera_id is required'}), 400
+
+    query = RecordingDetection.query
+    if inmate_id is not None:
+        query = query.filter(RecordingDetection.inmate_id == inmate_id,
+                             RecordingDetection.distance <= max_distance)
+    if camera_id is not None:
+        query = query.filter(RecordingDetection.camera_id == camera_id)
+    if start:
+        query = query.filter(RecordingDetection.detected_at >= start)
+    if end:
+        query = query.filter(RecordingDetection.detected_at < end)
+
+    total = query.count()
+    detections = query.order_by(RecordingDetection.detected_at).offset(offset).limit(limit).all()
+
+    return jsonify({
+        'detections': [
+            dict(d.to_dict(), stream_url=f"/api/recordings/{d.recording_id}/stream#t={d.offset_seconds:.1f}")
+            for d in detections
+        ],
+        'total': total,
+        'limit': limit,
+        'offset': offset
+    })
+
+
+@recording_api_bp.route('/<int:recording_id>/index', methods=['GET'])
+@login_or_jwt_required
+def get_recording_index(recording_id):
+    """Indexing progress of a recording and its detection timeline."""
+    recording = Recording.query.get_or_404(recording_id)
+    index = db.session.get(RecordingIndex, recording.id)
+    detections = recording.detections.order_by(RecordingDetection.offset_seconds).all()
+    return jsonify({
+        'index': index.to_dict() if index else None,
+        'detections': [d.to_dict() for d in detections]
+    })
+
+
+@recording_api_bp.route('/<int:recording_id>/index', methods=['POST'])
+@login_or_jwt_required
+def reindex_recording(recording_id):
+    """Queue a recording for indexing again from the start (e.g. after gallery changes)."""
+    recording = Recording.query.get_or_404(recording_id)
+    if recording.status != 'completed':
+        return jsonify({'error': 'Recording not complete'}), 400
+    recording_indexer.reset_index(recording.id)
+    recording_indexer.wake()
+    return jsonify({'status': 'queued', 'recording_id': recording.id}), 202
+
+
+@recording_api_bp.route('/index/status', methods=['GET'])
+@login_or_jwt_required
+def recording_index_status():
+    """Indexer workers and per-status recording counts."""
+    counts = dict(db.session.query(RecordingIndex.status, db.func.count()).group_by(RecordingIndex.status).all())
+    return jsonify(dict(recording_indexer.indexer_stats(), recordings=counts))
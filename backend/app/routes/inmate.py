@@ -88,9 +88,8 @@ def register():
             elif hasattr(inmate, 'image_filename'):
                 inmate.image_filename = filename
 
-            # Optional: if your Inmate model has a JSON/ARRAY field for the embedding
-            if hasattr(inmate, 'face_encoding'):
-                inmate.face_encoding = embedding  # JSON-serializable list of floats
+            # Store the embedding as a binary float32 row
+            inmate.set_multi_encodings([embedding])
 
             # Set who registered this inmate
             if hasattr(inmate, 'registered_by') and current_user.is_authenticated:
@@ -1,8 +1,12 @@
 # app/routes/recognition_api.py
-from flask import Blueprint, request, jsonify
-from app.utils.auth_helpers import login_or_jwt_required
-from app import socketio
+from flask import Blueprint, request, jsonify, current_app, url_for
+from flask_login import current_user
+from app.utils.auth_helpers import login_or_jwt_required, request_is_admin, request_user_id
+from app.utils.logger import get_logger
 from app.models.inmate import Inmate
+from app.models.inmate_embedding import (
+    InmateEmbedding, KIND_FACE, KIND_PERIOCULAR, EMBEDDING_MODEL_VERSION, decode_vectors
+)
 from app.models.alert import Alert
 from app.models.active_recognition import ActiveRecognition
 from app.extensions import db
@@ -10,32 +14,37 @@ from app.utils.embedding_client import (
     extract_embedding_from_frame,
     extract_full_embeddings,
     extract_periocular_embedding,
-    compute_fusion_score,
     detect_all_faces
 )
-from app.utils.geolocation import find_nearby_facilities, get_detection_location, haversine_distance
+from app.utils import gallery_store
+from app.utils.frame_cache import FrameResultCache, dhash
+from app.utils.frame_slots import LatestFrameSlots
+from app.services.recognition_jobs import submit_job, get_job
+from app.services import alert_manager, dedup_index, frame_ingest, notification_dispatcher, recognition_pool
+from app.services.recognition_engine import (
+    GalleryMatcher, DEFAULT_RERANK_CANDIDATES, DEFAULT_GEO_BASE_RADIUS_KM, DEFAULT_GEO_SPEED_KMH,
+    DEFAULT_GEO_MAX_RADIUS_KM, assign_faces, partition_key
+)
+from app.utils.geolocation import get_detection_location, haversine_distance
 from app.utils.image_preprocessing import (
-    aggressive_denoise, deblur_image, strong_deblur,
-    remove_salt_pepper_noise, deblur_motion_horizontal, deblur_motion_multi_direction
+    estimate_noise_level, estimate_blur_level, estimate_salt_pepper_level,
+    QUERY_AUGMENTATION_FAMILIES
 )
-from scipy.spatial.distance import cosine
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import numpy as np
 import cv2
+import logging
 import os
-import sys
+import threading
+import time
 
 # Enable/disable periocular fusion matching
 ENABLE_PERIOCULAR_FUSION = True
 
-def log(msg):
-    """Log to both stdout and a file for debugging."""
-    print(msg, flush=True)
-    sys.stdout.flush()
-    sys.stderr.flush()
-    with open("recognition_debug.log", "a") as f:
-        f.write(msg + "\n")
+logger = get_logger("recognition_api")
+dedup_logger = get_logger("recognition_api.dedup")
+multi_face_logger = get_logger("recognition_api.multi_face")
 
 
 def should_create_alert(inmate_id, camera_id, detection_lat, detection_lng):
@@ -43,23 +52,21 @@ def should_create_alert(inmate_id, camera_id, detection_lat, detection_lng):
     Check if we should create a new alert or skip (deduplication).
 
     Returns:
-        tuple: (should_create: bool, existing_active: ActiveRecognition or None)
+        tuple: (should_create: bool, existing_active: dedup_index.Sighting or None)
 
     Rules:
         - Create alert if no active recognition for this inmate in last hour
         - Create alert if detection is at different location (50m+ away)
         - Skip alert if same inmate, same location, within 1 hour
     """
-    one_hour_ago = datetime.utcnow() - timedelta(hours=1)
+    one_hour_ago = datetime.utcnow() - dedup_index.WINDOW
 
-    # Find active recognition for this inmate within the last hour
-    active = ActiveRecognition.query.filter(
-        ActiveRecognition.inmate_id == inmate_id,
-        ActiveRecognition.first_detected_at > one_hour_ago
-    ).order_by(ActiveRecognition.first_detected_at.desc()).first()
+    # Find active recognition for this inmate within the last hour (in-memory
+    # index; the database is only read the first time an inmate is seen)
+    active = dedup_index.active_sighting(inmate_id, one_hour_ago)
 
     if not active:
-        log(f"[dedup] No active recognition for inmate {inmate_id} - will create alert")
+        dedup_logger.debug(f"No active recognition for inmate {inmate_id} - will create alert")
         return True, None  # No active recognition, create alert
 
     # Check location difference (50m threshold)
@@ -70,43 +77,29 @@ def should_create_alert(inmate_id, camera_id, detection_lat, detection_lng):
                 detection_lat, detection_lng
             )
             if distance_km > 0.05:  # 50 meters = 0.05 km
-                log(f"[dedup] Different location ({distance_km:.3f}km away) - will create new alert")
+                dedup_logger.debug(f"Different location ({distance_km:.3f}km away) - will create new alert")
                 return True, active  # Different location, create new alert
         except Exception as e:
-            log(f"[dedup] Error calculating distance: {e}")
+            dedup_logger.warning(f"Error calculating distance: {e}")
 
-    # Update last_detected_at and skip alert
-    try:
-        active.last_detected_at = datetime.utcnow()
-        db.session.commit()
-        log(f"[dedup] Same location within 1 hour - skipping alert, updated last_detected_at")
-    except Exception as e:
-        log(f"[dedup] Error updating active recognition: {e}")
-        db.session.rollback()
+    # Update last_detected_at (coalesced, write-behind) and skip alert
+    dedup_index.touch(active)
+    dedup_logger.info(f"Same location within 1 hour - skipping alert, updated last_detected_at")
 
     return False, active  # Skip, same location within 1 hour
 
 
-def create_active_recognition(inmate_id, camera_id, detection_lat, detection_lng, alert_id):
-    """Create a new ActiveRecognition record to track this detection."""
-    try:
-        active = ActiveRecognition(
-            inmate_id=inmate_id,
-            camera_id=camera_id,
-            latitude=detection_lat,
-            longitude=detection_lng,
-            alert_id=alert_id,
-            first_detected_at=datetime.utcnow(),
-            last_detected_at=datetime.utcnow()
-        )
-        db.session.add(active)
-        db.session.commit()
-        log(f"[dedup] Created ActiveRecognition for inmate {inmate_id}")
-        return active
-    except Exception as e:
-        log(f"[dedup] Error creating ActiveRecognition: {e}")
-        db.session.rollback()
-        return None
+def create_active_recognition(inmate_id, camera_id, detection_lat, detection_lng):
+    """New (unsaved) ActiveRecognition record to track this detection."""
+    now = datetime.utcnow()
+    return ActiveRecognition(
+        inmate_id=inmate_id,
+        camera_id=camera_id,
+        latitude=detection_lat,
+        longitude=detection_lng,
+        first_detected_at=now,
+        last_detected_at=now
+    )
 
 
 recognition_api_bp = Blueprint('recognition_api', __name__, url_prefix='/api/recognition')
@@ -115,10 +108,44 @@ recognition_api_bp = Blueprint('recognition_api', __name__, url_prefix='/api/rec
 # FaceNet embeddings are more robust - can use higher threshold
 SIMILARITY_THRESHOLD = 0.45   # Cosine distance threshold for FaceNet (40%+ similarity)
 MIN_CONFIDENCE = 50  # Minimum confidence percentage to show match
-
-# Cache for inmate encodings (loaded once per request cycle)
+# Escaped-partition matches this close raise the alarm before the full search finishes;
+# geo-tier matches this close end the search without scanning the rest of the gallery
+EARLY_ALARM_DISTANCE = 0.30
+
+# Adaptive query augmentation: embed the original crop first and stop when its
+# best distance is clearly a match (below ACCEPT) or clearly nobody (above REJECT);
+# otherwise embed only the augmentation families the crop's degradations call for,
+# and fall back to the remaining families if the result is still ambiguous
+ADAPTIVE_AUGMENTATION = True
+ADAPTIVE_ACCEPT_DISTANCE = 0.30
+ADAPTIVE_REJECT_DISTANCE = 0.80
+AUGMENTATION_FAMILIES = tuple(QUERY_AUGMENTATION_FAMILIES)
+NOISE_FAMILY_THRESHOLD = 25  # estimate_noise_level above this -> denoising
+BLUR_FAMILY_THRESHOLD = 15  # estimate_blur_level below this -> sharpening (128px crops)
+SALT_PEPPER_FAMILY_THRESHOLD = 0.002  # Impulse pixel fraction above this -> median filter
+
+# /match results that may be reused for near-identical frames (never errors)
+CACHEABLE_STATUSES = ("match_found", "escaped_inmate_detected", "low_confidence", "no_match", "no_face_detected")
+
+# One-to-one face/inmate assignment within a frame: 'hungarian', 'greedy' or None
+MULTI_FACE_ASSIGNMENT = 'hungarian'
+MULTI_FACE_TOP_K = 5  # Candidate inmates kept per face for the assignment
+
+# Memory-mapped gallery currently used by this worker (see app/utils/gallery_store.py)
 _inmate_cache = None
-_cache_timestamp = None
+# Matcher over _inmate_cache (holds the optional quantized copy); rebuilt per version
+_matcher = None
+# When this worker last compared the gallery's DB stamp with the database
+_last_db_check = 0.0
+# Serializes gallery loads between the warm-up thread and request handlers
+_gallery_lock = threading.Lock()
+# Readiness reported by /api/recognition/status
+_gallery_status = {"state": "cold", "version": None, "inmates": 0, "db_version": None,
+                   "warmup_seconds": None, "error": None}
+# Recent /match results per camera for near-identical frames (see _get_frame_cache)
+_frame_cache = None
+# Newest pending /match frame per camera (see _get_frame_slots)
+_frame_slots = None
 
 # Load face cascade detector once
 _face_cascade = None
@@ -217,10 +244,10 @@ def _detect_all_faces(frame):
             break
 
     if len(faces) == 0:
-        log(f"[multi-face] No faces detected in image {w}x{h}")
+        multi_face_logger.debug(f"No faces detected in image {w}x{h}")
         return []
 
-    log(f"[multi-face] Detected {len(faces)} faces in image")
+    multi_face_logger.debug(f"Detected {len(faces)} faces in image")
 
     # Process each face
     face_crops = []
@@ -236,107 +263,332 @@ def _detect_all_faces(frame):
 
         bbox = (int(x), int(y), int(fw), int(fh))
         face_crops.append((face_resized, bbox))
-        log(f"[multi-face] Face {i+1}: bbox={bbox}, crop size={face_crop.shape}")
+        multi_face_logger.debug("Face %d: bbox=%s, crop size=%s", i + 1, bbox, face_crop.shape)
 
     return face_crops
 
+def _query_inmate_metadata():
+    """
+    Read metadata for every inmate that has at least one face embedding.
+
+    Returns:
+        list: JSON-serializable dicts ordered by search partition
+              (see recognition_engine.partition_key), then database id
+    """
+    rows = db.session.query(
+        Inmate.id,
+        Inmate.inmate_id,
+        Inmate.name,
+        Inmate.status,
+        Inmate.mugshot_path,
+        Inmate.risk_level,
+        Inmate.crime,
+        Inmate.updated_at,
+        Inmate.escape_latitude,
+        Inmate.escape_longitude,
+        Inmate.escape_date
+    ).filter(
+        Inmate.encodings.any(InmateEmbedding.kind == KIND_FACE)
+    ).order_by(Inmate.id).all()
+
+    inmates = [{
+        "id": row.id,
+        "inmate_id": row.inmate_id,
+        "name": row.name,
+        "status": row.status,
+        "mugshot_path": row.mugshot_path,
+        "risk_level": row.risk_level,
+        "crime": row.crime,
+        "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+        "escape_latitude": row.escape_latitude,
+        "escape_longitude": row.escape_longitude,
+        "escape_date": row.escape_date.isoformat() if row.escape_date else None,
+    } for row in rows]
+
+    # Group by (status, risk_level) in search order so partitions are contiguous
+    inmates.sort(key=partition_key)
+    return inmates
+
+
+def _query_inmate_vectors(index_by_id, inmate_pks=None):
+    """
+    Read face and periocular embeddings from the database.
+
+    Embeddings are raw float32 blobs, so each kind is decoded into one matrix
+    with a single np.frombuffer call.
+
+    Args:
+        index_by_id: Inmate database id -> gallery index
+        inmate_pks: Only read these inmates (None = everyone)
+
+    Returns:
+        tuple: (face_matrix, face_owner, periocular_matrix, periocular_owner)
+               where *_owner maps every matrix row to a gallery index
+    """
+    query = db.session.query(
+        InmateEmbedding.inmate_id,
+        InmateEmbedding.kind,
+        InmateEmbedding.vector
+    ).filter(
+        InmateEmbedding.dim == gallery_store.EMBEDDING_DIM,
+        InmateEmbedding.model_version == EMBEDDING_MODEL_VERSION
+    )
+
+    if inmate_pks is None:
+        batches = [query]
+    else:
+        # Stay under SQLite's bound-parameter limit
+        batches = [
+            query.filter(InmateEmbedding.inmate_id.in_(inmate_pks[i:i + 500]))
+            for i in range(0, len(inmate_pks), 500)
+        ]
+
+    blobs = {KIND_FACE: [], KIND_PERIOCULAR: []}
+    owners = {KIND_FACE: [], KIND_PERIOCULAR: []}
+    for batch in batches:
+        for inmate_pk, kind, vector in batch.order_by(InmateEmbedding.inmate_id, InmateEmbedding.id):
+            index = index_by_id.get(inmate_pk)
+            if index is None or kind not in blobs:
+                continue
+            blobs[kind].append(vector)
+            owners[kind].append(index)
+
+    result = []
+    for kind in (KIND_FACE, KIND_PERIOCULAR):
+        # Rows must be grouped by gallery index; stable sort keeps enrolment order
+        owner = np.asarray(owners[kind], dtype=np.int64)
+        order = np.argsort(owner, kind="stable")
+        result += [decode_vectors(blobs[kind], gallery_store.EMBEDDING_DIM)[order], owner[order]]
+    return tuple(result)
+
+
+def _query_inmate_gallery():
+    """
+    Read the whole gallery from the database.
+
+    Returns:
+        tuple: (inmates, face_matrix, face_owner, periocular_matrix, periocular_owner)
+    """
+    inmates = _query_inmate_metadata()
+    index_by_id = {inmate["id"]: i for i, inmate in enumerate(inmates)}
+    return (inmates,) + _query_inmate_vectors(index_by_id)
+
+
+def _gallery_db_version():
+    """
+    Cheap stamp of the database state the gallery depends on.
+
+    Any enrolment, edit or deletion changes at least one field: edits and
+    re-enrolments bump Inmate.updated_at, deletions change the counts and
+    new embedding rows raise the last embedding id.
+    """
+    inmate_count, last_update = db.session.query(
+        db.func.count(Inmate.id), db.func.max(Inmate.updated_at)
+    ).one()
+    embedding_count, last_embedding_id = db.session.query(
+        db.func.count(InmateEmbedding.id), db.func.max(InmateEmbedding.id)
+    ).filter(
+        InmateEmbedding.dim == gallery_store.EMBEDDING_DIM,
+        InmateEmbedding.model_version == EMBEDDING_MODEL_VERSION
+    ).one()
+
+    if isinstance(last_update, datetime):
+        last_update = last_update.isoformat()
+    return {
+        "model_version": EMBEDDING_MODEL_VERSION,
+        "inmates": inmate_count,
+        "inmates_updated_at": last_update,
+        "embeddings": embedding_count,
+        "last_embedding_id": last_embedding_id,
+    }
+
+
+def _count_gallery_embeddings():
+    """Number of embedding rows that belong in the gallery (inmates with a face embedding)."""
+    enrolled = db.session.query(InmateEmbedding.inmate_id).filter(InmateEmbedding.kind == KIND_FACE)
+    return db.session.query(db.func.count(InmateEmbedding.id)).filter(
+        InmateEmbedding.dim == gallery_store.EMBEDDING_DIM,
+        InmateEmbedding.model_version == EMBEDDING_MODEL_VERSION,
+        InmateEmbedding.kind.in_([KIND_FACE, KIND_PERIOCULAR]),
+        InmateEmbedding.inmate_id.in_(enrolled)
+    ).scalar()
+
+
+def _merge_with_previous(previous, inmates, index_by_id):
+    """
+    Build gallery matrices reusing the previous snapshot for unchanged inmates.
+
+    Only inmates whose updated_at differs from the snapshot (or that are new)
+    have their embeddings read from the database.
+
+    Returns:
+        tuple: (face, face_owner, periocular, periocular_owner, num_reused),
+               or None if the merged gallery does not match the database
+    """
+    old_by_id = {inmate["id"]: (i, inmate.get("updated_at")) for i, inmate in enumerate(previous.inmates)}
+    reused_new, reused_old, changed_pks = [], [], []
+    for new_index, inmate in enumerate(inmates):
+        old = old_by_id.get(inmate["id"])
+        if old is not None and old[1] is not None and old[1] == inmate["updated_at"]:
+            reused_new.append(new_index)
+            reused_old.append(old[0])
+        else:
+            changed_pks.append(inmate["id"])
+
+    face, face_owner, peri, peri_owner = _query_inmate_vectors(index_by_id, changed_pks)
+    if reused_new:
+        reused_new = np.asarray(reused_new, dtype=np.int64)
+        old_face, old_face_owner, old_peri, old_peri_owner = previous.take(reused_old)
+        face = np.concatenate([old_face, face])
+        face_owner = np.concatenate([reused_new[old_face_owner], face_owner])
+        peri = np.concatenate([old_peri, peri])
+        peri_owner = np.concatenate([reused_new[old_peri_owner], peri_owner])
+
+        # Rows must be grouped by owner; stable sort keeps enrolment order
+        order = np.argsort(face_owner, kind="stable")
+        face, face_owner = face[order], face_owner[order]
+        order = np.argsort(peri_owner, kind="stable")
+        peri, peri_owner = peri[order], peri_owner[order]
+
+    # Changes made without bumping updated_at (e.g. raw SQL) would be missed
+    if len(face) + len(peri) != _count_gallery_embeddings():
+        return None
+    return face, face_owner, peri, peri_owner, len(reused_new)
+
+
+def _rebuild_gallery(gallery_dir, db_version, previous=None):
+    """
+    Query the database and publish a new shared gallery version.
+
+    If a previous snapshot built with the same model is available, only
+    inmates changed since it was built are re-read from the database.
+    """
+    started = time.time()
+
+    inmates = _query_inmate_metadata()
+    index_by_id = {inmate["id"]: i for i, inmate in enumerate(inmates)}
+
+    merged = None
+    if (previous is not None and previous.db_version
+            and previous.db_version.get("model_version") == EMBEDDING_MODEL_VERSION):
+        merged = _merge_with_previous(previous, inmates, index_by_id)
+        if merged is None:
+            logger.warning("Snapshot out of sync with database, doing a full rebuild")
+
+    if merged is not None:
+        face, face_owner, peri, peri_owner, num_reused = merged
+    else:
+        face, face_owner, peri, peri_owner = _query_inmate_vectors(index_by_id)
+        num_reused = 0
+
+    version = gallery_store.write_gallery_arrays(
+        gallery_dir, inmates, face, face_owner, peri, peri_owner, db_version=db_version
+    )
+    gallery = gallery_store.open_gallery(gallery_dir, version)
+    logger.info(f"Published gallery {version}: {len(gallery)} inmates "
+                f"({num_reused} reused from snapshot), {gallery.meta['num_face']} face + "
+                f"{gallery.meta['num_periocular']} periocular encodings in {time.time() - started:.2f}s")
+    return gallery
+
+
 def _load_inmate_encodings():
     """
-    Load all inmate face and periocular encodings from database.
-    Supports both legacy single encoding and multi-embeddings.
-    Returns list of (inmate_data, [face_encodings], [periocular_encodings]) tuples.
+    Return a GalleryMatcher over the inmate gallery (None if unavailable).
+
+    The gallery is a memory-mapped snapshot on disk shared by every worker
+    process and stamped with the database version it was built from. Workers
+    remap when another process publishes a new version. Every
+    GALLERY_REFRESH_SECONDS a worker compares the stamp with the database;
+    if it changed, one worker (holding the build lock) publishes a new version
+    re-reading only the inmates changed since the snapshot. With
+    GALLERY_QUANTIZATION set, the matcher keeps a float16/int8 copy for coarse
+    scoring and re-ranks from the mmap; with GALLERY_SHORTLIST set, it scores
+    per-inmate centroids first and only the shortlisted inmates exactly.
     """
-    global _inmate_cache, _cache_timestamp
-    import time
-    import json
+    global _inmate_cache, _matcher, _last_db_check
 
-    # Refresh cache every 30 seconds (reduced for faster updates after new inmates)
-    current_time = time.time()
-    if _inmate_cache is None or _cache_timestamp is None or (current_time - _cache_timestamp) > 30:
+    gallery_dir = current_app.config.get("GALLERY_DIR") or os.path.join(
+        current_app.instance_path, "gallery"
+    )
+    refresh_seconds = current_app.config.get("GALLERY_REFRESH_SECONDS", 30)
+
+    with _gallery_lock:
         try:
-            # Use a fresh query and extract data immediately
-            # Select columns including multi-embeddings and periocular
-            inmates = db.session.query(
-                Inmate.id,
-                Inmate.inmate_id,
-                Inmate.name,
-                Inmate.status,
-                Inmate.mugshot_path,
-                Inmate.risk_level,
-                Inmate.crime,
-                Inmate.face_encoding,
-                Inmate.face_encodings_json,
-                Inmate.periocular_encoding,
-                Inmate.periocular_encodings_json,
-                Inmate.has_glasses_in_mugshot
-            ).filter(
-                db.or_(
-                    Inmate.face_encoding.isnot(None),
-                    Inmate.face_encodings_json.isnot(None)
-                )
-            ).all()
-
-            # Cache as plain data with list of all encodings per inmate
-            new_cache = []
-            total_face_encodings = 0
-            total_periocular_encodings = 0
-
-            for row in inmates:
-                face_encodings = []
-                periocular_encodings = []
-
-                # Add legacy single face encoding if exists
-                if row.face_encoding is not None:
-                    face_encodings.append(np.array(row.face_encoding, dtype=np.float32))
-
-                # Add multi face embeddings if exists
-                if row.face_encodings_json:
-                    try:
-                        multi_enc = json.loads(row.face_encodings_json)
-                        for enc in multi_enc:
-                            if enc is not None:
-                                face_encodings.append(np.array(enc, dtype=np.float32))
-                    except (json.JSONDecodeError, TypeError):
-                        pass
-
-                # Add legacy single periocular encoding if exists
-                if row.periocular_encoding is not None:
-                    periocular_encodings.append(np.array(row.periocular_encoding, dtype=np.float32))
-
-                # Add multi periocular embeddings if exists
-                if row.periocular_encodings_json:
-                    try:
-                        multi_peri = json.loads(row.periocular_encodings_json)
-                        for enc in multi_peri:
-                            if enc is not None:
-                                periocular_encodings.append(np.array(enc, dtype=np.float32))
-                    except (json.JSONDecodeError, TypeError):
-                        pass
-
-                if face_encodings:
-                    inmate_data = {
-                        "id": row.id,
-                        "inmate_id": row.inmate_id,
-                        "name": row.name,
-                        "status": row.status,
-                        "mugshot_path": row.mugshot_path,
-                        "risk_level": row.risk_level,
-                        "crime": row.crime,
-                        "has_glasses_in_mugshot": row.has_glasses_in_mugshot or False,
-                    }
-                    new_cache.append((inmate_data, face_encodings, periocular_encodings))
-                    total_face_encodings += len(face_encodings)
-                    total_periocular_encodings += len(periocular_encodings)
-
-            _inmate_cache = new_cache
-            _cache_timestamp = current_time
-            print(f"[recognition_api] Loaded {len(_inmate_cache)} inmates: {total_face_encodings} face + {total_periocular_encodings} periocular encodings")
+            # Remap if another worker published a newer version
+            version = gallery_store.current_version(gallery_dir)
+            if version and (_inmate_cache is None or _inmate_cache.version != version):
+                gallery = gallery_store.open_gallery(gallery_dir, version)
+                if gallery is not None:
+                    _inmate_cache = gallery
+
+            if _inmate_cache is None or time.time() - _last_db_check > refresh_seconds:
+                db_version = _gallery_db_version()
+                _last_db_check = time.time()
+
+                if _inmate_cache is None or _inmate_cache.db_version != db_version:
+                    if gallery_store.acquire_build_lock(gallery_dir):
+                        try:
+                            # Another worker may have published while we checked
+                            latest = gallery_store.open_gallery(gallery_dir) or _inmate_cache
+                            if latest is not None and latest.db_version == db_version:
+                                _inmate_cache = latest
+                            else:
+                                _inmate_cache = _rebuild_gallery(gallery_dir, db_version, previous=latest)
+                        finally:
+                            gallery_store.release_build_lock(gallery_dir)
+                    elif _inmate_cache is None:
+                        # First start: another worker is building, wait for it to publish
+                        deadline = time.time() + 15
+                        while _inmate_cache is None and time.time() < deadline:
+                            time.sleep(0.2)
+                            _inmate_cache = gallery_store.open_gallery(gallery_dir)
         except Exception as e:
-            print(f"[recognition_api] Error loading cache: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"Error loading gallery: {e}")
+            _gallery_status["error"] = str(e)
+
+        if _inmate_cache is None:
+            return None
 
-    return _inmate_cache
+        if _matcher is None or _matcher.gallery is not _inmate_cache:
+            _matcher = GalleryMatcher(
+                _inmate_cache,
+                quantization=current_app.config.get("GALLERY_QUANTIZATION"),
+                rerank_candidates=current_app.config.get(
+                    "GALLERY_RERANK_CANDIDATES", DEFAULT_RERANK_CANDIDATES
+                ),
+                shortlist=current_app.config.get("GALLERY_SHORTLIST"),
+            )
+            _gallery_status.update({
+                "state": "ready",
+                "version": _inmate_cache.version,
+                "inmates": len(_inmate_cache),
+                "db_version": _inmate_cache.db_version,
+                "error": None,
+            })
+        return _matcher
+
+
+def start_gallery_warmup(app):
+    """
+    Load the gallery snapshot in a background thread so the first recognition
+    request after a restart does not pay for it. Progress is reported by
+    GET /api/recognition/status.
+    """
+    if not app.config.get("GALLERY_WARM_START", True):
+        return
+
+    def _warm():
+        started = time.time()
+        _gallery_status["state"] = "loading"
+        with app.app_context():
+            matcher = _load_inmate_encodings()
+        _gallery_status["warmup_seconds"] = round(time.time() - started, 2)
+        if matcher is None:
+            _gallery_status["state"] = "error" if _gallery_status.get("error") else "empty"
+        logger.info(f"Gallery warm-up finished in {_gallery_status['warmup_seconds']}s "
+                    f"({_gallery_status['state']})")
+
+    threading.Thread(target=_warm, name="gallery-warmup", daemon=True).start()
 
 def _decode_frame_from_request(req) -> np.ndarray:
     """
@@ -363,81 +615,213 @@ def _decode_image_from_file_field(req, field_name='frame') -> np.ndarray:
     return img
 
 
-def _generate_query_augmentations(face_crop):
+def _generate_query_augmentations(face_crop, families=None):
     """
     Generate augmented versions of query image for robust matching.
-    Optimized to prevent memory exhaustion - max ~15 augmentations.
+    Shared intermediates are computed once and independent steps run in
+    parallel (see image_preprocessing.generate_query_augmentations), in a
+    worker process when RECOGNITION_PROCESS_WORKERS is set.
+
+    Args:
+        face_crop: Face image (BGR)
+        families: Augmentation families to generate (see AUGMENTATION_FAMILIES);
+                  None generates all of them
     """
-    augmentations = [face_crop]
-    h, w = face_crop.shape[:2]
-    center = (w // 2, h // 2)
+    return recognition_pool.augment(face_crop, families)
 
-    # CLAHE normalization (used multiple times below)
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
 
-    # === Essential rotations (reduced from 7 to 3) ===
-    for angle in [-15, 15, 180]:
-        M = cv2.getRotationMatrix2D(center, angle, 1.0)
-        rotated = cv2.warpAffine(face_crop, M, (w, h), borderMode=cv2.BORDER_REPLICATE)
-        augmentations.append(rotated)
+def _select_augmentation_families(face_crop):
+    """
+    Pick the augmentation families relevant to the degradations measured in a crop.
+    Rotations are always included since they cannot be measured cheaply.
 
-    # === Grayscale ===
+    Returns:
+        tuple: (families, measurements dict)
+    """
     gray = cv2.cvtColor(face_crop, cv2.COLOR_BGR2GRAY)
-    gray_bgr = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
-    augmentations.append(gray_bgr)
-
-    # === Exposure corrections ===
-    bright = cv2.convertScaleAbs(face_crop, alpha=1.3, beta=30)
-    augmentations.append(bright)
-
-    # === CLAHE normalization ===
-    lab = cv2.cvtColor(face_crop, cv2.COLOR_BGR2LAB)
-    l, a, b = cv2.split(lab)
-    l = clahe.apply(l)
-    lab = cv2.merge([l, a, b])
-    clahe_img = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
-    augmentations.append(clahe_img)
-
-    # === Gaussian noise removal (NL means) ===
-    try:
-        denoised = aggressive_denoise(face_crop)
-        augmentations.append(denoised)
-    except Exception:
-        pass
+    measurements = {
+        "noise": round(float(estimate_noise_level(face_crop)), 2),
+        "blur": round(float(estimate_blur_level(face_crop)), 2),
+        "salt_pepper": round(float(estimate_salt_pepper_level(face_crop)), 4),
+        "brightness": round(float(gray.mean()), 1),
+        "contrast": round(float(gray.std()), 1),
+    }
 
-    # === General deblurring ===
+    families = ["geometry"]
+    if not (60 <= measurements["brightness"] <= 190) or measurements["contrast"] < 25:
+        families.append("tone")
+    noisy = measurements["noise"] > NOISE_FAMILY_THRESHOLD
+    blurry = measurements["blur"] < BLUR_FAMILY_THRESHOLD
+    if measurements["salt_pepper"] > SALT_PEPPER_FAMILY_THRESHOLD:
+        families.append("salt_pepper")
+    elif noisy:
+        families.append("noise")
+    if blurry:
+        families.append("blur")
+    if noisy and blurry:
+        families.append("noise_blur")
+    return families, measurements
+
+
+def _request_camera_id():
+    """Camera id sent with the current request (form field 'camera_id'), or None."""
     try:
-        sharpened = strong_deblur(face_crop)
-        augmentations.append(sharpened)
-    except Exception:
-        pass
+        camera_id = request.form.get('camera_id')
+        return int(camera_id) if camera_id else None
+    except Exception as e:
+        logger.warning(f"Invalid camera_id: {e}")
+        return None
 
-    # === Salt & pepper noise removal (median filter) ===
-    try:
-        sp_denoised = remove_salt_pepper_noise(face_crop, kernel_size=5)
-        augmentations.append(sp_denoised)
-    except Exception:
-        pass
 
-    # === Motion blur handling (horizontal) ===
+def _detection_location(camera_id):
+    """
+    Location of a detection by the given camera.
+
+    Returns:
+        tuple: (latitude, longitude); (None, None) if unknown
+    """
     try:
-        motion_h = deblur_motion_horizontal(face_crop, kernel_size=11)
-        augmentations.append(motion_h)
-    except Exception:
-        pass
+        return get_detection_location(camera_id)
+    except Exception as e:
+        logger.warning(f"Error getting location: {e}")
+        return None, None
 
-    # === Combined: denoised + sharpened (for combined distortions) ===
+
+def _geo_tier(inmate_encodings, detection_lat, detection_lng):
+    """
+    Escaped inmates who could have reached the detecting camera, nearest first.
+    Empty when GEO_TIER_ENABLED is off or the camera location is unknown.
+    """
+    config = current_app.config
+    if not config.get("GEO_TIER_ENABLED"):
+        return []
+    indices, distances_km = inmate_encodings.geo_candidates(
+        detection_lat, detection_lng,
+        base_radius_km=config.get("GEO_TIER_BASE_RADIUS_KM", DEFAULT_GEO_BASE_RADIUS_KM),
+        speed_kmh=config.get("GEO_TIER_SPEED_KMH", DEFAULT_GEO_SPEED_KMH),
+        max_radius_km=config.get("GEO_TIER_MAX_RADIUS_KM", DEFAULT_GEO_MAX_RADIUS_KM),
+    )
+    if len(indices):
+        nearest = [(inmate_encodings.inmates[i]["inmate_id"], round(float(d), 1))
+                   for i, d in zip(indices[:5], distances_km[:5])]
+        logger.debug(f"Geo tier: {len(indices)} escaped inmates in range, nearest {nearest}")
+    return indices
+
+
+def _handle_confirmed_match(best_match, confidence, camera_id=None):
+    """
+    Raise the alert for a confident match: deduplicate, queue the Match,
+    Alert and ActiveRecognition records (app/services/alert_manager.py) and
+    emit the Socket.IO events (including the escaped-inmate alarm).
+
+    Args:
+        best_match: Inmate metadata dict from the gallery
+        confidence: Match confidence percentage
+        camera_id: Camera that detected the inmate
+
+    Returns:
+        dict: Recognition response for the match
+    """
+    # best_match is already a dictionary from the cache
+    inmate_payload = {
+        "id": best_match["id"],
+        "inmate_id": best_match["inmate_id"],
+        "name": best_match["name"],
+        "status": best_match["status"],
+        "mugshot_path": best_match["mugshot_path"],
+        "risk_level": best_match["risk_level"],
+        "crime": best_match["crime"],
+        "confidence": confidence,
+    }
+
+    # Check if inmate is ESCAPED - trigger critical alarm
+    is_escaped = str(inmate_payload.get("status", "")).lower() == "escaped"
+    alert_manager.record_match(best_match["id"])
+
+    # Get detection location early for deduplication
+    detection_lat, detection_lng = _detection_location(camera_id)
+
+    # DEDUPLICATION CHECK - prevent multiple alerts for same inmate
+    should_create, existing_active = should_create_alert(
+        inmate_id=best_match["id"],
+        camera_id=camera_id,
+        detection_lat=detection_lat,
+        detection_lng=detection_lng
+    )
+
+    if not should_create:
+        # Detection logged but no new alert needed
+        logger.info(f"Skipping duplicate alert for {inmate_payload['name']}")
+        return {
+            "status": "escaped_inmate_detected" if is_escaped else "match_found",
+            "inmate": inmate_payload,
+            "is_escaped": is_escaped,
+            "deduplicated": True,
+            "message": "Detection logged. Alert already active for this inmate at this location.",
+            "existing_alert_id": existing_active.alert_id if existing_active else None,
+            "status_code": 200
+        }
+
+    # Queue the Alert (with confidence score for tracking) and the
+    # ActiveRecognition for future deduplication; escaped-inmate alarms are
+    # written right away so the alarm carries the alert id
+    alert_id = None
     try:
-        combined = aggressive_denoise(face_crop)
-        combined = strong_deblur(combined)
-        augmentations.append(combined)
-    except Exception:
-        pass
+        alert_level = "danger" if is_escaped else "warning"
+        alert_message = (
+            f"ESCAPED INMATE DETECTED: {inmate_payload['name']} ({confidence}% confidence)"
+            if is_escaped
+            else f"Match found: {inmate_payload['name']} ({confidence}% confidence)"
+        )
 
-    return augmentations
+        alert = Alert(
+            message=alert_message,
+            level=alert_level,
+            confidence=confidence,
+            inmate_id=best_match["id"],
+            camera_id=camera_id,
+            resolved=False,
+            timestamp=datetime.utcnow()
+        )
+        active = create_active_recognition(
+            inmate_id=best_match["id"],
+            camera_id=camera_id,
+            detection_lat=detection_lat,
+            detection_lng=detection_lng
+        )
+        pending = alert_manager.queue_alert(alert, active)
+        dedup_index.record_sighting(pending)
+        if is_escaped:
+            alert_manager.flush()
+            alert_id = pending.alert_id
+        logger.info(f"Alert queued with confidence {confidence}% - Escaped: {is_escaped}")
+    except Exception as e:
+        logger.error(f"Failed to create alert: {e}")
+        alert_id = None
+
+    # Real-time event for dashboards (sent by the notification dispatcher)
+    notification_dispatcher.notify('match_found', {
+        'inmate_name': inmate_payload["name"],
+        'inmate_id': inmate_payload["id"],
+        'confidence': inmate_payload["confidence"],
+        'is_escaped': is_escaped
+    })
+
+    # ESCAPED INMATE ALARM - critical alert to all connected clients and to
+    # the facilities near the detection, fanned out off the request thread
+    if is_escaped:
+        notification_dispatcher.notify_escaped_alarm(inmate_payload, alert_id, detection_lat, detection_lng, radius_km=50)
+        logger.warning(f"ESCAPED INMATE ALARM triggered for {inmate_payload['name']}")
 
+    return {
+        "status": "escaped_inmate_detected" if is_escaped else "match_found",
+        "inmate": inmate_payload,
+        "is_escaped": is_escaped,
+        "status_code": 200
+    }
 
-def _run_recognition(frame, use_detection=True) -> dict:
+
+def _run_recognition(frame, use_detection=True, camera_id=None) -> dict:
     """
     Run the recognition pipeline on a frame using similarity matching.
     Uses query-time augmentation for robust matching with distorted images.
@@ -447,6 +831,7 @@ def _run_recognition(frame, use_detection=True) -> dict:
     Args:
         frame: BGR image
         use_detection: If True (live camera), detect face first. If False (upload), just resize.
+        camera_id: Camera that captured the frame (for location, dedup and the geo tier)
     """
     if frame is None:
         return {"error": "No valid image provided", "status_code": 400}
@@ -463,29 +848,21 @@ def _run_recognition(frame, use_detection=True) -> dict:
                 "status_code": 200
             }
 
-        # Generate query augmentations for robust matching
-        query_augmentations = _generate_query_augmentations(face_crop)
-        log(f"[recognition_api] Generated {len(query_augmentations)} query augmentations")
-
-        # Extract face embeddings for all augmentations
-        query_embeddings = []
-        for aug_img in query_augmentations:
-            emb = extract_embedding_from_frame(aug_img)
-            if emb is not None:
-                query_embeddings.append(np.array(emb, dtype=np.float32))
+        # Load cached inmate encodings (now includes periocular)
+        inmate_encodings = _load_inmate_encodings()
 
-        if not query_embeddings:
-            return {"error": "Embedding service unavailable. Is it running on port 5001?", "status_code": 503}
+        if not inmate_encodings:
+            return {"error": "No inmate face encodings in database", "status_code": 500}
 
-        input_features = query_embeddings[0]  # Keep first for compatibility
-        log(f"[recognition_api] Got {len(query_embeddings)} query face embeddings (FaceNet 512-dim)")
+        logger.debug(f"Comparing against {len(inmate_encodings)} cached inmates")
 
         # === PERIOCULAR FUSION: Extract periocular embedding and detect glasses ===
         query_periocular_emb = None
         glasses_detected = False
         glasses_confidence = 0.0
 
-        if ENABLE_PERIOCULAR_FUSION:
+        # No point in the extra embedding call if nobody has periocular enrolment
+        if ENABLE_PERIOCULAR_FUSION and inmate_encodings.has_periocular:
             try:
                 # Try to get periocular embedding from the original frame (not face crop)
                 peri_result = extract_periocular_embedding(frame)
@@ -493,84 +870,103 @@ def _run_recognition(frame, use_detection=True) -> dict:
                     query_periocular_emb = np.array(peri_result['embedding'], dtype=np.float32)
                     glasses_detected = peri_result.get('glasses_detected', False)
                     glasses_confidence = peri_result.get('glasses_confidence', 0.0)
-                    log(f"[recognition_api] Periocular embedding extracted. Glasses: {glasses_detected} ({glasses_confidence:.2f})")
+                    logger.debug(f"Periocular embedding extracted. Glasses: {glasses_detected} ({glasses_confidence:.2f})")
                 else:
-                    log("[recognition_api] Periocular extraction failed, using face-only matching")
+                    logger.warning("Periocular extraction failed, using face-only matching")
             except Exception as e:
-                log(f"[recognition_api] Periocular extraction error: {e}")
+                logger.warning(f"Periocular extraction error: {e}")
                 # Continue with face-only matching
 
-        # Load cached inmate encodings (now includes periocular)
-        inmate_encodings = _load_inmate_encodings()
+        # Escaped inmates near the camera, then the Escaped partitions, are searched
+        # first; raise their alarm as soon as a tier yields a confident match
+        early_matches = {}
+        detection_lat, detection_lng = _detection_location(camera_id)
+        geo_tier = _geo_tier(inmate_encodings, detection_lat, detection_lng)
+
+        def _on_partition(partition, best_index, best_distance):
+            if str(partition["status"] or "").lower() == "escaped" and best_distance < EARLY_ALARM_DISTANCE:
+                inmate = inmate_encodings.inmates[best_index]
+                if inmate["id"] in early_matches:
+                    return
+                logger.info(f"Early escaped match: {inmate['inmate_id']} (distance {best_distance:.4f})")
+                early_matches[inmate["id"]] = _handle_confirmed_match(
+                    inmate, float(round((1 - best_distance) * 100, 1)), camera_id
+                )
 
-        if not inmate_encodings:
-            return {"error": "No inmate face encodings in database", "status_code": 500}
+        # Query augmentation stages: the original crop, then the families its
+        # measured degradations call for, then everything else
+        if ADAPTIVE_AUGMENTATION:
+            selected, measurements = _select_augmentation_families(face_crop)
+            remaining = [f for f in AUGMENTATION_FAMILIES if f != "original" and f not in selected]
+            stages = [["original"], selected, remaining]
+            logger.debug(f"Crop measurements {measurements} -> families {selected}")
+        else:
+            stages = [list(AUGMENTATION_FAMILIES)]
 
-        log(f"[recognition_api] Comparing against {len(inmate_encodings)} cached inmates")
+        # Score every inmate (cosine distance with optional periocular fusion)
+        use_periocular = ENABLE_PERIOCULAR_FUSION and query_periocular_emb is not None
+        query_embeddings = []
+        scores = None
+        for stage, families in enumerate(stages):
+            if not families:
+                continue
+            query_augmentations = _generate_query_augmentations(face_crop, families)
+            for aug_img in query_augmentations:
+                emb = extract_embedding_from_frame(aug_img)
+                if emb is not None:
+                    query_embeddings.append(np.array(emb, dtype=np.float32))
+            if not query_embeddings:
+                continue
+
+            scores = recognition_pool.score(
+                inmate_encodings,
+                query_embeddings,
+                periocular_query=query_periocular_emb if use_periocular else None,
+                glasses_detected=glasses_detected,
+                glasses_confidence=glasses_confidence,
+                glasses_boost=True,
+                on_partition=_on_partition,
+                priority=geo_tier,
+                stop_distance=EARLY_ALARM_DISTANCE
+            )
+            stage_best = float(np.min(scores.distances)) if len(scores.distances) else float('inf')
+            logger.debug("Augmentation stage %d: %d images %s, %d embeddings, best distance %.4f",
+                         stage, len(query_augmentations), families, len(query_embeddings), stage_best)
+            if stage_best < ADAPTIVE_ACCEPT_DISTANCE:
+                break
+            if stage == 0 and stage_best > ADAPTIVE_REJECT_DISTANCE:
+                break
+
+        if not query_embeddings:
+            return {"error": "Embedding service unavailable. Is it running on port 5001?", "status_code": 503}
+
+        input_features = query_embeddings[0]  # Keep first for compatibility
+        logger.debug(f"Got {len(query_embeddings)} query face embeddings (FaceNet 512-dim)")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Partition timings: %s", [(p['tier'], p['status'], p['risk_level'], p['inmates'], p['ms']) for p in scores.partitions])
+        if scores.stopped_early:
+            logger.info("Confident geo-tier match, skipped the global search")
+        top_3_matches = []
+        for i in scores.ranked(limit=3):
+            if not np.isfinite(scores.distances[i]):
+                break  # Outside the centroid shortlist
+            inmate = inmate_encodings.inmates[i]
+            if scores.fused[i]:
+                logger.debug("%s: face=%.4f, peri=%.4f, fused=%.4f", inmate['inmate_id'], scores.face[i], scores.periocular[i], scores.distances[i])
+            top_3_matches.append((inmate['inmate_id'], float(scores.distances[i]), scores.method(i)))
 
-        # Find best match using cosine distance with optional periocular fusion
         best_match = None
         best_distance = float('inf')
         best_match_method = 'face_only'
-        top_3_matches = []
-
-        for inmate, face_encodings_list, periocular_encodings_list in inmate_encodings:
-            try:
-                # Compare ALL query embeddings against ALL inmate face embeddings
-                min_face_dist = float('inf')
-                for query_emb in query_embeddings:
-                    for encoding in face_encodings_list:
-                        dist = cosine(query_emb, encoding)
-                        if dist < min_face_dist:
-                            min_face_dist = dist
-
-                # === PERIOCULAR FUSION ===
-                # If we have periocular embeddings for both query and inmate, use fusion
-                final_distance = min_face_dist
-                match_method = 'face_only'
-
-                if (ENABLE_PERIOCULAR_FUSION and
-                    query_periocular_emb is not None and
-                    periocular_encodings_list):
-
-                    # Find best periocular match
-                    min_peri_dist = float('inf')
-                    for peri_enc in periocular_encodings_list:
-                        peri_dist = cosine(query_periocular_emb, peri_enc)
-                        if peri_dist < min_peri_dist:
-                            min_peri_dist = peri_dist
-
-                    # Compute fusion score with adaptive weighting
-                    fused_dist, face_weight = compute_fusion_score(
-                        min_face_dist,
-                        min_peri_dist,
-                        glasses_detected,
-                        glasses_confidence
-                    )
-                    final_distance = fused_dist
-                    match_method = f'fusion(face:{face_weight:.2f})'
-                    log(f"[recognition_api] {inmate['inmate_id']}: face={min_face_dist:.4f}, peri={min_peri_dist:.4f}, fused={fused_dist:.4f}")
-
-                elif ENABLE_PERIOCULAR_FUSION and glasses_detected and query_periocular_emb is not None:
-                    # Glasses detected but inmate has no periocular encodings
-                    # Boost face distance slightly since glasses may interfere
-                    final_distance = min_face_dist * 0.95  # Slight forgiveness
-                    match_method = 'face_only(glasses_boost)'
-
-                top_3_matches.append((inmate['inmate_id'], final_distance, len(face_encodings_list), match_method))
-
-                if final_distance < best_distance:
-                    best_distance = final_distance
-                    best_match = inmate
-                    best_match_method = match_method
-            except Exception as e:
-                print(f"[recognition_api] Error comparing with {inmate['inmate_id']}: {e}")
-                continue
+        if len(scores.distances):
+            best_index = int(scores.ranked(limit=1)[0])
+            best_match = inmate_encodings.inmates[best_index]
+            best_distance = float(scores.distances[best_index])
+            best_match_method = scores.method(best_index)
 
-        # Sort and show top 3 matches for debugging
-        top_3_matches.sort(key=lambda x: x[1])
-        log(f"[recognition_api] Top 3 matches: {[(m[0], f'{m[1]:.4f}', m[3]) for m in top_3_matches[:3]]}")
-        log(f"[recognition_api] Best match: {best_match['inmate_id'] if best_match else 'None'}, distance: {best_distance:.4f}, method: {best_match_method}, threshold: {SIMILARITY_THRESHOLD}")
+        # Show top 3 matches for debugging
+        logger.debug("Top 3 matches: %s", top_3_matches)
+        logger.info(f"Best match: {best_match['inmate_id'] if best_match else 'None'}, distance: {best_distance:.4f}, method: {best_match_method}, threshold: {SIMILARITY_THRESHOLD}")
 
         # Check if match is above threshold
         if best_match and best_distance < SIMILARITY_THRESHOLD:
@@ -578,144 +974,19 @@ def _run_recognition(frame, use_detection=True) -> dict:
 
             # Only show match if confidence is high enough
             if confidence >= MIN_CONFIDENCE:
-                # best_match is already a dictionary from the cache
-                inmate_payload = {
-                    "id": best_match["id"],
-                    "inmate_id": best_match["inmate_id"],
-                    "name": best_match["name"],
-                    "status": best_match["status"],
-                    "mugshot_path": best_match["mugshot_path"],
-                    "risk_level": best_match["risk_level"],
-                    "crime": best_match["crime"],
-                    "confidence": confidence,
-                }
-
-                # Check if inmate is ESCAPED - trigger critical alarm
-                is_escaped = str(inmate_payload.get("status", "")).lower() == "escaped"
-
-                # Get camera_id and detection location early for deduplication
-                camera_id = None
-                detection_lat, detection_lng = None, None
-                try:
-                    camera_id = request.form.get('camera_id') if hasattr(request, 'form') else None
-                    if camera_id:
-                        camera_id = int(camera_id)
-                    detection_lat, detection_lng = get_detection_location(camera_id)
-                except Exception as e:
-                    log(f"[recognition_api] Error getting location: {e}")
-
-                # DEDUPLICATION CHECK - prevent multiple alerts for same inmate
-                should_create, existing_active = should_create_alert(
-                    inmate_id=best_match["id"],
-                    camera_id=camera_id,
-                    detection_lat=detection_lat,
-                    detection_lng=detection_lng
-                )
-
-                if not should_create:
-                    # Detection logged but no new alert needed
-                    log(f"[recognition_api] Skipping duplicate alert for {inmate_payload['name']}")
-                    return {
-                        "status": "escaped_inmate_detected" if is_escaped else "match_found",
-                        "inmate": inmate_payload,
-                        "is_escaped": is_escaped,
-                        "deduplicated": True,
-                        "message": "Detection logged. Alert already active for this inmate at this location.",
-                        "existing_alert_id": existing_active.alert_id if existing_active else None,
-                        "status_code": 200
-                    }
-
-                # Create Alert record with confidence score for tracking
-                alert_id = None
-                try:
-                    alert_level = "danger" if is_escaped else "warning"
-                    alert_message = (
-                        f"ESCAPED INMATE DETECTED: {inmate_payload['name']} ({confidence}% confidence)"
-                        if is_escaped
-                        else f"Match found: {inmate_payload['name']} ({confidence}% confidence)"
-                    )
-
-                    alert = Alert(
-                        message=alert_message,
-                        level=alert_level,
-                        confidence=confidence,
-                        inmate_id=best_match["id"],
-                        camera_id=camera_id,
-                        resolved=False
-                    )
-                    db.session.add(alert)
-                    db.session.commit()
-                    alert_id = alert.id
-                    print(f"[recognition_api] Alert created with confidence {confidence}% - Escaped: {is_escaped}")
-
-                    # Create ActiveRecognition record for future deduplication
-                    create_active_recognition(
-                        inmate_id=best_match["id"],
-                        camera_id=camera_id,
-                        detection_lat=detection_lat,
-                        detection_lng=detection_lng,
-                        alert_id=alert_id
-                    )
-                except Exception as e:
-                    print(f"[recognition_api] Failed to create alert: {e}")
-                    db.session.rollback()
-                    alert_id = None
-
-                # Real-time event for dashboards
-                try:
-                    socketio.emit('match_found', {
-                        'inmate_name': inmate_payload["name"],
-                        'inmate_id': inmate_payload["id"],
-                        'confidence': inmate_payload["confidence"],
-                        'is_escaped': is_escaped
-                    })
-                except Exception as e:
-                    print("[recognition_api] Socket emit failed:", e)
-
-                # ESCAPED INMATE ALARM - send critical alert to all connected clients
-                if is_escaped:
-                    try:
-
-                        # Emit escaped inmate alarm to ALL connected clients
-                        socketio.emit('escaped_inmate_alarm', {
-                            'inmate': inmate_payload,
-                            'alert_id': alert_id,
-                            'detection_location': {
-                                'lat': detection_lat,
-                                'lng': detection_lng
-                            } if detection_lat and detection_lng else None,
-                            'timestamp': datetime.utcnow().isoformat(),
-                            'requires_acknowledgment': True
-                        })
-                        print(f"[recognition_api] ESCAPED INMATE ALARM triggered for {inmate_payload['name']}")
-
-                        # Find and notify nearby facilities if location is known
-                        if detection_lat and detection_lng:
-                            nearby = find_nearby_facilities(detection_lat, detection_lng, radius_km=50)
-                            for facility in nearby:
-                                # Emit to specific user room (using user_id from dictionary)
-                                socketio.emit('escaped_inmate_alarm', {
-                                    'inmate': inmate_payload,
-                                    'alert_id': alert_id,
-                                    'distance_km': facility['distance_km'],
-                                    'timestamp': datetime.utcnow().isoformat()
-                                }, room=f"user_{facility['user_id']}")
-                            print(f"[recognition_api] Notified {len(nearby)} nearby facilities")
-                    except Exception as e:
-                        print(f"[recognition_api] Failed to emit escaped alarm: {e}")
-
-                return {
-                    "status": "escaped_inmate_detected" if is_escaped else "match_found",
-                    "inmate": inmate_payload,
-                    "is_escaped": is_escaped,
-                    "status_code": 200
-                }
+                if best_match["id"] in early_matches:
+                    result = early_matches[best_match["id"]]  # Alarm already raised
+                else:
+                    result = _handle_confirmed_match(best_match, confidence, camera_id)
+                result["search_partitions"] = scores.partitions
+                return result
             else:
                 # Low confidence match - not reliable enough to show
                 return {
                     "status": "low_confidence",
                     "message": f"Possible match ({confidence}% confidence) but below {MIN_CONFIDENCE}% threshold",
                     "confidence": confidence,
+                    "search_partitions": scores.partitions,
                     "status_code": 200
                 }
 
@@ -731,13 +1002,12 @@ def _run_recognition(frame, use_detection=True) -> dict:
             ] if top_3_matches else [],
             "input_feature_dim": len(input_features) if input_features is not None else 0,
             "debug_message": f"Best distance {best_distance:.4f} >= threshold {SIMILARITY_THRESHOLD}. Need distance < {SIMILARITY_THRESHOLD} for match.",
+            "search_partitions": scores.partitions,
             "status_code": 200
         }
 
     except Exception as e:
-        print("[recognition_api] ERROR during recognition:", e)
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Error during recognition: {e}")
         return {"error": str(e), "status_code": 500}
 
 
@@ -749,7 +1019,7 @@ def _match_single_face(face_crop, inmate_encodings, original_frame=None):
 
     Args:
         face_crop: Cropped face image (128x128)
-        inmate_encodings: List of (inmate_data, face_encodings, periocular_encodings) tuples
+        inmate_encodings: GalleryMatcher from _load_inmate_encodings()
         original_frame: Original full frame for periocular extraction (optional)
     """
     try:
@@ -771,7 +1041,7 @@ def _match_single_face(face_crop, inmate_encodings, original_frame=None):
         glasses_detected = False
         glasses_confidence = 0.0
 
-        if ENABLE_PERIOCULAR_FUSION:
+        if ENABLE_PERIOCULAR_FUSION and inmate_encodings.has_periocular:
             try:
                 # Use face_crop for periocular (or original_frame if provided)
                 img_for_periocular = original_frame if original_frame is not None else face_crop
@@ -784,43 +1054,19 @@ def _match_single_face(face_crop, inmate_encodings, original_frame=None):
                 pass
 
         # Find best match using cosine distance with optional periocular fusion
+        scores = recognition_pool.score(
+            inmate_encodings,
+            query_embeddings,
+            periocular_query=query_periocular_emb,
+            glasses_detected=glasses_detected,
+            glasses_confidence=glasses_confidence
+        )
         best_match = None
         best_distance = float('inf')
-        best_match_method = 'face_only'
-
-        for inmate, face_encodings_list, periocular_encodings_list in inmate_encodings:
-            try:
-                # Compare query embeddings against inmate face embeddings
-                min_face_dist = float('inf')
-                for query_emb in query_embeddings:
-                    for encoding in face_encodings_list:
-                        dist = cosine(query_emb, encoding)
-                        if dist < min_face_dist:
-                            min_face_dist = dist
-
-                # Apply periocular fusion if available
-                final_distance = min_face_dist
-
-                if (ENABLE_PERIOCULAR_FUSION and
-                    query_periocular_emb is not None and
-                    periocular_encodings_list):
-
-                    min_peri_dist = float('inf')
-                    for peri_enc in periocular_encodings_list:
-                        peri_dist = cosine(query_periocular_emb, peri_enc)
-                        if peri_dist < min_peri_dist:
-                            min_peri_dist = peri_dist
-
-                    fused_dist, _ = compute_fusion_score(
-                        min_face_dist, min_peri_dist, glasses_detected, glasses_confidence
-                    )
-                    final_distance = fused_dist
-
-                if final_distance < best_distance:
-                    best_distance = final_distance
-                    best_match = inmate
-            except Exception:
-                continue
+        if len(scores.distances):
+            best_index = int(scores.ranked(limit=1)[0])
+            best_match = inmate_encodings.inmates[best_index]
+            best_distance = float(scores.distances[best_index])
 
         # Check if match is above threshold
         if best_match and best_distance < SIMILARITY_THRESHOLD:
@@ -842,77 +1088,56 @@ def _match_single_face(face_crop, inmate_encodings, original_frame=None):
         return None
 
     except Exception as e:
-        log(f"[multi-face] Error matching face: {e}")
+        multi_face_logger.warning(f"Error matching face: {e}")
         return None
 
 
-def _match_face_with_precomputed_embeddings(face_embedding, periocular_embedding, glasses_detected, glasses_confidence, inmate_encodings):
+def _match_faces_with_precomputed_embeddings(faces, inmate_encodings):
     """
-    Match a face against the inmate database using pre-computed embeddings.
+    Match every face of a frame against the inmate database in one batch.
     Supports periocular fusion for better accuracy with glasses/occlusion.
 
+    All faces are scored against the gallery as one (faces x gallery) product.
+    With MULTI_FACE_ASSIGNMENT set, an inmate can be claimed by only one face
+    per frame; a face that loses its best inmate falls back to its next
+    candidate among the top MULTI_FACE_TOP_K.
+
     Args:
-        face_embedding: 512-dim face embedding (list or None)
-        periocular_embedding: 512-dim periocular embedding (list or None)
-        glasses_detected: Whether glasses were detected
-        glasses_confidence: Confidence of glasses detection
-        inmate_encodings: List of (inmate_data, face_encodings, periocular_encodings) tuples
+        faces: Face dicts from /detect_all_faces (face_embedding, periocular_embedding,
+               glasses_detected, glasses_confidence)
+        inmate_encodings: GalleryMatcher from _load_inmate_encodings()
 
     Returns:
-        Match result dict or None
+        list: Match result dict or None for every face
     """
-    if face_embedding is None:
-        return None
-
-    query_face_emb = np.array(face_embedding, dtype=np.float32)
-    query_peri_emb = np.array(periocular_embedding, dtype=np.float32) if periocular_embedding else None
-
-    best_match = None
-    best_distance = float('inf')
-    match_method = 'face_only'
-
-    for inmate, face_encodings_list, periocular_encodings_list in inmate_encodings:
-        try:
-            # Find minimum face distance
-            min_face_dist = float('inf')
-            for encoding in face_encodings_list:
-                dist = cosine(query_face_emb, encoding)
-                if dist < min_face_dist:
-                    min_face_dist = dist
-
-            # Apply periocular fusion if available
-            final_distance = min_face_dist
-            current_method = 'face_only'
-
-            if (ENABLE_PERIOCULAR_FUSION and
-                query_peri_emb is not None and
-                periocular_encodings_list):
-
-                min_peri_dist = float('inf')
-                for peri_enc in periocular_encodings_list:
-                    peri_dist = cosine(query_peri_emb, peri_enc)
-                    if peri_dist < min_peri_dist:
-                        min_peri_dist = peri_dist
-
-                fused_dist, _ = compute_fusion_score(
-                    min_face_dist, min_peri_dist, glasses_detected, glasses_confidence
-                )
-                final_distance = fused_dist
-                current_method = 'fusion'
-
-            if final_distance < best_distance:
-                best_distance = final_distance
-                best_match = inmate
-                match_method = current_method
-
-        except Exception:
+    results = [None] * len(faces)
+    with_embedding = [i for i, face in enumerate(faces) if face.get('face_embedding') is not None]
+    if not with_embedding:
+        return results
+
+    batch = [faces[i] for i in with_embedding]
+    scores = recognition_pool.score_batch(
+        inmate_encodings,
+        np.array([face['face_embedding'] for face in batch], dtype=np.float32),
+        periocular_queries=[
+            face['periocular_embedding']
+            if ENABLE_PERIOCULAR_FUSION and face.get('periocular_embedding') else None
+            for face in batch
+        ],
+        glasses_detected=[face.get('glasses_detected', False) for face in batch],
+        glasses_confidence=[face.get('glasses_confidence', 0.0) for face in batch]
+    )
+    assignment = assign_faces(scores, SIMILARITY_THRESHOLD, method=MULTI_FACE_ASSIGNMENT,
+                              top_k=MULTI_FACE_TOP_K)
+
+    for face_scores, face, best_index, result_index in zip(scores, batch, assignment, with_embedding):
+        if best_index is None:
             continue
-
-    # Check if match is above threshold
-    if best_match and best_distance < SIMILARITY_THRESHOLD:
+        best_match = inmate_encodings.inmates[best_index]
+        best_distance = float(face_scores.distances[best_index])
         confidence = float(round((1 - best_distance) * 100, 1))
         if confidence >= MIN_CONFIDENCE:
-            return {
+            results[result_index] = {
                 "id": best_match["id"],
                 "inmate_id": best_match["inmate_id"],
                 "name": best_match["name"],
@@ -922,11 +1147,48 @@ def _match_face_with_precomputed_embeddings(face_embedding, periocular_embedding
                 "crime": best_match["crime"],
                 "confidence": confidence,
                 "distance": float(round(best_distance, 4)),
-                "glasses_detected": glasses_detected,
-                "match_method": match_method
+                "glasses_detected": face.get('glasses_detected', False),
+                "match_method": 'fusion' if face_scores.fused[best_index] else 'face_only'
             }
 
-    return None
+    return results
+
+
+def _alarm_escaped_inmates(escaped_inmates, matches, detection_method):
+    """
+    Record the Match rows of a multi-face frame, write the alerts for its
+    escaped inmates in one transaction and emit their alarms.
+    """
+    for match in matches:
+        alert_manager.record_match(match["id"])
+
+    queued = []
+    for escaped in escaped_inmates:
+        alert = Alert(
+            message=f"ESCAPED INMATE DETECTED: {escaped['name']} ({escaped['confidence']}% confidence)",
+            level="danger",
+            confidence=escaped['confidence'],
+            inmate_id=escaped["id"],
+            resolved=False,
+            timestamp=datetime.utcnow()
+        )
+        queued.append((escaped, alert_manager.queue_alert(alert)))
+    if not queued:
+        return
+
+    try:
+        alert_manager.flush()
+    except Exception as e:
+        multi_face_logger.error(f"Failed to create alerts: {e}")
+
+    for escaped, pending in queued:
+        notification_dispatcher.notify('escaped_inmate_alarm', {
+            'inmate': escaped,
+            'alert_id': pending.alert_id,
+            'timestamp': datetime.utcnow().isoformat(),
+            'multi_face_detection': True,
+            'detection_method': detection_method
+        })
 
 
 def _run_multi_recognition(frame) -> dict:
@@ -943,31 +1205,31 @@ def _run_multi_recognition(frame) -> dict:
 
     try:
         # Use MTCNN multi-face detection via embedding service
-        log("[multi-face] Calling MTCNN multi-face detection...")
+        multi_face_logger.debug("Calling MTCNN multi-face detection...")
         detection_result = detect_all_faces(frame)
 
         if detection_result is None:
-            log("[multi-face] Embedding service unavailable, falling back to Haar Cascade")
+            multi_face_logger.warning("Embedding service unavailable, falling back to Haar Cascade")
             # Fallback to old Haar Cascade method
             face_data = _detect_all_faces(frame)
             if not face_data:
-                log("[multi-face] No faces detected, falling back to single-face mode")
+                multi_face_logger.info("No faces detected, falling back to single-face mode")
                 return _run_recognition(frame, use_detection=False)
             # Process with old method (will use _match_single_face)
             return _run_multi_recognition_legacy(frame, face_data)
 
         if not detection_result.get('success', False):
-            log(f"[multi-face] Detection failed: {detection_result.get('error', 'Unknown error')}")
+            multi_face_logger.warning(f"Detection failed: {detection_result.get('error', 'Unknown error')}")
             return _run_recognition(frame, use_detection=False)
 
         faces = detection_result.get('faces', [])
         total_detected = detection_result.get('total_faces', 0)
 
         if total_detected == 0:
-            log("[multi-face] MTCNN detected no faces, falling back to single-face mode")
+            multi_face_logger.info("MTCNN detected no faces, falling back to single-face mode")
             return _run_recognition(frame, use_detection=False)
 
-        log(f"[multi-face] MTCNN detected {total_detected} faces with embeddings")
+        multi_face_logger.info(f"MTCNN detected {total_detected} faces with embeddings")
 
         # Load cached inmate encodings
         inmate_encodings = _load_inmate_encodings()
@@ -975,21 +1237,22 @@ def _run_multi_recognition(frame) -> dict:
         if not inmate_encodings:
             return {"error": "No inmate face encodings in database", "status_code": 500}
 
+        # Match all faces in one batch (pre-computed embeddings with periocular fusion)
+        face_matches = _match_faces_with_precomputed_embeddings(faces, inmate_encodings)
+
         # Process each detected face
         matches = []
         unmatched_faces = []
         escaped_inmates = []
 
-        for face_data in faces:
+        for face_data, match in zip(faces, face_matches):
             face_idx = face_data.get('face_index', 0)
             bbox = face_data.get('bbox', {})
-            face_embedding = face_data.get('face_embedding')
             periocular_embedding = face_data.get('periocular_embedding')
             glasses_detected = face_data.get('glasses_detected', False)
-            glasses_confidence = face_data.get('glasses_confidence', 0.0)
             detection_confidence = face_data.get('confidence', 0.0)
 
-            log(f"[multi-face] Processing face {face_idx}: bbox={bbox}, glasses={glasses_detected}, periocular={'yes' if periocular_embedding else 'no'}")
+            multi_face_logger.debug("Processing face %d: bbox=%s, glasses=%s, periocular=%s", face_idx, bbox, glasses_detected, 'yes' if periocular_embedding else 'no')
 
             face_info = {
                 "face_index": face_idx,
@@ -997,15 +1260,6 @@ def _run_multi_recognition(frame) -> dict:
                 "detection_confidence": detection_confidence
             }
 
-            # Match using pre-computed embeddings with periocular fusion
-            match = _match_face_with_precomputed_embeddings(
-                face_embedding,
-                periocular_embedding,
-                glasses_detected,
-                glasses_confidence,
-                inmate_encodings
-            )
-
             if match:
                 match["face_info"] = face_info
                 matches.append(match)
@@ -1013,12 +1267,12 @@ def _run_multi_recognition(frame) -> dict:
                 # Track escaped inmates
                 if str(match.get("status", "")).lower() == "escaped":
                     escaped_inmates.append(match)
-                    log(f"[multi-face] Face {face_idx}: ESCAPED INMATE - {match['name']} ({match['confidence']}%) [{match.get('match_method', 'unknown')}]")
+                    multi_face_logger.warning(f"Face {face_idx}: ESCAPED INMATE - {match['name']} ({match['confidence']}%) [{match.get('match_method', 'unknown')}]")
                 else:
-                    log(f"[multi-face] Face {face_idx}: Match - {match['name']} ({match['confidence']}%) [{match.get('match_method', 'unknown')}]")
+                    multi_face_logger.info(f"Face {face_idx}: Match - {match['name']} ({match['confidence']}%) [{match.get('match_method', 'unknown')}]")
             else:
                 unmatched_faces.append(face_info)
-                log(f"[multi-face] Face {face_idx}: No match")
+                multi_face_logger.info(f"Face {face_idx}: No match")
 
         # Determine overall status
         if escaped_inmates:
@@ -1028,43 +1282,18 @@ def _run_multi_recognition(frame) -> dict:
         else:
             status = "no_matches"
 
-        # Create alerts for escaped inmates
-        for escaped in escaped_inmates:
-            try:
-                alert = Alert(
-                    message=f"ESCAPED INMATE DETECTED: {escaped['name']} ({escaped['confidence']}% confidence)",
-                    level="danger",
-                    confidence=escaped['confidence'],
-                    inmate_id=escaped["id"],
-                    resolved=False
-                )
-                db.session.add(alert)
-                db.session.commit()
-
-                # Emit socket event
-                socketio.emit('escaped_inmate_alarm', {
-                    'inmate': escaped,
-                    'alert_id': alert.id,
-                    'timestamp': datetime.utcnow().isoformat(),
-                    'multi_face_detection': True,
-                    'detection_method': 'mtcnn_periocular_fusion'
-                })
-            except Exception as e:
-                log(f"[multi-face] Failed to create alert: {e}")
-                db.session.rollback()
+        # Create alerts for escaped inmates (one transaction for the frame)
+        _alarm_escaped_inmates(escaped_inmates, matches, 'mtcnn_periocular_fusion')
 
         # Emit general match event if any matches found
         if matches:
-            try:
-                socketio.emit('multi_face_match', {
-                    'total_faces': total_detected,
-                    'matched_count': len(matches),
-                    'escaped_count': len(escaped_inmates),
-                    'matches': [{'name': m['name'], 'confidence': m['confidence'], 'method': m.get('match_method', 'unknown')} for m in matches],
-                    'detection_method': 'mtcnn_periocular_fusion'
-                })
-            except Exception as e:
-                log(f"[multi-face] Socket emit failed: {e}")
+            notification_dispatcher.notify('multi_face_match', {
+                'total_faces': total_detected,
+                'matched_count': len(matches),
+                'escaped_count': len(escaped_inmates),
+                'matches': [{'name': m['name'], 'confidence': m['confidence'], 'method': m.get('match_method', 'unknown')} for m in matches],
+                'detection_method': 'mtcnn_periocular_fusion'
+            })
 
         return {
             "status": status,
@@ -1080,9 +1309,7 @@ def _run_multi_recognition(frame) -> dict:
         }
 
     except Exception as e:
-        print("[recognition_api] ERROR during multi-recognition:", e)
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Error during multi-recognition: {e}")
         return {"error": str(e), "status_code": 500}
 
 
@@ -1091,7 +1318,7 @@ def _run_multi_recognition_legacy(frame, face_data) -> dict:
     Legacy multi-face recognition using Haar Cascade detected faces.
     Used as fallback when embedding service is unavailable.
     """
-    log(f"[multi-face-legacy] Processing {len(face_data)} detected faces")
+    multi_face_logger.debug(f"Processing {len(face_data)} detected faces")
 
     inmate_encodings = _load_inmate_encodings()
     if not inmate_encodings:
@@ -1102,7 +1329,7 @@ def _run_multi_recognition_legacy(frame, face_data) -> dict:
     escaped_inmates = []
 
     for i, (face_crop, bbox) in enumerate(face_data):
-        log(f"[multi-face-legacy] Processing face {i+1}/{len(face_data)}")
+        multi_face_logger.debug("Processing face %d/%d", i + 1, len(face_data))
 
         match = _match_single_face(face_crop, inmate_encodings)
 
@@ -1117,12 +1344,12 @@ def _run_multi_recognition_legacy(frame, face_data) -> dict:
 
             if str(match.get("status", "")).lower() == "escaped":
                 escaped_inmates.append(match)
-                log(f"[multi-face-legacy] Face {i+1}: ESCAPED INMATE - {match['name']} ({match['confidence']}%)")
+                multi_face_logger.warning(f"Face {i+1}: ESCAPED INMATE - {match['name']} ({match['confidence']}%)")
             else:
-                log(f"[multi-face-legacy] Face {i+1}: Match - {match['name']} ({match['confidence']}%)")
+                multi_face_logger.info(f"Face {i+1}: Match - {match['name']} ({match['confidence']}%)")
         else:
             unmatched_faces.append(face_info)
-            log(f"[multi-face-legacy] Face {i+1}: No match")
+            multi_face_logger.debug(f"Face {i+1}: No match")
 
     if escaped_inmates:
         status = "escaped_inmates_detected"
@@ -1131,39 +1358,16 @@ def _run_multi_recognition_legacy(frame, face_data) -> dict:
     else:
         status = "no_matches"
 
-    for escaped in escaped_inmates:
-        try:
-            alert = Alert(
-                message=f"ESCAPED INMATE DETECTED: {escaped['name']} ({escaped['confidence']}% confidence)",
-                level="danger",
-                confidence=escaped['confidence'],
-                inmate_id=escaped["id"],
-                resolved=False
-            )
-            db.session.add(alert)
-            db.session.commit()
-            socketio.emit('escaped_inmate_alarm', {
-                'inmate': escaped,
-                'alert_id': alert.id,
-                'timestamp': datetime.utcnow().isoformat(),
-                'multi_face_detection': True,
-                'detection_method': 'haar_cascade_legacy'
-            })
-        except Exception as e:
-            log(f"[multi-face-legacy] Failed to create alert: {e}")
-            db.session.rollback()
+    _alarm_escaped_inmates(escaped_inmates, matches, 'haar_cascade_legacy')
 
     if matches:
-        try:
-            socketio.emit('multi_face_match', {
-                'total_faces': len(face_data),
-                'matched_count': len(matches),
-                'escaped_count': len(escaped_inmates),
-                'matches': [{'name': m['name'], 'confidence': m['confidence']} for m in matches],
-                'detection_method': 'haar_cascade_legacy'
-            })
-        except Exception as e:
-            log(f"[multi-face-legacy] Socket emit failed: {e}")
+        notification_dispatcher.notify('multi_face_match', {
+            'total_faces': len(face_data),
+            'matched_count': len(matches),
+            'escaped_count': len(escaped_inmates),
+            'matches': [{'name': m['name'], 'confidence': m['confidence']} for m in matches],
+            'detection_method': 'haar_cascade_legacy'
+        })
 
     return {
         "status": status,
@@ -1179,6 +1383,111 @@ def _run_multi_recognition_legacy(frame, face_data) -> dict:
     }
 
 
+def _get_frame_cache():
+    """Process-wide FrameResultCache configured from FRAME_CACHE_* (None when disabled)."""
+    global _frame_cache
+    config = current_app.config
+    if not config.get("FRAME_CACHE_ENABLED"):
+        return None
+    if _frame_cache is None:
+        _frame_cache = FrameResultCache(
+            max_distance=config.get("FRAME_CACHE_MAX_DISTANCE", 5),
+            max_age_seconds=config.get("FRAME_CACHE_MAX_AGE_SECONDS", 10),
+        )
+    return _frame_cache
+
+
+def _get_frame_slots():
+    """Process-wide LatestFrameSlots for /match (None when LATEST_FRAME_WINS is off)."""
+    global _frame_slots
+    config = current_app.config
+    if not config.get("LATEST_FRAME_WINS"):
+        return None
+    if _frame_slots is None:
+        _frame_slots = LatestFrameSlots(wait_seconds=config.get("FRAME_SLOT_WAIT_SECONDS", 60))
+    return _frame_slots
+
+
+def recognize_live_frame(frame, camera_id, camera_key):
+    """
+    Recognize a live camera frame: reuse the result of a near-identical recent
+    frame from the same camera, else run the pipeline through the camera's
+    latest-frame-wins slot. Shared by /match and the '/camera' Socket.IO
+    namespace (app/services/frame_ingest.py).
+
+    Args:
+        frame: BGR image
+        camera_id: Camera that captured the frame (or None)
+        camera_key: Cache / slot key (see _camera_key)
+
+    Returns:
+        dict: Result with its HTTP "status_code"
+    """
+    cache = _get_frame_cache()
+    slots = _get_frame_slots()
+    gallery_version, frame_hash = None, None
+    if cache is not None:
+        matcher = _load_inmate_encodings()
+        gallery_version = matcher.version if matcher else None
+        frame_hash = dhash(frame)
+        if gallery_version is not None:
+            cached, age = cache.lookup(camera_key, frame_hash, gallery_version)
+            if cached is not None:
+                logger.debug(f"Reusing result of a near-identical frame from {camera_key} ({age:.1f}s old)")
+                cached.update({"cached": True, "cache_age_seconds": round(age, 2)})
+                return cached
+
+    def recognize(item):
+        latest_frame, latest_hash = item
+        result = _run_recognition(latest_frame, camera_id=camera_id)
+        if gallery_version is not None and result.get("status") in CACHEABLE_STATUSES:
+            cache.store(camera_key, latest_hash, gallery_version, result)
+        return result
+
+    if slots is None:
+        return recognize((frame, frame_hash))
+    result, superseded = slots.submit(camera_key, (frame, frame_hash), recognize)
+    if result is None:
+        return {"error": "Timed out waiting for this camera's previous frame", "status_code": 503}
+    if superseded:
+        logger.debug(f"Frame from {camera_key} superseded by a newer one")
+    result["frame_superseded"] = superseded
+    return result
+
+
+def _camera_key():
+    """Camera the frame came from: the camera_id field, else the caller."""
+    camera_id = request.form.get('camera_id')
+    if camera_id:
+        return f"camera:{camera_id}"
+    if current_user.is_authenticated:
+        return f"user:{current_user.id}"
+    return f"addr:{request.remote_addr}"
+
+
+def _wants_async():
+    """True if the caller asked for a background job (query/form field 'async')."""
+    value = request.args.get('async') or request.form.get('async') or ''
+    return value.lower() in ('true', '1', 'yes')
+
+
+def _enqueue_recognition(kind, fn, *args):
+    """
+    Run fn(*args) as a background job (see app/services/recognition_jobs.py).
+
+    Returns:
+        Response: 202 with the job and its status URL, or 503 if the queue is full
+    """
+    job = submit_job(current_app._get_current_object(), kind, request_user_id(), fn, *args)
+    if job is None:
+        logger.warning(f"Job queue full, refusing {kind} request")
+        response = jsonify({"error": "Recognition queue is full, retry shortly"})
+        response.headers['Retry-After'] = '2'
+        return response, 503
+    job["status_url"] = url_for('recognition_api.recognition_job', job_id=job["job_id"])
+    return jsonify(job), 202
+
+
 @recognition_api_bp.route('/match', methods=['POST'])
 @login_or_jwt_required
 def recognize_face():
@@ -1186,11 +1495,36 @@ def recognize_face():
     Accepts: multipart/form-data with file field 'frame'
     Predicts inmate ID with XGBoost using 3060-dim HOG features.
     Emits 'match_found' on success.
+
+    A frame nearly identical to one recently seen from the same camera
+    reuses that frame's result (marked "cached") while the gallery is
+    unchanged; see app/utils/frame_cache.py.
+
+    Only the newest pending frame per camera is processed: a frame that
+    arrives while an older one is still being recognized replaces any frame
+    waiting behind it, and requests whose frame was dropped get the newer
+    frame's result with "frame_superseded": true (app/utils/frame_slots.py).
+
+    With async=true the frame is queued instead and 202 is returned with a
+    job id; the result is emitted as 'recognition_result' to the caller's
+    Socket.IO room and can be polled from /jobs/<job_id>.
     """
-    print("[recognition_api] /match endpoint called")
+    logger.debug("/match endpoint called")
     frame = _decode_frame_from_request(request)
-    print(f"[recognition_api] Frame decoded: {frame is not None}, shape: {frame.shape if frame is not None else 'None'}")
-    result = _run_recognition(frame)
+    logger.debug(f"Frame decoded: {frame is not None}, shape: {frame.shape if frame is not None else 'None'}")
+    if frame is None:
+        return jsonify({"error": "No valid image provided"}), 400
+
+    camera_id = _request_camera_id()
+    camera_key = _camera_key()
+
+    def run():
+        return recognize_live_frame(frame, camera_id, camera_key)
+
+    if _wants_async():
+        return _enqueue_recognition('match', run)
+
+    result = run()
     status_code = result.pop("status_code", 200)
     return jsonify(result), status_code
 
@@ -1205,18 +1539,14 @@ def upload_recognition():
     Optional form field 'multi_face':
       - If 'true' or '1': Detect and match ALL faces in the image
       - Otherwise: Single-face mode (legacy behavior)
-    """
-    import os
-    log_path = os.path.join(os.path.dirname(__file__), '..', '..', 'upload_requests.log')
-    with open(log_path, 'a') as f:
-        f.write(f"\n[{datetime.now()}] /upload endpoint HIT\n")
-        f.write(f"  Files in request: {list(request.files.keys())}\n")
 
-    log("[recognition_api] /upload endpoint called")
+    Optional field 'async': queue the recognition as a background job (see /match).
+    """
+    logger.info("/upload endpoint called", extra={"fields": {"files": list(request.files.keys())}})
 
     # Try 'file' first, then 'frame' as fallback
     frame = _decode_image_from_file_field(request, 'file')
-    log(f"[recognition_api] Frame from 'file': {frame is not None}")
+    logger.debug(f"Frame from 'file': {frame is not None}")
     if frame is None:
         frame = _decode_frame_from_request(request)
 
@@ -1227,11 +1557,16 @@ def upload_recognition():
     multi_face = request.form.get('multi_face', 'false').lower() in ('true', '1', 'yes')
 
     if multi_face:
-        log("[recognition_api] Multi-face mode enabled")
+        logger.debug("Multi-face mode enabled")
+        if _wants_async():
+            return _enqueue_recognition('multi', _run_multi_recognition, frame)
         result = _run_multi_recognition(frame)
     else:
         # use_detection=False: Just resize, don't detect face (consistent with mugshot storage)
-        result = _run_recognition(frame, use_detection=False)
+        camera_id = _request_camera_id()
+        if _wants_async():
+            return _enqueue_recognition('upload', _run_recognition, frame, False, camera_id)
+        result = _run_recognition(frame, use_detection=False, camera_id=camera_id)
 
     status_code = result.pop("status_code", 200)
     return jsonify(result), status_code
@@ -1266,7 +1601,7 @@ def upload_multi_recognition():
             "escaped_count": int
         }
     """
-    log("[recognition_api] /upload-multi endpoint called")
+    logger.debug("/upload-multi endpoint called")
 
     # Try 'file' first, then 'frame' as fallback
     frame = _decode_image_from_file_field(request, 'file')
@@ -1276,7 +1611,60 @@ def upload_multi_recognition():
     if frame is None:
         return jsonify({"error": "No image uploaded (use 'file' or 'frame' field)"}), 400
 
-    log(f"[recognition_api] Multi-face recognition on image {frame.shape}")
+    logger.debug(f"Multi-face recognition on image {frame.shape}")
+    if _wants_async():
+        return _enqueue_recognition('multi', _run_multi_recognition, frame)
     result = _run_multi_recognition(frame)
     status_code = result.pop("status_code", 200)
-    return jsonify(result), status_code
\ No newline at end of file
+    return jsonify(result), status_code
+
+
+@recognition_api_bp.route('/jobs/<job_id>', methods=['GET'])
+@login_or_jwt_required
+def recognition_job(job_id):
+    """
+    Status of a background recognition job submitted with async=true.
+
+    Returns the job with "status" queued | running | done | failed and, once
+    finished, its "result" and "status_code". Jobs are kept for
+    RECOGNITION_JOB_RESULT_TTL_SECONDS after finishing.
+    """
+    job = get_job(job_id, request_user_id())
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+@recognition_api_bp.route('/status', methods=['GET'])
+@login_or_jwt_required
+def gallery_status():
+    """
+    Readiness of the recognition gallery in this worker.
+    Returns 200 once the gallery is loaded and 503 while it is still loading.
+    """
+    ready = _gallery_status["state"] == "ready"
+    return jsonify({"ready": ready, **_gallery_status}), 200 if ready else 503
+
+
+@recognition_api_bp.route('/notifications/status', methods=['GET'])
+@login_or_jwt_required
+def notifications_status():
+    """
+    Notification dispatcher metrics in this worker: queue depth, pending
+    retries, counters and dispatch latency (enqueue to emitted). Admins only
+    (the counters cover every user's notifications).
+    """
+    if not request_is_admin():
+        return jsonify({"error": "Forbidden – admin only"}), 403
+    return jsonify(notification_dispatcher.dispatcher_stats()), 200
+
+
+@recognition_api_bp.route('/ingest/status', methods=['GET'])
+@login_or_jwt_required
+def ingest_status():
+    """
+    Open '/camera' Socket.IO connections in this worker with their frame
+    counters (received, recognized, dropped and rejected by backpressure).
+    Admins see every connection, other users only their own.
+    """
+    user_id = None if request_is_admin() else request_user_id()
+    return jsonify(frame_ingest.ingest_stats(user_id)), 200
@@ -0,0 +1,235 @@
+# app/services/alert_manager.py
+"""
+Write-behind persistence for recognition records.
+
+A confirmed match used to commit up to three times on the request thread
+(touching the ActiveRecognition, inserting the Alert, inserting the new
+ActiveRecognition), and the multi-face paths committed once per escaped
+inmate. On SQLite every one of those commits serializes the recognition
+threads on the database write lock.
+
+Instead, the recognition path queues its writes here:
+    - queue_alert():  a new Alert, optionally with the ActiveRecognition that
+                      deduplicates later detections (linked through its
+                      'alert' relationship, so alert_id is filled in on insert)
+    - touch_active(): a later detection of an active recognition
+                      (last_detected_at, coalesced per record)
+    - record_match(): a Match row for the dashboards' match charts
+A background writer thread applies everything queued in one transaction every
+ALERT_FLUSH_INTERVAL_SECONDS, or sooner once ALERT_BATCH_SIZE writes are
+waiting. Escaped-inmate alarms call flush() to write synchronously, so the
+alarm carries the alert id. Batches are written in a session of their own,
+never the caller's request session: a synchronous flush neither commits nor
+rolls back whatever the request has pending.
+
+Deduplication reads active recognitions from the in-memory index in
+app/services/dedup_index.py, which also covers records still in the queue;
+the writer thread also expires that index's old sightings.
+"""
+
+import atexit
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models.active_recognition import ActiveRecognition
+from app.models.match import Match
+from app.utils.logger import get_logger
+
+logger = get_logger("alert_manager")
+
+DEFAULT_FLUSH_INTERVAL_SECONDS = 1.0
+DEFAULT_BATCH_SIZE = 100
+MAX_FLUSH_ATTEMPTS = 3  # A batch that fails this often is dropped (and logged)
+
+_app = None
+_writer = None
+_wake = threading.Event()
+_stop = threading.Event()
+_lock = threading.Lock()  # Guards the queues below
+_flush_lock = threading.Lock()  # One transaction at a time
+_batch_size = DEFAULT_BATCH_SIZE
+
+_alerts = []  # PendingAlert
+_matches = []  # (inmate_id, timestamp)
+_touches = {}  # ActiveRecognition id -> last_detected_at
+_retries = []  # (attempts, alerts, matches, touches) of failed batches
+
+
+class PendingAlert:
+    """A queued Alert (and ActiveRecognition); alert_id is set once written."""
+
+    def __init__(self, alert, active=None):
+        self.alert = alert
+        self.active = active
+        self.alert_id = None
+
+
+def start_alert_writer(app):
+    """
+    Start the background writer thread for this app.
+
+    Without it (scripts, tests) every queued write is flushed immediately.
+    """
+    global _app, _writer, _batch_size
+    with _lock:
+        if _writer is not None:
+            return
+        _app = app
+        _stop.clear()
+        _batch_size = app.config.get("ALERT_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+        interval = app.config.get("ALERT_FLUSH_INTERVAL_SECONDS", DEFAULT_FLUSH_INTERVAL_SECONDS)
+        _writer = threading.Thread(target=_run_writer, args=(interval,), name="alert-writer", daemon=True)
+        _writer.start()
+    atexit.register(stop_alert_writer)
+
+
+def stop_alert_writer():
+    """Stop the writer thread after writing whatever is still queued."""
+    global _writer
+    if _writer is None:
+        return
+    _stop.set()
+    _wake.set()
+    _writer.join(timeout=10)
+    _writer = None
+
+
+def _run_writer(interval):
+    from app.services import dedup_index  # Imports this module
+
+    while not _stop.is_set():
+        _wake.wait(interval)
+        _wake.clear()
+        try:
+            with _app.app_context():
+                flush()
+            dedup_index.expire(datetime.utcnow() - dedup_index.WINDOW)
+        except Exception as e:
+            logger.exception(f"Alert writer flush failed: {e}")
+    with _app.app_context():
+        flush()
+
+
+def _queued(count):
+    """Wake the writer if the batch is full; flush inline if there is no writer."""
+    if _writer is None:
+        flush()
+    elif count >= _batch_size:
+        _wake.set()
+
+
+def queue_alert(alert, active=None):
+    """
+    Queue a new Alert and the ActiveRecognition that deduplicates it.
+
+    Args:
+        alert: Transient Alert (timestamp set by the caller or here)
+        active: Optional transient ActiveRecognition for the same detection
+
+    Returns:
+        PendingAlert: alert_id is filled in once the batch is written
+    """
+    if alert.timestamp is None:
+        alert.timestamp = datetime.utcnow()
+    pending = PendingAlert(alert, active)
+    if active is not None:
+        active.alert = alert
+    with _lock:
+        _alerts.append(pending)
+        count = len(_alerts) + len(_matches) + len(_touches)
+    _queued(count)
+    return pending
+
+
+def touch_active(active, when=None):
+    """Record a later detection of an ActiveRecognition (queued or stored)."""
+    when = when or datetime.utcnow()
+    if active.id is None:
+        active.last_detected_at = when  # Still queued: written with its batch
+        return
+    touch_active_id(active.id, when)
+
+
+def touch_active_id(active_id, when=None):
+    """Record a later detection of a stored ActiveRecognition by id."""
+    with _lock:
+        _touches[active_id] = when or datetime.utcnow()
+        count = len(_alerts) + len(_matches) + len(_touches)
+    _queued(count)
+
+
+def record_match(inmate_id, when=None):
+    """Queue a Match row for a confirmed recognition."""
+    with _lock:
+        _matches.append((inmate_id, when or datetime.utcnow()))
+        count = len(_alerts) + len(_matches) + len(_touches)
+    _queued(count)
+
+
+def pending_writes():
+    """Number of queued writes not yet committed."""
+    with _lock:
+        return len(_alerts) + len(_matches) + len(_touches) + sum(len(r[1]) + len(r[2]) + len(r[3]) for r in _retries)
+
+
+def flush():
+    """
+    Write everything queued in one transaction (needs an app context), in a
+    session of its own.
+
+    Returns:
+        int: Number of records written
+    """
+    with _flush_lock:
+        with _lock:
+            batches = list(_retries)
+            _retries.clear()
+            if _alerts or _matches or _touches:
+                batches.append((0, list(_alerts), list(_matches), dict(_touches)))
+                _alerts.clear()
+                _matches.clear()
+                _touches.clear()
+
+        written = 0
+        for attempts, alerts, matches, touches in batches:
+            try:
+                written += _write_batch(alerts, matches, touches)
+            except Exception as e:
+                if attempts + 1 >= MAX_FLUSH_ATTEMPTS:
+                    logger.error(f"Dropping {len(alerts)} alerts, {len(matches)} matches and "
+                                 f"{len(touches)} detection updates after {attempts + 1} failed writes: {e}")
+                else:
+                    logger.warning(f"Write-behind batch failed (attempt {attempts + 1}), will retry: {e}")
+                    with _lock:
+                        _retries.append((attempts + 1, alerts, matches, touches))
+        return written
+
+
+def _write_batch(alerts, matches, touches):
+    started = time.perf_counter()
+    # Not expired on commit: the records stay readable, detached, for the
+    # threads that queued them once this session is closed
+    with Session(db.engine, expire_on_commit=False) as session, session.begin():
+        for pending in alerts:
+            session.add(pending.alert)
+            if pending.active is not None:
+                session.add(pending.active)
+        session.add_all(Match(inmate_id=inmate_id, timestamp=when) for inmate_id, when in matches)
+        if touches:
+            session.bulk_update_mappings(
+                ActiveRecognition, [{"id": active_id, "last_detected_at": when} for active_id, when in touches.items()]
+            )
+        session.flush()
+        for pending in alerts:
+            pending.alert_id = pending.alert.id
+
+    written = len(alerts) + sum(p.active is not None for p in alerts) + len(matches) + len(touches)
+    if written:
+        logger.debug("Wrote %d records (%d alerts, %d matches, %d detection updates) in %.1f ms",
+                     written, len(alerts), len(matches), len(touches), 1000 * (time.perf_counter() - started))
+    return written
+
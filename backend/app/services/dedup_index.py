@@ -0,0 +1,156 @@
+# app/services/dedup_index.py
+"""
+In-process index of active recognitions for alert deduplication.
+
+Deduplication needs, per inmate, the newest active sighting: where it was
+(camera and coordinates), when it was first and last seen, and which alert
+it raised. Reading that from active_recognition on every confirmed match (an
+ORDER BY query plus a commit to bump last_detected_at) costs two round trips
+and a write every couple of seconds while an inmate stands in front of a
+camera.
+
+The index keeps one Sighting per inmate in memory. The database is read only
+when an inmate has no sighting in the deduplication window (first time seen
+by this process, or the previous sighting expired); new sightings are added
+when their alert is queued with alert_manager, and repeated sightings only
+update last_seen in memory. last_detected_at is written behind through
+alert_manager at most every DEDUP_TOUCH_INTERVAL_SECONDS per sighting.
+Sightings older than the deduplication WINDOW are dropped by the alert
+writer thread (expire()), so the index holds only inmates seen recently.
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+from app.models.active_recognition import ActiveRecognition
+from app.services import alert_manager
+
+DEFAULT_TOUCH_INTERVAL_SECONDS = 60
+WINDOW = timedelta(hours=1)  # A sighting deduplicates detections this long after it was first seen
+
+_index = {}  # inmate_id -> Sighting
+_lock = threading.Lock()
+_touch_interval = DEFAULT_TOUCH_INTERVAL_SECONDS
+
+
+class Sighting:
+    """Newest active recognition of an inmate (plain values, no ORM state)."""
+
+    def __init__(self, inmate_id, camera_id, latitude, longitude, first_seen, last_seen,
+                 active_id=None, alert_id=None, pending=None):
+        self.inmate_id = inmate_id
+        self.camera_id = camera_id
+        self.latitude = latitude
+        self.longitude = longitude
+        self.first_seen = first_seen
+        self.last_seen = last_seen
+        self.persisted_at = last_seen
+        self._active_id = active_id
+        self._alert_id = alert_id
+        self.pending = pending  # alert_manager.PendingAlert until its batch is written
+
+    @property
+    def active_id(self):
+        if self._active_id is None and self.pending is not None:
+            self._active_id = self.pending.active.id
+        return self._active_id
+
+    @property
+    def alert_id(self):
+        if self._alert_id is None and self.pending is not None:
+            self._alert_id = self.pending.alert_id
+        return self._alert_id
+
+
+def configure(app):
+    """Apply DEDUP_TOUCH_INTERVAL_SECONDS from the app config."""
+    global _touch_interval
+    _touch_interval = app.config.get("DEDUP_TOUCH_INTERVAL_SECONDS", DEFAULT_TOUCH_INTERVAL_SECONDS)
+
+
+def active_sighting(inmate_id, since):
+    """
+    Newest sighting of inmate_id first seen after since.
+
+    Looks in memory first; only if the inmate has no sighting in the window
+    is active_recognition queried (and the result kept).
+
+    Args:
+        inmate_id: Inmate primary key
+        since: Start of the deduplication window (UTC)
+
+    Returns:
+        Sighting or None
+    """
+    with _lock:
+        sighting = _index.get(inmate_id)
+    if sighting is not None and sighting.first_seen > since:
+        return sighting
+
+    active = ActiveRecognition.query.filter(
+        ActiveRecognition.inmate_id == inmate_id,
+        ActiveRecognition.first_detected_at > since
+    ).order_by(ActiveRecognition.first_detected_at.desc()).first()
+    if active is None:
+        return None
+
+    sighting = Sighting(
+        inmate_id, active.camera_id, active.latitude, active.longitude,
+        active.first_detected_at, active.last_detected_at,
+        active_id=active.id, alert_id=active.alert_id
+    )
+    with _lock:
+        current = _index.get(inmate_id)
+        if current is not None and current.first_seen >= sighting.first_seen:
+            return current  # Another thread recorded a newer sighting meanwhile
+        _index[inmate_id] = sighting
+    return sighting
+
+
+def record_sighting(pending):
+    """
+    Index the ActiveRecognition queued with an alert (alert_manager.queue_alert).
+
+    Returns:
+        Sighting: The inmate's new active sighting
+    """
+    active = pending.active
+    sighting = Sighting(
+        active.inmate_id, active.camera_id, active.latitude, active.longitude,
+        active.first_detected_at, active.last_detected_at, pending=pending
+    )
+    with _lock:
+        _index[active.inmate_id] = sighting
+    return sighting
+
+
+def touch(sighting, when=None):
+    """
+    Record a repeated sighting: last_seen in memory, last_detected_at written
+    behind at most every touch interval.
+    """
+    when = when or datetime.utcnow()
+    with _lock:
+        sighting.last_seen = when
+        if (when - sighting.persisted_at).total_seconds() < _touch_interval:
+            return
+        sighting.persisted_at = when
+    active_id = sighting.active_id
+    if active_id is not None:
+        alert_manager.touch_active_id(active_id, when)
+    elif sighting.pending is not None:
+        alert_manager.touch_active(sighting.pending.active, when)
+
+
+def expire(before):
+    """Drop sightings first seen before the given time; returns how many."""
+    with _lock:
+        expired = [inmate_id for inmate_id, s in _index.items() if s.first_seen <= before]
+        for inmate_id in expired:
+            del _index[inmate_id]
+    return len(expired)
+
+
+def clear():
+    with _lock:
+        _index.clear()
@@ -0,0 +1,196 @@
+# app/services/frame_ingest.py
+"""
+Binary frame ingestion over Socket.IO (the '/camera' namespace).
+
+Live clients used to POST every frame to /api/recognition/match: a new HTTP
+request with multipart parsing and authentication per frame, next to the
+Socket.IO connection they already hold for alarms. Camera clients can instead
+connect to the '/camera' namespace once (authenticated by session cookie or
+JWT) and emit 'frame' events carrying the JPEG bytes as a binary attachment.
+
+Backpressure is per connection. A connection has at most one frame being
+recognized and one waiting; what happens to a frame that arrives while one
+is already waiting is the drop policy (CAMERA_INGEST_DROP_POLICY):
+    - 'latest': the waiting frame is dropped and replaced (live video only
+                cares about the newest frame)
+    - 'reject': the new frame is refused
+Every frame is acknowledged at once (Socket.IO ack) with whether it was
+accepted and which earlier frame, if any, was dropped, so a client can pace
+itself on the acks. Results are pushed back on the same connection as
+'recognition_result' events carrying the frame's seq. Frames are also
+published to the camera's live viewers (app/services/frame_relay.py).
+"""
+
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from app import socketio
+from app.services import frame_relay
+from app.utils.logger import get_logger
+
+logger = get_logger("frame_ingest")
+
+NAMESPACE = "/camera"
+RESULT_EVENT = "recognition_result"
+DROP_POLICIES = ("latest", "reject")
+
+DEFAULT_DROP_POLICY = "latest"
+DEFAULT_MAX_FRAME_BYTES = 4 * 1024 * 1024
+
+_connections = {}  # sid -> CameraConnection
+_lock = threading.Lock()
+
+
+class CameraConnection:
+    """Ingestion state of one '/camera' connection."""
+
+    def __init__(self, app, sid, user_id, camera_id, process, drop_policy=DEFAULT_DROP_POLICY,
+                 max_frame_bytes=DEFAULT_MAX_FRAME_BYTES):
+        self.app = app
+        self.sid = sid
+        self.user_id = user_id
+        self.camera_id = camera_id
+        self.camera_key = f"camera:{camera_id}" if camera_id else f"user:{user_id}"
+        self.process = process
+        self.drop_policy = drop_policy
+        self.max_frame_bytes = max_frame_bytes
+        self.lock = threading.Lock()
+        self.pending = None  # (seq, jpeg bytes, received_at) waiting to be recognized
+        self.busy = False
+        self.closed = False
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    def stats(self):
+        return {
+            "camera_id": self.camera_id,
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+        }
+
+
+def open_connection(app, sid, user_id, camera_id, process):
+    """
+    Register an authenticated '/camera' connection.
+
+    Args:
+        app: Flask app (recognition runs in its context)
+        sid: Socket.IO session id
+        user_id: Authenticated user
+        camera_id: Camera the frames come from (or None)
+        process: Callable (frame, camera_id, camera_key) -> result dict
+    """
+    policy = app.config.get("CAMERA_INGEST_DROP_POLICY", DEFAULT_DROP_POLICY)
+    if policy not in DROP_POLICIES:
+        logger.warning(f"Unknown CAMERA_INGEST_DROP_POLICY {policy!r}, using {DEFAULT_DROP_POLICY!r}")
+        policy = DEFAULT_DROP_POLICY
+    connection = CameraConnection(
+        app, sid, user_id, camera_id, process, drop_policy=policy,
+        max_frame_bytes=app.config.get("CAMERA_FRAME_MAX_BYTES", DEFAULT_MAX_FRAME_BYTES),
+    )
+    with _lock:
+        _connections[sid] = connection
+    logger.info(f"Camera connection {sid} opened (user {user_id}, camera {camera_id}, drop policy {policy})")
+    return connection
+
+
+def close_connection(sid):
+    """Forget a connection; a frame being recognized finishes, the waiting one is dropped."""
+    with _lock:
+        connection = _connections.pop(sid, None)
+    if connection is None:
+        return
+    with connection.lock:
+        connection.closed = True
+        connection.pending = None
+    logger.info(f"Camera connection {sid} closed: {connection.stats()}")
+
+
+def submit_frame(sid, seq, data):
+    """
+    Accept a frame from a connection.
+
+    Args:
+        sid: Socket.IO session id
+        seq: Client sequence number of the frame
+        data: JPEG bytes
+
+    Returns:
+        dict: Acknowledgement: seq, accepted, dropped (seq of the waiting
+        frame this one replaced, or None), busy (a frame is being recognized)
+        and, when refused, error
+    """
+    connection = _connections.get(sid)
+    if connection is None:
+        return {"seq": seq, "accepted": False, "error": "not connected"}
+    if not isinstance(data, (bytes, bytearray)) or not data:
+        return {"seq": seq, "accepted": False, "error": "frame must be binary JPEG data"}
+    if len(data) > connection.max_frame_bytes:
+        return {"seq": seq, "accepted": False, "error": "frame too large"}
+    frame_relay.publish(connection.camera_key, bytes(data))  # Live viewers of this camera
+
+    dropped = None
+    with connection.lock:
+        connection.received += 1
+        if connection.pending is not None:
+            if connection.drop_policy == "reject":
+                connection.rejected += 1
+                return {"seq": seq, "accepted": False, "busy": True, "error": "busy"}
+            dropped = connection.pending[0]
+            connection.dropped += 1
+        connection.pending = (seq, bytes(data), time.perf_counter())
+        busy = connection.busy
+        connection.busy = True
+    if not busy:
+        socketio.start_background_task(_drain, connection)
+    return {"seq": seq, "accepted": True, "dropped": dropped, "busy": busy}
+
+
+def _drain(connection):
+    """Recognize the connection's waiting frames until there are none left."""
+    with connection.app.app_context():
+        while True:
+            with connection.lock:
+                if connection.pending is None or connection.closed:
+                    connection.busy = False
+                    return
+                seq, data, received_at = connection.pending
+                connection.pending = None
+
+            # A failure with one frame must not end the loop: busy would stay set
+            # and the connection would never be drained again
+            try:
+                result = _recognize(connection, data)
+                result.update({
+                    "seq": seq,
+                    "latency_ms": round(1000 * (time.perf_counter() - received_at), 1),
+                })
+                connection.processed += 1
+                socketio.emit(RESULT_EVENT, result, to=connection.sid, namespace=NAMESPACE)
+            except Exception as e:
+                logger.exception(f"Sending the result of frame {seq} from {connection.camera_key} failed: {e}")
+
+
+def _recognize(connection, data):
+    frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        return {"error": "Could not decode frame", "status_code": 400}
+    try:
+        return connection.process(frame, connection.camera_id, connection.camera_key)
+    except Exception as e:
+        logger.exception(f"Recognizing frame from {connection.camera_key} failed: {e}")
+        return {"error": str(e), "status_code": 500}
+
+
+def ingest_stats(user_id=None):
+    """Per-connection counters of the open '/camera' connections (of user_id only, if given)."""
+    with _lock:
+        connections = [c for c in _connections.values() if user_id is None or c.user_id == user_id]
+    return {"connections": len(connections), "cameras": [c.stats() for c in connections]}
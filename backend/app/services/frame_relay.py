@@ -0,0 +1,282 @@
+# app/services/frame_relay.py
+"""
+Camera frame relay for live viewers.
+
+send_frame used to re-emit every full-resolution base64 frame to the sender's
+room and, for admins, to every connected client, so bandwidth and CPU grew
+with viewers x cameras x frame size whether or not anyone was watching.
+
+Now a viewer subscribes to a camera with the resolution and frame rate it
+wants (subscribe()), and publish() forwards a camera's frame only to its
+subscribers:
+    - rate:    a subscriber gets at most its fps; frames in between are skipped
+    - size:    frames are downscaled to the subscriber's width (snapped to
+               RELAY_WIDTHS so subscribers share encodings) and re-encoded as
+               JPEG once per width; smaller targets are decoded at reduced
+               resolution directly
+    - slow consumers: every frame is emitted with an ack callback; while a
+               subscriber's previous frame is unacknowledged, new frames are
+               dropped for it (for at most RELAY_ACK_TIMEOUT_SECONDS)
+Frames are sent as binary attachments ('receive_frame' with the JPEG bytes in
+'frame'), not base64. relay_stats() reports per-subscriber throughput.
+"""
+
+import threading
+import time
+from datetime import datetime
+from functools import partial
+
+import cv2
+import numpy as np
+
+from app import socketio
+from app.utils.logger import get_logger
+
+logger = get_logger("frame_relay")
+
+FRAME_EVENT = "receive_frame"
+RELAY_WIDTHS = (160, 320, 480, 640, 960, 1280, 1920)
+
+DEFAULT_MAX_WIDTH = 640
+DEFAULT_FPS = 5
+DEFAULT_MAX_FPS = 15
+DEFAULT_JPEG_QUALITY = 70
+DEFAULT_ACK_TIMEOUT_SECONDS = 5
+
+_subscriptions = {}  # camera key -> {sid: Subscriber}
+_lock = threading.Lock()
+_config = {
+    "max_fps": DEFAULT_MAX_FPS,
+    "jpeg_quality": DEFAULT_JPEG_QUALITY,
+    "ack_timeout": DEFAULT_ACK_TIMEOUT_SECONDS,
+}
+
+
+class Subscriber:
+    """One viewer's subscription to one camera, with its throughput counters."""
+
+    def __init__(self, sid, user_id, camera_key, max_width, fps):
+        self.sid = sid
+        self.user_id = user_id
+        self.camera_key = camera_key
+        self.max_width = max_width
+        self.fps = fps
+        self.interval = 1.0 / fps
+        self.subscribed_at = time.monotonic()
+        self.last_sent_at = 0.0
+        self.awaiting_ack_since = None
+        self.sent = 0
+        self.bytes_sent = 0
+        self.skipped_rate = 0
+        self.dropped_slow = 0
+        self.ack_timeouts = 0
+        self.ack_ms = None  # Moving average of emit -> ack
+
+    def stats(self):
+        elapsed = max(time.monotonic() - self.subscribed_at, 1e-6)
+        return {
+            "sid": self.sid,
+            "user_id": self.user_id,
+            "camera": self.camera_key,
+            "max_width": self.max_width,
+            "target_fps": self.fps,
+            "sent": self.sent,
+            "fps": round(self.sent / elapsed, 2),
+            "kbps": round(8 * self.bytes_sent / elapsed / 1000, 1),
+            "bytes_sent": self.bytes_sent,
+            "skipped_rate": self.skipped_rate,
+            "dropped_slow": self.dropped_slow,
+            "ack_timeouts": self.ack_timeouts,
+            "ack_ms": round(self.ack_ms, 1) if self.ack_ms is not None else None,
+        }
+
+
+def configure(app):
+    """Apply RELAY_* settings from the app config."""
+    _config.update({
+        "max_fps": app.config.get("RELAY_MAX_FPS", DEFAULT_MAX_FPS),
+        "jpeg_quality": app.config.get("RELAY_JPEG_QUALITY", DEFAULT_JPEG_QUALITY),
+        "ack_timeout": app.config.get("RELAY_ACK_TIMEOUT_SECONDS", DEFAULT_ACK_TIMEOUT_SECONDS),
+    })
+
+
+def _snap_width(width):
+    """Largest RELAY_WIDTHS entry not above width (at least the smallest)."""
+    fitting = [w for w in RELAY_WIDTHS if w <= width]
+    return fitting[-1] if fitting else RELAY_WIDTHS[0]
+
+
+def subscribe(sid, user_id, camera_key, max_width=DEFAULT_MAX_WIDTH, fps=DEFAULT_FPS):
+    """
+    Subscribe a viewer connection to a camera (replacing an earlier
+    subscription of the same connection to it).
+
+    Returns:
+        Subscriber
+    """
+    fps = min(max(float(fps), 0.1), float(_config["max_fps"]))
+    subscriber = Subscriber(sid, user_id, camera_key, _snap_width(int(max_width)), fps)
+    with _lock:
+        _subscriptions.setdefault(camera_key, {})[sid] = subscriber
+    logger.debug("%s subscribed to %s at %dpx / %.1f fps", sid, camera_key, subscriber.max_width, fps)
+    return subscriber
+
+
+def unsubscribe(sid, camera_key=None):
+    """Drop a connection's subscription to camera_key, or to every camera."""
+    with _lock:
+        keys = [camera_key] if camera_key is not None else list(_subscriptions)
+        for key in keys:
+            subscribers = _subscriptions.get(key)
+            if subscribers and subscribers.pop(sid, None) is not None and not subscribers:
+                del _subscriptions[key]
+
+
+def has_subscribers(camera_key):
+    """True if anyone is watching the camera (lets publishers skip encoding)."""
+    return bool(_subscriptions.get(camera_key))
+
+
+def publish(camera_key, jpeg, timestamp=None):
+    """
+    Forward a camera frame to the subscribers that are due one.
+
+    Args:
+        camera_key: Camera the frame came from ("camera:<id>" or "user:<id>")
+        jpeg: JPEG bytes
+        timestamp: Capture time (ISO string); now if omitted
+
+    Returns:
+        int: Number of subscribers the frame was sent to
+    """
+    if not _subscriptions.get(camera_key):
+        return 0
+    now = time.monotonic()
+    due = []
+    with _lock:
+        for subscriber in _subscriptions.get(camera_key, {}).values():
+            if now - subscriber.last_sent_at < subscriber.interval:
+                subscriber.skipped_rate += 1
+                continue
+            if subscriber.awaiting_ack_since is not None:
+                if now - subscriber.awaiting_ack_since < _config["ack_timeout"]:
+                    subscriber.dropped_slow += 1
+                    continue
+                subscriber.ack_timeouts += 1
+            subscriber.last_sent_at = now
+            subscriber.awaiting_ack_since = now
+            due.append(subscriber)
+    if not due:
+        return 0
+
+    timestamp = timestamp or datetime.utcnow().isoformat()
+    renditions = _Renditions(jpeg, _config["jpeg_quality"])
+    sent = 0
+    for subscriber in due:
+        try:
+            data, width, height = renditions.get(subscriber.max_width)
+        except Exception as e:
+            logger.warning(f"Could not re-encode frame from {camera_key}: {e}")
+            subscriber.awaiting_ack_since = None
+            continue
+        try:
+            socketio.emit(FRAME_EVENT, {
+                "camera": camera_key,
+                "frame": data,
+                "width": width,
+                "height": height,
+                "timestamp": timestamp,
+            }, to=subscriber.sid, callback=partial(_acked, subscriber, time.monotonic()))
+        except Exception as e:
+            logger.warning(f"Relaying frame from {camera_key} to {subscriber.sid} failed: {e}")
+            subscriber.awaiting_ack_since = None
+            continue
+        subscriber.sent += 1
+        subscriber.bytes_sent += len(data)
+        sent += 1
+    return sent
+
+
+def _acked(subscriber, sent_at, *args):
+    ack_ms = 1000 * (time.monotonic() - sent_at)
+    subscriber.ack_ms = ack_ms if subscriber.ack_ms is None else 0.8 * subscriber.ack_ms + 0.2 * ack_ms
+    subscriber.awaiting_ack_since = None
+
+
+class _Renditions:
+    """Encodings of one source frame per target width, made on first use."""
+
+    def __init__(self, jpeg, quality):
+        self.jpeg = jpeg
+        self.quality = quality
+        self.size = _jpeg_size(jpeg)  # (width, height) from the header, or None
+        self._decoded = {}  # reduction factor -> image
+        self._encoded = {}  # width -> (bytes, width, height)
+
+    def get(self, width):
+        if width in self._encoded:
+            return self._encoded[width]
+        if self.size is not None and width >= self.size[0]:
+            result = (self.jpeg, self.size[0], self.size[1])  # Already small enough: forward as is
+        else:
+            image = self._decode(width)
+            if image is None:
+                raise ValueError("undecodable frame")
+            height, source_width = image.shape[:2]
+            if source_width > width:
+                height = max(1, round(height * width / source_width))
+                image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+            else:
+                width = source_width
+            ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if not ok:
+                raise ValueError("JPEG encoding failed")
+            result = (buffer.tobytes(), width, height)
+        self._encoded[width] = result
+        return result
+
+    def _decode(self, width):
+        # Decode at 1/2, 1/4 or 1/8 scale when that still covers the target width
+        factor = 1
+        if self.size is not None:
+            for candidate in (8, 4, 2):
+                if self.size[0] // candidate >= width:
+                    factor = candidate
+                    break
+        if factor not in self._decoded:
+            flags = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2,
+                     4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}[factor]
+            self._decoded[factor] = cv2.imdecode(np.frombuffer(self.jpeg, np.uint8), flags)
+        return self._decoded[factor]
+
+
+def _jpeg_size(data):
+    """(width, height) from a JPEG's start-of-frame header, or None."""
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # Fill byte
+            i += 1
+            continue
+        length = int.from_bytes(data[i + 2:i + 4], "big")
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height = int.from_bytes(data[i + 5:i + 7], "big")
+            width = int.from_bytes(data[i + 7:i + 9], "big")
+            return (width, height) if width and height else None
+        i += 2 + length
+    return None
+
+
+def relay_stats(user_id=None):
+    """Per-subscriber throughput (only user_id's subscriptions if given)."""
+    with _lock:
+        subscribers = [s for subs in _subscriptions.values() for s in subs.values()
+                       if user_id is None or s.user_id == user_id]
+    return {
+        "cameras": len({s.camera_key for s in subscribers}),
+        "subscribers": [s.stats() for s in subscribers],
+    }
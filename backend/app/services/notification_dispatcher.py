@@ -0,0 +1,233 @@
+# app/services/notification_dispatcher.py
+"""
+Off-request dispatch of recognition notifications.
+
+The escaped-inmate path used to emit the global alarm and then one alarm per
+nearby facility (after looking the facilities up) on the recognition request
+thread, before the HTTP response was returned. Now the recognition path only
+enqueues an event here; a dispatcher thread takes events from the queue,
+computes the recipients and emits:
+    - notify():               one Socket.IO event (global or to a room)
+    - notify_escaped_alarm(): the global alarm, then the nearby-facility
+                              alarms batched by distance: facilities at the
+                              same distance share a single emit to the list
+                              of their rooms. DISPATCH_DISTANCE_STEP_KM > 0
+                              rounds distances to that step first (fewer
+                              emits, coarser distance_km); 0 sends them exact
+Failed emits are retried with a growing delay up to DISPATCH_MAX_ATTEMPTS.
+
+dispatcher_stats() reports the queue depth and the dispatch latency (enqueue
+to emitted); GET /api/recognition/notifications/status serves it.
+"""
+
+import heapq
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from app import socketio
+from app.utils.geolocation import find_nearby_facilities
+from app.utils.logger import get_logger
+
+logger = get_logger("notification_dispatcher")
+
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_DELAY_SECONDS = 0.5  # Doubled after every failed attempt
+DEFAULT_DISTANCE_STEP_KM = 0.0  # Exact distances
+DEFAULT_NEARBY_RADIUS_KM = 50
+LATENCY_SAMPLES = 500
+
+_app = None
+_worker = None
+_queue = None
+_retry_heap = []  # (due time, seq, message)
+_seq = itertools.count()
+_config = {
+    "max_attempts": DEFAULT_MAX_ATTEMPTS,
+    "retry_delay": DEFAULT_RETRY_DELAY_SECONDS,
+    "distance_step": DEFAULT_DISTANCE_STEP_KM,
+}
+_stats_lock = threading.Lock()
+_latencies = deque(maxlen=LATENCY_SAMPLES)
+_counters = {"enqueued": 0, "dispatched": 0, "emits": 0, "retries": 0, "failed": 0, "inline": 0}
+
+
+def start_dispatcher(app):
+    """
+    Start the dispatcher thread for this app.
+
+    Without it (scripts, tests) events are dispatched on the caller's thread.
+    """
+    global _app, _worker, _queue
+    if _worker is not None:
+        return
+    _app = app
+    _config.update({
+        "max_attempts": app.config.get("DISPATCH_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS),
+        "retry_delay": app.config.get("DISPATCH_RETRY_DELAY_SECONDS", DEFAULT_RETRY_DELAY_SECONDS),
+        "distance_step": app.config.get("DISPATCH_DISTANCE_STEP_KM", DEFAULT_DISTANCE_STEP_KM),
+    })
+    _queue = queue.Queue(maxsize=app.config.get("DISPATCH_QUEUE_SIZE", DEFAULT_QUEUE_SIZE))
+    _worker = threading.Thread(target=_run_dispatcher, name="notification-dispatcher", daemon=True)
+    _worker.start()
+
+
+def _enqueue(event):
+    event["enqueued_at"] = time.perf_counter()
+    with _stats_lock:
+        _counters["enqueued"] += 1
+    if _worker is not None:
+        try:
+            _queue.put_nowait(event)
+            return
+        except queue.Full:
+            logger.warning(f"Dispatch queue full, sending {event['kind']} on the request thread")
+    with _stats_lock:
+        _counters["inline"] += 1
+    _dispatch(event)
+
+
+def notify(event_name, payload, room=None):
+    """Queue one Socket.IO event, to everyone or to a room (or list of rooms)."""
+    _enqueue({"kind": "emit", "event": event_name, "payload": payload, "room": room})
+
+
+def notify_escaped_alarm(inmate_payload, alert_id, detection_lat=None, detection_lng=None,
+                         radius_km=DEFAULT_NEARBY_RADIUS_KM):
+    """
+    Queue the escaped-inmate alarm: to all clients, then to the facilities
+    within radius_km of the detection (if its location is known).
+
+    Args:
+        inmate_payload: Inmate dict sent with the alarm
+        alert_id: Alert raised for the detection (or None)
+        detection_lat, detection_lng: Detection location
+        radius_km: Radius for nearby facilities
+    """
+    _enqueue({
+        "kind": "escaped_alarm",
+        "inmate": inmate_payload,
+        "alert_id": alert_id,
+        "lat": detection_lat,
+        "lng": detection_lng,
+        "radius_km": radius_km,
+        "timestamp": datetime.utcnow().isoformat(),
+    })
+
+
+def _run_dispatcher():
+    while True:
+        timeout = None
+        while _retry_heap and _retry_heap[0][0] <= time.time():
+            _, _, message = heapq.heappop(_retry_heap)
+            _send(message)
+        if _retry_heap:
+            timeout = max(_retry_heap[0][0] - time.time(), 0.0)
+        try:
+            event = _queue.get(timeout=timeout)
+        except queue.Empty:
+            continue
+        try:
+            with _app.app_context():
+                _dispatch(event)
+        except Exception as e:
+            logger.exception(f"Dispatching {event['kind']} failed: {e}")
+
+
+def _dispatch(event):
+    """Turn an event into Socket.IO messages and send them."""
+    if event["kind"] == "emit":
+        messages = [(event["event"], event["payload"], event["room"])]
+    else:
+        messages = _escaped_alarm_messages(event)
+    for event_name, payload, room in messages:
+        _send({"event": event_name, "payload": payload, "room": room, "attempts": 0})
+
+    latency = time.perf_counter() - event["enqueued_at"]
+    with _stats_lock:
+        _counters["dispatched"] += 1
+        _latencies.append(latency)
+
+
+def _escaped_alarm_messages(event):
+    inmate, alert_id = event["inmate"], event["alert_id"]
+    lat, lng = event["lat"], event["lng"]
+    messages = [("escaped_inmate_alarm", {
+        'inmate': inmate,
+        'alert_id': alert_id,
+        'detection_location': {'lat': lat, 'lng': lng} if lat and lng else None,
+        'timestamp': event["timestamp"],
+        'requires_acknowledgment': True
+    }, None)]
+    if not (lat and lng):
+        return messages
+
+    # Facilities at the same distance get the same payload: one emit to all of
+    # their rooms instead of one per facility
+    step = _config["distance_step"]
+    rooms_by_distance = {}
+    nearby = find_nearby_facilities(lat, lng, radius_km=event["radius_km"])
+    for facility in nearby:
+        distance = facility['distance_km']
+        if step:
+            distance = round(round(distance / step) * step, 2)
+        rooms_by_distance.setdefault(distance, []).append(f"user_{facility['user_id']}")
+    for distance, rooms in rooms_by_distance.items():
+        messages.append(("escaped_inmate_alarm", {
+            'inmate': inmate,
+            'alert_id': alert_id,
+            'distance_km': distance,
+            'timestamp': event["timestamp"]
+        }, rooms))
+    if nearby:
+        logger.info(f"Notifying {len(nearby)} nearby facilities in {len(rooms_by_distance)} emits")
+    return messages
+
+
+def _send(message):
+    try:
+        socketio.emit(message["event"], message["payload"], room=message["room"])
+        with _stats_lock:
+            _counters["emits"] += 1
+    except Exception as e:
+        message["attempts"] += 1
+        if message["attempts"] >= _config["max_attempts"] or _worker is None:
+            logger.error(f"Giving up on {message['event']} to {message['room'] or 'all'} "
+                         f"after {message['attempts']} attempts: {e}")
+            with _stats_lock:
+                _counters["failed"] += 1
+            return
+        delay = _config["retry_delay"] * 2 ** (message["attempts"] - 1)
+        logger.warning(f"Emit of {message['event']} failed ({e}), retrying in {delay:.1f}s")
+        with _stats_lock:
+            _counters["retries"] += 1
+        heapq.heappush(_retry_heap, (time.time() + delay, next(_seq), message))
+
+
+def dispatcher_stats():
+    """
+    Queue depth, counters and dispatch latency (enqueue to emitted) in ms.
+    """
+    with _stats_lock:
+        latencies = sorted(_latencies)
+        counters = dict(_counters)
+
+    def percentile(p):
+        return round(1000 * latencies[min(int(p * len(latencies)), len(latencies) - 1)], 2) if latencies else None
+
+    return {
+        "running": _worker is not None,
+        "queue_depth": _queue.qsize() if _queue is not None else 0,
+        "pending_retries": len(_retry_heap),
+        **counters,
+        "latency_ms": {
+            "samples": len(latencies),
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+            "max": round(1000 * latencies[-1], 2) if latencies else None,
+        },
+    }
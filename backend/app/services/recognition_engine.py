@@ -0,0 +1,585 @@
+# app/services/recognition_engine.py
+"""
+Vectorized matching of query embeddings against the inmate gallery.
+
+The gallery (app/utils/gallery_store.py) keeps all face and periocular
+embeddings as float32 matrices with rows grouped by inmate. Instead of looping
+over inmates and calling scipy's cosine() per pair, the matcher scores every
+query against every row with one matrix product and reduces per inmate.
+
+Optionally the matcher keeps a quantized copy of the gallery in memory
+(float16, or int8 with one scale per vector), or prefilters on one centroid
+per inmate. Coarse scores are computed on the quantized copy (or centroids)
+and the best candidates are re-scored in float32 from the memory-mapped
+gallery, so only a few pages of the full-precision matrix are ever touched.
+
+The search itself can be tiered: escaped inmates whose escape point is close
+enough to the detecting camera are scored first, then the gallery partitions
+in priority order, so an escape alarm does not wait for the whole gallery.
+"""
+
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.utils.embedding_client import compute_fusion_score
+from app.utils.geolocation import haversine_distances
+
+QUANTIZATION_MODES = (None, "float16", "int8")
+
+# Number of inmates re-scored in float32 after a quantized coarse pass
+DEFAULT_RERANK_CANDIDATES = 32
+
+# Rows converted back to float32 at a time during a quantized pass
+_CHUNK_ROWS = 512
+
+# Search order of gallery partitions (lower first); unknown values sort in the middle
+STATUS_PRIORITY = {"escaped": 0, "released": 2}
+RISK_PRIORITY = {"high": 0, "medium": 1, "low": 2}
+
+# Default growth of the geo tier radius around an escape point
+DEFAULT_GEO_BASE_RADIUS_KM = 10.0
+DEFAULT_GEO_SPEED_KMH = 30.0
+DEFAULT_GEO_MAX_RADIUS_KM = 300.0
+
+
+def partition_key(inmate):
+    """
+    Sort key placing an inmate's (status, risk_level) partition in search order:
+    Escaped first, Released last, higher risk first within a status.
+    """
+    status = str(inmate.get("status") or "").lower()
+    risk = str(inmate.get("risk_level") or "").lower()
+    return (STATUS_PRIORITY.get(status, 1), RISK_PRIORITY.get(risk, 1), status, risk)
+
+
+def _partitions(inmates):
+    """
+    Contiguous runs of inmates sharing (status, risk_level), in search order.
+    The gallery is published sorted by partition_key, so normally there is
+    one run per partition.
+    """
+    runs = []
+    for i, inmate in enumerate(inmates):
+        key = partition_key(inmate)
+        if runs and runs[-1][0] == key:
+            runs[-1][2] = i + 1
+        else:
+            runs.append([key, i, i + 1, inmate.get("status"), inmate.get("risk_level")])
+    runs.sort(key=lambda run: (run[0][:2], run[1]))
+    return [
+        {"status": status, "risk_level": risk, "start": start, "end": end}
+        for _, start, end, status, risk in runs
+    ]
+
+
+def _escape_sites(inmates):
+    """
+    Escape points of escaped inmates that have one.
+
+    Returns:
+        tuple: (indices, latitudes, longitudes, escape_dates) arrays; dates
+               are datetime64 (NaT when unknown)
+    """
+    indices, lats, lngs, dates = [], [], [], []
+    for i, inmate in enumerate(inmates):
+        if str(inmate.get("status") or "").lower() != "escaped":
+            continue
+        lat, lng = inmate.get("escape_latitude"), inmate.get("escape_longitude")
+        if lat is None or lng is None:
+            continue
+        indices.append(i)
+        lats.append(lat)
+        lngs.append(lng)
+        dates.append(inmate.get("escape_date") or "NaT")
+    return (np.asarray(indices, dtype=np.int64), np.asarray(lats, dtype=np.float64),
+            np.asarray(lngs, dtype=np.float64), np.asarray(dates, dtype="datetime64[s]"))
+
+
+def _normalize_queries(queries):
+    q = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    norms = np.linalg.norm(q, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return q / norms
+
+
+def _centroids(matrix, offsets):
+    """L2-normalized mean row per segment (zero rows for empty segments)."""
+    num_segments = len(offsets) - 1
+    centroids = np.zeros((num_segments, matrix.shape[1]), dtype=np.float32)
+    starts = offsets[:-1]
+    non_empty = offsets[1:] > starts
+    if len(matrix) and non_empty.any():
+        centroids[non_empty] = np.add.reduceat(np.asarray(matrix, dtype=np.float32), starts[non_empty], axis=0)
+    norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return centroids / norms
+
+
+def _segment_max(values, offsets):
+    """
+    Max of values[..., offsets[i]:offsets[i+1]] for every segment i.
+    Empty segments get -inf.
+    """
+    num_segments = len(offsets) - 1
+    out = np.full(values.shape[:-1] + (num_segments,), -np.inf, dtype=np.float32)
+    starts = offsets[:-1]
+    non_empty = offsets[1:] > starts
+    if values.shape[-1] and non_empty.any():
+        out[..., non_empty] = np.maximum.reduceat(values, starts[non_empty], axis=-1)
+    return out
+
+
+class QuantizedMatrix:
+    """In-memory float16 or per-vector scaled int8 copy of a float32 matrix."""
+
+    def __init__(self, matrix, mode):
+        if mode not in ("float16", "int8"):
+            raise ValueError(f"Unsupported quantization mode: {mode}")
+        self.mode = mode
+        self.shape = matrix.shape
+        if mode == "float16":
+            self.data = np.asarray(matrix, dtype=np.float16)
+            self.scale = None
+        else:
+            max_abs = np.abs(matrix).max(axis=1) if len(matrix) else np.zeros(0, np.float32)
+            self.scale = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+            self.data = np.round(matrix / self.scale[:, None]).astype(np.int8)
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + (self.scale.nbytes if self.scale is not None else 0)
+
+    def dot(self, queries, row_start=0, row_end=None):
+        """Approximate queries @ matrix[row_start:row_end].T, computed in float32 chunks."""
+        row_end = self.shape[0] if row_end is None else row_end
+        out = np.empty((queries.shape[0], row_end - row_start), dtype=np.float32)
+        for start in range(row_start, row_end, _CHUNK_ROWS):
+            end = min(start + _CHUNK_ROWS, row_end)
+            block = self.data[start:end].astype(np.float32)
+            cols = slice(start - row_start, end - row_start)
+            out[:, cols] = queries @ block.T
+            if self.scale is not None:
+                out[:, cols] *= self.scale[start:end]
+        return out
+
+
+class MatchScores:
+    """
+    Per-inmate distances for one query.
+
+    Attributes:
+        distances: (M,) final distance per inmate (fused when possible)
+        face: (M,) minimum face cosine distance per inmate
+        periocular: (M,) minimum periocular cosine distance (inf if unavailable)
+        fused: (M,) True where the final distance used periocular fusion
+        boosted: (M,) True where the glasses boost was applied to face-only
+        face_weight: fusion weight given to the face distance
+        comparisons: query-vector dot products computed for this query
+        partitions: per-tier search stats (tier, status, risk_level, inmates,
+                    ms, best_distance) in search order
+        stopped_early: True if the search ended after the geo tier, leaving
+                       every other inmate at infinite distance
+    """
+
+    def __init__(self, distances, face, periocular, fused, boosted, face_weight, comparisons=0,
+                 partitions=None, stopped_early=False):
+        self.distances = distances
+        self.face = face
+        self.periocular = periocular
+        self.fused = fused
+        self.boosted = boosted
+        self.face_weight = face_weight
+        self.comparisons = comparisons
+        self.partitions = partitions or []
+        self.stopped_early = stopped_early
+
+    def ranked(self, limit=None):
+        """Inmate indices ordered by ascending final distance."""
+        if limit is not None and limit < len(self.distances):
+            top = np.argpartition(self.distances, limit)[:limit]
+            return top[np.argsort(self.distances[top], kind="stable")]
+        return np.argsort(self.distances, kind="stable")
+
+    def method(self, index):
+        if self.fused[index]:
+            return f"fusion(face:{self.face_weight:.2f})"
+        if self.boosted[index]:
+            return "face_only(glasses_boost)"
+        return "face_only"
+
+
+class GalleryMatcher:
+    """
+    Scores queries against one gallery version.
+
+    Matching runs in up to two stages. The coarse stage scores every inmate
+    against either the full rows (exact, or quantized copy) or, with a
+    shortlist, one L2-normalized centroid per inmate. The refine stage then
+    re-scores the best candidates exactly against all of their float32 rows
+    from the memory-mapped gallery.
+
+    Args:
+        gallery: gallery_store.Gallery
+        quantization: None, 'float16' or 'int8' (applies to the coarse matrix)
+        rerank_candidates: Inmates re-scored in float32 after a quantized pass
+        shortlist: If set, prefilter on per-inmate centroids and score only the
+                   top `shortlist` inmates exactly; everyone else is reported
+                   as no match (infinite distance)
+    """
+
+    def __init__(self, gallery, quantization=None, rerank_candidates=DEFAULT_RERANK_CANDIDATES,
+                 shortlist=None):
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unsupported quantization mode: {quantization}")
+        self.gallery = gallery
+        self.version = gallery.version
+        self.inmates = gallery.inmates
+        self.quantization = quantization
+        self.rerank_candidates = rerank_candidates
+        self.shortlist = shortlist if shortlist and shortlist < len(gallery) else None
+        self.has_periocular = len(gallery.periocular) > 0
+        self._has_periocular_rows = np.diff(gallery.periocular_offsets) > 0
+        self.partitions = _partitions(gallery.inmates)
+        self._escape_sites = _escape_sites(gallery.inmates)
+
+        if self.shortlist:
+            every_inmate = np.arange(len(gallery) + 1)
+            self._coarse_face = (_centroids(gallery.face, gallery.face_offsets), every_inmate)
+            self._coarse_peri = (_centroids(gallery.periocular, gallery.periocular_offsets), every_inmate)
+        else:
+            self._coarse_face = (gallery.face, gallery.face_offsets)
+            self._coarse_peri = (gallery.periocular, gallery.periocular_offsets)
+
+        self._face_q = QuantizedMatrix(self._coarse_face[0], quantization) if quantization else None
+        self._peri_q = (
+            QuantizedMatrix(self._coarse_peri[0], quantization)
+            if quantization and self.has_periocular else None
+        )
+
+    def __len__(self):
+        return len(self.inmates)
+
+    @property
+    def _refines(self):
+        return bool(self.shortlist or self.quantization)
+
+    def memory_bytes(self):
+        """Bytes held privately by this process for coarse scoring."""
+        if self.quantization:
+            return self._face_q.nbytes + (self._peri_q.nbytes if self._peri_q is not None else 0)
+        if self.shortlist:
+            return self._coarse_face[0].nbytes + self._coarse_peri[0].nbytes
+        return self.gallery.face.nbytes + self.gallery.periocular.nbytes
+
+    def geo_candidates(self, latitude, longitude, now=None,
+                       base_radius_km=DEFAULT_GEO_BASE_RADIUS_KM,
+                       speed_kmh=DEFAULT_GEO_SPEED_KMH,
+                       max_radius_km=DEFAULT_GEO_MAX_RADIUS_KM):
+        """
+        Escaped inmates who could have reached a location since their escape.
+
+        The search radius around each escape point grows with the time since
+        the escape (base_radius_km + speed_kmh * hours, capped at
+        max_radius_km). Inmates without an escape date get the full radius.
+
+        Args:
+            latitude, longitude: Detecting camera location (None if unknown)
+            now: Naive UTC datetime to measure elapsed time from (default: utcnow)
+
+        Returns:
+            tuple: (indices, distances_km) of inmates within their radius,
+                   nearest escape point first
+        """
+        indices, lats, lngs, dates = self._escape_sites
+        if latitude is None or longitude is None or len(indices) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        now = np.datetime64(now or datetime.utcnow(), "s")
+        hours = (now - dates) / np.timedelta64(1, "h")
+        radius = np.minimum(base_radius_km + speed_kmh * np.maximum(hours, 0.0), max_radius_km)
+        radius[np.isnan(hours)] = max_radius_km
+
+        distances_km = haversine_distances(latitude, longitude, lats, lngs)
+        inside = np.flatnonzero(distances_km <= radius)
+        inside = inside[np.argsort(distances_km[inside], kind="stable")]
+        return indices[inside], distances_km[inside]
+
+    def _coarse_similarities(self, queries, kind, start=0, end=None):
+        """(Q, end - start) per-inmate max similarity for inmates start..end in the coarse stage."""
+        end = len(self) if end is None else end
+        if kind == "face":
+            (matrix, offsets), quantized = self._coarse_face, self._face_q
+        else:
+            (matrix, offsets), quantized = self._coarse_peri, self._peri_q
+        row_start, row_end = offsets[start], offsets[end]
+        if quantized is not None:
+            sims = quantized.dot(queries, row_start, row_end)
+        else:
+            sims = queries @ np.asarray(matrix[row_start:row_end]).T
+        sims = _segment_max(sims, offsets[start:end + 1] - row_start)
+        if kind != "face" and self.shortlist:
+            sims[:, ~self._has_periocular_rows[start:end]] = -np.inf
+        return sims, queries.shape[0] * int(row_end - row_start)
+
+    def _exact_similarities(self, queries, kind, indices):
+        """(Q, len(indices)) float32 per-inmate max similarity for a subset of inmates."""
+        rows, owner = self.gallery.subset_rows(kind, indices)
+        sims = queries @ np.asarray(rows, dtype=np.float32).T
+        offsets = np.searchsorted(owner, np.arange(len(indices) + 1))
+        return _segment_max(sims, offsets), queries.shape[0] * len(rows)
+
+    def _fuse(self, face_dist, peri_dist, use_periocular, glasses_detected,
+              glasses_confidence, glasses_boost):
+        has_peri = np.isfinite(peri_dist) & use_periocular
+        fused_dist, face_weight = compute_fusion_score(
+            face_dist, np.where(has_peri, peri_dist, 0.0), glasses_detected, glasses_confidence
+        )
+        boosted = np.zeros_like(has_peri)
+        if glasses_boost and glasses_detected and use_periocular:
+            boosted = ~has_peri
+        distances = np.where(has_peri, fused_dist, np.where(boosted, face_dist * 0.95, face_dist))
+        return distances.astype(np.float32), has_peri, boosted, face_weight
+
+    def _refine(self, faces, peri, face_sim, peri_sim, distances, fused, boosted, fuse_args, start=0):
+        """
+        Re-score the best coarse candidates of one query exactly (in place).
+        The score arrays cover inmates start..start + len(distances).
+
+        Returns:
+            int: Number of query-vector comparisons made
+        """
+        if len(distances) == 0:
+            return 0
+        k = min(self.shortlist or self.rerank_candidates, len(distances))
+        candidates = np.argpartition(distances, k - 1)[:k]
+        exact_face, comparisons = self._exact_similarities(faces, "face", candidates + start)
+        face_sim[candidates] = exact_face.max(axis=0)
+        if peri is not None and self.has_periocular:
+            exact_peri, peri_comparisons = self._exact_similarities(peri, "periocular", candidates + start)
+            peri_sim[candidates] = exact_peri[0]
+            comparisons += peri_comparisons
+
+        if self.shortlist:
+            # Centroid scores are not distances; drop everyone outside the shortlist
+            outside = np.ones(len(distances), dtype=bool)
+            outside[candidates] = False
+            face_sim[outside] = -np.inf
+            peri_sim[outside] = -np.inf
+            distances[outside] = np.inf
+
+        exact = self._fuse(1.0 - face_sim[candidates], 1.0 - peri_sim[candidates], *fuse_args)
+        distances[candidates], fused[candidates], boosted[candidates], _ = exact
+        return comparisons
+
+    def score(self, face_queries, periocular_query=None, glasses_detected=False,
+              glasses_confidence=0.0, glasses_boost=False, on_partition=None,
+              priority=None, stop_distance=None):
+        """
+        Score queries against every inmate, one tier at a time.
+
+        An optional priority tier (e.g. geo_candidates() for the detecting
+        camera) is scored exactly first. The gallery partitions follow in
+        priority order (Escaped first, then by risk), so a caller can act on
+        an escaped-inmate match before the rest of the gallery has been scanned.
+
+        Args:
+            face_queries: One or more face embeddings (augmentations of the same face)
+            periocular_query: Optional periocular embedding of the same face
+            glasses_detected: Whether glasses were detected in the query
+            glasses_confidence: Glasses detection confidence (0-1)
+            glasses_boost: Forgive face distance by 5% when glasses were detected
+                           but the inmate has no periocular enrolment
+            on_partition: Optional callback(stats, best_index, best_distance)
+                          called with each tier's MatchScores.partitions entry
+                          as soon as the tier is scored
+            priority: Optional inmate indices scored before the partitions
+            stop_distance: If the priority tier's best distance is below this,
+                           skip the partitions (all other inmates stay at inf)
+
+        Returns:
+            MatchScores
+        """
+        faces = _normalize_queries(face_queries)
+        use_periocular = periocular_query is not None
+        peri = _normalize_queries(periocular_query) if use_periocular else None
+        fuse_args = (use_periocular, glasses_detected, glasses_confidence, glasses_boost)
+
+        num_inmates = len(self)
+        face_sim = np.full(num_inmates, -np.inf, dtype=np.float32)
+        peri_sim = np.full(num_inmates, -np.inf, dtype=np.float32)
+        distances = np.full(num_inmates, np.inf, dtype=np.float32)
+        fused = np.zeros(num_inmates, dtype=bool)
+        boosted = np.zeros(num_inmates, dtype=bool)
+        face_weight = compute_fusion_score(0.0, 0.0, glasses_detected, glasses_confidence)[1]
+        comparisons = 0
+        timings = []
+
+        def finish_tier(tier, status, risk_level, indices, started):
+            best = int(indices[np.argmin(distances[indices])])
+            timings.append({
+                "tier": tier,
+                "status": status,
+                "risk_level": risk_level,
+                "inmates": len(indices),
+                "ms": round(1000 * (time.perf_counter() - started), 3),
+                "best_distance": float(distances[best]),
+            })
+            if on_partition is not None:
+                on_partition(timings[-1], best, float(distances[best]))
+            return best
+
+        tier_scores = None
+        if priority is not None and len(priority):
+            started = time.perf_counter()
+            tier = np.asarray(priority, dtype=np.int64)
+            exact_face, n = self._exact_similarities(faces, "face", tier)
+            face_sim[tier] = exact_face.max(axis=0)
+            comparisons += n
+            if use_periocular and self.has_periocular:
+                exact_peri, n = self._exact_similarities(peri, "periocular", tier)
+                peri_sim[tier] = exact_peri[0]
+                comparisons += n
+            distances[tier], fused[tier], boosted[tier], face_weight = self._fuse(
+                1.0 - face_sim[tier], 1.0 - peri_sim[tier], *fuse_args)
+            tier_scores = (tier, face_sim[tier], peri_sim[tier], distances[tier], fused[tier], boosted[tier])
+
+            best = finish_tier("geo", "Escaped", None, tier, started)
+            if stop_distance is not None and distances[best] < stop_distance:
+                return MatchScores(distances, 1.0 - face_sim, 1.0 - peri_sim, fused, boosted, face_weight,
+                                   comparisons, timings, stopped_early=True)
+
+        for partition in self.partitions:
+            started = time.perf_counter()
+            a, b = partition["start"], partition["end"]
+
+            sims, n = self._coarse_similarities(faces, "face", a, b)
+            face_sim[a:b] = sims.max(axis=0)
+            comparisons += n
+            if use_periocular and self.has_periocular:
+                sims, n = self._coarse_similarities(peri, "periocular", a, b)
+                peri_sim[a:b] = sims[0]
+                comparisons += n
+
+            distances[a:b], fused[a:b], boosted[a:b], face_weight = self._fuse(
+                1.0 - face_sim[a:b], 1.0 - peri_sim[a:b], *fuse_args)
+            if self._refines:
+                comparisons += self._refine(faces, peri, face_sim[a:b], peri_sim[a:b], distances[a:b],
+                                            fused[a:b], boosted[a:b], fuse_args, start=a)
+
+            finish_tier("partition", partition["status"], partition["risk_level"], np.arange(a, b), started)
+
+        if tier_scores is not None:
+            # The priority tier was scored exactly; keep that over coarse or shortlisted scores
+            tier, face_sim[tier], peri_sim[tier], distances[tier], fused[tier], boosted[tier] = tier_scores
+
+        return MatchScores(distances, 1.0 - face_sim, 1.0 - peri_sim, fused, boosted, face_weight,
+                           comparisons, timings)
+
+    def score_batch(self, face_queries, periocular_queries=None, glasses_detected=None,
+                    glasses_confidence=None):
+        """
+        Score several different faces (e.g. everyone in one frame) in one pass.
+
+        Every face is one row of a single (faces x gallery) product instead of
+        a separate scan of the gallery.
+
+        Args:
+            face_queries: (F, D) one face embedding per detected face
+            periocular_queries: Optional list of F periocular embeddings (entries may be None)
+            glasses_detected: Optional list of F glasses flags
+            glasses_confidence: Optional list of F glasses confidences
+
+        Returns:
+            list: One MatchScores per face
+        """
+        faces = _normalize_queries(face_queries)
+        num_faces = len(faces)
+        periocular_queries = periocular_queries or [None] * num_faces
+        glasses_detected = glasses_detected or [False] * num_faces
+        glasses_confidence = glasses_confidence or [0.0] * num_faces
+
+        face_sim, comparisons = self._coarse_similarities(faces, "face")
+        peri_sim = np.full((num_faces, len(self)), -np.inf, dtype=np.float32)
+        peri = [None] * num_faces
+        with_peri = [i for i, q in enumerate(periocular_queries) if q is not None]
+        if with_peri:
+            peri_matrix = _normalize_queries(np.stack([np.ravel(periocular_queries[i]) for i in with_peri]))
+            for row, i in enumerate(with_peri):
+                peri[i] = peri_matrix[row:row + 1]
+            if self.has_periocular:
+                peri_sim[with_peri], peri_comparisons = self._coarse_similarities(peri_matrix, "periocular")
+                comparisons += peri_comparisons
+
+        results = []
+        for i in range(num_faces):
+            fuse_args = (peri[i] is not None, glasses_detected[i], glasses_confidence[i], False)
+            distances, fused, boosted, face_weight = self._fuse(
+                1.0 - face_sim[i], 1.0 - peri_sim[i], *fuse_args)
+            face_comparisons = comparisons // num_faces
+            if self._refines:
+                face_comparisons += self._refine(faces[i:i + 1], peri[i], face_sim[i], peri_sim[i],
+                                                 distances, fused, boosted, fuse_args)
+            results.append(MatchScores(distances, 1.0 - face_sim[i], 1.0 - peri_sim[i],
+                                       fused, boosted, face_weight, face_comparisons))
+        return results
+
+
+def assign_faces(scores, max_distance, method="hungarian", top_k=5):
+    """
+    Pick at most one inmate per face and at most one face per inmate.
+
+    Only each face's top_k inmates under max_distance are considered. Faces
+    whose candidates are all taken by better-matching faces are left
+    unmatched (or fall back to their next candidate).
+
+    Args:
+        scores: List of MatchScores, one per face
+        max_distance: Distance at or above which a pair is not a match
+        method: 'hungarian' (minimum total distance), 'greedy' (best pairs
+                first) or None (no one-to-one constraint, best inmate per face)
+        top_k: Candidates kept per face
+
+    Returns:
+        list: Inmate index or None for every face
+    """
+    candidates = []
+    for face_scores in scores:
+        top = face_scores.ranked(limit=top_k)
+        candidates.append([int(i) for i in top if face_scores.distances[i] < max_distance])
+
+    if method is None:
+        return [c[0] if c else None for c in candidates]
+
+    assignment = [None] * len(scores)
+    if method == "greedy":
+        pairs = sorted(
+            (float(scores[f].distances[i]), f, i)
+            for f, face_candidates in enumerate(candidates) for i in face_candidates
+        )
+        taken = set()
+        for _, f, i in pairs:
+            if assignment[f] is None and i not in taken:
+                assignment[f] = i
+                taken.add(i)
+        return assignment
+
+    if method != "hungarian":
+        raise ValueError(f"Unknown assignment method: {method}")
+
+    from scipy.optimize import linear_sum_assignment
+
+    columns = sorted({i for face_candidates in candidates for i in face_candidates})
+    if not columns:
+        return assignment
+    column_of = {i: c for c, i in enumerate(columns)}
+    # Non-candidates cost as much as staying unmatched
+    cost = np.full((len(scores), len(columns)), max_distance, dtype=np.float64)
+    for f, face_candidates in enumerate(candidates):
+        for i in face_candidates:
+            cost[f, column_of[i]] = scores[f].distances[i]
+    for f, c in zip(*linear_sum_assignment(cost)):
+        if cost[f, c] < max_distance:
+            assignment[f] = columns[c]
+    return assignment
@@ -0,0 +1,144 @@
+# app/services/recognition_jobs.py
+"""
+Background recognition jobs.
+
+The recognition endpoints can hand a decoded frame to a small, bounded pool
+of worker threads instead of running the pipeline (embedding HTTP calls,
+alert writes, socket emits) on the request thread. The request returns 202
+with a job id; the worker pushes the result to the submitting user's
+Socket.IO room ("user_<id>") as a 'recognition_result' event, and the result
+stays available from GET /api/recognition/jobs/<id> for a while afterwards.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from app import socketio
+from app.utils.logger import get_logger
+
+logger = get_logger("recognition_jobs")
+
+RESULT_EVENT = "recognition_result"
+
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 16  # Jobs queued or running before new ones are refused
+DEFAULT_RESULT_TTL_SECONDS = 300
+
+_executor = None
+_slots = None
+_jobs = {}
+_lock = threading.Lock()
+
+
+def _init_pool(config):
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=config.get("RECOGNITION_JOB_WORKERS", DEFAULT_WORKERS),
+                thread_name_prefix="recognition-job",
+            )
+            _slots = threading.BoundedSemaphore(config.get("RECOGNITION_JOB_QUEUE_SIZE", DEFAULT_QUEUE_SIZE))
+
+
+def _purge_expired(ttl_seconds):
+    """Forget finished jobs older than ttl_seconds (caller holds _lock)."""
+    cutoff = time.time() - ttl_seconds
+    expired = [job_id for job_id, job in _jobs.items()
+               if job["finished_at"] is not None and job["finished_at"] < cutoff]
+    for job_id in expired:
+        del _jobs[job_id]
+
+
+def _public(job):
+    """JSON view of a job (without internal fields)."""
+    return {key: value for key, value in job.items() if key != "user_id"}
+
+
+def submit_job(app, kind, user_id, fn, *args):
+    """
+    Queue fn(*args) to run in an app context on the job pool.
+
+    fn returns a response dict like _run_recognition (with an optional
+    "status_code"). When it finishes, the job is emitted to the room
+    "user_<user_id>".
+
+    Args:
+        app: Flask app (current_app._get_current_object())
+        kind: Endpoint name recorded on the job ('match', 'upload', ...)
+        user_id: Submitting user (owner of the job)
+        fn: Callable producing the result dict
+
+    Returns:
+        dict: The queued job, or None if the queue is full
+    """
+    _init_pool(app.config)
+    if not _slots.acquire(blocking=False):
+        return None
+
+    job = {
+        "job_id": uuid.uuid4().hex,
+        "kind": kind,
+        "user_id": user_id,
+        "status": "queued",
+        "submitted_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "status_code": None,
+        "result": None,
+    }
+    with _lock:
+        _purge_expired(app.config.get("RECOGNITION_JOB_RESULT_TTL_SECONDS", DEFAULT_RESULT_TTL_SECONDS))
+        _jobs[job["job_id"]] = job
+    try:
+        _executor.submit(_run_job, app, job, fn, args)
+    except Exception:
+        _slots.release()
+        with _lock:
+            _jobs.pop(job["job_id"], None)
+        raise
+    return _public(job)
+
+
+def _run_job(app, job, fn, args):
+    try:
+        with app.app_context():
+            job["status"] = "running"
+            job["started_at"] = time.time()
+            try:
+                result = fn(*args)
+                status_code = result.pop("status_code", 200)
+            except Exception as e:
+                logger.exception(f"Job {job['job_id']} failed: {e}")
+                result, status_code = {"error": str(e)}, 500
+
+            with _lock:
+                job.update({
+                    "status": "done" if status_code < 400 else "failed",
+                    "finished_at": time.time(),
+                    "status_code": status_code,
+                    "result": result,
+                })
+            try:
+                socketio.emit(RESULT_EVENT, _public(job), room=f"user_{job['user_id']}")
+            except Exception as e:
+                logger.warning(f"Socket emit failed: {e}")
+    finally:
+        _slots.release()
+
+
+def get_job(job_id, user_id):
+    """The job if it exists and belongs to user_id, else None."""
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None or job["user_id"] != user_id:
+            return None
+        return _public(job)
+
+
+def pending_jobs():
+    """Number of queued or running jobs."""
+    with _lock:
+        return sum(1 for job in _jobs.values() if job["finished_at"] is None)
@@ -0,0 +1,339 @@
+# app/services/recognition_pool.py
+"""
+Process pool for the CPU-bound recognition stages.
+
+Query augmentation (OpenCV filters, NL-means denoising) and gallery matching
+run for tens of milliseconds per request. On the request thread they hold the
+GIL against every other request and socket; under the gevent server
+(serve.py) they would stall the whole event loop. With
+RECOGNITION_PROCESS_WORKERS > 0 both stages run in a pool of worker
+processes instead, and the request greenlet/thread only waits on the result:
+    - augment():     generate_query_augmentations() for a face crop
+    - score():       GalleryMatcher.score() for a set of query embeddings
+    - score_batch(): GalleryMatcher.score_batch() for every face of a frame
+
+Each worker is warmed at start-up: it imports OpenCV/numpy, pins OpenCV to one
+thread (the pool is the parallelism) and maps the current gallery snapshot
+with the same matcher settings as the app. Snapshots are memory-mapped, so
+the workers share the page cache with the app process. A worker asked to
+score against a gallery version it has not mapped yet remaps first.
+
+Workers are started with the 'forkserver' method, so they never inherit the
+app's gevent monkey patching, locks or database connections. Each worker has
+its own pipe and runs one task at a time; the caller waits for the reply with
+multiprocessing.connection.wait(), which yields to other greenlets under
+gevent. (concurrent.futures.ProcessPoolExecutor is not used: under gevent its
+feeder and manager threads become greenlets, and a feeder blocked writing a
+crop into a full pipe stops the manager from reading the result the worker
+is blocked writing, hanging the server.)
+
+score()'s per-tier on_partition events are sent back over the pipe as each
+tier finishes, ahead of the final reply, so the caller's callback (e.g. the
+early escaped-inmate alarm) still fires before the rest of the gallery has
+been scanned.
+
+With no pool (the default, and in scripts) every call runs in-process.
+"""
+
+import atexit
+import multiprocessing
+import os
+import queue
+import threading
+from multiprocessing.connection import wait
+
+import cv2
+
+from app.services.recognition_engine import GalleryMatcher, DEFAULT_RERANK_CANDIDATES
+from app.utils import gallery_store
+from app.utils.image_preprocessing import generate_query_augmentations
+from app.utils.logger import get_logger
+
+logger = get_logger("recognition_pool")
+
+_idle = None  # queue.Queue of idle _Worker
+_workers = []
+_settings = None
+_lock = threading.Lock()
+
+# Worker-process state
+_worker_settings = {}
+_worker_matcher = None
+_worker_writer = None
+
+
+class _TaskError(RuntimeError):
+    """The task raised in the worker (the worker itself is fine)."""
+
+
+class _Worker:
+    """A worker process and the parent's end of its pipe."""
+
+    def __init__(self, context, settings):
+        # Two one-way OS pipes: a duplex Pipe is a socketpair, which gevent
+        # creates non-blocking (and the worker would inherit that)
+        self.reader, child_writer = context.Pipe(duplex=False)
+        child_reader, self.writer = context.Pipe(duplex=False)
+        self.process = context.Process(
+            target=_worker_main, args=(child_reader, child_writer, settings),
+            name="recognition-worker", daemon=True,
+        )
+        self.process.start()
+        child_reader.close()
+        child_writer.close()
+
+    def call(self, task, *args, on_event=None):
+        self.writer.send((task, args))
+        while True:
+            wait([self.reader])  # Cooperative under gevent; the recv below does not block for long
+            message = self.reader.recv()
+            if message[0] != "event":
+                break
+            if on_event is not None:
+                try:
+                    on_event(*message[1])
+                except Exception as e:
+                    # The final reply is still outstanding; keep the worker in step
+                    logger.warning(f"Recognition worker {task} event callback failed: {e}")
+        ok, value = message
+        if not ok:
+            raise _TaskError(f"Recognition worker {task} failed: {value}")
+        return value
+
+    def close(self):
+        self.writer.close()
+        self.reader.close()
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+def start_pool(app):
+    """
+    Start RECOGNITION_PROCESS_WORKERS worker processes (no-op if 0).
+
+    The workers map the gallery in GALLERY_DIR with the app's
+    GALLERY_QUANTIZATION / GALLERY_RERANK_CANDIDATES / GALLERY_SHORTLIST.
+    """
+    global _idle, _settings
+    count = app.config.get("RECOGNITION_PROCESS_WORKERS", 0)
+    if not count:
+        return
+    settings = {
+        "gallery_dir": app.config.get("GALLERY_DIR") or os.path.join(app.instance_path, "gallery"),
+        "quantization": app.config.get("GALLERY_QUANTIZATION"),
+        "rerank_candidates": app.config.get("GALLERY_RERANK_CANDIDATES", DEFAULT_RERANK_CANDIDATES),
+        "shortlist": app.config.get("GALLERY_SHORTLIST"),
+    }
+    with _lock:
+        if _idle is not None:
+            return
+        _settings = settings
+        _idle = queue.Queue()
+        for _ in range(count):
+            worker = _Worker(_context(), settings)
+            _workers.append(worker)
+            _idle.put(worker)
+    atexit.register(stop_pool)
+
+    # Wait for every worker to finish warming up
+    for _ in range(count):
+        worker = _idle.get()
+        try:
+            version = worker.call("warm")
+        except Exception as e:
+            logger.warning(f"Recognition worker warm-up failed: {e}")
+            worker = _replace(worker)
+        else:
+            logger.debug("Recognition worker %d warm (gallery %s)", worker.process.pid, version)
+        _idle.put(worker)
+    logger.info(f"Recognition process pool started with {count} workers")
+
+
+def _context():
+    context = multiprocessing.get_context("forkserver")
+    # Fork workers from a server that already imported this module (and
+    # OpenCV/numpy with it) rather than the app's __main__
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+def _replace(worker):
+    """Start a new worker in place of one that died."""
+    with _lock:
+        if worker in _workers:
+            _workers.remove(worker)
+        replacement = _Worker(_context(), _settings)
+        _workers.append(replacement)
+    worker.close()
+    return replacement
+
+
+def stop_pool():
+    global _idle
+    with _lock:
+        workers = list(_workers)
+        _workers.clear()
+        _idle = None
+    for worker in workers:
+        worker.close()
+
+
+def pool_size():
+    """Number of worker processes (0 when recognition runs in-process)."""
+    return len(_workers)
+
+
+def _run(task, *args, on_event=None):
+    """Run a task on the next idle worker (waiting for one if all are busy)."""
+    idle = _idle
+    worker = idle.get()
+    try:
+        return worker.call(task, *args, on_event=on_event)
+    except _TaskError:
+        raise
+    except BaseException as e:
+        # The worker died, or the wait was interrupted with its reply still
+        # outstanding (e.g. a greenlet timeout): either way it is replaced
+        logger.warning(f"Replacing recognition worker {worker.process.pid} after {task}: {e!r}")
+        worker = _replace(worker)
+        if isinstance(e, (EOFError, OSError)):
+            raise RuntimeError(f"Recognition worker died during {task}") from e
+        raise
+    finally:
+        idle.put(worker)
+
+
+def augment(face_crop, families=None):
+    """
+    Query augmentations of a face crop (see generate_query_augmentations).
+    """
+    if _idle is None:
+        return generate_query_augmentations(face_crop, families)
+    return _run("augment", face_crop, families)
+
+
+def score(matcher, face_queries, on_partition=None, **kwargs):
+    """
+    matcher.score(face_queries, on_partition=on_partition, **kwargs), in a
+    worker process when the pool is running.
+
+    The worker streams each tier's on_partition event back as soon as the
+    tier is scored and on_partition runs here, in this process (callbacks such
+    as the early escaped alarm need the app context).
+
+    Args:
+        matcher: GalleryMatcher of the gallery version to score against
+        face_queries: Face embeddings
+        on_partition: Optional callback(stats, best_index, best_distance)
+        **kwargs: Other GalleryMatcher.score() arguments
+
+    Returns:
+        MatchScores
+    """
+    if _idle is None:
+        return matcher.score(face_queries, on_partition=on_partition, **kwargs)
+
+    scores = _run("score", matcher.version, face_queries, on_partition is not None, kwargs,
+                  on_event=on_partition)
+    if scores is None:
+        # Version already removed from disk (superseded); score it here
+        logger.warning(f"Gallery version {matcher.version} unavailable to workers, scoring in-process")
+        return matcher.score(face_queries, on_partition=on_partition, **kwargs)
+    return scores
+
+
+def score_batch(matcher, face_queries, **kwargs):
+    """
+    matcher.score_batch(face_queries, **kwargs), in a worker process when the
+    pool is running.
+
+    Args:
+        matcher: GalleryMatcher of the gallery version to score against
+        face_queries: (F, D) one face embedding per detected face
+        **kwargs: Other GalleryMatcher.score_batch() arguments
+
+    Returns:
+        list: One MatchScores per face
+    """
+    if _idle is None:
+        return matcher.score_batch(face_queries, **kwargs)
+
+    scores = _run("score_batch", matcher.version, face_queries, kwargs)
+    if scores is None:
+        logger.warning(f"Gallery version {matcher.version} unavailable to workers, scoring in-process")
+        return matcher.score_batch(face_queries, **kwargs)
+    return scores
+
+
+# ─────────────────────────────────────────────
+# Worker process side
+# ─────────────────────────────────────────────
+
+def _worker_main(reader, writer, settings):
+    global _worker_writer
+    _worker_writer = writer
+    _init_worker(settings)
+    tasks = {"warm": _warm, "augment": _augment, "score": _score, "score_batch": _score_batch}
+    while True:
+        try:
+            task, args = reader.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        try:
+            reply = (True, tasks[task](*args))
+        except Exception as e:
+            reply = (False, f"{type(e).__name__}: {e}")
+        writer.send(reply)
+
+
+def _init_worker(settings):
+    cv2.setNumThreads(1)
+    _worker_settings.update(settings)
+    try:
+        _matcher_for(None)
+    except Exception as e:
+        logger.warning(f"Worker could not map the gallery: {e}")
+
+
+def _matcher_for(version):
+    """The worker's GalleryMatcher for a gallery version (None = newest)."""
+    global _worker_matcher
+    if _worker_matcher is not None and (version is None or _worker_matcher.version == version):
+        return _worker_matcher
+    gallery = gallery_store.open_gallery(_worker_settings["gallery_dir"], version)
+    if gallery is None:
+        return None
+    _worker_matcher = GalleryMatcher(
+        gallery,
+        quantization=_worker_settings["quantization"],
+        rerank_candidates=_worker_settings["rerank_candidates"],
+        shortlist=_worker_settings["shortlist"],
+    )
+    return _worker_matcher
+
+
+def _warm():
+    return _worker_matcher.version if _worker_matcher is not None else None
+
+
+def _augment(face_crop, families):
+    return generate_query_augmentations(face_crop, families, parallel=False)
+
+
+def _send_event(*event):
+    _worker_writer.send(("event", event))
+
+
+def _score(version, face_queries, stream_events, kwargs):
+    matcher = _matcher_for(version)
+    if matcher is None:
+        return None
+    return matcher.score(face_queries, on_partition=_send_event if stream_events else None, **kwargs)
+
+
+def _score_batch(version, face_queries, kwargs):
+    matcher = _matcher_for(version)
+    if matcher is None:
+        return None
+    return matcher.score_batch(face_queries, **kwargs)
@@ -0,0 +1,531 @@
+# app/services/recording_indexer.py
+"""
+Offline recognition index of stored recordings.
+
+Uploaded recordings were never analysed, so there was no way to ask whether
+an inmate had been seen on a camera in a given period. The indexer goes
+through completed recordings in the background and stores a detection
+timeline per recording (RecordingDetection: time, bounding box, closest
+inmate and its distance):
+    - sampling: frames are sampled at RECORDING_INDEX_SAMPLE_FPS of video
+      time; a sample is only analysed when the scene changed since the last
+      analysed frame (mean difference of small grayscale thumbnails above
+      RECORDING_INDEX_SCENE_THRESHOLD) or RECORDING_INDEX_MAX_GAP_SECONDS of
+      video passed, so static footage costs almost nothing
+    - faces found in analysed frames are embedded in batches of
+      RECORDING_INDEX_BATCH_SIZE through the embedding service's
+      /encode_multiple, then matched against the gallery in one
+      GalleryMatcher.score_batch() pass per batch
+    - recordings are indexed in parallel, one worker process per recording,
+      up to RECORDING_INDEX_WORKERS at a time; the indexer is off (0) unless
+      the server launchers (run.py, serve.py) turn it on, so the flask CLI,
+      migrations and scripts importing the app start no processes
+    - progress is committed every RECORDING_INDEX_CHUNK_SECONDS of video
+      together with that chunk's detections (RecordingIndex.processed_seconds),
+      so an interrupted recording resumes from its last chunk; failed
+      recordings are retried up to RECORDING_INDEX_MAX_ATTEMPTS times
+    - several server processes may run an indexer (reloader, multi-worker
+      deployments): a recording is claimed with a conditional UPDATE of its
+      RecordingIndex row (owner, heartbeat_at), and progress is only written
+      while the claim holds; a claim whose heartbeat is older than
+      RECORDING_INDEX_LEASE_SECONDS (a process that died) is taken over
+
+Worker processes are started with 'forkserver' and report over one-way pipes
+that the coordinator thread waits on with multiprocessing.connection.wait()
+(cooperative under gevent), as in app/services/recognition_pool.py.
+"""
+
+import multiprocessing
+import os
+import socket
+import threading
+import uuid
+import time
+from datetime import datetime, timedelta
+from multiprocessing.connection import wait
+
+import cv2
+import numpy as np
+
+from app.extensions import db
+from app.utils.logger import get_logger
+
+logger = get_logger("recording_indexer")
+
+DEFAULT_WORKERS = 0  # Off; run.py / serve.py set RECORDING_INDEX_WORKERS
+DEFAULT_SAMPLE_FPS = 1.0
+DEFAULT_SCENE_THRESHOLD = 6.0  # Mean absolute gray-level difference (0-255)
+DEFAULT_MAX_GAP_SECONDS = 10.0
+DEFAULT_CHUNK_SECONDS = 30.0
+DEFAULT_BATCH_SIZE = 16
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_POLL_SECONDS = 30
+DEFAULT_LEASE_SECONDS = 120
+SCENE_WIDTH = 64  # Thumbnail width for scene-change detection
+
+_app = None
+_thread = None
+_owner = None  # This process's claim id
+_last_heartbeat = 0.0
+_wake = threading.Event()
+_stop = threading.Event()
+_jobs = {}  # recording id -> _Job
+_settings = {}
+_counters = {"indexed": 0, "failed": 0, "chunks": 0, "detections": 0}
+
+
+class _Job:
+    """A worker process indexing one recording, and the read end of its pipe."""
+
+    def __init__(self, recording_id, path, start_seconds, settings):
+        context = multiprocessing.get_context("forkserver")
+        self.recording_id = recording_id
+        self.started_at = time.monotonic()
+        self.reader, writer = context.Pipe(duplex=False)
+        self.process = context.Process(
+            target=_index_worker, args=(writer, path, start_seconds, settings),
+            name=f"recording-indexer-{recording_id}", daemon=True,
+        )
+        self.process.start()
+        writer.close()
+
+    def close(self):
+        self.reader.close()
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+def start_indexer(app):
+    """Start the coordinator thread (no-op if RECORDING_INDEX_WORKERS is 0)."""
+    global _app, _thread, _owner
+    workers = app.config.get("RECORDING_INDEX_WORKERS", DEFAULT_WORKERS)
+    if not workers or _thread is not None:
+        return
+    _app = app
+    _owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    _settings.update({
+        "workers": workers,
+        "gallery_dir": app.config.get("GALLERY_DIR") or os.path.join(app.instance_path, "gallery"),
+        "sample_fps": app.config.get("RECORDING_INDEX_SAMPLE_FPS", DEFAULT_SAMPLE_FPS),
+        "scene_threshold": app.config.get("RECORDING_INDEX_SCENE_THRESHOLD", DEFAULT_SCENE_THRESHOLD),
+        "max_gap": app.config.get("RECORDING_INDEX_MAX_GAP_SECONDS", DEFAULT_MAX_GAP_SECONDS),
+        "chunk_seconds": app.config.get("RECORDING_INDEX_CHUNK_SECONDS", DEFAULT_CHUNK_SECONDS),
+        "batch_size": app.config.get("RECORDING_INDEX_BATCH_SIZE", DEFAULT_BATCH_SIZE),
+        "max_attempts": app.config.get("RECORDING_INDEX_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS),
+        "poll_seconds": app.config.get("RECORDING_INDEX_POLL_SECONDS", DEFAULT_POLL_SECONDS),
+        "lease_seconds": app.config.get("RECORDING_INDEX_LEASE_SECONDS", DEFAULT_LEASE_SECONDS),
+    })
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="recording-indexer", daemon=True)
+    _thread.start()
+
+
+def stop_indexer():
+    global _thread
+    _stop.set()
+    _wake.set()
+    if _thread is not None:
+        _thread.join(timeout=5)
+        _thread = None
+    for job in list(_jobs.values()):
+        job.close()
+    if _jobs and _app is not None:
+        _release(list(_jobs))
+    _jobs.clear()
+
+
+def _release(recording_ids):
+    """Hand this process's claims back, so another indexer resumes them without waiting for the lease."""
+    from app.models.recording_index import RecordingIndex
+
+    try:
+        with _app.app_context():
+            for recording_id in recording_ids:
+                db.session.execute(
+                    db.update(RecordingIndex).where(_owned(recording_id))
+                    .values(status="pending", owner=None, heartbeat_at=None)
+                    .execution_options(synchronize_session=False)
+                )
+            db.session.commit()
+    except Exception as e:
+        logger.warning(f"Could not release recording index claims: {e}")
+
+
+def wake():
+    """Look for new completed recordings now rather than at the next poll."""
+    _wake.set()
+
+
+def reset_index(recording_id):
+    """
+    Index a recording again from the start (dropping its detections and
+    progress), e.g. after the gallery changed. Written straight to the
+    database, so it holds whichever process serves the request: clearing the
+    owner voids any claim, and the indexer holding it drops the job at its
+    next heartbeat (its late chunks no longer match _owned()). Call wake()
+    after the commit to start it again now.
+    """
+    from app.models.recording_index import RecordingDetection, RecordingIndex
+
+    RecordingDetection.query.filter_by(recording_id=recording_id).delete()
+    index = db.session.get(RecordingIndex, recording_id) or RecordingIndex(recording_id=recording_id)
+    db.session.add(index)
+    index.status, index.attempts, index.error = "pending", 0, None
+    index.owner = index.heartbeat_at = None
+    index.processed_seconds = 0.0
+    index.frames_sampled = index.frames_analyzed = index.faces = 0
+    index.started_at = index.finished_at = None
+    db.session.commit()
+
+
+def indexer_stats():
+    now = time.monotonic()
+    return {
+        "workers": _settings.get("workers", 0),
+        "owner": _owner,
+        "running": [{"recording_id": job.recording_id, "pid": job.process.pid,
+                     "seconds": round(now - job.started_at, 1)} for job in list(_jobs.values())],
+        **_counters,
+    }
+
+
+# ─────────────────────────────────────────────
+# Coordinator
+# ─────────────────────────────────────────────
+
+def _run():
+    while not _stop.is_set():
+        try:
+            with _app.app_context():
+                _start_jobs()
+                jobs = {job.reader: job for job in _jobs.values()}
+                if not jobs:
+                    db.session.remove()
+            if not jobs:
+                _wake.wait(_settings["poll_seconds"])
+                _wake.clear()
+                continue
+            ready = wait(list(jobs), timeout=1.0)
+            with _app.app_context():
+                for reader in ready:
+                    _handle(jobs[reader])
+                _heartbeat()
+        except Exception as e:
+            logger.exception(f"Recording indexer error: {e}")
+            _stop.wait(1.0)
+
+
+def _claimable():
+    """Rows an indexer may take: pending ones, and ones whose owner stopped reporting."""
+    from app.models.recording_index import RecordingIndex
+
+    expired = datetime.utcnow() - timedelta(seconds=_settings["lease_seconds"])
+    return db.or_(
+        RecordingIndex.status == "pending",
+        db.and_(RecordingIndex.status == "indexing",
+                db.or_(RecordingIndex.heartbeat_at.is_(None), RecordingIndex.heartbeat_at < expired)),
+    )
+
+
+def _claim(recording_id):
+    """Take a recording for this process; False if another indexer claimed it first."""
+    from app.models.recording_index import RecordingIndex
+
+    result = db.session.execute(
+        db.update(RecordingIndex)
+        .where(RecordingIndex.recording_id == recording_id, _claimable())
+        .values(status="indexing", owner=_owner, heartbeat_at=datetime.utcnow(),
+                attempts=RecordingIndex.attempts + 1, error=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def _owned(recording_id):
+    """WHERE clause for the row of a recording this process still holds."""
+    from app.models.recording_index import RecordingIndex
+
+    return db.and_(RecordingIndex.recording_id == recording_id,
+                   RecordingIndex.status == "indexing", RecordingIndex.owner == _owner)
+
+
+def _start_jobs():
+    from sqlalchemy.exc import IntegrityError
+
+    from app.models.recording import Recording
+    from app.models.recording_index import RecordingIndex
+    from app.routes.api.recording_routes import get_recordings_dir
+    from app.utils import gallery_store
+
+    # Completed recordings nobody queued yet
+    unindexed = (db.session.query(Recording.id)
+                 .outerjoin(RecordingIndex, RecordingIndex.recording_id == Recording.id)
+                 .filter(Recording.status == "completed", RecordingIndex.recording_id.is_(None))
+                 .limit(100).all())
+    if unindexed:
+        try:
+            db.session.add_all([RecordingIndex(recording_id=row.id) for row in unindexed])
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()  # Another indexer process queued them first
+
+    free = _settings["workers"] - len(_jobs)
+    if free <= 0:
+        return
+    candidates = (db.session.query(RecordingIndex.recording_id).join(Recording)
+                  .filter(_claimable(), ~RecordingIndex.recording_id.in_(list(_jobs) or [0]))
+                  .order_by(Recording.start_time)
+                  .limit(free).all())
+    for (recording_id,) in candidates:
+        if not _claim(recording_id):
+            continue
+        index = db.session.get(RecordingIndex, recording_id)
+        path = os.path.join(get_recordings_dir(), index.recording.file_path)
+        if not os.path.exists(path):
+            index.status, index.error, index.owner = "error", "Recording file not found", None
+            db.session.commit()
+            continue
+        index.started_at = index.started_at or datetime.utcnow()
+        index.gallery_version = gallery_store.current_version(_settings["gallery_dir"])
+        db.session.commit()
+        _jobs[recording_id] = _Job(recording_id, path, index.processed_seconds, _settings)
+        logger.info(f"Indexing recording {recording_id} from {index.processed_seconds:.0f}s "
+                    f"(attempt {index.attempts})")
+
+
+def _heartbeat():
+    """Renew this process's claims; stop jobs whose claim was reset or taken over."""
+    from app.models.recording_index import RecordingIndex
+
+    global _last_heartbeat
+    now = time.monotonic()
+    if not _jobs or now - _last_heartbeat < _settings["lease_seconds"] / 4:
+        return
+    _last_heartbeat = now
+    held = set()
+    for recording_id in list(_jobs):
+        result = db.session.execute(
+            db.update(RecordingIndex).where(_owned(recording_id))
+            .values(heartbeat_at=datetime.utcnow()).execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            held.add(recording_id)
+    db.session.commit()
+    for recording_id in set(_jobs) - held:
+        logger.warning(f"Lost the claim on recording {recording_id}; stopping its job")
+        _finish(_jobs[recording_id])
+
+
+def _handle(job):
+    """Apply one message from a worker (or its exit), if this process still holds the recording."""
+    from app.models.recording import Recording
+    from app.models.recording_index import RecordingDetection, RecordingIndex
+
+    try:
+        message = job.reader.recv()
+    except (EOFError, OSError):
+        message = ("error", "indexer worker exited")
+
+    kind = message[0]
+    now = datetime.utcnow()
+    if kind == "chunk":
+        _, processed_seconds, detections, counts = message
+        # Progress first: the conditional UPDATE both checks and holds the claim
+        # for the transaction the detections are inserted in
+        result = db.session.execute(
+            db.update(RecordingIndex).where(_owned(job.recording_id))
+            .values(processed_seconds=processed_seconds, heartbeat_at=now,
+                    frames_sampled=RecordingIndex.frames_sampled + counts["frames_sampled"],
+                    frames_analyzed=RecordingIndex.frames_analyzed + counts["frames_analyzed"],
+                    faces=RecordingIndex.faces + counts["faces"])
+            .execution_options(synchronize_session=False)
+        )
+        recording = db.session.get(Recording, job.recording_id)
+        if result.rowcount != 1 or recording is None:  # Deleted, reset or taken over meanwhile
+            db.session.rollback()
+            _finish(job)
+            return
+        for offset, x, y, w, h, inmate_id, distance in detections:
+            db.session.add(RecordingDetection(
+                recording_id=job.recording_id, camera_id=recording.camera_id,
+                offset_seconds=offset, detected_at=recording.start_time + timedelta(seconds=offset),
+                bbox_x=x, bbox_y=y, bbox_width=w, bbox_height=h,
+                inmate_id=inmate_id, distance=distance,
+            ))
+        db.session.commit()
+        _counters["chunks"] += 1
+        _counters["detections"] += len(detections)
+        return
+
+    if kind == "done":
+        values = {"status": "indexed", "finished_at": now}
+    else:
+        error = str(message[1])[:500]
+        values = {"status": db.case((RecordingIndex.attempts >= _settings["max_attempts"], "error"),
+                                    else_="pending"),
+                  "error": error}
+    result = db.session.execute(
+        db.update(RecordingIndex).where(_owned(job.recording_id))
+        .values(owner=None, heartbeat_at=None, **values).execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 1:
+        index = db.session.get(RecordingIndex, job.recording_id)
+        if kind == "done":
+            if not index.recording.duration and message[1]:
+                index.recording.duration = int(message[1])
+            _counters["indexed"] += 1
+            logger.info(f"Indexed recording {job.recording_id}: {index.faces} faces in "
+                        f"{index.frames_analyzed}/{index.frames_sampled} analysed samples")
+        else:
+            _counters["failed"] += 1
+            logger.warning(f"Indexing recording {job.recording_id} failed at {index.processed_seconds:.0f}s: "
+                           f"{error}")
+    db.session.commit()
+    _finish(job)
+
+
+def _finish(job):
+    _jobs.pop(job.recording_id, None)
+    job.close()
+
+
+# ─────────────────────────────────────────────
+# Worker process side
+# ─────────────────────────────────────────────
+
+_face_cascade = None
+
+
+def _index_worker(writer, path, start_seconds, settings):
+    cv2.setNumThreads(1)
+    try:
+        duration = _index_recording(writer, path, start_seconds, settings)
+        writer.send(("done", duration))
+    except (BrokenPipeError, EOFError):
+        pass  # The coordinator dropped the job (stopped, or reindex requested)
+    except Exception as e:
+        try:
+            writer.send(("error", f"{type(e).__name__}: {e}"))
+        except OSError:
+            pass
+    finally:
+        writer.close()
+
+
+def _index_recording(writer, path, start_seconds, settings):
+    """Index a recording from start_seconds, sending one message per chunk; returns the duration."""
+    import requests
+    from app.services.recognition_engine import GalleryMatcher
+    from app.utils import gallery_store
+
+    gallery = gallery_store.open_gallery(settings["gallery_dir"])
+    matcher = GalleryMatcher(gallery) if gallery is not None and len(gallery) else None
+    session = requests.Session()
+
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError("could not open recording")
+    fps = capture.get(cv2.CAP_PROP_FPS)
+    fps = fps if 0 < fps <= 240 else None  # WebM often reports nonsense
+    if start_seconds > 0:
+        capture.set(cv2.CAP_PROP_POS_MSEC, 1000 * start_seconds)
+
+    sample_interval = 1.0 / settings["sample_fps"]
+    next_sample = start_seconds
+    chunk_end = start_seconds + settings["chunk_seconds"]
+    last_thumb, last_analyzed = None, -np.inf
+    pending, detections = [], []
+    counts = {"frames_sampled": 0, "frames_analyzed": 0, "faces": 0}
+    frame_number, position = 0, start_seconds
+
+    def flush():
+        if pending:
+            detections.extend(_match_faces(pending, matcher, gallery, session))
+            pending.clear()
+
+    def send_chunk(processed_seconds):
+        flush()
+        writer.send(("chunk", processed_seconds, list(detections), dict(counts)))
+        detections.clear()
+        counts.update(frames_sampled=0, frames_analyzed=0, faces=0)
+
+    try:
+        while capture.grab():
+            msec = capture.get(cv2.CAP_PROP_POS_MSEC)
+            t = msec / 1000 if msec > 0 or not fps else frame_number / fps
+            frame_number += 1
+            if t < start_seconds:  # Seeking unsupported: skip forward
+                continue
+            position = t
+            if t >= chunk_end:
+                send_chunk(t)
+                chunk_end = t + settings["chunk_seconds"]
+            if t < next_sample:
+                continue
+            next_sample = max(next_sample + sample_interval, t)
+
+            ok, frame = capture.retrieve()
+            if not ok:
+                continue
+            counts["frames_sampled"] += 1
+            height = max(1, round(frame.shape[0] * SCENE_WIDTH / frame.shape[1]))
+            thumb = cv2.cvtColor(cv2.resize(frame, (SCENE_WIDTH, height), interpolation=cv2.INTER_AREA),
+                                 cv2.COLOR_BGR2GRAY)
+            changed = (last_thumb is None or t - last_analyzed >= settings["max_gap"]
+                       or float(cv2.absdiff(thumb, last_thumb).mean()) >= settings["scene_threshold"])
+            if not changed:
+                continue
+            last_thumb, last_analyzed = thumb, t
+            counts["frames_analyzed"] += 1
+
+            for crop, bbox in _detect_faces(frame):
+                counts["faces"] += 1
+                pending.append((t, crop, bbox))
+            if len(pending) >= settings["batch_size"]:
+                flush()
+    finally:
+        capture.release()
+        session.close()
+    send_chunk(position)
+    return position
+
+
+def _detect_faces(frame):
+    """[(128x128 face crop, (x, y, w, h)), ...] with the Haar cascade used for live frames."""
+    global _face_cascade
+    if _face_cascade is None:
+        _face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    faces = []
+    for min_neighbors in (5, 4, 3):
+        faces = _face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=min_neighbors, minSize=(30, 30))
+        if len(faces) > 0:
+            break
+    crops = []
+    for x, y, w, h in faces:
+        padding = int(max(w, h) * 0.2)
+        x1, y1 = max(0, x - padding), max(0, y - padding)
+        x2, y2 = min(frame.shape[1], x + w + padding), min(frame.shape[0], y + h + padding)
+        crops.append((cv2.resize(frame[y1:y2, x1:x2], (128, 128)), (int(x), int(y), int(w), int(h))))
+    return crops
+
+
+def _match_faces(pending, matcher, gallery, session):
+    """Embed a batch of face crops and match them; one detection tuple per face."""
+    from app.utils.embedding_client import extract_embeddings_batch
+
+    embeddings = extract_embeddings_batch([crop for _, crop, _ in pending], session=session)
+    if embeddings is None:
+        raise RuntimeError("embedding service unavailable")
+    matches = [(None, None)] * len(pending)
+    valid = [i for i, embedding in enumerate(embeddings) if embedding is not None]
+    if matcher is not None and valid:
+        queries = np.asarray([embeddings[i] for i in valid], dtype=np.float32)
+        for i, scores in zip(valid, matcher.score_batch(queries)):
+            best = int(scores.ranked(limit=1)[0])
+            distance = float(scores.distances[best])
+            if np.isfinite(distance):
+                matches[i] = (gallery.inmates[best]["id"], distance)
+    return [(t, *bbox, *match) for (t, _, bbox), match in zip(pending, matches)]
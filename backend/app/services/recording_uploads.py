@@ -0,0 +1,308 @@
+# app/services/recording_uploads.py
+"""
+Chunked, resumable recording uploads.
+
+POST /api/recordings/<id>/upload used to take the whole video as one
+multipart field: werkzeug buffered it to a temp file before the route saw
+it, and a dropped connection lost the whole upload. An upload session instead
+receives the video as numbered chunks, each PUT as a raw request body and
+appended straight to a .part file next to the final file:
+    - chunk n is accepted only when chunks 0..n-1 are in; a later chunk is
+      refused with the index the session expects next
+    - retries are idempotent: an already stored chunk is answered from the
+      manifest (its SHA-256 must match) without being written again
+    - a chunk cut off mid-body is truncated away, so the file only ever
+      holds whole chunks
+    - finish_session() checks the chunk count / size the client announces
+      and moves the .part file into place
+Session state is a small JSON manifest under '<recordings dir>/.uploads',
+rewritten atomically after every chunk, so sessions survive a restart and a
+client can ask where to resume (load_session()). Chunks of one session are
+written one at a time across every server process: each write holds an
+exclusive lock on the manifest's '.lock' file (fcntl.flock, or an O_EXCL
+lock file where fcntl is unavailable).
+"""
+
+import hashlib
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: O_EXCL lock files instead
+    fcntl = None
+
+from app.utils.logger import get_logger
+
+logger = get_logger("recording_uploads")
+
+SESSIONS_DIR = ".uploads"
+READ_BLOCK_BYTES = 256 * 1024
+
+DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024
+DEFAULT_SESSION_TTL_SECONDS = 24 * 3600
+
+# O_EXCL fallback: lock files older than this were left by a crashed process
+STALE_LOCK_SECONDS = 600
+LOCK_POLL_SECONDS = 0.05
+
+
+class UploadError(Exception):
+    """A request the session cannot accept; status is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400, session=None):
+        super().__init__(message)
+        self.status = status
+        self.session = session
+
+
+def _manifest_path(recordings_dir, session_id):
+    return os.path.join(recordings_dir, SESSIONS_DIR, f"{session_id}.json")
+
+
+def _lock_path(recordings_dir, session_id):
+    return os.path.join(recordings_dir, SESSIONS_DIR, f"{session_id}.lock")
+
+
+@contextmanager
+def _session_lock(recordings_dir, session_id):
+    """Hold the session's lock file exclusively (blocks while another process or thread holds it)."""
+    if not session_id.isalnum():
+        raise UploadError("Unknown upload session", 404)
+    path = _lock_path(recordings_dir, session_id)
+    if fcntl is not None:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_RDWR)
+        except FileNotFoundError:
+            raise UploadError("Unknown upload session", 404)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)  # Releases the flock
+        return
+
+    while True:
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > STALE_LOCK_SECONDS:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue
+            time.sleep(LOCK_POLL_SECONDS)
+        except FileNotFoundError:
+            raise UploadError("Unknown upload session", 404)
+    try:
+        yield
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _save(recordings_dir, session):
+    session["updated_at"] = time.time()
+    path = _manifest_path(recordings_dir, session["session_id"])
+    with open(path + ".tmp", "w") as f:
+        json.dump(session, f)
+    os.replace(path + ".tmp", path)
+
+
+def session_state(session):
+    """Client view of a session: where to resume and how large chunks may be."""
+    return {
+        "session_id": session["session_id"],
+        "recording_id": session["recording_id"],
+        "chunk_size": session["chunk_size"],
+        "next_chunk": len(session["chunks"]),
+        "received_bytes": session["offset"],
+        "expected_size": session.get("expected_size"),
+    }
+
+
+def create_session(recordings_dir, recording, chunk_size=DEFAULT_CHUNK_BYTES, expected_size=None):
+    """
+    Open an upload session for a recording, starting an empty .part file.
+
+    Args:
+        recordings_dir: Recordings root (file paths are relative to it)
+        recording: Recording the upload belongs to
+        chunk_size: Largest chunk accepted (bytes)
+        expected_size: Total size announced by the client (checked when finishing)
+
+    Returns:
+        dict: The session manifest
+    """
+    os.makedirs(os.path.join(recordings_dir, SESSIONS_DIR), exist_ok=True)
+    session_id = uuid.uuid4().hex
+    part_path = f"{recording.file_path}.{session_id}.part"
+    full_part_path = os.path.join(recordings_dir, part_path)
+    os.makedirs(os.path.dirname(full_part_path), exist_ok=True)
+    open(full_part_path, "wb").close()
+
+    session = {
+        "session_id": session_id,
+        "recording_id": recording.id,
+        "file_path": recording.file_path,
+        "part_path": part_path,
+        "chunk_size": chunk_size,
+        "expected_size": expected_size,
+        "offset": 0,
+        "chunks": [],  # [size, sha256] per stored chunk
+        "created_at": time.time(),
+    }
+    _save(recordings_dir, session)
+    logger.info(f"Upload session {session_id} opened for recording {recording.id}")
+    return session
+
+
+def load_session(recordings_dir, session_id, recording_id):
+    """The session's manifest; UploadError 404 if unknown or not the recording's."""
+    if not session_id.isalnum():
+        raise UploadError("Unknown upload session", 404)
+    try:
+        with open(_manifest_path(recordings_dir, session_id)) as f:
+            session = json.load(f)
+    except (OSError, ValueError):
+        raise UploadError("Unknown upload session", 404)
+    if session["recording_id"] != recording_id:
+        raise UploadError("Unknown upload session", 404)
+    return session
+
+
+def write_chunk(recordings_dir, session_id, recording_id, index, stream, length):
+    """
+    Append chunk `index` read from `stream` (a request body of `length` bytes).
+
+    Returns:
+        (dict, bool): The updated session, and whether the chunk was a
+        retry of one already stored
+    """
+    with _session_lock(recordings_dir, session_id):
+        session = load_session(recordings_dir, session_id, recording_id)
+        if length is None:
+            raise UploadError("Content-Length is required", 411, session)
+        if length <= 0 or length > session["chunk_size"]:
+            raise UploadError(f"Chunks must be 1 to {session['chunk_size']} bytes", 413, session)
+
+        stored = len(session["chunks"])
+        if index < stored:
+            size, digest = session["chunks"][index]
+            received = hashlib.sha256()
+            for block in iter(lambda: stream.read(READ_BLOCK_BYTES), b""):
+                received.update(block)
+            if size != length or digest != received.hexdigest():
+                raise UploadError(f"Chunk {index} was already received with different content", 409, session)
+            return session, True
+        if index > stored:
+            raise UploadError(f"Expected chunk {stored}", 409, session)
+
+        digest = hashlib.sha256()
+        written = 0
+        full_part_path = os.path.join(recordings_dir, session["part_path"])
+        with open(full_part_path, "r+b") as f:
+            f.truncate(session["offset"])  # Drop anything left by an interrupted chunk
+            f.seek(session["offset"])
+            try:
+                for block in iter(lambda: stream.read(READ_BLOCK_BYTES), b""):
+                    f.write(block)
+                    digest.update(block)
+                    written += len(block)
+            except Exception as e:
+                written = -1
+                logger.warning(f"Upload session {session_id}: chunk {index} interrupted: {e}")
+            if written != length:
+                f.truncate(session["offset"])
+                raise UploadError(f"Chunk {index} was incomplete", 400, session)
+            f.flush()
+            os.fsync(f.fileno())
+
+        session["chunks"].append([length, digest.hexdigest()])
+        session["offset"] += length
+        _save(recordings_dir, session)
+        return session, False
+
+
+def finish_session(recordings_dir, session_id, recording_id, total_chunks=None, total_size=None):
+    """
+    Close a session and move its .part file into place.
+
+    Args:
+        total_chunks: Chunk count the client sent (checked if given)
+        total_size: Byte count the client sent (checked if given; defaults to
+                    the size announced when the session was opened)
+
+    Returns:
+        str: Full path of the finished recording file
+    """
+    with _session_lock(recordings_dir, session_id):
+        session = load_session(recordings_dir, session_id, recording_id)
+        total_size = total_size if total_size is not None else session.get("expected_size")
+        if total_chunks is not None and total_chunks != len(session["chunks"]):
+            raise UploadError(f"Received {len(session['chunks'])} of {total_chunks} chunks", 409, session)
+        if total_size is not None and total_size != session["offset"]:
+            raise UploadError(f"Received {session['offset']} of {total_size} bytes", 409, session)
+        if not session["chunks"]:
+            raise UploadError("No chunks were uploaded", 400, session)
+
+        full_path = os.path.join(recordings_dir, session["file_path"])
+        os.replace(os.path.join(recordings_dir, session["part_path"]), full_path)
+        os.remove(_manifest_path(recordings_dir, session_id))
+        if fcntl is not None:
+            # Waiters holding the old lock file find the manifest gone (404)
+            os.remove(_lock_path(recordings_dir, session_id))
+    logger.info(f"Upload session {session_id} finished: {session['offset']} bytes in {len(session['chunks'])} chunks")
+    return full_path
+
+
+def expire_sessions(recordings_dir, ttl_seconds=DEFAULT_SESSION_TTL_SECONDS):
+    """Delete sessions (and their .part files) idle for longer than ttl_seconds."""
+    sessions_dir = os.path.join(recordings_dir, SESSIONS_DIR)
+    if not os.path.isdir(sessions_dir):
+        return 0
+    expired = 0
+    cutoff = time.time() - ttl_seconds
+    for name in os.listdir(sessions_dir):
+        path = os.path.join(sessions_dir, name)
+        try:
+            if os.path.getmtime(path) >= cutoff:
+                continue
+        except OSError:
+            continue
+        if name.endswith(".lock"):
+            # Lock files outlive their manifest only when a session id was guessed
+            if not os.path.exists(path[:-len(".lock")] + ".json"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            continue
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(path) as f:
+                part_path = json.load(f).get("part_path")
+            if part_path:
+                os.remove(os.path.join(recordings_dir, part_path))
+        except (OSError, ValueError):
+            pass
+        try:
+            os.remove(path)
+            expired += 1
+        except OSError:
+            pass
+        try:
+            os.remove(_lock_path(recordings_dir, name[:-len(".json")]))
+        except OSError:
+            pass
+    if expired:
+        logger.info(f"Expired {expired} idle upload sessions")
+    return expired
@@ -1,38 +1,175 @@
 # app/socket_events.py
-from flask_socketio import emit, join_room
+from flask_socketio import join_room
 import base64
-import datetime
+import binascii
+from flask import current_app, request
 from flask_login import current_user
 from app import socketio
+from app.extensions import db
+from app.models.camera import Camera
+from app.models.user import User
+from app.services import frame_ingest, frame_relay
+from app.utils.jwt import decode_jwt
 
-@socketio.on('connect')
-def handle_connect():
+def _socket_user(auth):
+    """Session user, else the user of the JWT from the connect auth payload, token query arg or bearer header."""
     if current_user.is_authenticated:
-        join_room(current_user.username)
-        print(f"{current_user.username} connected.")
+        return current_user
+    token = auth.get('token') or request.args.get('token')
+    auth_header = request.headers.get('Authorization', '')
+    if not token and auth_header.startswith('Bearer '):
+        token = auth_header.split(' ', 1)[1]
+    payload = decode_jwt(token) if token else None
+    if not payload or payload.get('user_id') is None:
+        return None
+    return db.session.get(User, payload['user_id'])
+
+
+@socketio.on('connect')
+def handle_connect(auth=None):
+    user = _socket_user(auth if isinstance(auth, dict) else {})
+    if user is not None:
+        join_room(user.username)
+        join_room(f"user_{user.id}")  # Per-user events (recognition job results)
+        print(f"{user.username} connected.")
     else:
         print("Anonymous user connected.")
 
+@socketio.on('disconnect')
+def handle_disconnect(reason=None):
+    frame_relay.unsubscribe(request.sid)
+
+# ─────────────────────────────────────────────
+# Live view relay (app/services/frame_relay.py)
+# ─────────────────────────────────────────────
+def _decode_frame(frame):
+    """JPEG bytes from a binary attachment or a legacy base64 (data URL) string."""
+    if isinstance(frame, (bytes, bytearray)):
+        return bytes(frame)
+    if isinstance(frame, str) and frame:
+        try:
+            return base64.b64decode(frame.split(',', 1)[-1])
+        except (binascii.Error, ValueError):
+            return None
+    return None
+
+
+def _camera_key(data):
+    """Relay key of the camera a subscription or frame refers to."""
+    if data.get('camera_id'):
+        return f"camera:{int(data['camera_id'])}"
+    return f"user:{int(data.get('user_id') or current_user.id)}"
+
+
+def _owns_camera(user, camera_id):
+    """Admins may use every camera, other users only their own."""
+    if user.is_admin:
+        return True
+    return Camera.query.filter_by(id=camera_id, user_id=user.id).first() is not None
+
+
+def _may_view(camera_key):
+    kind, _, key_id = camera_key.partition(':')
+    if kind == 'user':
+        return current_user.is_admin or int(key_id) == current_user.id
+    return _owns_camera(current_user, int(key_id))
+
+
 @socketio.on('send_frame')
 def handle_send_frame(data):
-    if not current_user.is_authenticated:
+    """
+    A frame from the sender's camera ({'frame': JPEG bytes or base64,
+    'camera_id': optional}), relayed to that camera's subscribers. Frames
+    for a camera the sender does not own go to the sender's own
+    browser-camera key instead.
+    """
+    if not current_user.is_authenticated or not isinstance(data, dict):
         return
+    frame = _decode_frame(data.get('frame'))
+    if not frame:
+        return
+    try:
+        camera_id = int(data['camera_id']) if data.get('camera_id') else None
+    except (TypeError, ValueError):
+        camera_id = None
+    if camera_id is not None and _owns_camera(current_user, camera_id):
+        camera_key = f"camera:{camera_id}"
+    else:
+        camera_key = f"user:{current_user.id}"
+    frame_relay.publish(camera_key, frame)
+
+
+@socketio.on('subscribe_camera')
+def handle_subscribe_camera(data=None):
+    """
+    Receive a camera's frames as 'receive_frame' events.
+
+    data: {'camera_id' or 'user_id' (the user's own browser camera),
+    'max_width': pixels, 'fps': frames per second}. Each frame must be
+    acknowledged before the next is sent. Returns {'ok', 'camera', ...}.
+    """
+    if not current_user.is_authenticated:
+        return {'ok': False, 'error': 'unauthorized'}
+    data = data if isinstance(data, dict) else {}
+    try:
+        camera_key = _camera_key(data)
+        max_width = int(data.get('max_width') or current_app.config.get('RELAY_DEFAULT_MAX_WIDTH', 640))
+        fps = float(data.get('fps') or current_app.config.get('RELAY_DEFAULT_FPS', 5))
+    except (TypeError, ValueError):
+        return {'ok': False, 'error': 'invalid subscription'}
+    if not _may_view(camera_key):
+        return {'ok': False, 'error': 'forbidden'}
+    subscriber = frame_relay.subscribe(request.sid, current_user.id, camera_key, max_width, fps)
+    return {'ok': True, 'camera': camera_key, 'max_width': subscriber.max_width, 'fps': subscriber.fps}
+
+
+@socketio.on('unsubscribe_camera')
+def handle_unsubscribe_camera(data=None):
+    data = data if isinstance(data, dict) and current_user.is_authenticated else {}
+    try:
+        camera_key = _camera_key(data) if data else None
+    except (TypeError, ValueError):
+        return {'ok': False, 'error': 'invalid camera'}
+    frame_relay.unsubscribe(request.sid, camera_key)
+    return {'ok': True}
+
+
+# ─────────────────────────────────────────────
+# '/camera': binary frame ingestion for recognition (app/services/frame_ingest.py)
+# ─────────────────────────────────────────────
+@socketio.on('connect', namespace=frame_ingest.NAMESPACE)
+def handle_camera_connect(auth=None):
+    auth = auth if isinstance(auth, dict) else {}
+    user = _socket_user(auth)
+    if user is None:
+        raise ConnectionRefusedError('unauthorized')
+    try:
+        camera_id = auth.get('camera_id') or request.args.get('camera_id')
+        camera_id = int(camera_id) if camera_id else None
+    except (TypeError, ValueError):
+        raise ConnectionRefusedError('invalid camera_id')
+    # Recognitions, locations and alerts are attributed to this camera
+    if camera_id is not None and not _owns_camera(user, camera_id):
+        raise ConnectionRefusedError('forbidden')
+
+    from app.routes.recognition_api import recognize_live_frame
+    frame_ingest.open_connection(
+        current_app._get_current_object(), request.sid, user.id, camera_id, recognize_live_frame
+    )
+
+
+@socketio.on('disconnect', namespace=frame_ingest.NAMESPACE)
+def handle_camera_disconnect(reason=None):
+    frame_ingest.close_connection(request.sid)
+
 
-    frame_data = data.get('frame')
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    # For Admins: broadcast frames to 'admin' room (optional later)
-    # For now: emit to user's personal room
-    emit('receive_frame', {
-        'frame': frame_data,
-        'username': current_user.username,
-        'timestamp': timestamp,
-    }, room=current_user.username)
-
-    # If admin, broadcast also to a "global" room
-    if current_user.is_admin:
-        emit('receive_frame', {
-            'frame': frame_data,
-            'username': current_user.username,
-            'timestamp': timestamp,
-        }, broadcast=True)
+@socketio.on('frame', namespace=frame_ingest.NAMESPACE)
+def handle_camera_frame(data, seq=None):
+    """
+    A JPEG frame as a binary attachment: either the bytes themselves or
+    {'frame': bytes, 'seq': n}. The return value is the acknowledgement.
+    """
+    if isinstance(data, dict):
+        seq = data.get('seq', seq)
+        data = data.get('frame')
+    return frame_ingest.submit_frame(request.sid, seq, data)
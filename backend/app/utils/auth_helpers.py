@@ -1,5 +1,7 @@
 from functools import wraps
+from flask import request
 from flask_login import current_user
+from app.utils.jwt import decode_jwt
 from app.utils.jwt_required import jwt_required  # adjust path if needed
 
 def login_or_jwt_required(f):
@@ -8,4 +10,29 @@ def login_or_jwt_required(f):
         if current_user.is_authenticated:
             return f(*args, **kwargs)
         return jwt_required(f)(*args, **kwargs)
-    return decorated_function
\ No newline at end of file
+    return decorated_function
+
+
+# login_or_jwt_required leaves current_user anonymous for bearer-token callers;
+# these resolve the caller either way.
+def request_user_id():
+    """Id of the authenticated caller (session user or JWT bearer)."""
+    if current_user.is_authenticated:
+        return current_user.id
+    auth_header = request.headers.get('Authorization', '')
+    if auth_header.startswith('Bearer '):
+        payload = decode_jwt(auth_header.split(' ', 1)[1])
+        if payload:
+            return payload.get('user_id')
+    return None
+
+
+def request_is_admin():
+    """Whether the authenticated caller is an admin (checked against the user row, not the token)."""
+    if current_user.is_authenticated:
+        return bool(current_user.is_admin)
+    from app.extensions import db
+    from app.models.user import User
+    user_id = request_user_id()
+    user = db.session.get(User, user_id) if user_id is not None else None
+    return bool(user and user.is_admin)
\ No newline at end of file
@@ -0,0 +1,486 @@
+# app/utils/camera_stream.py
+"""
+Server-side ingestion of RTSP / USB / video-file cameras.
+
+Camera rows describe IP and USB cameras (camera_type 'rtsp' with stream_url,
+'usb' with device_id), but until now every frame came from a browser. Each
+active camera whose type the server can open gets a CameraStream:
+    - a decode thread reads the source with cv2.VideoCapture, keeping only
+      the newest sampled frame (CAMERA_STREAM_SAMPLE_FPS) in a latest-frame
+      buffer; live sources are read continuously so the capture buffer never
+      lags behind the scene
+    - a recognition thread takes the buffered frame and runs it through the
+      same path as browser frames (recognize_live_frame), without HTTP;
+      samples that arrive while a frame is being recognized replace each
+      other, so results never fall behind
+    - a source that fails to open or stops delivering frames is reopened
+      with exponential backoff (CAMERA_STREAM_RECONNECT_MIN/MAX_SECONDS)
+    - sampled frames are also published to the camera's live viewers
+      (app/services/frame_relay.py) when it has any
+
+camera_type 'file' (stream_url is a local path) plays a video file at its
+native frame rate, looping, so the pipeline can be exercised offline.
+
+The server only opens sources that cannot reach beyond the camera itself:
+'rtsp' cameras need an rtsp:// or rtsps:// URL, and 'usb' / 'file' cameras
+(server devices and files) are opened only for cameras owned by an admin,
+files only inside CAMERA_STREAM_FILE_DIRS. The camera routes refuse other
+sources up front (validate_source()).
+
+Streams start with the server for every active camera (CAMERA_STREAM_AUTOSTART,
+set by run.py / serve.py; off for the flask CLI and scripts) and follow the
+camera routes: sync_camera() after create / update / toggle, stop_camera()
+after delete. A camera can be opened only once (a USB device
+in particular), so only one server process runs streams: the one holding
+an exclusive lock on CAMERA_STREAM_LOCK_FILE. It also re-reads the camera
+table every CAMERA_STREAM_SYNC_SECONDS, picking up changes made through
+other processes. stream_stats() reports per-camera decode,
+sample and recognition rates and the capture-to-result lag;
+GET /api/cameras/streams/status serves it.
+
+Under the gevent server (serve.py) the blocking VideoCapture calls run on
+gevent's native thread pool.
+"""
+
+import atexit
+import os
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+import cv2
+
+from app.utils.logger import get_logger
+
+logger = get_logger("camera_stream")
+
+CAMERA_TYPES = ("webcam", "rtsp", "usb", "file")
+STREAM_TYPES = ("rtsp", "usb", "file")
+RTSP_SCHEMES = ("rtsp", "rtsps")
+
+DEFAULT_SAMPLE_FPS = 2.0
+DEFAULT_RECONNECT_MIN_SECONDS = 1.0
+DEFAULT_RECONNECT_MAX_SECONDS = 30.0
+DEFAULT_OPEN_TIMEOUT_SECONDS = 10
+DEFAULT_SYNC_SECONDS = 30
+RELAY_JPEG_QUALITY = 80
+
+_app = None
+_process = None
+_lock_file = None  # Held open while this process runs the streams
+_sync_thread = None
+_streams = {}  # camera id -> CameraStream
+_lock = threading.Lock()
+_config = {
+    "sample_fps": DEFAULT_SAMPLE_FPS,
+    "reconnect_min": DEFAULT_RECONNECT_MIN_SECONDS,
+    "reconnect_max": DEFAULT_RECONNECT_MAX_SECONDS,
+    "open_timeout": DEFAULT_OPEN_TIMEOUT_SECONDS,
+    "file_dirs": [],
+    "gevent": False,
+}
+
+
+def _is_rtsp_url(url):
+    if not isinstance(url, str) or any(c.isspace() or ord(c) < 32 for c in url):
+        return False
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return False
+    return parts.scheme.lower() in RTSP_SCHEMES and bool(parts.hostname)
+
+
+def _is_allowed_file(path):
+    """True for an existing file inside one of CAMERA_STREAM_FILE_DIRS."""
+    if not isinstance(path, str) or not os.path.isabs(path):
+        return False
+    path = os.path.realpath(path)
+    for directory in _config["file_dirs"]:
+        directory = os.path.realpath(directory)
+        if os.path.commonpath([path, directory]) == directory:
+            return os.path.isfile(path)
+    return False
+
+
+def _owner_is_admin(camera):
+    from app.extensions import db
+    from app.models.user import User
+    owner = db.session.get(User, camera.user_id) if camera.user_id else None
+    return bool(owner and owner.is_admin)
+
+
+def validate_source(camera_type, stream_url=None, device_id=None, is_admin=False):
+    """
+    Check a camera's source before it is saved.
+
+    Returns:
+        str: Why the server must not accept it, or None if it is fine
+    """
+    camera_type = (camera_type or "webcam").lower()
+    if camera_type not in CAMERA_TYPES:
+        return f"camera_type must be one of: {', '.join(CAMERA_TYPES)}"
+    if camera_type == "rtsp" and not _is_rtsp_url(stream_url):
+        return "stream_url must be an rtsp:// or rtsps:// URL"
+    if camera_type == "file":
+        if not is_admin:
+            return "Only admins can add file cameras"
+        if not _is_allowed_file(stream_url):
+            return "stream_url must be a video file inside CAMERA_STREAM_FILE_DIRS"
+    return None
+
+
+def stream_source(camera):
+    """
+    What cv2.VideoCapture should open for a camera, or None if the server
+    cannot or may not read it (browser webcams, missing or disallowed
+    URL / device / file).
+    """
+    camera_type = (camera.camera_type or "").lower()
+    if camera_type == "rtsp":
+        return camera.stream_url if _is_rtsp_url(camera.stream_url) else None
+    if camera_type == "usb":
+        # Non-numeric ids are browser media devices; server devices are admin-only
+        device = (camera.device_id or "0").strip()
+        return int(device) if device.isdigit() and _owner_is_admin(camera) else None
+    if camera_type == "file":
+        return camera.stream_url if _is_allowed_file(camera.stream_url) and _owner_is_admin(camera) else None
+    return None
+
+
+def _redact(source):
+    """Source for logs and stats, without credentials in the URL."""
+    return re.sub(r"//[^/@]+@", "//***@", source) if isinstance(source, str) else source
+
+
+def _blocking(fn, *args):
+    """fn(*args), on a native thread under gevent (VideoCapture blocks in C)."""
+    if not _config["gevent"]:
+        return fn(*args)
+    from gevent import get_hub
+    return get_hub().threadpool.apply(fn, args)
+
+
+class CameraStream:
+    """
+    Decode and recognition threads of one camera.
+
+    Args:
+        app: Flask app (recognition runs in its context)
+        camera_id: Camera row id
+        source: VideoCapture source (URL, device index or file path)
+        process: Callable (frame, camera_id, camera_key) -> result dict
+        sample_fps: Frames per second handed to recognition
+    """
+
+    def __init__(self, app, camera_id, source, process, sample_fps=DEFAULT_SAMPLE_FPS):
+        self.app = app
+        self.camera_id = camera_id
+        self.camera_key = f"camera:{camera_id}"
+        self.source = source
+        self.is_file = isinstance(source, str) and os.path.isfile(source)
+        self.process = process
+        self.sample_interval = 1.0 / sample_fps if sample_fps > 0 else 0.0
+        self.state = "starting"
+        self.last_error = None
+        self._stop = threading.Event()
+        self._condition = threading.Condition()
+        self._latest = None  # (frame, captured_at) waiting to be recognized
+        self._threads = []
+        self.started_at = time.monotonic()
+        self.frames_read = 0
+        self.samples = 0
+        self.superseded = 0
+        self.recognized = 0
+        self.reconnects = 0
+        self.last_frame_at = None
+        self.last_status = None
+        self.lag_ms = None  # Moving average of capture -> result
+        self._decode_fps = None  # Moving average
+
+    def start(self):
+        for target, role in ((self._run_decoder, "decode"), (self._run_recognizer, "recognize")):
+            thread = threading.Thread(target=target, name=f"camera-{self.camera_id}-{role}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+        self.state = "stopped"
+
+    # ── decode ──────────────────────────────
+
+    def _open(self):
+        if isinstance(self.source, str) and not self.is_file:
+            timeout_ms = int(1000 * _config["open_timeout"])
+            capture = cv2.VideoCapture(self.source, cv2.CAP_FFMPEG, [
+                cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms,
+                cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms,
+            ])
+        else:
+            capture = cv2.VideoCapture(self.source)
+        if not capture.isOpened():
+            capture.release()
+            return None
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Honoured by some backends (V4L2)
+        return capture
+
+    def _run_decoder(self):
+        backoff = _config["reconnect_min"]
+        while not self._stop.is_set():
+            self.state = "connecting"
+            capture = _blocking(self._open)
+            if capture is None:
+                self.last_error = "could not open source"
+            else:
+                logger.info(f"Camera {self.camera_id} streaming from {_redact(self.source)}")
+                self.state = "streaming"
+                try:
+                    if self._read_frames(capture):
+                        backoff = _config["reconnect_min"]
+                finally:
+                    _blocking(capture.release)
+            if self._stop.is_set():
+                break
+            self.state = "reconnecting"
+            self.reconnects += 1
+            logger.warning(f"Camera {self.camera_id}: {self.last_error}; reconnecting in {backoff:.1f}s")
+            self._stop.wait(backoff)
+            backoff = min(2 * backoff, _config["reconnect_max"])
+
+    def _read_frames(self, capture):
+        """Read until the source fails or the stream stops; True if any frame was read."""
+        frame_interval = 0.0
+        if self.is_file:
+            native_fps = capture.get(cv2.CAP_PROP_FPS)
+            frame_interval = 1.0 / native_fps if native_fps and native_fps > 0 else 1.0 / 25
+        read_any = False
+        next_frame_at = next_sample_at = time.monotonic()
+        while not self._stop.is_set():
+            if frame_interval:
+                # Play files in real time
+                delay = next_frame_at - time.monotonic()
+                if delay > 0:
+                    self._stop.wait(delay)
+                next_frame_at = max(next_frame_at + frame_interval, time.monotonic() - frame_interval)
+            if not _blocking(capture.grab):
+                if self.is_file and read_any:
+                    capture.set(cv2.CAP_PROP_POS_FRAMES, 0)  # Loop
+                    continue
+                self.last_error = "stream ended or read failed"
+                return read_any
+            now = time.monotonic()
+            if self.last_frame_at is not None:
+                fps = 1.0 / max(now - self.last_frame_at, 1e-6)
+                self._decode_fps = fps if self._decode_fps is None else 0.9 * self._decode_fps + 0.1 * fps
+            self.last_frame_at = now
+            self.frames_read += 1
+            read_any = True
+            if now < next_sample_at:
+                continue
+            next_sample_at = max(next_sample_at + self.sample_interval, now)
+            ok, frame = _blocking(capture.retrieve)
+            if ok:
+                self._sample(frame, now)
+        return read_any
+
+    def _sample(self, frame, captured_at):
+        self.samples += 1
+        with self._condition:
+            if self._latest is not None:
+                self.superseded += 1
+            self._latest = (frame, captured_at)
+            self._condition.notify()
+        _publish_to_viewers(self.camera_key, frame)
+
+    # ── recognize ───────────────────────────
+
+    def _run_recognizer(self):
+        while True:
+            with self._condition:
+                while self._latest is None and not self._stop.is_set():
+                    self._condition.wait()
+                if self._stop.is_set():
+                    return
+                frame, captured_at = self._latest
+                self._latest = None
+            try:
+                with self.app.app_context():
+                    result = self.process(frame, self.camera_id, self.camera_key)
+                self.last_status = result.get("status") or result.get("error")
+            except Exception as e:
+                logger.exception(f"Recognizing frame from camera {self.camera_id} failed: {e}")
+                self.last_status = "error"
+            lag_ms = 1000 * (time.monotonic() - captured_at)
+            self.lag_ms = lag_ms if self.lag_ms is None else 0.8 * self.lag_ms + 0.2 * lag_ms
+            self.recognized += 1
+
+    def stats(self):
+        now = time.monotonic()
+        elapsed = max(now - self.started_at, 1e-6)
+        streaming = self.state == "streaming" and self._decode_fps is not None
+        return {
+            "camera_id": self.camera_id,
+            "source": _redact(self.source),
+            "state": self.state,
+            "decode_fps": round(self._decode_fps, 2) if streaming else 0.0,
+            "sample_fps": round(self.samples / elapsed, 2),
+            "recognized_fps": round(self.recognized / elapsed, 2),
+            "frames_read": self.frames_read,
+            "samples": self.samples,
+            "superseded": self.superseded,
+            "recognized": self.recognized,
+            "lag_ms": round(self.lag_ms, 1) if self.lag_ms is not None else None,
+            "last_frame_age_ms": round(1000 * (now - self.last_frame_at), 1) if self.last_frame_at else None,
+            "last_status": self.last_status,
+            "reconnects": self.reconnects,
+            "last_error": self.last_error,
+        }
+
+
+def _publish_to_viewers(camera_key, frame):
+    from app.services import frame_relay
+    if not frame_relay.has_subscribers(camera_key):
+        return
+    ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, RELAY_JPEG_QUALITY])
+    if ok:
+        frame_relay.publish(camera_key, buffer.tobytes())
+
+
+# ─────────────────────────────────────────────
+# Stream management
+# ─────────────────────────────────────────────
+
+def start_camera_streams(app, process=None):
+    """
+    Start streams for every active camera the server can read, unless
+    another process already runs them.
+
+    Args:
+        app: Flask app
+        process: Recognition callable (default: recognize_live_frame)
+    """
+    global _app, _process, _sync_thread
+    _config.update({
+        "sample_fps": app.config.get("CAMERA_STREAM_SAMPLE_FPS", DEFAULT_SAMPLE_FPS),
+        "reconnect_min": app.config.get("CAMERA_STREAM_RECONNECT_MIN_SECONDS", DEFAULT_RECONNECT_MIN_SECONDS),
+        "reconnect_max": app.config.get("CAMERA_STREAM_RECONNECT_MAX_SECONDS", DEFAULT_RECONNECT_MAX_SECONDS),
+        "open_timeout": app.config.get("CAMERA_STREAM_OPEN_TIMEOUT_SECONDS", DEFAULT_OPEN_TIMEOUT_SECONDS),
+        "file_dirs": list(app.config.get("CAMERA_STREAM_FILE_DIRS") or []),
+        "gevent": app.config.get("SOCKETIO_ASYNC_MODE") == "gevent",
+    })
+    if not app.config.get("CAMERA_STREAM_AUTOSTART", False) or _app is not None:
+        return
+    lock_path = app.config.get("CAMERA_STREAM_LOCK_FILE") or os.path.join(app.instance_path, "camera_streams.lock")
+    if not _acquire_lock(lock_path):
+        logger.info("Camera streams are run by another server process")
+        return
+    if process is None:
+        from app.routes.recognition_api import recognize_live_frame as process
+    _app, _process = app, process
+    with app.app_context():
+        _sync_all()
+    atexit.register(stop_camera_streams)
+    if _streams:
+        logger.info(f"Started {len(_streams)} camera streams")
+    interval = app.config.get("CAMERA_STREAM_SYNC_SECONDS", DEFAULT_SYNC_SECONDS)
+    if interval:
+        _sync_thread = threading.Thread(target=_run_sync, args=(interval,), name="camera-stream-sync", daemon=True)
+        _sync_thread.start()
+
+
+def _acquire_lock(path):
+    """Take the process-wide stream lock without blocking; True if this process got it."""
+    global _lock_file
+    try:
+        import fcntl
+    except ImportError:  # No fcntl (Windows): a single server process is assumed
+        return True
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    lock_file = open(path, "a+")
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(f"{os.getpid()}\n")
+    lock_file.flush()
+    _lock_file = lock_file
+    return True
+
+
+def _sync_all():
+    """Match the running streams to the camera table."""
+    from app.models.camera import Camera
+
+    cameras = Camera.query.filter(Camera.camera_type.in_(STREAM_TYPES)).all()
+    for camera in cameras:
+        sync_camera(camera)
+    known = {camera.id for camera in cameras}
+    for camera_id in [camera_id for camera_id in list(_streams) if camera_id not in known]:
+        stop_camera(camera_id)
+
+
+def _run_sync(interval):
+    while _app is not None:
+        time.sleep(interval)
+        try:
+            with _app.app_context():
+                _sync_all()
+        except Exception as e:
+            logger.warning(f"Camera stream sync failed: {e}")
+
+
+def sync_camera(camera):
+    """
+    Start, restart or stop a camera's stream to match its row: running while
+    the camera is active and has a readable source.
+    """
+    if _app is None:
+        return
+    source = stream_source(camera) if camera.status else None
+    with _lock:
+        current = _streams.get(camera.id)
+        if current is not None and current.source == source:
+            return
+        stream = None
+        if source is not None:
+            stream = CameraStream(_app, camera.id, source, _process, _config["sample_fps"])
+            _streams[camera.id] = stream
+        else:
+            _streams.pop(camera.id, None)
+    if current is not None:
+        current.stop()
+    if stream is not None:
+        stream.start()
+
+
+def stop_camera(camera_id):
+    """Stop a camera's stream (e.g. the camera was deleted)."""
+    with _lock:
+        stream = _streams.pop(camera_id, None)
+    if stream is not None:
+        stream.stop()
+
+
+def stop_camera_streams():
+    with _lock:
+        streams = list(_streams.values())
+        _streams.clear()
+    for stream in streams:
+        stream.stop()
+
+
+def stream_stats(camera_ids=None):
+    """Per-camera stream stats (only camera_ids if given)."""
+    with _lock:
+        streams = [s for s in _streams.values() if camera_ids is None or s.camera_id in camera_ids]
+    return {"streams": len(streams), "cameras": [s.stats() for s in streams]}
@@ -9,9 +9,14 @@ import base64
 import requests
 from typing import Optional, Dict, Tuple, List
 
+from app.utils.logger import get_logger
+
+logger = get_logger("embedding_client")
+
 # Base URL for embedding service
 EMBEDDING_SERVICE_URL = os.getenv("EMBEDDING_SERVICE_URL", "http://127.0.0.1:5001")
 EMBEDDING_URL = os.getenv("EMBEDDING_URL", f"{EMBEDDING_SERVICE_URL}/encode")
+ENCODE_MULTIPLE_URL = f"{EMBEDDING_SERVICE_URL}/encode_multiple"
 PERIOCULAR_URL = f"{EMBEDDING_SERVICE_URL}/encode_periocular"
 FULL_ENCODE_URL = f"{EMBEDDING_SERVICE_URL}/encode_full"
 GLASSES_DETECT_URL = f"{EMBEDDING_SERVICE_URL}/detect_glasses"
@@ -50,6 +55,37 @@ def extract_embedding_from_frame(frame) -> Optional[List[float]]:
     return data.get("embedding")
 
 
+def extract_embeddings_batch(frames, session=None) -> Optional[List[Optional[List[float]]]]:
+    """
+    Embed several face crops in one request (/encode_multiple).
+
+    Args:
+        frames: BGR OpenCV images
+        session: Optional requests.Session to reuse a connection
+
+    Returns:
+        One embedding (or None where the service could not encode the crop)
+        per frame, or None if the request failed.
+    """
+    images = []
+    for frame in frames:
+        b64 = _encode_image_to_base64(frame)
+        images.append(f"data:image/jpeg;base64,{b64}" if b64 else "")
+    if not images:
+        return []
+
+    try:
+        resp = (session or requests).post(ENCODE_MULTIPLE_URL, json={"images": images},
+                                          timeout=REQUEST_TIMEOUT * 3)
+        resp.raise_for_status()
+    except requests.RequestException as e:
+        logger.warning(f"Batch embedding request failed: {e}")
+        return None
+
+    embeddings = resp.json().get("embeddings") or []
+    return embeddings if len(embeddings) == len(frames) else None
+
+
 def extract_periocular_embedding(frame) -> Optional[Dict]:
     """
     Extract periocular (eye region) embedding from a frame.
@@ -95,7 +131,7 @@ def extract_periocular_embedding(frame) -> Optional[Dict]:
         }
 
     except requests.RequestException as e:
-        print(f"[embedding_client] Periocular embedding request failed: {e}")
+        logger.warning(f"Periocular embedding request failed: {e}")
         return None
 
 
@@ -127,7 +163,7 @@ def extract_full_embeddings(frame) -> Optional[Dict]:
         return resp.json()
 
     except requests.RequestException as e:
-        print(f"[embedding_client] Full embedding request failed: {e}")
+        logger.warning(f"Full embedding request failed: {e}")
         return None
 
 
@@ -157,7 +193,7 @@ def detect_glasses(frame) -> Optional[Dict]:
         return resp.json()
 
     except requests.RequestException as e:
-        print(f"[embedding_client] Glasses detection request failed: {e}")
+        logger.warning(f"Glasses detection request failed: {e}")
         return None
 
 
@@ -303,5 +339,5 @@ def detect_all_faces(frame) -> Optional[Dict]:
         return resp.json()
 
     except requests.RequestException as e:
-        print(f"[embedding_client] Multi-face detection request failed: {e}")
+        logger.warning(f"Multi-face detection request failed: {e}")
         return None
\ No newline at end of file
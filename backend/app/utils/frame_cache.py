@@ -0,0 +1,107 @@
+# app/utils/frame_cache.py
+"""
+Per-camera reuse of recognition results for near-identical frames.
+
+Live monitoring polls the recognition endpoint every couple of seconds, and a
+static scene produces frames that differ only by sensor noise and JPEG
+artefacts. Each frame is reduced to a 64-bit difference hash (dHash) of its
+downscaled grayscale image; if a recent frame from the same camera is within
+a small Hamming distance and the gallery has not changed since, its result
+is returned instead of running detection, augmentation, embedding and
+matching again. Entries expire after a maximum age so a static scene is still
+re-evaluated periodically.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+
+import cv2
+import numpy as np
+
+DEFAULT_MAX_DISTANCE = 5  # Differing bits (of 64) still counted as the same scene
+DEFAULT_MAX_AGE_SECONDS = 10
+DEFAULT_ENTRIES_PER_CAMERA = 4
+DEFAULT_MAX_CAMERAS = 256
+
+
+def dhash(image, hash_size=8):
+    """
+    Difference hash of an image: one bit per horizontally adjacent pixel pair
+    of the (hash_size + 1) x hash_size grayscale thumbnail.
+
+    Args:
+        image: BGR or grayscale image
+        hash_size: Bits per row (hash has hash_size ** 2 bits)
+
+    Returns:
+        int: The hash
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    thumb = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (thumb[:, 1:] > thumb[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+class FrameResultCache:
+    """
+    Recent (hash, gallery version, result) entries per camera.
+
+    Args:
+        max_distance: Largest Hamming distance between hashes counted as a hit
+        max_age_seconds: Entries older than this are never reused
+        entries_per_camera: Recent frames remembered per camera
+        max_cameras: Cameras tracked before the least recently used is dropped
+    """
+
+    def __init__(self, max_distance=DEFAULT_MAX_DISTANCE, max_age_seconds=DEFAULT_MAX_AGE_SECONDS,
+                 entries_per_camera=DEFAULT_ENTRIES_PER_CAMERA, max_cameras=DEFAULT_MAX_CAMERAS):
+        self.max_distance = max_distance
+        self.max_age_seconds = max_age_seconds
+        self.entries_per_camera = entries_per_camera
+        self.max_cameras = max_cameras
+        self.hits = 0
+        self.misses = 0
+        self._cameras = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, camera_key, frame_hash, gallery_version):
+        """
+        Result of a recent, near-identical frame from the same camera.
+
+        Returns:
+            tuple: (result dict copy, age in seconds) or (None, None)
+        """
+        now = time.time()
+        with self._lock:
+            entries = self._cameras.get(camera_key)
+            if entries:
+                self._cameras.move_to_end(camera_key)
+                for stored_at, stored_hash, version, result in reversed(entries):
+                    if (now - stored_at <= self.max_age_seconds and version == gallery_version
+                            and hamming_distance(stored_hash, frame_hash) <= self.max_distance):
+                        self.hits += 1
+                        return dict(result), now - stored_at
+            self.misses += 1
+        return None, None
+
+    def store(self, camera_key, frame_hash, gallery_version, result):
+        with self._lock:
+            entries = self._cameras.get(camera_key)
+            if entries is None:
+                entries = self._cameras[camera_key] = deque(maxlen=self.entries_per_camera)
+                while len(self._cameras) > self.max_cameras:
+                    self._cameras.popitem(last=False)
+            self._cameras.move_to_end(camera_key)
+            entries.append((time.time(), frame_hash, gallery_version, dict(result)))
+
+    def clear(self, camera_key=None):
+        with self._lock:
+            if camera_key is None:
+                self._cameras.clear()
+            else:
+                self._cameras.pop(camera_key, None)
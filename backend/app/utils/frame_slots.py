@@ -0,0 +1,113 @@
+# app/utils/frame_slots.py
+"""
+Latest-frame-wins ingestion slots for live cameras.
+
+Live clients send a frame every couple of seconds (LiveMonitoring) or as fast
+as they can (live_camera_client.py). When recognition is slower than that,
+requests for the same camera would run one after another and results would
+fall further and further behind the scene. Each camera instead gets one slot
+that holds only its newest pending frame: a frame that arrives while the
+camera's previous frame is being processed replaces whatever was pending, so
+superseded frames are dropped before any processing. Requests whose frame was
+dropped receive the result computed from the newer frame, marked as such, so
+a response never waits for more than the frame in progress plus the newest.
+"""
+
+import threading
+from collections import OrderedDict
+
+from app.utils.logger import get_logger
+
+logger = get_logger("frame_slots")
+
+DEFAULT_WAIT_SECONDS = 60  # Longest a request waits for its camera's slot
+DEFAULT_MAX_CAMERAS = 256
+
+
+class _Slot:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.last_seq = 0
+        self.pending = None  # (seq, frame) waiting to be processed
+        self.busy = False
+        self.result_seq = 0
+        self.result = None
+
+
+class LatestFrameSlots:
+    """
+    One latest-frame-wins slot per camera.
+
+    Args:
+        wait_seconds: Longest a request waits before giving up
+        max_cameras: Idle slots kept before the least recently used is dropped
+    """
+
+    def __init__(self, wait_seconds=DEFAULT_WAIT_SECONDS, max_cameras=DEFAULT_MAX_CAMERAS):
+        self.wait_seconds = wait_seconds
+        self.max_cameras = max_cameras
+        self.processed = 0
+        self.superseded = 0
+        self._slots = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _slot(self, camera_key):
+        with self._lock:
+            slot = self._slots.get(camera_key)
+            if slot is None:
+                slot = self._slots[camera_key] = _Slot()
+                for key in list(self._slots):
+                    if len(self._slots) <= self.max_cameras:
+                        break
+                    if not self._slots[key].busy and self._slots[key].pending is None:
+                        del self._slots[key]
+            self._slots.move_to_end(camera_key)
+            return slot
+
+    def submit(self, camera_key, frame, process):
+        """
+        Process the camera's newest frame and return its result.
+
+        The calling thread either processes the newest pending frame itself
+        (its own or a newer one) or waits for the thread that does.
+
+        Args:
+            camera_key: Camera the frame came from
+            frame: The frame
+            process: Callable frame -> result dict
+
+        Returns:
+            tuple: (result dict copy, superseded) where superseded is True if
+            the result was computed from a newer frame than this one; the
+            result is None if the wait timed out
+        """
+        slot = self._slot(camera_key)
+        with slot.condition:
+            slot.last_seq += 1
+            seq = slot.last_seq
+            if slot.pending is not None:
+                self.superseded += 1
+            slot.pending = (seq, frame)
+            slot.condition.notify_all()
+
+            while slot.result_seq < seq:
+                if not slot.busy and slot.pending is not None:
+                    run_seq, run_frame = slot.pending
+                    slot.pending = None
+                    slot.busy = True
+                    slot.condition.release()
+                    try:
+                        try:
+                            result = process(run_frame)
+                        except Exception as e:
+                            logger.exception(f"Processing frame for {camera_key} failed: {e}")
+                            result = {"error": str(e), "status_code": 500}
+                    finally:
+                        slot.condition.acquire()
+                        slot.busy = False
+                    slot.result_seq, slot.result = run_seq, result
+                    self.processed += 1
+                    slot.condition.notify_all()
+                elif not slot.condition.wait(timeout=self.wait_seconds):
+                    return None, False
+            return dict(slot.result), slot.result_seq > seq
@@ -0,0 +1,329 @@
+# app/utils/gallery_store.py
+"""
+Versioned, memory-mapped on-disk gallery of inmate embeddings.
+
+Every backend worker maps the same files read-only, so the gallery is held
+once in the OS page cache no matter how many worker processes are running.
+A single writer builds a new version next to the live one and switches the
+CURRENT pointer atomically; readers notice the new pointer and remap.
+
+Layout under the gallery directory:
+
+    CURRENT                    name of the live version (replaced atomically)
+    build.lock                 held by the process currently rebuilding
+    v000042/
+        face.npy               float32 (N, D) face embeddings grouped by inmate
+        face_owner.npy         int32 (N,) row -> inmate index
+        periocular.npy         float32 (P, D) periocular embeddings
+        periocular_owner.npy   int32 (P,) row -> inmate index
+        meta.json              version, build time, DB change version and
+                               inmate metadata table
+"""
+
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from app.utils.logger import get_logger
+
+logger = get_logger("gallery_store")
+
+EMBEDDING_DIM = 512  # FaceNet output size
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = "build.lock"
+STALE_LOCK_SECONDS = 300
+KEEP_OLD_VERSIONS = 2
+
+
+class Gallery:
+    """
+    Read-only view of one gallery version.
+
+    Matrices are numpy memmaps; per-inmate embeddings are row views into
+    them, so nothing is copied into the worker's private memory.
+    """
+
+    def __init__(self, path, meta, face, face_owner, periocular, periocular_owner):
+        self.path = path
+        self.meta = meta
+        self.version = meta["version"]
+        self.built_at = meta["built_at"]
+        self.db_version = meta.get("db_version")
+        self.inmates = meta["inmates"]
+        self.face = face
+        self.face_owner = face_owner
+        self.periocular = periocular
+        self.periocular_owner = periocular_owner
+
+        num_inmates = len(self.inmates)
+        self.face_offsets = _offsets_from_owner(face_owner, num_inmates)
+        self.periocular_offsets = _offsets_from_owner(periocular_owner, num_inmates)
+
+    def __len__(self):
+        return len(self.inmates)
+
+    def face_rows(self, index):
+        start, end = self.face_offsets[index], self.face_offsets[index + 1]
+        return self.face[start:end]
+
+    def periocular_rows(self, index):
+        start, end = self.periocular_offsets[index], self.periocular_offsets[index + 1]
+        return self.periocular[start:end]
+
+    def subset_rows(self, kind, indices):
+        """
+        Copy the rows of a subset of inmates out of the mapped files.
+
+        Args:
+            kind: 'face' or 'periocular'
+            indices: Inmate indices into this gallery
+
+        Returns:
+            tuple: (rows, owner) where owner gives each row's position in indices
+        """
+        if kind == "face":
+            matrix, offsets = self.face, self.face_offsets
+        else:
+            matrix, offsets = self.periocular, self.periocular_offsets
+        row_numbers, owner = _row_indices(offsets, indices)
+        return matrix[row_numbers], owner
+
+    def take(self, indices):
+        """
+        Copy the face and periocular rows of a subset of inmates.
+
+        Returns:
+            tuple: (face, face_owner, periocular, periocular_owner) where the
+                   owners index into `indices`
+        """
+        return self.subset_rows("face", indices) + self.subset_rows("periocular", indices)
+
+
+def _offsets_from_owner(owner, num_inmates):
+    """Row range boundaries per inmate (rows are stored grouped by owner)."""
+    return np.searchsorted(owner, np.arange(num_inmates + 1)).astype(np.int64)
+
+
+def _row_indices(offsets, indices):
+    """Row numbers covering the given inmates, and the position of each row's owner in indices."""
+    indices = np.asarray(indices, dtype=np.int64)
+    counts = offsets[indices + 1] - offsets[indices]
+    owner = np.repeat(np.arange(len(indices)), counts)
+    # Row = segment start + position within the segment
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(offsets[indices], counts) + within, owner
+
+
+def _normalized(matrix):
+    """Contiguous float32 copy with unit-length rows, so cosine similarity is a dot product."""
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _stack(vectors, dim):
+    if not vectors:
+        return np.zeros((0, dim), dtype=np.float32)
+    return np.ascontiguousarray(np.stack(vectors), dtype=np.float32)
+
+
+def current_version(gallery_dir):
+    """Return the name of the live version, or None if nothing is published."""
+    try:
+        with open(os.path.join(gallery_dir, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def open_gallery(gallery_dir, version=None):
+    """
+    Map a published gallery version read-only.
+
+    Returns:
+        Gallery, or None if no version is published (or it was removed).
+    """
+    version = version or current_version(gallery_dir)
+    if not version:
+        return None
+
+    path = os.path.join(gallery_dir, version)
+    try:
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        return Gallery(
+            path,
+            meta,
+            np.load(os.path.join(path, "face.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "face_owner.npy")),
+            np.load(os.path.join(path, "periocular.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "periocular_owner.npy")),
+        )
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not open gallery {version}: {e}")
+        return None
+
+
+def write_gallery(gallery_dir, entries):
+    """
+    Materialize a new gallery version from per-inmate encoding lists.
+
+    Should be called while holding the build lock (see acquire_build_lock).
+
+    Args:
+        gallery_dir: Directory holding all gallery versions
+        entries: List of (inmate_data, [face_encodings], [periocular_encodings])
+                 where inmate_data is a JSON-serializable dict
+
+    Returns:
+        Name of the published version
+    """
+    inmates = []
+    face_vectors, face_owner = [], []
+    peri_vectors, peri_owner = [], []
+    skipped = 0
+
+    for inmate_data, face_encodings, periocular_encodings in entries:
+        index = len(inmates)
+        inmates.append(inmate_data)
+        for enc in face_encodings:
+            enc = np.asarray(enc, dtype=np.float32).ravel()
+            if enc.shape[0] != EMBEDDING_DIM:
+                skipped += 1
+                continue
+            face_vectors.append(enc)
+            face_owner.append(index)
+        for enc in periocular_encodings:
+            enc = np.asarray(enc, dtype=np.float32).ravel()
+            if enc.shape[0] != EMBEDDING_DIM:
+                skipped += 1
+                continue
+            peri_vectors.append(enc)
+            peri_owner.append(index)
+
+    if skipped:
+        logger.warning(f"Skipped {skipped} encodings that are not {EMBEDDING_DIM}-dim")
+
+    return write_gallery_arrays(
+        gallery_dir,
+        inmates,
+        _stack(face_vectors, EMBEDDING_DIM),
+        face_owner,
+        _stack(peri_vectors, EMBEDDING_DIM),
+        peri_owner,
+    )
+
+
+def write_gallery_arrays(gallery_dir, inmates, face, face_owner, periocular, periocular_owner,
+                         db_version=None):
+    """
+    Materialize a new gallery version from ready-made matrices and publish it.
+
+    Should be called while holding the build lock (see acquire_build_lock).
+
+    Args:
+        gallery_dir: Directory holding all gallery versions
+        inmates: List of JSON-serializable inmate metadata dicts
+        face: (N, D) float32 face embeddings, rows grouped by owner
+              (rows are L2-normalized on write)
+        face_owner: (N,) index into inmates for every face row (non-decreasing)
+        periocular: (P, D) float32 periocular embeddings, rows grouped by owner
+        periocular_owner: (P,) index into inmates for every periocular row
+        db_version: JSON-serializable stamp of the database state the gallery
+                    was built from, used to decide whether a snapshot is current
+
+    Returns:
+        Name of the published version
+    """
+    os.makedirs(gallery_dir, exist_ok=True)
+
+    version = _next_version_name(gallery_dir)
+    tmp_path = os.path.join(gallery_dir, f".{version}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    np.save(os.path.join(tmp_path, "face.npy"), _normalized(face))
+    np.save(os.path.join(tmp_path, "face_owner.npy"), np.asarray(face_owner, dtype=np.int32))
+    np.save(os.path.join(tmp_path, "periocular.npy"), _normalized(periocular))
+    np.save(os.path.join(tmp_path, "periocular_owner.npy"), np.asarray(periocular_owner, dtype=np.int32))
+
+    meta = {
+        "version": version,
+        "built_at": time.time(),
+        "db_version": db_version,
+        "dim": EMBEDDING_DIM,
+        "num_face": int(len(face)),
+        "num_periocular": int(len(periocular)),
+        "inmates": inmates,
+    }
+    with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+    # Publish: move the finished directory into place, then swap the pointer.
+    os.replace(tmp_path, os.path.join(gallery_dir, version))
+    pointer_tmp = os.path.join(gallery_dir, f".{CURRENT_FILE}.tmp-{os.getpid()}")
+    with open(pointer_tmp, "w") as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(gallery_dir, CURRENT_FILE))
+
+    _remove_old_versions(gallery_dir, version)
+    return version
+
+
+def _version_dirs(gallery_dir):
+    try:
+        names = os.listdir(gallery_dir)
+    except OSError:
+        return []
+    return sorted(n for n in names if n.startswith("v") and n[1:].isdigit())
+
+
+def _next_version_name(gallery_dir):
+    existing = _version_dirs(gallery_dir)
+    last = int(existing[-1][1:]) if existing else 0
+    return f"v{last + 1:06d}"
+
+
+def _remove_old_versions(gallery_dir, live_version):
+    """
+    Delete versions older than the last few. Workers that still map an old
+    version keep their mapping (POSIX); on Windows deletion fails and is retried
+    on the next publish.
+    """
+    old = [v for v in _version_dirs(gallery_dir) if v != live_version]
+    for version in old[:max(0, len(old) - KEEP_OLD_VERSIONS)]:
+        shutil.rmtree(os.path.join(gallery_dir, version), ignore_errors=True)
+
+
+def acquire_build_lock(gallery_dir):
+    """
+    Try to become the single process rebuilding the gallery.
+    Non-blocking; returns True if the lock was taken.
+    """
+    os.makedirs(gallery_dir, exist_ok=True)
+    lock_path = os.path.join(gallery_dir, LOCK_FILE)
+
+    try:
+        if time.time() - os.path.getmtime(lock_path) > STALE_LOCK_SECONDS:
+            os.remove(lock_path)  # Holder crashed mid-build
+    except OSError:
+        pass
+
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w") as f:
+        f.write(str(os.getpid()))
+    return True
+
+
+def release_build_lock(gallery_dir):
+    try:
+        os.remove(os.path.join(gallery_dir, LOCK_FILE))
+    except OSError:
+        pass
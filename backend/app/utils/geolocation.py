@@ -4,8 +4,28 @@ Geolocation utilities for distance calculation and finding nearby facilities.
 Used for escaped inmate alarm system to alert nearby facilities.
 """
 
+import threading
+import time
 from math import radians, sin, cos, sqrt, atan2
 
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+DEFAULT_FACILITY_CELL_DEGREES = 0.5  # ~55 km grid cells
+DEFAULT_FACILITY_INDEX_MAX_AGE_SECONDS = 300
+
+# Spatial index of facility coordinates; see get_facility_index
+_facility_index = None
+_facility_index_built_at = 0.0
+_facility_index_stale = False
+_facility_index_lock = threading.Lock()
+_listeners_registered = False
+
+# camera_id -> (latitude, longitude) of existing cameras; see get_detection_location
+_camera_locations = {}
+_camera_locations_lock = threading.Lock()
+
 
 def haversine_distance(lat1, lng1, lat2, lng2):
     """
@@ -33,41 +53,188 @@ def haversine_distance(lat1, lng1, lat2, lng2):
     return R * c
 
 
-def find_nearby_facilities(lat, lng, radius_km=50):
+def haversine_distances(lat, lng, lats, lngs):
     """
-    Find all users/facilities within a given radius of a point.
+    Great-circle distance from one point to many points at once.
 
     Args:
-        lat: Detection latitude
-        lng: Detection longitude
-        radius_km: Search radius in kilometers (default 50km)
+        lat, lng: Latitude and longitude of the origin (in degrees)
+        lats, lngs: Arrays of latitudes and longitudes (in degrees)
 
     Returns:
-        List of dictionaries with user data (not ORM objects to avoid session issues)
+        numpy array of distances in kilometers
+    """
+    R = 6371  # Earth's radius in kilometers
+
+    lat1 = np.radians(lat)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    delta_lat = lat2 - lat1
+    delta_lng = np.radians(np.asarray(lngs, dtype=np.float64) - lng)
+
+    a = np.sin(delta_lat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(delta_lng / 2) ** 2
+    return R * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+class FacilityIndex:
     """
+    Grid index of facility (user) coordinates for radius queries.
+
+    Facilities are bucketed into cells of cell_degrees x cell_degrees and
+    stored sorted by cell, so a query only looks at the cells overlapping its
+    bounding box and filters those candidates with vectorized haversine;
+    its cost depends on the facilities near the point, not on the total.
+
+    Args:
+        user_ids, emails, lats, lngs: Parallel sequences, one entry per facility
+        cell_degrees: Grid cell size in degrees
+    """
+
+    def __init__(self, user_ids, emails, lats, lngs, cell_degrees=DEFAULT_FACILITY_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.rows = int(np.ceil(180 / cell_degrees)) + 1
+        self.cols = int(np.ceil(360 / cell_degrees))
+
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        keys = self._cell_rows(lats) * self.cols + self._cell_cols(lngs)
+        order = np.argsort(keys, kind="stable")
+
+        self.lats = lats[order]
+        self.lngs = lngs[order]
+        self.user_ids = np.asarray(user_ids)[order]
+        self.emails = np.asarray(emails, dtype=object)[order]
+        self.cell_keys, self.cell_starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+        self.cell_ends = self.cell_starts + counts
+
+    def __len__(self):
+        return len(self.lats)
+
+    def _cell_rows(self, lats):
+        return np.floor((np.asarray(lats) + 90) / self.cell_degrees).astype(np.int64)
+
+    def _cell_cols(self, lngs):
+        return np.floor((np.mod(np.asarray(lngs) + 180, 360)) / self.cell_degrees).astype(np.int64) % self.cols
+
+    def _candidates(self, lat, lng, radius_km):
+        """Indices of the facilities in the cells overlapping the query's bounding box."""
+        if not len(self.cell_keys):
+            return np.empty(0, dtype=np.int64)
+        dlat = np.degrees(radius_km / EARTH_RADIUS_KM)
+        row_lo, row_hi = self._cell_rows([lat - dlat, lat + dlat])
+        rows = np.arange(max(row_lo, 0), min(row_hi, self.rows - 1) + 1)
+
+        max_abs_lat = min(abs(lat) + dlat, 90.0)
+        cos_lat = np.cos(np.radians(max_abs_lat))
+        if max_abs_lat >= 90.0 or cos_lat <= 0 or dlat / cos_lat >= 180:
+            cols = np.arange(self.cols)  # Box reaches a pole or wraps the globe
+        else:
+            dlng = dlat / cos_lat
+            col_lo = int(np.floor((lng - dlng + 180) / self.cell_degrees))
+            col_hi = int(np.floor((lng + dlng + 180) / self.cell_degrees))
+            cols = np.unique(np.arange(col_lo, col_hi + 1) % self.cols)
+
+        keys = (rows[:, None] * self.cols + cols[None, :]).ravel()
+        positions = np.minimum(np.searchsorted(self.cell_keys, keys), len(self.cell_keys) - 1)
+        positions = positions[self.cell_keys[positions] == keys]
+        if not len(positions):
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(self.cell_starts[p], self.cell_ends[p]) for p in positions])
+
+    def query(self, lat, lng, radius_km):
+        """
+        Facilities within radius_km of a point, closest first.
+
+        Returns:
+            List of dicts with user_id, user_email and distance_km (as find_nearby_facilities)
+        """
+        candidates = self._candidates(lat, lng, radius_km)
+        if not len(candidates):
+            return []
+        distances = haversine_distances(lat, lng, self.lats[candidates], self.lngs[candidates])
+        inside = distances <= radius_km
+        candidates, distances = candidates[inside], np.round(distances[inside], 2)
+        order = np.argsort(distances, kind="stable")
+        return [
+            {
+                'user_id': int(self.user_ids[i]),
+                'user_email': self.emails[i],
+                'distance_km': float(d)
+            }
+            for i, d in zip(candidates[order], distances[order])
+        ]
+
+
+def _mark_facilities_stale(mapper, connection, target):
+    global _facility_index_stale
+    _facility_index_stale = True
+
+
+def _mark_facilities_stale_on_change(mapper, connection, target):
+    from sqlalchemy import inspect
+
+    state = inspect(target)
+    if any(getattr(state.attrs, name).history.has_changes() for name in ("latitude", "longitude", "email")):
+        _mark_facilities_stale(mapper, connection, target)
+
+
+def _register_user_listeners():
+    """Rebuild the facility index after users with locations change (any route)."""
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    from sqlalchemy import event
     from app.models.user import User
 
-    # Get all users with location data
-    users = User.query.filter(
-        User.latitude.isnot(None),
-        User.longitude.isnot(None)
-    ).all()
+    event.listen(User, "after_insert", _mark_facilities_stale)
+    event.listen(User, "after_delete", _mark_facilities_stale)
+    event.listen(User, "after_update", _mark_facilities_stale_on_change)
+    _listeners_registered = True
+
+
+def get_facility_index(max_age_seconds=DEFAULT_FACILITY_INDEX_MAX_AGE_SECONDS):
+    """
+    FacilityIndex of all users with coordinates.
+
+    Rebuilt (one query) when a user is created, deleted, moved or renamed in
+    this process, and at least every max_age_seconds for changes made elsewhere.
+    """
+    global _facility_index, _facility_index_built_at, _facility_index_stale
+    with _facility_index_lock:
+        fresh = (_facility_index is not None and not _facility_index_stale
+                 and time.time() - _facility_index_built_at < max_age_seconds)
+        if fresh:
+            return _facility_index
 
-    nearby = []
-    for user in users:
-        dist = haversine_distance(lat, lng, user.latitude, user.longitude)
-        if dist <= radius_km:
-            # Store user data as dictionary, not ORM object
-            nearby.append({
-                'user_id': user.id,
-                'user_email': user.email,
-                'distance_km': round(dist, 2)
-            })
+        from app.models.user import User
 
-    # Sort by distance (closest first)
-    nearby.sort(key=lambda x: x['distance_km'])
+        _register_user_listeners()
+        _facility_index_stale = False
+        rows = User.query.with_entities(User.id, User.email, User.latitude, User.longitude).filter(
+            User.latitude.isnot(None),
+            User.longitude.isnot(None)
+        ).all()
+        _facility_index = FacilityIndex(
+            [r.id for r in rows], [r.email for r in rows],
+            [r.latitude for r in rows], [r.longitude for r in rows]
+        )
+        _facility_index_built_at = time.time()
+        return _facility_index
 
-    return nearby
+
+def find_nearby_facilities(lat, lng, radius_km=50):
+    """
+    Find all users/facilities within a given radius of a point.
+
+    Args:
+        lat: Detection latitude
+        lng: Detection longitude
+        radius_km: Search radius in kilometers (default 50km)
+
+    Returns:
+        List of dictionaries with user data (not ORM objects to avoid session issues),
+        closest first
+    """
+    return get_facility_index().query(lat, lng, radius_km)
 
 
 def get_detection_location(camera_id=None, default_lat=None, default_lng=None):
@@ -88,12 +255,41 @@ def get_detection_location(camera_id=None, default_lat=None, default_lng=None):
         Tuple of (latitude, longitude) or (None, None)
     """
     if camera_id:
-        from app.models.camera import Camera
-        camera = Camera.query.get(camera_id)
-        if camera and camera.latitude and camera.longitude:
-            return camera.latitude, camera.longitude
+        location = _camera_location(camera_id)
+        if location[0] and location[1]:
+            return location
 
     if default_lat is not None and default_lng is not None:
         return default_lat, default_lng
 
     return None, None
+
+
+def _camera_location(camera_id):
+    """Camera coordinates, cached per camera until invalidate_camera_location()."""
+    with _camera_locations_lock:
+        location = _camera_locations.get(camera_id)
+    if location is not None:
+        return location
+
+    from app.models.camera import Camera
+    camera = Camera.query.get(camera_id)
+    if camera is None:
+        return None, None  # Not cached: the id may be created later
+    location = (camera.latitude, camera.longitude)
+    with _camera_locations_lock:
+        _camera_locations[camera_id] = location
+    return location
+
+
+def invalidate_camera_location(camera_id=None):
+    """
+    Forget the cached coordinates of a camera (or of all cameras).
+
+    Called by the camera routes whenever a camera is created, updated or deleted.
+    """
+    with _camera_locations_lock:
+        if camera_id is None:
+            _camera_locations.clear()
+        else:
+            _camera_locations.pop(camera_id, None)
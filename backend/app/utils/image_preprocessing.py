@@ -8,6 +8,31 @@ import cv2
 import numpy as np
 from PIL import Image
 import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+# OpenCV CLAHE and cascade objects are not safe to share between threads,
+# so each thread keeps its own cached instances
+_thread_cache = threading.local()
+
+
+def get_clahe(clip_limit=2.0, tile_grid_size=(8, 8)):
+    """Cached CLAHE object for the calling thread."""
+    cache = _thread_cache.__dict__.setdefault("clahe", {})
+    key = (clip_limit, tuple(tile_grid_size))
+    if key not in cache:
+        cache[key] = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tuple(tile_grid_size))
+    return cache[key]
+
+
+def get_cascade(filename):
+    """Cached Haar cascade (e.g. 'haarcascade_eye.xml') for the calling thread."""
+    cache = _thread_cache.__dict__.setdefault("cascades", {})
+    if filename not in cache:
+        cache[filename] = cv2.CascadeClassifier(cv2.data.haarcascades + filename)
+    return cache[filename]
 
 
 def ensure_rgb(image):
@@ -67,8 +92,7 @@ def apply_clahe(image, clip_limit=2.0, tile_grid_size=(8, 8)):
     l, a, b = cv2.split(lab)
 
     # Apply CLAHE to L channel
-    clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
-    l = clahe.apply(l)
+    l = get_clahe(clip_limit, tile_grid_size).apply(l)
 
     # Merge channels back
     lab = cv2.merge([l, a, b])
@@ -133,13 +157,14 @@ def reduce_noise(image, strength=10):
     return cv2.fastNlMeansDenoisingColored(image, None, strength, strength, 7, 21)
 
 
-def aggressive_denoise(image):
+def aggressive_denoise(image, dst=None):
     """
     Apply aggressive noise reduction for heavily noisy images.
     Uses multiple passes and bilateral filtering.
 
     Args:
         image: BGR image
+        dst: Optional preallocated output buffer
 
     Returns:
         Heavily denoised BGR image
@@ -148,7 +173,7 @@ def aggressive_denoise(image):
     denoised = cv2.fastNlMeansDenoisingColored(image, None, 15, 15, 7, 21)
 
     # Second pass: bilateral filter preserves edges better
-    denoised = cv2.bilateralFilter(denoised, 9, 75, 75)
+    denoised = cv2.bilateralFilter(denoised, 9, 75, 75, dst=dst)
 
     return denoised
 
@@ -173,12 +198,13 @@ def deblur_image(image):
     return sharpened
 
 
-def strong_deblur(image):
+def strong_deblur(image, dst=None):
     """
     Apply stronger sharpening for heavily blurred images.
 
     Args:
         image: BGR image
+        dst: Optional preallocated output buffer
 
     Returns:
         Strongly sharpened BGR image
@@ -190,10 +216,77 @@ def strong_deblur(image):
         [-1, -1, -1]
     ])
 
-    sharpened = cv2.filter2D(image, -1, kernel)
+    sharpened = cv2.filter2D(image, -1, kernel, dst=dst)
     return sharpened
 
 
+def remove_salt_pepper_noise(image, kernel_size=5, dst=None):
+    """
+    Remove salt & pepper (impulse) noise with a median filter.
+
+    Args:
+        image: BGR image
+        kernel_size: Median window size (made odd if even)
+        dst: Optional preallocated output buffer
+
+    Returns:
+        Filtered BGR image
+    """
+    if kernel_size % 2 == 0:
+        kernel_size += 1
+    return cv2.medianBlur(image, kernel_size, dst=dst)
+
+
+@lru_cache(maxsize=8)
+def _directional_sharpen_kernel(kernel_size):
+    """Sharpening kernel along a horizontal line of kernel_size pixels (sums to 1)."""
+    kernel = np.zeros((3, kernel_size), dtype=np.float32)
+    kernel[1, :] = -1.0 / kernel_size
+    kernel[1, kernel_size // 2] = 2.0
+    return kernel / kernel.sum()
+
+
+def deblur_motion_horizontal(image, kernel_size=11, dst=None):
+    """
+    Counter horizontal motion blur with directional sharpening.
+
+    Args:
+        image: BGR image
+        kernel_size: Length of the motion the kernel compensates for
+        dst: Optional preallocated output buffer
+
+    Returns:
+        Sharpened BGR image
+    """
+    return cv2.filter2D(image, -1, _directional_sharpen_kernel(kernel_size), dst=dst)
+
+
+def deblur_motion_multi_direction(image, kernel_size=11):
+    """
+    Counter motion blur of unknown direction.
+    Averages directional sharpening at 0, 45, 90 and 135 degrees.
+
+    Args:
+        image: BGR image
+        kernel_size: Length of the motion the kernels compensate for
+
+    Returns:
+        Sharpened BGR image
+    """
+    base = _directional_sharpen_kernel(kernel_size)
+    size = kernel_size if kernel_size % 2 else kernel_size + 1
+    square = np.zeros((size, size), dtype=np.float32)
+    square[size // 2 - 1:size // 2 + 2, :kernel_size] = base
+
+    accumulated = np.zeros(image.shape, dtype=np.float32)
+    for angle in (0, 45, 90, 135):
+        M = cv2.getRotationMatrix2D((size // 2, size // 2), angle, 1.0)
+        kernel = cv2.warpAffine(square, M, (size, size))
+        kernel *= base.sum() / max(kernel.sum(), 1e-6)  # Keep brightness
+        accumulated += cv2.filter2D(image, cv2.CV_32F, kernel)
+    return np.clip(accumulated / 4, 0, 255).astype(np.uint8)
+
+
 def auto_rotate_face(image, face_cascade=None):
     """
     Attempt to detect and correct face rotation.
@@ -208,10 +301,8 @@ def auto_rotate_face(image, face_cascade=None):
     """
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
-    # Load eye cascade
-    eye_cascade = cv2.CascadeClassifier(
-        cv2.data.haarcascades + 'haarcascade_eye.xml'
-    )
+    # Eye cascade is loaded from disk once per thread
+    eye_cascade = get_cascade('haarcascade_eye.xml')
 
     # Try to detect eyes
     eyes = eye_cascade.detectMultiScale(gray, 1.1, 5, minSize=(20, 20))
@@ -347,6 +438,24 @@ def estimate_blur_level(image):
     return laplacian_var
 
 
+def estimate_salt_pepper_level(image, residual_threshold=40):
+    """
+    Estimate salt & pepper (impulse) noise as the fraction of pixels far from
+    their 3x3 median. Unlike counting pure white/black pixels, this survives
+    resizing and ignores saturated but smooth regions.
+
+    Args:
+        image: BGR image
+        residual_threshold: Minimum |pixel - median| counted as an impulse
+
+    Returns:
+        float: Fraction of impulse pixels (0-1, clean images are close to 0)
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+    residual = cv2.absdiff(gray, cv2.medianBlur(gray, 3))
+    return float(np.count_nonzero(residual > residual_threshold)) / gray.size
+
+
 def selective_preprocess(image, noise_threshold=15, blur_threshold=50):
     """
     Intelligently preprocess image based on detected quality.
@@ -507,3 +616,168 @@ def generate_augmentations(image, include_rotations=True, include_brightness=Tru
         augmentations.append((blur_medium, 'blur_9'))
 
     return augmentations
+
+
+# =============================================================================
+# QUERY AUGMENTATION ENGINE - Shared steps, computed once, run in parallel
+# =============================================================================
+
+# Worker threads for independent augmentation steps (OpenCV releases the GIL)
+AUGMENTATION_WORKERS = min(4, os.cpu_count() or 1)
+
+_augmentation_pool = None
+_augmentation_pool_lock = threading.Lock()
+
+
+def _rotate_step(angle):
+    def rotate(image, dst=None):
+        h, w = image.shape[:2]
+        M = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+        return cv2.warpAffine(image, M, (w, h), dst=dst, borderMode=cv2.BORDER_REPLICATE)
+    return rotate
+
+
+def _gray_step(image, dst=None):
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=dst)
+
+
+def _gray_bgr_step(gray, dst=None):
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR, dst=dst)
+
+
+def _bright_step(image, dst=None):
+    return cv2.convertScaleAbs(image, dst=dst, alpha=1.3, beta=30)
+
+
+def _lab_step(image, dst=None):
+    return cv2.cvtColor(image, cv2.COLOR_BGR2LAB, dst=dst)
+
+
+def _clahe_step(lab, dst=None):
+    l, a, b = cv2.split(lab)
+    merged = cv2.merge([get_clahe(2.0, (8, 8)).apply(l), a, b])
+    return cv2.cvtColor(merged, cv2.COLOR_LAB2BGR, dst=dst)
+
+
+def _median_step(image, dst=None):
+    return remove_salt_pepper_noise(image, kernel_size=5, dst=dst)
+
+
+def _motion_step(image, dst=None):
+    return deblur_motion_horizontal(image, kernel_size=11, dst=dst)
+
+
+# Step name -> (function, input steps). "image" is the query crop itself.
+# Intermediate steps (gray, lab, denoised) are shared by several outputs.
+AUGMENTATION_STEPS = {
+    "rotate_-15": (_rotate_step(-15), ("image",)),
+    "rotate_15": (_rotate_step(15), ("image",)),
+    "rotate_180": (_rotate_step(180), ("image",)),
+    "gray": (_gray_step, ("image",)),
+    "grayscale": (_gray_bgr_step, ("gray",)),
+    "bright": (_bright_step, ("image",)),
+    "lab": (_lab_step, ("image",)),
+    "clahe": (_clahe_step, ("lab",)),
+    "denoised": (aggressive_denoise, ("image",)),
+    "sharpened": (strong_deblur, ("image",)),
+    "median": (_median_step, ("image",)),
+    "motion_h": (_motion_step, ("image",)),
+    "denoised_sharpened": (strong_deblur, ("denoised",)),
+}
+
+# Output order of generate_query_augmentations
+QUERY_AUGMENTATIONS = (
+    "original", "rotate_-15", "rotate_15", "rotate_180", "grayscale", "bright", "clahe",
+    "denoised", "sharpened", "median", "motion_h", "denoised_sharpened",
+)
+
+# Augmentations grouped by the degradation they counter
+QUERY_AUGMENTATION_FAMILIES = {
+    "original": ("original",),
+    "geometry": ("rotate_-15", "rotate_15", "rotate_180"),
+    "tone": ("grayscale", "bright", "clahe"),
+    "noise": ("denoised",),
+    "blur": ("sharpened", "motion_h"),
+    "salt_pepper": ("median",),
+    "noise_blur": ("denoised_sharpened",),
+}
+
+
+def _get_augmentation_pool():
+    global _augmentation_pool
+    with _augmentation_pool_lock:
+        if _augmentation_pool is None and AUGMENTATION_WORKERS > 1:
+            _augmentation_pool = ThreadPoolExecutor(
+                max_workers=AUGMENTATION_WORKERS, thread_name_prefix="augment"
+            )
+    return _augmentation_pool
+
+
+@lru_cache(maxsize=64)
+def _augmentation_plan(outputs):
+    """
+    Steps needed for the given outputs, grouped into waves: every step in a
+    wave only depends on steps of earlier waves, so a wave runs in parallel.
+    """
+    depth = {"image": -1}
+
+    def visit(name):
+        if name not in depth:
+            depth[name] = 1 + max(visit(dep) for dep in AUGMENTATION_STEPS[name][1])
+        return depth[name]
+
+    for name in outputs:
+        visit(name)
+    waves = [[] for _ in range(max(depth.values()) + 1)]
+    for name, d in depth.items():
+        if d >= 0:
+            waves[d].append(name)
+    return tuple(tuple(wave) for wave in waves)
+
+
+def generate_query_augmentations(image, families=None, parallel=True):
+    """
+    Generate query-time augmentations of a face crop.
+
+    Each shared intermediate (grayscale, LAB, NL-means denoising) is computed
+    once, independent steps run on a thread pool, and the outputs are written
+    into one preallocated block.
+
+    Args:
+        image: BGR face crop (uint8)
+        families: Keys of QUERY_AUGMENTATION_FAMILIES to generate (None = all)
+        parallel: Run independent steps on the shared thread pool
+
+    Returns:
+        List of BGR images in QUERY_AUGMENTATIONS order ('original' is the
+        input itself). Steps that fail are left out.
+    """
+    families = QUERY_AUGMENTATION_FAMILIES if families is None else families
+    wanted = {name for family in families for name in QUERY_AUGMENTATION_FAMILIES[family]}
+    outputs = [name for name in QUERY_AUGMENTATIONS if name in wanted]
+    computed = tuple(name for name in outputs if name != "original")
+
+    buffers = np.empty((len(computed),) + image.shape, dtype=image.dtype)
+    dst = {name: buffers[i] for i, name in enumerate(computed)}
+    values = {"image": image}
+
+    def run(name):
+        function, inputs = AUGMENTATION_STEPS[name]
+        args = [values[i] for i in inputs]
+        if any(arg is None for arg in args):
+            return None
+        try:
+            return function(*args, dst=dst.get(name))
+        except Exception:
+            return None
+
+    pool = _get_augmentation_pool() if parallel else None
+    for wave in _augmentation_plan(computed):
+        if pool is not None and len(wave) > 1:
+            results = list(pool.map(run, wave))
+        else:
+            results = [run(name) for name in wave]
+        values.update(zip(wave, results))
+
+    values["original"] = image
+    return [values[name] for name in outputs if values[name] is not None]
@@ -1,28 +1,317 @@
 # live_camera_client.py
+"""
+Edge capture client: reads a local camera and sends frames for recognition.
+
+Capture, motion detection and upload run on separate threads, so a slow
+server never stalls capture or the preview window, and the server only sees
+frames worth recognizing:
+    - capture: reads the camera continuously into a latest-frame buffer (a
+               video file is read at its own frame rate, like a live camera)
+    - motion:  differences each new frame against the previous one on a small
+               blurred grayscale copy; a frame is queued for upload when
+               enough pixels changed (--motion-threshold), or when nothing
+               has been sent for --keepalive seconds
+    - upload:  --max-in-flight threads post queued frames over one persistent
+               session (utils/recognition_client.py); the queue holds only the
+               newest frame, so frames waiting behind a slow upload are
+               replaced rather than piling up
+JPEG quality and resolution adapt to the measured round-trip time: above
+--target-rtt-ms quality drops first, then resolution; well below it,
+resolution is restored first, then quality.
+
+Usage (from backend/app/utils, only needs OpenCV and requests; or
+`python -m app.utils.live_camera_client` from backend/):
+    python live_camera_client.py [--source 0] [--camera-id 3] [--url http://host:5002]
+                                 [--token JWT] [--headless] [--duration 60]
+"""
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
 import cv2
-from utils.recognition_client import send_frame_for_recognition
-
-cap = cv2.VideoCapture(0)  # Change to your camera source
-camera_id = "cam-001"
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    # Send every N seconds OR based on motion trigger
-    result = send_frame_for_recognition(frame, camera_id=camera_id)
-    
-    # Display prediction
-    if 'predicted_id' in result:
-        cv2.putText(frame, f"Predicted ID: {result['predicted_id']}", (10, 30),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-    elif 'error' in result:
-        print("Recognition error:", result['error'])
-
-    cv2.imshow('Live Camera Feed', frame)
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
-
-cap.release()
-cv2.destroyAllWindows()
+
+try:
+    from .recognition_client import RecognitionClient
+except ImportError:  # Run as a script: no parent package
+    from recognition_client import RecognitionClient
+
+MOTION_WIDTH = 160  # Width of the grayscale copy used for differencing
+MOTION_PIXEL_DELTA = 25  # Gray-level change that counts a pixel as moving
+
+MIN_QUALITY, MAX_QUALITY, QUALITY_STEP = 40, 85, 10
+MIN_WIDTH = 320
+SCALE_STEP = 0.75
+ADAPT_INTERVAL_SECONDS = 1.0
+DEFAULT_FILE_FPS = 25.0  # Video files that do not report a frame rate
+
+
+class LatestFrame:
+    """Newest captured frame; readers wait for one newer than they have seen."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._frame = None
+        self._seq = 0
+
+    def put(self, frame):
+        with self._condition:
+            self._frame = frame
+            self._seq += 1
+            self._condition.notify_all()
+
+    def get(self, after_seq=0, timeout=1.0):
+        """(seq, frame), waiting up to timeout for a frame newer than after_seq."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._seq > after_seq, timeout)
+            return self._seq, self._frame
+
+
+class AdaptiveEncoder:
+    """
+    JPEG quality / resolution controller driven by upload round-trip times.
+
+    Args:
+        target_rtt: Round-trip time to stay under (seconds)
+        max_width: Largest width sent (frames are never upscaled)
+    """
+
+    def __init__(self, target_rtt, max_width):
+        self.target_rtt = target_rtt
+        self.max_width = max_width
+        self.quality = MAX_QUALITY
+        self.width = max_width
+        self.rtt = None  # Moving average
+        self._adapted_at = 0.0
+        self._lock = threading.Lock()
+
+    def encode(self, frame):
+        with self._lock:
+            quality, width = self.quality, self.width
+        if frame.shape[1] > width:
+            height = round(frame.shape[0] * width / frame.shape[1])
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return buffer.tobytes() if ok else None
+
+    def record(self, rtt):
+        with self._lock:
+            self.rtt = rtt if self.rtt is None else 0.7 * self.rtt + 0.3 * rtt
+            now = time.monotonic()
+            if now - self._adapted_at < ADAPT_INTERVAL_SECONDS:
+                return
+            self._adapted_at = now
+            if self.rtt > 1.5 * self.target_rtt:
+                if self.quality > MIN_QUALITY:
+                    self.quality = max(MIN_QUALITY, self.quality - QUALITY_STEP)
+                elif self.width > MIN_WIDTH:
+                    self.width = max(MIN_WIDTH, int(self.width * SCALE_STEP))
+            elif self.rtt < 0.7 * self.target_rtt:
+                if self.width < self.max_width:
+                    self.width = min(self.max_width, int(self.width / SCALE_STEP))
+                elif self.quality < MAX_QUALITY:
+                    self.quality = min(MAX_QUALITY, self.quality + QUALITY_STEP)
+
+
+class LiveCameraClient:
+    """
+    Args:
+        capture: Opened cv2.VideoCapture
+        client: RecognitionClient
+        camera_id: Camera row id sent with each frame (or None)
+        max_in_flight: Concurrent uploads
+        keepalive: Longest gap between uploads without motion (seconds)
+        motion_threshold: Fraction of moving pixels that triggers an upload
+        target_rtt: Round-trip time the encoder adapts to (seconds)
+        fps: Pace reads to this frame rate (for video files; a live camera
+             already delivers frames in real time, so None reads freely)
+    """
+
+    def __init__(self, capture, client, camera_id=None, max_in_flight=2, keepalive=5.0,
+                 motion_threshold=0.01, target_rtt=0.3, fps=None):
+        self.capture = capture
+        self.frame_interval = 1.0 / fps if fps else None
+        self.client = client
+        self.camera_id = camera_id
+        self.max_in_flight = max_in_flight
+        self.keepalive = keepalive
+        self.motion_threshold = motion_threshold
+        width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)) or 1280
+        self.encoder = AdaptiveEncoder(target_rtt, max_width=min(width, 1280))
+        self.frames = LatestFrame()
+        self.uploads = queue.Queue(maxsize=1)
+        self.stop = threading.Event()
+        self.last_result = {}
+        self.last_sent_at = 0.0
+        self.stats = {"captured": 0, "motion": 0, "keepalive": 0, "replaced": 0, "sent": 0, "errors": 0}
+        self._threads = []
+
+    def start(self):
+        targets = [(self._capture_loop, "capture"), (self._motion_loop, "motion")]
+        targets += [(self._upload_loop, f"upload-{i}") for i in range(self.max_in_flight)]
+        for target, name in targets:
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def close(self):
+        self.stop.set()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self.client.close()
+
+    def _capture_loop(self):
+        next_read = time.monotonic()
+        while not self.stop.is_set():
+            if self.frame_interval is not None:
+                delay = next_read - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                # Fall behind by more than a frame (slow decode): don't burst to catch up
+                next_read = max(next_read, time.monotonic() - self.frame_interval) + self.frame_interval
+            ok, frame = self.capture.read()
+            if not ok:
+                print("Camera read failed, stopping")
+                self.stop.set()
+                return
+            self.stats["captured"] += 1
+            self.frames.put(frame)
+
+    def _motion_loop(self):
+        seq, previous = 0, None
+        while not self.stop.is_set():
+            seq, frame = self.frames.get(seq)
+            if frame is None:
+                continue
+            height = round(frame.shape[0] * MOTION_WIDTH / frame.shape[1])
+            small = cv2.resize(frame, (MOTION_WIDTH, height), interpolation=cv2.INTER_AREA)
+            gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+            moving = 1.0
+            if previous is not None:
+                _, mask = cv2.threshold(cv2.absdiff(gray, previous), MOTION_PIXEL_DELTA, 255, cv2.THRESH_BINARY)
+                moving = cv2.countNonZero(mask) / mask.size
+            previous = gray
+
+            if moving >= self.motion_threshold:
+                self.stats["motion"] += 1
+            elif time.monotonic() - self.last_sent_at >= self.keepalive:
+                self.stats["keepalive"] += 1
+            else:
+                continue
+            self.last_sent_at = time.monotonic()
+            self._queue_upload(frame)
+
+    def _queue_upload(self, frame):
+        """Queue a frame, replacing one still waiting for an upload thread."""
+        while True:
+            try:
+                self.uploads.put_nowait(frame)
+                return
+            except queue.Full:
+                try:
+                    self.uploads.get_nowait()
+                    self.stats["replaced"] += 1
+                except queue.Empty:
+                    pass
+
+    def _upload_loop(self):
+        while not self.stop.is_set():
+            try:
+                frame = self.uploads.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            jpeg = self.encoder.encode(frame)
+            if jpeg is None:
+                continue
+            started = time.monotonic()
+            result = self.client.recognize_jpeg(jpeg, camera_id=self.camera_id)
+            self.encoder.record(time.monotonic() - started)
+            self.stats["sent"] += 1
+            if "error" in result:
+                self.stats["errors"] += 1
+                print("Recognition error:", result["error"])
+            self.last_result = result
+
+    def overlay(self, frame):
+        """Draw the last result and the upload settings on a preview frame."""
+        result = self.last_result
+        inmate = result.get("inmate") or {}
+        if inmate:
+            label, color = f"{result.get('status')}: {inmate.get('name')}", (0, 0, 255)
+        else:
+            label, color = str(result.get("status") or result.get("error") or "-"), (0, 255, 0)
+        cv2.putText(frame, label, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+        cv2.putText(frame, self.status_line(), (10, frame.shape[0] - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+    def status_line(self):
+        rtt = self.encoder.rtt
+        return (f"rtt {1000 * rtt:.0f} ms  q{self.encoder.quality}  {self.encoder.width}px  "
+                f"sent {self.stats['sent']}  replaced {self.stats['replaced']}"
+                if rtt is not None else "waiting for first result")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default="0", help="Camera index, video file or stream URL")
+    parser.add_argument("--camera-id", type=int, default=None, help="Camera row id on the server")
+    parser.add_argument("--url", default=None, help="Server root (default HEIMDALL_URL)")
+    parser.add_argument("--token", default=None, help="JWT (default HEIMDALL_TOKEN)")
+    parser.add_argument("--max-in-flight", type=int, default=2, help="Concurrent uploads")
+    parser.add_argument("--keepalive", type=float, default=5.0, help="Seconds between uploads without motion")
+    parser.add_argument("--motion-threshold", type=float, default=0.01, help="Fraction of pixels that must change")
+    parser.add_argument("--target-rtt-ms", type=float, default=300, help="Round-trip time to adapt to")
+    parser.add_argument("--headless", action="store_true", help="No preview window; print stats instead")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    capture = cv2.VideoCapture(int(args.source) if args.source.isdigit() else args.source)
+    if not capture.isOpened():
+        sys.exit(f"Could not open camera source {args.source}")
+    # Devices and streams deliver frames in real time; a file would be read as fast as it decodes
+    fps = (capture.get(cv2.CAP_PROP_FPS) or DEFAULT_FILE_FPS) if os.path.isfile(args.source) else None
+
+    live = LiveCameraClient(
+        capture, RecognitionClient(args.url, args.token, pool_size=args.max_in_flight),
+        camera_id=args.camera_id, max_in_flight=args.max_in_flight, keepalive=args.keepalive,
+        motion_threshold=args.motion_threshold, target_rtt=args.target_rtt_ms / 1000, fps=fps,
+    )
+    live.start()
+    started = time.monotonic()
+    seq, last_print = 0, 0.0
+    try:
+        while not live.stop.is_set():
+            if args.duration is not None and time.monotonic() - started >= args.duration:
+                break
+            if args.headless:
+                time.sleep(0.2)
+                if time.monotonic() - last_print >= 5:
+                    last_print = time.monotonic()
+                    print(live.status_line(), live.stats)
+                continue
+            seq, frame = live.frames.get(seq, timeout=0.1)
+            if frame is None:
+                continue
+            frame = frame.copy()
+            live.overlay(frame)
+            cv2.imshow("Live Camera Feed", frame)
+            if cv2.waitKey(1) & 0xFF == ord("q"):
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        live.close()
+        capture.release()
+        if not args.headless:
+            cv2.destroyAllWindows()
+    print("Final:", live.status_line(), live.stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# app/utils/logger.py
+"""
+Non-blocking structured logging for the recognition path.
+
+Modules get a named logger from get_logger() ("heimdall.<name>"). Records are
+put on an in-memory queue by a QueueHandler, so logging from a request or a
+worker thread never touches the console or the disk; a single QueueListener
+thread formats them and writes them to:
+    - the console, as "time LEVEL [name] message"
+    - a size-rotated log file, one JSON object per line with the time, level,
+      logger, message and any structured fields passed as extra={"fields": {...}}
+
+Debug lines in hot loops should use lazy %-style arguments (or check
+logger.isEnabledFor(logging.DEBUG) first), so they cost a level check only
+when DEBUG is off.
+
+configure_logging(app) applies LOG_LEVEL / LOG_FILE / LOG_MAX_BYTES /
+LOG_BACKUP_COUNT from the app config; until it is called (scripts, tests) the
+defaults below are used.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+
+ROOT_LOGGER = "heimdall"
+
+DEFAULT_LEVEL = "INFO"
+DEFAULT_LOG_FILE = "recognition_debug.log"
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+_listener = None
+_lock = threading.Lock()
+
+
+def _short_name(record):
+    prefix = ROOT_LOGGER + "."
+    return record.name[len(prefix):] if record.name.startswith(prefix) else record.name
+
+
+def _exception_text(formatter, record):
+    # Records from the queue carry the traceback already formatted (_QueueHandler)
+    if record.exc_text:
+        return record.exc_text
+    return formatter.formatException(record.exc_info) if record.exc_info else None
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that keeps the message and the traceback apart.
+
+    The stock prepare() formats the traceback into the message, so the JSON
+    file would get it inside "msg". Here the message and the traceback text
+    are rendered on the calling thread (the arguments and the exception may
+    change or go away once it moves on) into separate fields.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = _exception_text(logging.Formatter(), record)
+            record.exc_info = None
+        return record
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Human-readable single line: time, level, short logger name, message."""
+
+    def format(self, record):
+        line = (f"{self.formatTime(record, '%H:%M:%S')} {record.levelname:<7} "
+                f"[{_short_name(record)}] {record.getMessage()}")
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        exception = _exception_text(self, record)
+        if exception:
+            line += "\n" + exception
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including structured fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": _short_name(record),
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        exception = _exception_text(self, record)
+        if exception:
+            entry["exc"] = exception
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(app=None, level=None, log_file=None, max_bytes=None, backup_count=None):
+    """
+    (Re)configure the heimdall loggers and start the listener thread.
+
+    Args:
+        app: Flask app whose LOG_* config provides the defaults
+        level: Level name or number (LOG_LEVEL)
+        log_file: Rotating log file path, or '' to log to the console only (LOG_FILE)
+        max_bytes: Size at which the file is rotated (LOG_MAX_BYTES)
+        backup_count: Rotated files kept (LOG_BACKUP_COUNT)
+
+    Returns:
+        logging.Logger: The root heimdall logger
+    """
+    global _listener
+    config = app.config if app is not None else {}
+    level = level or config.get("LOG_LEVEL", DEFAULT_LEVEL)
+    log_file = log_file if log_file is not None else config.get("LOG_FILE", DEFAULT_LOG_FILE)
+    max_bytes = max_bytes or config.get("LOG_MAX_BYTES", DEFAULT_MAX_BYTES)
+    backup_count = backup_count if backup_count is not None else config.get("LOG_BACKUP_COUNT", DEFAULT_BACKUP_COUNT)
+
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(ConsoleFormatter())
+        handlers = [console]
+        if log_file:
+            directory = os.path.dirname(os.path.abspath(log_file))
+            os.makedirs(directory, exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
+            )
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+
+        log_queue = queue.SimpleQueue()
+        root = logging.getLogger(ROOT_LOGGER)
+        root.handlers = [_QueueHandler(log_queue)]
+        root.setLevel(level.upper() if isinstance(level, str) else level)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        return root
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger(name):
+    """
+    Logger for a module, e.g. get_logger("recognition_api").
+
+    Configures logging with the defaults if nothing has configured it yet.
+    """
+    if _listener is None:
+        configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
@@ -1,20 +1,78 @@
 # utils/recognition_client.py
-import base64
-import requests
+"""
+HTTP client for the recognition API, used by edge capture clients
+(live_camera_client.py).
+
+A RecognitionClient keeps one requests.Session, so consecutive frames reuse
+the same keep-alive connection instead of opening a new one per frame, and
+every request has a timeout. Frames are posted as JPEG multipart uploads to
+/api/recognition/match, authenticated with a JWT bearer token.
+"""
+
+import os
+
 import cv2
-import numpy as np
-
-def send_frame_for_recognition(frame, camera_id=None):
-    # Encode image to base64
-    _, buffer = cv2.imencode('.jpg', frame)
-    encoded_image = base64.b64encode(buffer).decode('utf-8')
-    payload = {
-        "image": f"data:image/jpeg;base64,{encoded_image}",
-        "camera_id": camera_id
-    }
-
-    try:
-        response = requests.post("http://localhost:5000/recognition/api/predict", json=payload)
-        return response.json()
-    except Exception as e:
-        return {"error": str(e)}
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = os.environ.get("HEIMDALL_URL", "http://localhost:5002")
+DEFAULT_TIMEOUT = (3.05, 15)  # (connect, read) seconds
+MATCH_PATH = "/api/recognition/match"
+
+
+class RecognitionClient:
+    """
+    Args:
+        base_url: Server root (default HEIMDALL_URL or http://localhost:5002)
+        token: JWT for the Authorization header (default HEIMDALL_TOKEN)
+        timeout: requests timeout, seconds or (connect, read)
+        pool_size: Connections kept alive (one per concurrent upload)
+    """
+
+    def __init__(self, base_url=None, token=None, timeout=DEFAULT_TIMEOUT, pool_size=4):
+        self.url = (base_url or DEFAULT_BASE_URL).rstrip("/") + MATCH_PATH
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        token = token or os.environ.get("HEIMDALL_TOKEN")
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def recognize_jpeg(self, jpeg, camera_id=None):
+        """
+        Post JPEG bytes for recognition.
+
+        Returns:
+            dict: The server's JSON result, or {"error": ...}
+        """
+        data = {"camera_id": str(camera_id)} if camera_id is not None else {}
+        try:
+            response = self.session.post(
+                self.url, files={"frame": ("frame.jpg", jpeg, "image/jpeg")},
+                data=data, timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            return {"error": str(e)}
+        try:
+            return response.json()
+        except ValueError:
+            return {"error": f"HTTP {response.status_code}"}
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+
+
+def send_frame_for_recognition(frame, camera_id=None, quality=90):
+    """Encode a BGR frame as JPEG and recognize it with a shared client."""
+    global _default_client
+    if _default_client is None:
+        _default_client = RecognitionClient()
+    ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        return {"error": "Could not encode frame"}
+    return _default_client.recognize_jpeg(buffer.tobytes(), camera_id=camera_id)
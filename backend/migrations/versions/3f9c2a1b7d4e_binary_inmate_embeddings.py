@@ -0,0 +1,156 @@
+"""Move inmate embeddings from JSON/pickle columns to binary inmate_embedding rows
+
+Revision ID: 3f9c2a1b7d4e
+Revises:
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+import json
+import pickle
+from datetime import datetime
+
+import numpy as np
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a1b7d4e'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+MODEL_VERSION = 'facenet-vggface2'
+
+# (legacy single column, legacy JSON list column, kind)
+LEGACY_COLUMNS = [
+    ('face_encoding', 'face_encodings_json', 'face'),
+    ('periocular_encoding', 'periocular_encodings_json', 'periocular'),
+]
+
+embedding_table = sa.table(
+    'inmate_embedding',
+    sa.column('inmate_id', sa.Integer),
+    sa.column('kind', sa.String),
+    sa.column('dim', sa.Integer),
+    sa.column('model_version', sa.String),
+    sa.column('vector', sa.LargeBinary),
+    sa.column('created_at', sa.DateTime),
+)
+
+
+def _to_blob(vector):
+    arr = np.asarray(vector, dtype=np.float32).ravel()
+    norm = np.linalg.norm(arr)
+    if norm > 0:
+        arr = arr / norm
+    return arr.astype('<f4').tobytes(), int(arr.shape[0])
+
+
+def _legacy_vectors(single_value, json_value):
+    """Decode legacy pickle + JSON values into a de-duplicated list of vectors."""
+    vectors = []
+    if single_value is not None:
+        try:
+            value = pickle.loads(single_value) if isinstance(single_value, (bytes, bytearray)) else single_value
+            vectors.append(np.asarray(value, dtype=np.float32).ravel())
+        except Exception:
+            # Pickles written by an incompatible NumPy version; the JSON list
+            # usually holds the same vector.
+            pass
+    if json_value:
+        try:
+            for enc in json.loads(json_value):
+                if enc is not None:
+                    vectors.append(np.asarray(enc, dtype=np.float32).ravel())
+        except (json.JSONDecodeError, TypeError, ValueError):
+            pass
+
+    unique = []
+    for vec in vectors:
+        if not any(vec.shape == seen.shape and np.allclose(vec, seen) for seen in unique):
+            unique.append(vec)
+    return unique
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # create_app() runs db.create_all(), so the table may already exist
+    if 'inmate_embedding' not in inspector.get_table_names():
+        op.create_table(
+            'inmate_embedding',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('inmate_id', sa.Integer(), nullable=False),
+            sa.Column('kind', sa.String(length=20), nullable=False),
+            sa.Column('dim', sa.Integer(), nullable=False),
+            sa.Column('model_version', sa.String(length=50), nullable=False),
+            sa.Column('vector', sa.LargeBinary(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['inmate_id'], ['inmate.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_inmate_embedding_inmate_id', 'inmate_embedding', ['inmate_id'])
+
+    inmate_columns = {c['name'] for c in inspector.get_columns('inmate')}
+    present = [
+        (single, multi, kind) for single, multi, kind in LEGACY_COLUMNS
+        if single in inmate_columns or multi in inmate_columns
+    ]
+    if not present:
+        return
+
+    # Convert existing rows
+    selected = ['id'] + [c for single, multi, _ in present for c in (single, multi) if c in inmate_columns]
+    result = bind.execute(sa.text(f"SELECT {', '.join(selected)} FROM inmate"))
+    now = datetime.utcnow()
+    new_rows = []
+    for row in result.mappings():
+        for single, multi, kind in present:
+            for vec in _legacy_vectors(row.get(single), row.get(multi)):
+                blob, dim = _to_blob(vec)
+                new_rows.append({
+                    'inmate_id': row['id'],
+                    'kind': kind,
+                    'dim': dim,
+                    'model_version': MODEL_VERSION,
+                    'vector': blob,
+                    'created_at': now,
+                })
+    if new_rows:
+        op.bulk_insert(embedding_table, new_rows)
+
+    # Drop the legacy columns (batch mode rebuilds the table on SQLite)
+    with op.batch_alter_table('inmate') as batch_op:
+        for single, multi, _ in present:
+            for column in (single, multi):
+                if column in inmate_columns:
+                    batch_op.drop_column(column)
+
+
+def downgrade():
+    bind = op.get_bind()
+
+    with op.batch_alter_table('inmate') as batch_op:
+        for single, multi, _ in LEGACY_COLUMNS:
+            batch_op.add_column(sa.Column(single, sa.LargeBinary(), nullable=True))
+            batch_op.add_column(sa.Column(multi, sa.Text(), nullable=True))
+
+    # Rebuild the JSON lists from the binary rows (the single pickle columns stay empty)
+    for _, multi, kind in LEGACY_COLUMNS:
+        grouped = {}
+        result = bind.execute(
+            sa.text("SELECT inmate_id, vector FROM inmate_embedding WHERE kind = :kind ORDER BY inmate_id, id"),
+            {'kind': kind},
+        )
+        for inmate_id, vector in result:
+            grouped.setdefault(inmate_id, []).append(np.frombuffer(vector, dtype='<f4').tolist())
+        for inmate_id, vectors in grouped.items():
+            bind.execute(
+                sa.text(f"UPDATE inmate SET {multi} = :value WHERE id = :id"),
+                {'value': json.dumps(vectors), 'id': inmate_id},
+            )
+
+    op.drop_index('ix_inmate_embedding_inmate_id', table_name='inmate_embedding')
+    op.drop_table('inmate_embedding')
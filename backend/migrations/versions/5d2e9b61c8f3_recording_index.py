@@ -0,0 +1,63 @@
+"""Add recording_index and recording_detection for offline recording indexing
+
+Revision ID: 5d2e9b61c8f3
+Revises: 8c41e7d05a92
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2e9b61c8f3'
+down_revision = '8c41e7d05a92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app() runs db.create_all(), which may already have created them
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'recording_index' not in tables:
+        op.create_table(
+            'recording_index',
+            sa.Column('recording_id', sa.Integer(), sa.ForeignKey('recording.id'), primary_key=True),
+            sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+            sa.Column('processed_seconds', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('frames_sampled', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('frames_analyzed', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('faces', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('gallery_version', sa.String(length=50), nullable=True),
+            sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('error', sa.String(length=500), nullable=True),
+            sa.Column('started_at', sa.DateTime(), nullable=True),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_recording_index_status', 'recording_index', ['status'])
+
+    if 'recording_detection' not in tables:
+        op.create_table(
+            'recording_detection',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('recording_id', sa.Integer(), sa.ForeignKey('recording.id'), nullable=False),
+            sa.Column('camera_id', sa.Integer(), sa.ForeignKey('camera.id'), nullable=False),
+            sa.Column('offset_seconds', sa.Float(), nullable=False),
+            sa.Column('detected_at', sa.DateTime(), nullable=False),
+            sa.Column('bbox_x', sa.Integer(), nullable=False),
+            sa.Column('bbox_y', sa.Integer(), nullable=False),
+            sa.Column('bbox_width', sa.Integer(), nullable=False),
+            sa.Column('bbox_height', sa.Integer(), nullable=False),
+            sa.Column('inmate_id', sa.Integer(), sa.ForeignKey('inmate.id'), nullable=True),
+            sa.Column('distance', sa.Float(), nullable=True),
+        )
+        op.create_index('ix_recording_detection_recording_id', 'recording_detection', ['recording_id'])
+        op.create_index('ix_recording_detection_inmate_time', 'recording_detection', ['inmate_id', 'detected_at'])
+        op.create_index('ix_recording_detection_camera_time', 'recording_detection', ['camera_id', 'detected_at'])
+
+
+def downgrade():
+    op.drop_table('recording_detection')
+    op.drop_table('recording_index')
@@ -0,0 +1,33 @@
+"""Add recording_index.owner / heartbeat_at so each recording is indexed by one process
+
+Revision ID: 7b3e0c9d4a16
+Revises: 5d2e9b61c8f3
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7b3e0c9d4a16'
+down_revision = '5d2e9b61c8f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('recording_index')}
+
+    # create_app() runs db.create_all(), which does not add columns to existing tables
+    with op.batch_alter_table('recording_index') as batch_op:
+        if 'owner' not in columns:
+            batch_op.add_column(sa.Column('owner', sa.String(length=100), nullable=True))
+        if 'heartbeat_at' not in columns:
+            batch_op.add_column(sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('recording_index') as batch_op:
+        batch_op.drop_column('heartbeat_at')
+        batch_op.drop_column('owner')
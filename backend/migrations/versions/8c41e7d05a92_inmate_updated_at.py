@@ -0,0 +1,40 @@
+"""Add inmate.updated_at to stamp gallery snapshots with a DB change version
+
+Revision ID: 8c41e7d05a92
+Revises: 3f9c2a1b7d4e
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from datetime import datetime
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8c41e7d05a92'
+down_revision = '3f9c2a1b7d4e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inmate_columns = {c['name'] for c in sa.inspect(bind).get_columns('inmate')}
+
+    # create_app() runs db.create_all(), which does not add columns to existing tables
+    if 'updated_at' not in inmate_columns:
+        with op.batch_alter_table('inmate') as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+            batch_op.create_index('ix_inmate_updated_at', ['updated_at'])
+
+    bind.execute(
+        sa.text("UPDATE inmate SET updated_at = COALESCE(created_at, :now) WHERE updated_at IS NULL"),
+        {'now': datetime.utcnow()},
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('inmate') as batch_op:
+        batch_op.drop_index('ix_inmate_updated_at')
+        batch_op.drop_column('updated_at')
@@ -1,12 +1,18 @@
 # backend/run.py
-from flask_socketio import SocketIO
-from app import create_app
+# Development server (threading). For production use serve.py.
+# FLASK_DEBUG=1 turns on the debugger and auto-reload; background services
+# then start only in the reloaded server process (app/__init__.py).
+import os
 
-app = create_app()
-socketio = SocketIO(app, cors_allowed_origins="*")  # allows frontend connection
+from app import create_app, socketio  # socketio allows frontend connection
 
 if __name__ == '__main__':
-    print("Starting server on port 5002...")
-    socketio.run(app, host='0.0.0.0', port=5002, debug=True)
-
-
+    debug = os.environ.get('FLASK_DEBUG') == '1'
+    if debug:
+        os.environ['HEIMDALL_RELOADER'] = '1'
+    # Background services that only a server runs (off for the flask CLI and scripts)
+    os.environ.setdefault('RECORDING_INDEX_WORKERS', '1')
+    os.environ.setdefault('CAMERA_STREAM_AUTOSTART', '1')
+    app = create_app()
+    print(f"Starting server on port 5002{' (debug, auto-reload)' if debug else ''}...")
+    socketio.run(app, host='0.0.0.0', port=5002, debug=debug, use_reloader=debug)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Adaptive Query Augmentation Report
+
+Counts embedding-service calls per recognition query on the distortion mix of
+test_recognition_performance.py, with the fixed augmentation set (before)
+and the adaptive policy (after):
+    - before: every augmentation family is embedded for every query
+    - after:  the original crop first, then only the families selected from
+              estimate_noise_level / estimate_blur_level / salt & pepper /
+              exposure measurements, then the rest if still ambiguous
+
+The full run calls _run_recognition in-process, so it needs the embedding
+service (port 5001) and a seeded database, like test_recognition_performance.py.
+With --selection-only it needs neither: it reports the images generated for
+the original crop plus the selected families (the count when the adaptive
+policy decides after its second stage) and how often each family is chosen.
+
+Usage:
+    cd backend
+    python scripts/benchmark_adaptive_augmentation.py [--queries 300] [--selection-only]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+import cv2
+import numpy as np
+import requests
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.test_recognition_performance import apply_single_distortion
+
+RESULTS_FILE = "adaptive_augmentation_results.json"
+DISTORTION_TYPES = [
+    'gaussian_noise', 'salt_pepper', 'blur', 'motion_blur',
+    'brightness', 'contrast', 'rotation', 'jpeg_compression',
+    'occlusion', 'combined'
+]
+
+
+def load_queries(count, seed):
+    """Distorted inmate images drawn like test_recognition_performance.py."""
+    random.seed(seed)
+    np.random.seed(seed)
+    images_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              'app', 'static', 'inmate_images')
+    files = sorted(f for f in os.listdir(images_dir) if f.lower().endswith(('.jpg', '.png', '.jpeg')))
+    if not files:
+        print(f"[benchmark] No inmate images in {images_dir}")
+        sys.exit(1)
+
+    queries = []
+    for _ in range(count):
+        name = random.choice(files)
+        image = cv2.imread(os.path.join(images_dir, name))
+        if image is None:
+            continue
+        distortion = random.choice(DISTORTION_TYPES)
+        level = random.randint(0, 4)
+        queries.append({
+            "inmate_id": name.rsplit('_', 1)[0],
+            "distortion": distortion,
+            "level": level,
+            "image": apply_single_distortion(image, distortion, level),
+        })
+    return queries
+
+
+def selection_report(queries):
+    from app.routes import recognition_api as ra
+
+    per_distortion = defaultdict(lambda: {"queries": 0, "before": 0, "after": 0})
+    families = Counter()
+    for query in queries:
+        crop = ra._detect_and_crop_face(query["image"], use_detection=False)
+        selected, _ = ra._select_augmentation_families(crop)
+        families.update(selected)
+        entry = per_distortion[query["distortion"]]
+        entry["queries"] += 1
+        entry["before"] += len(ra._generate_query_augmentations(crop))
+        entry["after"] += len(ra._generate_query_augmentations(crop, ["original"] + selected))
+    return per_distortion, families
+
+
+def recognition_report(queries):
+    from app import create_app
+    from app.routes import recognition_api as ra
+    from app.utils.embedding_client import EMBEDDING_SERVICE_URL
+
+    try:
+        requests.get(f"{EMBEDDING_SERVICE_URL}/health", timeout=5).raise_for_status()
+    except Exception:
+        print("[benchmark] Embedding service not running on port 5001 (or use --selection-only)")
+        sys.exit(1)
+
+    calls = Counter()
+    embed, periocular = ra.extract_embedding_from_frame, ra.extract_periocular_embedding
+
+    def counting_embed(image):
+        calls["face"] += 1
+        return embed(image)
+
+    def counting_periocular(frame):
+        calls["periocular"] += 1
+        return periocular(frame)
+
+    ra.extract_embedding_from_frame = counting_embed
+    ra.extract_periocular_embedding = counting_periocular
+    # Alerts are not the subject here; keep the database untouched
+    ra._handle_confirmed_match = lambda inmate, confidence, camera_id=None: {"status": "match_found", "inmate": dict(inmate)}
+
+    app = create_app()
+    per_distortion = defaultdict(lambda: {"queries": 0})
+    with app.app_context(), app.test_request_context():
+        for mode, adaptive in (("before", False), ("after", True)):
+            ra.ADAPTIVE_AUGMENTATION = adaptive
+            for query in queries:
+                calls.clear()
+                start = time.perf_counter()
+                result = ra._run_recognition(query["image"], use_detection=False)
+                elapsed = time.perf_counter() - start
+
+                entry = per_distortion[query["distortion"]]
+                if mode == "before":
+                    entry["queries"] += 1
+                correct = result.get("inmate", {}).get("inmate_id") == query["inmate_id"]
+                for key, value in ((mode, calls["face"]), (f"{mode}_periocular", calls["periocular"]),
+                                   (f"{mode}_correct", int(correct)), (f"{mode}_seconds", elapsed)):
+                    entry[key] = entry.get(key, 0) + value
+    return per_distortion, None
+
+
+def run(args):
+    queries = load_queries(args.queries, args.seed)
+    print(f"[benchmark] {len(queries)} queries over {len(DISTORTION_TYPES)} distortion types")
+    if args.selection_only:
+        per_distortion, families = selection_report(queries)
+    else:
+        per_distortion, families = recognition_report(queries)
+
+    total = {"queries": 0}
+    print(f"  {'Distortion':<18} | {'Queries':>7} | {'Before':>7} | {'After':>7}")
+    for distortion in DISTORTION_TYPES:
+        entry = per_distortion.get(distortion)
+        if not entry:
+            continue
+        for key, value in entry.items():
+            total[key] = total.get(key, 0) + value
+        print(f"  {distortion:<18} | {entry['queries']:>7} | {entry['before'] / entry['queries']:>7.2f} | "
+              f"{entry['after'] / entry['queries']:>7.2f}")
+    print(f"  {'all':<18} | {total['queries']:>7} | {total['before'] / total['queries']:>7.2f} | "
+          f"{total['after'] / total['queries']:>7.2f}  embeddings per query")
+    if families:
+        print(f"  Families selected: {dict(families)}")
+    if not args.selection_only:
+        print(f"  Exact matches: before {total['before_correct']}, after {total['after_correct']}; "
+              f"periocular calls: before {total['before_periocular']}, after {total['after_periocular']}")
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "mode": "selection_only" if args.selection_only else "recognition",
+        "num_queries": total["queries"],
+        "embeddings_per_query_before": round(total["before"] / total["queries"], 3),
+        "embeddings_per_query_after": round(total["after"] / total["queries"], 3),
+        "families_selected": dict(families or {}),
+        "by_distortion": {
+            k: {key: round(v, 3) if isinstance(v, float) else v for key, v in entry.items()}
+            for k, entry in per_distortion.items()
+        },
+    }
+    with open(RESULTS_FILE, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[benchmark] Results saved to {RESULTS_FILE}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--selection-only", action="store_true",
+                        help="Skip embedding and matching; report the selected families only")
+    parser.add_argument("--seed", type=int, default=0)
+    run(parser.parse_args())
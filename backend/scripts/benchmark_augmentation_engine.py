@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Query Augmentation Engine Micro-Benchmark
+
+Times generating query augmentations for one 128x128 face crop per profile
+(a set of augmentation families, as chosen by the adaptive policy):
+    - legacy:     sequential, every variant from scratch (NL-means runs twice
+                  for the noise + noise_blur families, CLAHE rebuilt per call)
+    - sequential: image_preprocessing.generate_query_augmentations(parallel=False)
+    - parallel:   the same engine on its thread pool
+
+Also checks that the engine's outputs are identical to the legacy ones. Uses
+the inmate images in app/static/inmate_images if present, otherwise random
+crops.
+
+Usage:
+    cd backend
+    python scripts/benchmark_augmentation_engine.py [--repeats 20] [--workers 4]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import image_preprocessing
+from app.utils.image_preprocessing import (
+    aggressive_denoise, strong_deblur, remove_salt_pepper_noise, deblur_motion_horizontal,
+    generate_query_augmentations
+)
+
+RESULTS_FILE = "augmentation_engine_results.json"
+CROP_SIZE = (128, 128)
+
+PROFILES = {
+    "original": ["original"],
+    "geometry": ["original", "geometry"],
+    "tone": ["original", "geometry", "tone"],
+    "noise": ["original", "geometry", "noise"],
+    "blur": ["original", "geometry", "blur"],
+    "salt_pepper": ["original", "geometry", "salt_pepper"],
+    "noise_blur": ["original", "geometry", "noise", "blur", "noise_blur"],
+    "full": None,
+}
+
+
+def legacy_augmentations(face_crop, families=None):
+    """_generate_query_augmentations as it was before the engine."""
+    families = image_preprocessing.QUERY_AUGMENTATION_FAMILIES if families is None else families
+    augmentations = []
+    h, w = face_crop.shape[:2]
+    center = (w // 2, h // 2)
+    if "original" in families:
+        augmentations.append(face_crop)
+    if "geometry" in families:
+        for angle in [-15, 15, 180]:
+            M = cv2.getRotationMatrix2D(center, angle, 1.0)
+            augmentations.append(cv2.warpAffine(face_crop, M, (w, h), borderMode=cv2.BORDER_REPLICATE))
+    if "tone" in families:
+        gray = cv2.cvtColor(face_crop, cv2.COLOR_BGR2GRAY)
+        augmentations.append(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))
+        augmentations.append(cv2.convertScaleAbs(face_crop, alpha=1.3, beta=30))
+        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        l, a, b = cv2.split(cv2.cvtColor(face_crop, cv2.COLOR_BGR2LAB))
+        augmentations.append(cv2.cvtColor(cv2.merge([clahe.apply(l), a, b]), cv2.COLOR_LAB2BGR))
+    if "noise" in families:
+        augmentations.append(aggressive_denoise(face_crop))
+    if "blur" in families:
+        augmentations.append(strong_deblur(face_crop))
+    if "salt_pepper" in families:
+        augmentations.append(remove_salt_pepper_noise(face_crop, kernel_size=5))
+    if "blur" in families:
+        augmentations.append(deblur_motion_horizontal(face_crop, kernel_size=11))
+    if "noise_blur" in families:
+        augmentations.append(strong_deblur(aggressive_denoise(face_crop)))
+    return augmentations
+
+
+def load_crops(count, rng):
+    images_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "app", "static", "inmate_images")
+    crops = []
+    if os.path.isdir(images_dir):
+        for name in sorted(os.listdir(images_dir))[:count]:
+            image = cv2.imread(os.path.join(images_dir, name))
+            if image is not None:
+                crops.append(cv2.resize(image, CROP_SIZE))
+    if not crops:
+        print("[benchmark] No inmate images found, using random crops")
+        crops = [rng.integers(0, 256, CROP_SIZE + (3,), dtype=np.uint8) for _ in range(count)]
+    return crops
+
+
+def timed(fn, crops, repeats):
+    for crop in crops[:2]:
+        fn(crop)  # Warm up (thread pool, caches)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for crop in crops:
+            fn(crop)
+    return 1000 * (time.perf_counter() - start) / (repeats * len(crops))
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    image_preprocessing.AUGMENTATION_WORKERS = args.workers
+    crops = load_crops(args.crops, rng)
+    print(f"[benchmark] {len(crops)} crops, {args.repeats} repeats, {args.workers} workers, "
+          f"cv2 threads {cv2.getNumThreads()}")
+
+    results = {}
+    for profile, families in PROFILES.items():
+        identical = all(
+            len(a) == len(b) and all(np.array_equal(x, y) for x, y in zip(a, b))
+            for a, b in ((legacy_augmentations(c, families), generate_query_augmentations(c, families))
+                         for c in crops)
+        )
+        entry = {
+            "images": len(legacy_augmentations(crops[0], families)),
+            "legacy_ms": timed(lambda c: legacy_augmentations(c, families), crops, args.repeats),
+            "sequential_ms": timed(lambda c: generate_query_augmentations(c, families, parallel=False),
+                                   crops, args.repeats),
+            "parallel_ms": timed(lambda c: generate_query_augmentations(c, families), crops, args.repeats),
+            "identical": identical,
+        }
+        entry["speedup"] = entry["legacy_ms"] / entry["parallel_ms"]
+        results[profile] = {k: round(v, 3) if isinstance(v, float) else v for k, v in entry.items()}
+        print(f"  {profile:<12} {entry['images']:3d} images  legacy {entry['legacy_ms']:7.2f} ms  "
+              f"sequential {entry['sequential_ms']:7.2f} ms  parallel {entry['parallel_ms']:7.2f} ms  "
+              f"({entry['speedup']:.2f}x)  identical={identical}")
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "num_crops": len(crops),
+        "repeats": args.repeats,
+        "workers": args.workers,
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    with open(RESULTS_FILE, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[benchmark] Results saved to {RESULTS_FILE}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--crops", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=image_preprocessing.AUGMENTATION_WORKERS)
+    parser.add_argument("--seed", type=int, default=0)
+    run(parser.parse_args())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Centroid Prefilter Benchmark
+
+Checks that the two-stage search (per-inmate centroid prefilter, then exact
+scoring of the top-M shortlisted inmates) makes the same decisions as the
+exhaustive search, and reports how many comparisons it saves.
+
+Each query mimics _run_recognition: several augmentations of one probe face
+(noisy copies of an enrolled embedding) scored together. Decisions compared
+per query: the top-1 inmate, its distance and whether it passes
+SIMILARITY_THRESHOLD. Uses the gallery in the database if one is seeded,
+otherwise a synthetic gallery with several embeddings per inmate.
+
+Usage:
+    cd backend
+    python scripts/benchmark_centroid_prefilter.py [--shortlist 10 25 50 100 200] [--synthetic]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.recognition_engine import GalleryMatcher
+from app.utils import gallery_store
+
+RESULTS_FILE = "centroid_prefilter_results.json"
+SIMILARITY_THRESHOLD = 0.45  # Same as app/routes/recognition_api.py
+AUGMENTATIONS = 8  # Query embeddings per probe, like _generate_query_augmentations
+
+
+def load_gallery(args, rng):
+    if not args.synthetic:
+        try:
+            from app import create_app
+            from app.routes.recognition_api import _query_inmate_gallery
+
+            app = create_app()
+            with app.app_context():
+                gallery = _query_inmate_gallery()
+            if len(gallery[0]):
+                return "database", gallery
+            print("[benchmark] Database has no enrolled inmates, using a synthetic gallery")
+        except Exception as e:
+            print(f"[benchmark] Could not load gallery from database: {e}")
+
+    # Several enrolment images per inmate, as written by clear_and_regenerate.py
+    dim = gallery_store.EMBEDDING_DIM
+    counts = rng.integers(1, 9, size=args.synthetic_inmates)
+    centers = rng.standard_normal((args.synthetic_inmates, dim)).astype(np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    owner = np.repeat(np.arange(args.synthetic_inmates), counts)
+    face = centers[owner] + (0.7 / np.sqrt(dim) * rng.standard_normal((len(owner), dim))).astype(np.float32)
+    inmates = [{"id": i + 1, "inmate_id": f"SYN{i + 1:06d}"} for i in range(args.synthetic_inmates)]
+    return "synthetic", (inmates, face, owner, np.zeros((0, dim), np.float32), [])
+
+
+def make_probes(gallery, count, noise, rng):
+    probes = []
+    for inmate in rng.choice(len(gallery), size=count):
+        rows = np.asarray(gallery.face_rows(inmate))
+        base = rows[rng.integers(len(rows))]
+        probe = base + (noise / np.sqrt(base.shape[0]) * rng.standard_normal(base.shape)).astype(np.float32)
+        augmentations = probe + (0.2 / np.sqrt(base.shape[0])
+                                 * rng.standard_normal((AUGMENTATIONS, base.shape[0]))).astype(np.float32)
+        probes.append(augmentations)
+    return probes
+
+
+def decide(matcher, probes):
+    decisions, comparisons = [], 0
+    start = time.perf_counter()
+    for probe in probes:
+        scores = matcher.score(probe)
+        best = int(scores.ranked(limit=1)[0])
+        decisions.append((best, float(scores.distances[best])))
+        comparisons += scores.comparisons
+    return decisions, comparisons, 1000 * (time.perf_counter() - start) / len(probes)
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    source, data = load_gallery(args, rng)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gallery_store.write_gallery_arrays(tmp, *data)
+        gallery = gallery_store.open_gallery(tmp)
+        print(f"[benchmark] Source: {source}, {len(gallery)} inmates, {gallery.meta['num_face']} face rows "
+              f"({gallery.meta['num_face'] / max(1, len(gallery)):.1f} per inmate)")
+
+        probes = make_probes(gallery, args.queries, args.noise, rng)
+        exhaustive, full_comparisons, full_ms = decide(GalleryMatcher(gallery), probes)
+        print(f"  exhaustive:     {full_ms:7.2f} ms/query, {full_comparisons / len(probes):10.0f} comparisons/query")
+
+        results = []
+        for shortlist in args.shortlist:
+            decisions, comparisons, ms = decide(GalleryMatcher(gallery, shortlist=shortlist), probes)
+            same_inmate = sum(a[0] == b[0] for a, b in zip(exhaustive, decisions))
+            same_decision = sum(
+                (a[1] < SIMILARITY_THRESHOLD) == (b[1] < SIMILARITY_THRESHOLD)
+                and (a[1] >= SIMILARITY_THRESHOLD or a[0] == b[0])
+                for a, b in zip(exhaustive, decisions)
+            )
+            max_delta = max(abs(a[1] - b[1]) for a, b in zip(exhaustive, decisions) if a[0] == b[0])
+            entry = {
+                "shortlist": shortlist,
+                "same_top1": same_inmate,
+                "same_decision": same_decision,
+                "max_distance_delta": round(max_delta, 6),
+                "comparison_fraction": round(comparisons / full_comparisons, 4),
+                "ms_per_query": round(ms, 3),
+                "speedup": round(full_ms / ms, 2),
+            }
+            results.append(entry)
+            print(f"  shortlist {shortlist:5d}: {ms:7.2f} ms/query, {entry['comparison_fraction']:.1%} of comparisons, "
+                  f"same decision {same_decision}/{len(probes)}, same top-1 {same_inmate}/{len(probes)}")
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "source": source,
+        "num_inmates": len(data[0]),
+        "num_face_rows": int(len(data[1])),
+        "num_queries": len(probes),
+        "exhaustive_ms_per_query": round(full_ms, 3),
+        "results": results,
+    }
+    with open(RESULTS_FILE, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[benchmark] Results saved to {RESULTS_FILE}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shortlist", type=int, nargs="+", default=[10, 25, 50, 100, 200])
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--noise", type=float, default=0.6, help="Norm of the noise added to each probe")
+    parser.add_argument("--synthetic", action="store_true", help="Skip the database and use a synthetic gallery")
+    parser.add_argument("--synthetic-inmates", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    run(parser.parse_args())
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Gallery Quantization Report
+
+Compares the float32 matcher against the float16 and int8 quantized matchers
+(coarse score + float32 re-rank) on the inmate gallery:
+    - private memory held for coarse scoring
+    - matching time per query
+    - top-1 decisions that differ from float32 (identity and threshold outcome)
+
+Queries are noisy copies of enrolled face embeddings, so every query has a
+known owner. The gallery can be tiled with perturbed copies to simulate a
+larger deployment. Without a database (or with an empty one) a synthetic
+gallery is used instead.
+
+Usage:
+    cd backend
+    python scripts/seed_lfw_inmates.py          # once, to seed the LFW gallery
+    python scripts/benchmark_gallery_quantization.py [--scale 50] [--queries 500]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.recognition_engine import GalleryMatcher, DEFAULT_RERANK_CANDIDATES
+from app.utils import gallery_store
+
+RESULTS_FILE = "gallery_quantization_results.json"
+SIMILARITY_THRESHOLD = 0.45  # Same as app/routes/recognition_api.py
+MODES = [None, "float16", "int8"]
+
+# Norm of the noise added to enrolled embeddings to create distractor identities
+DISTRACTOR_NOISE = 1.5
+
+
+def load_lfw_gallery():
+    """Read the seeded gallery from the database. Returns None if unavailable."""
+    try:
+        from app import create_app
+        from app.routes.recognition_api import _query_inmate_gallery
+
+        app = create_app()
+        with app.app_context():
+            gallery = _query_inmate_gallery()
+        if len(gallery[0]) == 0:
+            print("[benchmark] Database has no enrolled inmates")
+            return None
+        return gallery
+    except Exception as e:
+        print(f"[benchmark] Could not load gallery from database: {e}")
+        return None
+
+
+def synthetic_gallery(num_inmates, per_inmate, rng):
+    inmates = [{"id": i + 1, "inmate_id": f"SYN{i + 1:06d}"} for i in range(num_inmates)]
+    centers = rng.standard_normal((num_inmates, gallery_store.EMBEDDING_DIM)).astype(np.float32)
+    face = np.repeat(centers, per_inmate, axis=0)
+    face += _noise(face.shape, 0.6 * np.sqrt(face.shape[1]), rng)
+    owner = np.repeat(np.arange(num_inmates), per_inmate)
+    empty = np.zeros((0, gallery_store.EMBEDDING_DIM), dtype=np.float32)
+    return inmates, face, owner, empty, []
+
+
+def tile_gallery(gallery, scale, rng):
+    """Add (scale - 1) perturbed copies of every inmate as distractor identities."""
+    inmates, face, face_owner, peri, peri_owner = gallery
+    if scale <= 1:
+        return gallery
+    face_owner = np.asarray(face_owner)
+    peri_owner = np.asarray(peri_owner, dtype=np.int64)
+    n = len(inmates)
+
+    all_inmates = list(inmates)
+    faces, face_owners = [face], [face_owner]
+    peris, peri_owners = [peri], [peri_owner]
+    for copy in range(1, scale):
+        all_inmates += [dict(m, inmate_id=f"{m['inmate_id']}#{copy}") for m in inmates]
+        faces.append(face + _noise(face.shape, DISTRACTOR_NOISE, rng))
+        face_owners.append(face_owner + copy * n)
+        if len(peri):
+            peris.append(peri + _noise(peri.shape, DISTRACTOR_NOISE, rng))
+            peri_owners.append(peri_owner + copy * n)
+
+    # Rows must stay grouped by owner
+    return (all_inmates, np.concatenate(faces), np.concatenate(face_owners),
+            np.concatenate(peris), np.concatenate(peri_owners))
+
+
+def _noise(shape, norm, rng):
+    """Gaussian noise whose rows have roughly the given L2 norm."""
+    return (norm / np.sqrt(shape[1]) * rng.standard_normal(shape)).astype(np.float32)
+
+
+def make_queries(face, face_owner, count, noise, rng):
+    rows = rng.choice(len(face), size=min(count, len(face)), replace=False)
+    base = face[rows] / np.linalg.norm(face[rows], axis=1, keepdims=True)
+    return base + _noise(base.shape, noise, rng), np.asarray(face_owner)[rows]
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+
+    gallery = None if args.synthetic else load_lfw_gallery()
+    source = "lfw_seed"
+    if gallery is None:
+        source = "synthetic"
+        gallery = synthetic_gallery(args.synthetic_inmates, 3, rng)
+    gallery = tile_gallery(gallery, args.scale, rng)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gallery_store.write_gallery_arrays(tmp, *gallery)
+        mapped = gallery_store.open_gallery(tmp)
+        print(f"[benchmark] Source: {source}, {len(mapped)} inmates, "
+              f"{mapped.meta['num_face']} face + {mapped.meta['num_periocular']} periocular rows")
+
+        queries, owners = make_queries(np.asarray(mapped.face), mapped.face_owner,
+                                       args.queries, args.noise, rng)
+
+        results = {}
+        baseline = None
+        for mode in MODES:
+            matcher = GalleryMatcher(mapped, quantization=mode, rerank_candidates=args.rerank)
+            matcher.score(queries[0])  # Warm up page cache
+
+            top1 = np.empty(len(queries), dtype=np.int64)
+            best = np.empty(len(queries), dtype=np.float32)
+            start = time.perf_counter()
+            for q, query in enumerate(queries):
+                scores = matcher.score(query)
+                top1[q] = scores.ranked(limit=1)[0]
+                best[q] = scores.distances[top1[q]]
+            elapsed = time.perf_counter() - start
+
+            name = mode or "float32"
+            accepted = best < SIMILARITY_THRESHOLD
+            entry = {
+                "memory_mb": round(matcher.memory_bytes() / 1e6, 2),
+                "ms_per_query": round(1000 * elapsed / len(queries), 3),
+                "top1_accuracy": round(float(np.mean(top1 == owners)), 4),
+            }
+            if baseline is None:
+                baseline = (top1, best, accepted, entry)
+            else:
+                base_top1, base_best, base_accepted, base_entry = baseline
+                entry["memory_saved_pct"] = round(100 * (1 - entry["memory_mb"] / base_entry["memory_mb"]), 1)
+                entry["speedup"] = round(base_entry["ms_per_query"] / entry["ms_per_query"], 2)
+                entry["top1_changed"] = int(np.sum(top1 != base_top1))
+                entry["threshold_decision_changed"] = int(np.sum(accepted != base_accepted))
+                entry["max_distance_delta"] = round(float(np.max(np.abs(best - base_best))), 6)
+            results[name] = entry
+
+            print(f"  {name:8s} memory={entry['memory_mb']:9.2f} MB  "
+                  f"{entry['ms_per_query']:8.3f} ms/query  top1={entry['top1_accuracy']:.4f}"
+                  + (f"  changed={entry['top1_changed']}  saved={entry['memory_saved_pct']}%  "
+                     f"speedup={entry['speedup']}x" if mode else ""))
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "source": source,
+        "num_inmates": len(gallery[0]),
+        "num_face_rows": int(len(gallery[1])),
+        "num_queries": int(len(queries)),
+        "query_noise": args.noise,
+        "rerank_candidates": args.rerank,
+        "results": results,
+    }
+    with open(RESULTS_FILE, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[benchmark] Results saved to {RESULTS_FILE}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1, help="Tile the gallery N times with distractor identities")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=0.5, help="Norm of the noise added to each query embedding")
+    parser.add_argument("--rerank", type=int, default=DEFAULT_RERANK_CANDIDATES)
+    parser.add_argument("--synthetic", action="store_true", help="Skip the database and use a synthetic gallery")
+    parser.add_argument("--synthetic-inmates", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    run(parser.parse_args())
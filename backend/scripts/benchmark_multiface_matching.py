@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Multi-Face Matching Benchmark
+
+Times matching every face of a crowded frame against the gallery:
+    - legacy:   per face, per inmate scipy cosine loop (pre-matcher behaviour)
+    - per_face: one GalleryMatcher.score() gallery scan per face
+    - batched:  one (faces x gallery) product via score_batch() + assignment
+
+Faces are noisy copies of enrolled embeddings. Every fourth face is an
+unenrolled lookalike of the first face's inmate, which a per-face search
+tends to match to the same inmate; the one-to-one assignment should leave it
+unmatched. Uses the gallery in the database if one is seeded, otherwise a
+synthetic gallery.
+
+Usage:
+    cd backend
+    python scripts/benchmark_multiface_matching.py [--faces 1 5 20 50] [--synthetic]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+from scipy.spatial.distance import cosine
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.recognition_engine import GalleryMatcher, assign_faces
+from app.utils import gallery_store
+
+RESULTS_FILE = "multiface_matching_results.json"
+SIMILARITY_THRESHOLD = 0.45  # Same as app/routes/recognition_api.py
+QUERY_NOISE = 0.5  # Norm of the noise added to each face embedding
+LOOKALIKE_MIX = 0.85  # Share of the lookalike embedding taken from the real inmate
+REPEATS = 5
+
+
+def load_gallery(synthetic_inmates, rng, use_db=True):
+    if use_db:
+        try:
+            from app import create_app
+            from app.routes.recognition_api import _query_inmate_gallery
+
+            app = create_app()
+            with app.app_context():
+                gallery = _query_inmate_gallery()
+            if len(gallery[0]):
+                return "database", gallery
+            print("[benchmark] Database has no enrolled inmates, using a synthetic gallery")
+        except Exception as e:
+            print(f"[benchmark] Could not load gallery from database: {e}")
+
+    dim = gallery_store.EMBEDDING_DIM
+    inmates = [{"id": i + 1, "inmate_id": f"SYN{i + 1:06d}"} for i in range(synthetic_inmates)]
+    centers = rng.standard_normal((synthetic_inmates, dim)).astype(np.float32)
+    face = np.repeat(centers, 3, axis=0) + 0.6 * rng.standard_normal((synthetic_inmates * 3, dim)).astype(np.float32)
+    owner = np.repeat(np.arange(synthetic_inmates), 3)
+    return "synthetic", (inmates, face, owner, np.zeros((0, dim), np.float32), [])
+
+
+def legacy_match(queries, gallery):
+    """Per face, per inmate loop with scipy cosine (behaviour before the matcher)."""
+    results = []
+    for query in queries:
+        best, best_distance = None, float("inf")
+        for i in range(len(gallery)):
+            for encoding in gallery.face_rows(i):
+                dist = cosine(query, encoding)
+                if dist < best_distance:
+                    best, best_distance = i, dist
+        results.append(best if best_distance < SIMILARITY_THRESHOLD else None)
+    return results
+
+
+def per_face_match(queries, matcher):
+    results = []
+    for query in queries:
+        scores = matcher.score(query)
+        best = int(scores.ranked(limit=1)[0])
+        results.append(best if scores.distances[best] < SIMILARITY_THRESHOLD else None)
+    return results
+
+
+def batched_match(queries, matcher, method):
+    return assign_faces(matcher.score_batch(queries), SIMILARITY_THRESHOLD, method=method)
+
+
+def timed(fn, repeats):
+    fn()  # Warm up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return 1000 * (time.perf_counter() - start) / repeats, result
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    source, data = load_gallery(args.synthetic_inmates, rng, use_db=not args.synthetic)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gallery_store.write_gallery_arrays(tmp, *data)
+        gallery = gallery_store.open_gallery(tmp)
+        matcher = GalleryMatcher(gallery, quantization=args.quantization)
+        print(f"[benchmark] Source: {source}, {len(gallery)} inmates, {gallery.meta['num_face']} face rows, "
+              f"quantization={args.quantization or 'float32'}")
+
+        results = []
+        for num_faces in args.faces:
+            identities = list(rng.choice(len(gallery), size=num_faces, replace=len(gallery) < num_faces))
+            base = np.stack([gallery.face_rows(i)[0] for i in identities])
+            # Every fourth face is an unenrolled lookalike of face 0's inmate
+            for f in range(3, num_faces, 4):
+                stranger = rng.standard_normal(base.shape[1]).astype(np.float32)
+                stranger /= np.linalg.norm(stranger)
+                base[f] = LOOKALIKE_MIX * base[0] + (1 - LOOKALIKE_MIX) * stranger
+                identities[f] = None
+            queries = base + (QUERY_NOISE / np.sqrt(base.shape[1])
+                              * rng.standard_normal(base.shape)).astype(np.float32)
+
+            entry = {"faces": num_faces}
+            entry["per_face_ms"], per_face = timed(lambda: per_face_match(queries, matcher), REPEATS)
+            for method in ("hungarian", "greedy"):
+                entry[f"batched_{method}_ms"], assigned = timed(
+                    lambda: batched_match(queries, matcher, method), REPEATS)
+            if args.legacy:
+                entry["legacy_ms"], _ = timed(lambda: legacy_match(queries, gallery), 1)
+
+            entry["speedup_vs_per_face"] = round(entry["per_face_ms"] / entry["batched_hungarian_ms"], 2)
+            taken = [i for i in per_face if i is not None]
+            entry["duplicate_claims_per_face"] = len(taken) - len(set(taken))
+            entry["correct_per_face"] = int(sum(p == t for p, t in zip(per_face, identities)))
+            entry["correct_assigned"] = int(sum(a == t for a, t in zip(assigned, identities)))
+            results.append({k: round(v, 3) if isinstance(v, float) else v for k, v in entry.items()})
+
+            print(f"  {num_faces:3d} faces: per-face {entry['per_face_ms']:8.2f} ms, "
+                  f"batched {entry['batched_hungarian_ms']:8.2f} ms ({entry['speedup_vs_per_face']}x)"
+                  + (f", legacy {entry['legacy_ms']:9.1f} ms" if args.legacy else "")
+                  + f", duplicate claims without assignment: {entry['duplicate_claims_per_face']}, "
+                    f"correct {entry['correct_per_face']} -> {entry['correct_assigned']}/{num_faces}")
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "source": source,
+        "num_inmates": len(data[0]),
+        "quantization": args.quantization,
+        "results": results,
+    }
+    with open(RESULTS_FILE, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[benchmark] Results saved to {RESULTS_FILE}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--faces", type=int, nargs="+", default=[1, 5, 20, 50])
+    parser.add_argument("--quantization", choices=["float16", "int8"], default=None)
+    parser.add_argument("--legacy", action="store_true", help="Also time the scipy loop (slow)")
+    parser.add_argument("--synthetic", action="store_true", help="Skip the database and use a synthetic gallery")
+    parser.add_argument("--synthetic-inmates", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    run(parser.parse_args())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Nearby-Facility Lookup Benchmark
+
+Times the escaped-inmate alarm's nearby-facility lookup (50 km by default)
+for growing numbers of facilities spread over the globe:
+    - legacy: pure-Python haversine_distance over every facility (the loop
+              find_nearby_facilities ran after loading all users; the ORM
+              load it also paid per alarm is not included)
+    - index:  geolocation.FacilityIndex grid query with vectorized haversine
+
+Also checks that both return the same facilities and distances.
+
+Usage:
+    cd backend
+    python scripts/benchmark_nearby_facilities.py [--sizes 1000 10000 100000] [--queries 200]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.geolocation import FacilityIndex, haversine_distance
+
+RESULTS_FILE = "nearby_facilities_results.json"
+
+
+def random_points(rng, count):
+    """Points uniformly distributed over the sphere."""
+    lats = np.degrees(np.arcsin(rng.uniform(-1, 1, count)))
+    lngs = rng.uniform(-180, 180, count)
+    return lats, lngs
+
+
+def legacy_lookup(facilities, lat, lng, radius_km):
+    """find_nearby_facilities as it was before the index (minus the User query)."""
+    nearby = []
+    for user_id, email, user_lat, user_lng in facilities:
+        dist = haversine_distance(lat, lng, user_lat, user_lng)
+        if dist <= radius_km:
+            nearby.append({'user_id': user_id, 'user_email': email, 'distance_km': round(dist, 2)})
+    nearby.sort(key=lambda x: x['distance_km'])
+    return nearby
+
+
+def same_results(a, b):
+    key = lambda r: (r['distance_km'], r['user_id'])
+    return sorted(map(key, a)) == sorted(map(key, b))
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    query_lats, query_lngs = random_points(rng, args.queries)
+    results = {}
+
+    for size in args.sizes:
+        lats, lngs = random_points(rng, size)
+        ids = np.arange(1, size + 1)
+        emails = [f"facility{i}@example.org" for i in ids]
+        facilities = list(zip(ids.tolist(), emails, lats.tolist(), lngs.tolist()))
+
+        start = time.perf_counter()
+        index = FacilityIndex(ids, emails, lats, lngs)
+        build_ms = 1000 * (time.perf_counter() - start)
+
+        legacy_queries = query_lats[:args.legacy_queries], query_lngs[:args.legacy_queries]
+        start = time.perf_counter()
+        legacy = [legacy_lookup(facilities, lat, lng, args.radius) for lat, lng in zip(*legacy_queries)]
+        legacy_ms = 1000 * (time.perf_counter() - start) / len(legacy)
+
+        start = time.perf_counter()
+        indexed = [index.query(lat, lng, args.radius) for lat, lng in zip(query_lats, query_lngs)]
+        index_ms = 1000 * (time.perf_counter() - start) / len(indexed)
+
+        identical = all(same_results(a, b) for a, b in zip(legacy, indexed))
+        found = sum(len(r) for r in indexed) / len(indexed)
+        results[size] = {
+            "build_ms": round(build_ms, 2),
+            "legacy_ms": round(legacy_ms, 3),
+            "index_ms": round(index_ms, 4),
+            "speedup": round(legacy_ms / index_ms, 1),
+            "facilities_found_per_query": round(found, 2),
+            "identical": identical,
+        }
+        print(f"  {size:>7} facilities  build {build_ms:8.2f} ms  legacy {legacy_ms:9.3f} ms  "
+              f"index {index_ms:7.4f} ms  ({legacy_ms / index_ms:8.1f}x)  "
+              f"{found:.2f} found/query  identical={identical}")
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "radius_km": args.radius,
+        "queries": args.queries,
+        "legacy_queries": args.legacy_queries,
+        "results": results,
+    }
+    with open(RESULTS_FILE, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[benchmark] Results saved to {RESULTS_FILE}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--legacy-queries", type=int, default=20, help="Queries timed with the (slow) legacy loop")
+    parser.add_argument("--radius", type=float, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    run(parser.parse_args())
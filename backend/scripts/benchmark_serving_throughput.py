@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Serving Throughput Benchmark
+
+Compares the current server (run.py: threading, recognition on the request
+thread) with the production setup (serve.py: gevent plus the recognition
+process pool) on the recognition path's CPU stages:
+    - threading:       one thread per request, augmentation and matching in-process
+    - threading+pool:  threads, augmentation and matching in worker processes
+    - gevent:          greenlets, augmentation and matching in-process
+    - gevent+pool:     greenlets, augmentation and matching in worker processes (serve.py)
+
+Each simulated request generates every query augmentation of a face crop,
+waits --embed-ms per augmentation for the embedding service (I/O), then
+scores the embeddings against a synthetic gallery, with --clients requests
+in flight. Alongside, a "socket" loop wakes every 10 ms, standing in for
+Socket.IO and other HTTP traffic; its wake-up lateness shows how long the
+CPU stages hold the interpreter (GIL or event loop) away from it.
+
+Every mode runs in its own process (gevent monkey-patches the interpreter).
+
+Usage:
+    cd backend
+    python scripts/benchmark_serving_throughput.py [--clients 8] [--workers 2] [--duration 10]
+"""
+
+import sys
+
+if __name__ == "__main__" and "--run-mode" in sys.argv and "gevent" in sys.argv[sys.argv.index("--run-mode") + 1]:
+    from gevent import monkey
+
+    monkey.patch_all()
+
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import recognition_pool
+from app.services.recognition_engine import GalleryMatcher
+from app.utils import gallery_store
+
+RESULTS_FILE = "serving_throughput_results.json"
+MODES = ["threading", "threading+pool", "gevent", "gevent+pool"]
+TICK_SECONDS = 0.010
+EARLY_ALARM_DISTANCE = 0.30  # Same as app/routes/recognition_api.py
+
+
+def synthetic_gallery(gallery_dir, num_inmates, per_inmate, rng):
+    inmates = [{
+        "id": i + 1, "inmate_id": f"SYN{i + 1:06d}", "name": f"Inmate {i + 1}",
+        "status": "Escaped" if i % 50 == 0 else "Incarcerated", "risk_level": "High",
+        "mugshot_path": None, "crime": None,
+    } for i in range(num_inmates)]
+    face = rng.standard_normal((num_inmates * per_inmate, gallery_store.EMBEDDING_DIM)).astype(np.float32)
+    owner = np.repeat(np.arange(num_inmates), per_inmate)
+    empty = np.zeros((0, gallery_store.EMBEDDING_DIM), dtype=np.float32)
+    gallery_store.write_gallery_arrays(gallery_dir, inmates, face, owner, empty, [])
+
+
+def face_crop(rng, size=128):
+    """Smooth image with sensor noise, roughly like a webcam face crop."""
+    base = cv2.GaussianBlur(rng.integers(0, 256, (size, size, 3), dtype=np.uint8), (0, 0), 6)
+    noisy = base.astype(np.int16) + rng.normal(0, 12, base.shape).astype(np.int16)
+    return np.clip(noisy, 0, 255).astype(np.uint8)
+
+
+def run_mode(args):
+    """Run one mode in this process and print its results as JSON."""
+    from flask import Flask
+
+    use_pool = args.run_mode.endswith("+pool")
+    use_gevent = args.run_mode.startswith("gevent")
+    rng = np.random.default_rng(args.seed)
+
+    with tempfile.TemporaryDirectory() as gallery_dir:
+        synthetic_gallery(gallery_dir, args.inmates, 3, rng)
+        matcher = GalleryMatcher(gallery_store.open_gallery(gallery_dir), shortlist=100)
+        if use_pool:
+            app = Flask("benchmark")
+            app.config.update(GALLERY_DIR=gallery_dir, GALLERY_SHORTLIST=100,
+                              RECOGNITION_PROCESS_WORKERS=args.workers)
+            recognition_pool.start_pool(app)
+
+        crops = [face_crop(rng) for _ in range(8)]
+        embeddings = rng.standard_normal((64, gallery_store.EMBEDDING_DIM)).astype(np.float32)
+
+        def request(i):
+            augmentations = recognition_pool.augment(crops[i % len(crops)])
+            time.sleep(args.embed_ms / 1000 * len(augmentations))  # Embedding service calls
+            queries = embeddings[np.arange(len(augmentations)) + i % 16]
+            scores = recognition_pool.score(matcher, queries, stop_distance=EARLY_ALARM_DISTANCE)
+            return int(scores.ranked(limit=1)[0])
+
+        stop = threading.Event()
+        latencies, lateness = [], []
+
+        def client(c):
+            i = c
+            while not stop.is_set():
+                started = time.perf_counter()
+                request(i)
+                latencies.append(time.perf_counter() - started)
+                i += args.clients
+
+        def socket_loop():
+            while not stop.is_set():
+                started = time.perf_counter()
+                time.sleep(TICK_SECONDS)
+                lateness.append(time.perf_counter() - started - TICK_SECONDS)
+
+        request(0)  # Warm up (lazy imports, page cache)
+        started = time.perf_counter()
+        if use_gevent:
+            import gevent
+
+            greenlets = [gevent.spawn(client, c) for c in range(args.clients)] + [gevent.spawn(socket_loop)]
+            gevent.sleep(args.duration)
+            stop.set()
+            gevent.joinall(greenlets)
+        else:
+            threads = [threading.Thread(target=client, args=(c,)) for c in range(args.clients)]
+            threads.append(threading.Thread(target=socket_loop))
+            for t in threads:
+                t.start()
+            time.sleep(args.duration)
+            stop.set()
+            for t in threads:
+                t.join()
+        elapsed = time.perf_counter() - started
+        recognition_pool.stop_pool()
+
+    latencies.sort()
+    lateness.sort()
+
+    def percentile(values, p):
+        return round(1000 * values[min(int(p * len(values)), len(values) - 1)], 2) if values else None
+
+    print(json.dumps({
+        "requests_per_second": round(len(latencies) / elapsed, 2),
+        "requests": len(latencies),
+        "latency_ms": {"p50": percentile(latencies, 0.50), "p95": percentile(latencies, 0.95)},
+        "socket_delay_ms": {"p50": percentile(lateness, 0.50), "p99": percentile(lateness, 0.99),
+                            "max": percentile(lateness, 1.0)},
+    }))
+
+
+def run(args):
+    results = {}
+    for mode in args.modes:
+        command = [sys.executable, os.path.abspath(__file__), "--run-mode", mode,
+                   "--clients", str(args.clients), "--workers", str(args.workers),
+                   "--duration", str(args.duration), "--embed-ms", str(args.embed_ms),
+                   "--inmates", str(args.inmates), "--seed", str(args.seed)]
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        results[mode] = entry = json.loads(output.strip().splitlines()[-1])
+        print(f"  {mode:<15} {entry['requests_per_second']:7.2f} req/s  "
+              f"latency p50 {entry['latency_ms']['p50']:8.1f} ms  p95 {entry['latency_ms']['p95']:8.1f} ms  "
+              f"socket delay p50 {entry['socket_delay_ms']['p50']:6.2f} ms  "
+              f"p99 {entry['socket_delay_ms']['p99']:7.2f} ms  max {entry['socket_delay_ms']['max']:7.2f} ms")
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "cpus": os.cpu_count(),
+        "clients": args.clients,
+        "workers": args.workers,
+        "duration_seconds": args.duration,
+        "embed_ms": args.embed_ms,
+        "inmates": args.inmates,
+        "results": results,
+    }
+    with open(RESULTS_FILE, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[benchmark] Results saved to {RESULTS_FILE}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--clients", type=int, default=8, help="Requests in flight")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Recognition worker processes")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per mode")
+    parser.add_argument("--embed-ms", type=float, default=2.0, help="Embedding service time per augmentation")
+    parser.add_argument("--inmates", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--run-mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run_mode:
+        run_mode(args)
+    else:
+        run(args)
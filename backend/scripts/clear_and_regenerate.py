@@ -1,22 +1,25 @@
 #!/usr/bin/env python3
 """
-Clear existing embeddings and regenerate with current NumPy version.
+Clear existing face embeddings and regenerate them.
 
-This bypasses SQLAlchemy's pickle deserialization issue by using raw SQL.
+Works directly on the SQLite file (no app import) and writes each embedding as
+an L2-normalized float32 blob into the inmate_embedding table.
 """
 import base64
-import json
 import sqlite3
 import sys
+from datetime import datetime
 from pathlib import Path
 
 import cv2
+import numpy as np
 import requests
 
 BASE_DIR = Path(__file__).resolve().parents[1]  # backend/
 DB_PATH = BASE_DIR / "instance" / "heimdall.db"
 EMBEDDING_URL = "http://127.0.0.1:5001/encode"
 IMAGES_DIR = BASE_DIR / "app" / "static" / "inmate_images"
+MODEL_VERSION = "facenet-vggface2"  # Must match app/models/inmate_embedding.py
 
 
 def to_data_url(img_path: Path) -> str:
@@ -31,6 +34,15 @@ def to_data_url(img_path: Path) -> str:
     return f"data:image/jpeg;base64,{b64}"
 
 
+def to_blob(embedding) -> tuple[bytes, int]:
+    """L2-normalize an embedding and return (float32 bytes, dim)."""
+    arr = np.asarray(embedding, dtype=np.float32).ravel()
+    norm = np.linalg.norm(arr)
+    if norm > 0:
+        arr = arr / norm
+    return arr.astype("<f4").tobytes(), int(arr.shape[0])
+
+
 def find_images_for_inmate(inmate_id: str, mugshot_path: str = None) -> list[Path]:
     """Find all image files for an inmate."""
     images = []
@@ -80,13 +92,13 @@ def main():
     conn = sqlite3.connect(str(DB_PATH))
     cursor = conn.cursor()
 
-    # Step 1: Clear existing embeddings (avoids pickle issues)
+    # Step 1: Clear existing face embeddings
     print("\nStep 1: Clearing existing embeddings...")
-    cursor.execute("UPDATE inmate SET face_encoding = NULL, face_encodings_json = NULL")
+    cursor.execute("DELETE FROM inmate_embedding WHERE kind = 'face'")
     conn.commit()
     print(f"  Cleared embeddings for all inmates")
 
-    # Step 2: Get all inmates (without loading pickle data)
+    # Step 2: Get all inmates
     cursor.execute("SELECT id, inmate_id, name, mugshot_path FROM inmate")
     inmates = cursor.fetchall()
     print(f"\nStep 2: Found {len(inmates)} inmates to process")
@@ -123,19 +135,17 @@ def main():
                 failed += 1
                 continue
 
-            # Convert to pickle bytes for face_encoding (primary)
-            import pickle
-            import numpy as np
-            primary_embedding = pickle.dumps(np.array(embeddings[0], dtype=np.float32))
-
-            # Store as JSON for face_encodings_json (multi-embedding)
-            embeddings_json = json.dumps(embeddings)
-
-            # Update database
-            cursor.execute(
-                "UPDATE inmate SET face_encoding = ?, face_encodings_json = ? WHERE id = ?",
-                (primary_embedding, embeddings_json, db_id)
-            )
+            # Insert one binary row per embedding
+            now = datetime.utcnow().isoformat(sep=" ")
+            for embedding in embeddings:
+                blob, dim = to_blob(embedding)
+                cursor.execute(
+                    "INSERT INTO inmate_embedding (inmate_id, kind, dim, model_version, vector, created_at) "
+                    "VALUES (?, 'face', ?, ?, ?, ?)",
+                    (db_id, dim, MODEL_VERSION, blob, now)
+                )
+            # Lets running backends pick the change up in their next gallery rebuild
+            cursor.execute("UPDATE inmate SET updated_at = ? WHERE id = ?", (now, db_id))
 
             updated += 1
             print(f"[{i}/{len(inmates)}] OK {inmate_id}: {len(embeddings)} embeddings")
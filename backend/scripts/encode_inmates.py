@@ -3,7 +3,6 @@ import base64
 from pathlib import Path
 import cv2
 import requests
-from sqlalchemy import or_
 import sys
 from pathlib import Path
 
@@ -13,6 +12,7 @@ sys.path.append(str(BASE_DIR))
 from app import create_app
 from app.extensions import db
 from app.models.inmate import Inmate
+from app.models.inmate_embedding import InmateEmbedding, KIND_FACE
 
 # Where your images were written by the seeder (used only as a fallback):
 BACKUP_IMAGES_DIR = Path(__file__).resolve().parents[1] / "app" / "static" / "inmate_images"
@@ -62,7 +62,7 @@ def main():
         # Only encode those missing an embedding
         to_encode = (
             db.session.query(Inmate)
-            .filter(or_(Inmate.face_encoding.is_(None), Inmate.face_encoding == ""))
+            .filter(~Inmate.encodings.any(InmateEmbedding.kind == KIND_FACE))
             .all()
         )
         print(f"Encoding {len(to_encode)} inmates...")
@@ -83,7 +83,7 @@ def main():
                     print(f"[{i}] No embedding returned for inmate id={inmate.id}")
                     continue
 
-                inmate.face_encoding = embedding
+                inmate.set_multi_encodings([embedding])
                 updated += 1
 
                 # Commit in batches
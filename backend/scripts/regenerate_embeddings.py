@@ -2,15 +2,14 @@
 """
 Regenerate all inmate face embeddings.
 
-This script clears existing embeddings and regenerates them using the current
-NumPy version, fixing pickle compatibility issues.
+This script clears existing face embeddings and regenerates them, storing each
+one as a binary float32 row in the inmate_embedding table.
 
 Usage:
     1. Start embedding service: python app/utils/embedding_service.py
     2. Run this script: python scripts/regenerate_embeddings.py
 """
 import base64
-import json
 import sys
 from pathlib import Path
 
@@ -126,11 +125,8 @@ def main():
                     failed += 1
                     continue
 
-                # Store primary embedding
-                inmate.face_encoding = embeddings[0]
-
-                # Store all embeddings as JSON
-                inmate.face_encodings_json = json.dumps(embeddings)
+                # Replace all face embeddings (binary float32 rows)
+                inmate.set_multi_encodings(embeddings)
 
                 updated += 1
                 print(f"[{i}/{len(inmates)}] OK {inmate.inmate_id}: {len(embeddings)} embeddings")
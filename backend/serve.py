@@ -0,0 +1,74 @@
+# backend/serve.py
+"""
+Production server.
+
+run.py serves the app with the threading development server, where every
+request and Socket.IO connection is an OS thread and the OpenCV augmentation
+and matching of one request hold the GIL against all of them. This launcher
+instead:
+    - serves HTTP and Socket.IO (WebSocket) from gevent greenlets, so waiting
+      on the embedding service, the database and clients is cooperative
+    - runs query augmentation and matching in a pool of worker processes
+      warmed with the gallery (app/services/recognition_pool.py)
+
+Usage:
+    cd backend
+    python serve.py [--host 0.0.0.0] [--port 5002] [--process-workers N] [--job-workers N]
+                    [--index-workers N]
+
+--process-workers defaults to the CPU count (RECOGNITION_PROCESS_WORKERS
+overrides it); 0 keeps recognition in the server process. --index-workers
+defaults to 1 (RECORDING_INDEX_WORKERS overrides it); 0 disables the
+recording indexer.
+"""
+
+# Patch the standard library before anything else imports it. Only when run
+# as a script: the recognition worker processes re-import this module as
+# __mp_main__ and must stay unpatched.
+if __name__ == "__main__":
+    from gevent import monkey
+
+    monkey.patch_all()
+
+import argparse
+import os
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 5002)))
+    parser.add_argument("--process-workers", type=int,
+                        default=int(os.environ.get("RECOGNITION_PROCESS_WORKERS") or os.cpu_count() or 1),
+                        help="Worker processes for augmentation and matching (0 = in-process)")
+    parser.add_argument("--job-workers", type=int, default=None,
+                        help="Concurrent background recognition jobs (RECOGNITION_JOB_WORKERS)")
+    parser.add_argument("--index-workers", type=int,
+                        default=int(os.environ.get("RECORDING_INDEX_WORKERS") or 1),
+                        help="Recording indexer worker processes (0 = no indexing)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    os.environ["SOCKETIO_ASYNC_MODE"] = "gevent"
+    os.environ["RECOGNITION_PROCESS_WORKERS"] = str(args.process_workers)
+    os.environ["RECORDING_INDEX_WORKERS"] = str(args.index_workers)
+    os.environ.setdefault("CAMERA_STREAM_AUTOSTART", "1")
+
+    from app import create_app, socketio
+
+    app = create_app()
+    if args.job_workers is not None:
+        app.config["RECOGNITION_JOB_WORKERS"] = args.job_workers
+
+    print(f"Starting server on {args.host}:{args.port} (gevent, "
+          f"{args.process_workers} recognition worker processes)...")
+    try:
+        socketio.run(app, host=args.host, port=args.port, log_output=False)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
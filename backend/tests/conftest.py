@@ -0,0 +1,92 @@
+# backend/tests/conftest.py
+"""
+Shared fixtures: one app per test session on a temporary SQLite database,
+with the background services that need external resources switched off,
+and a clean schema for every test.
+
+Run from backend/:  python -m pytest -q tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    from app.config import DevelopmentConfig
+
+    root = tmp_path_factory.mktemp("heimdall")
+    overrides = {
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + str(root / "test.db"),
+        "GALLERY_DIR": str(root / "gallery"),
+        "GALLERY_WARM_START": False,
+        "RECOGNITION_PROCESS_WORKERS": 0,
+        "RECORDING_INDEX_WORKERS": 0,
+        "RECORDINGS_DIR": str(root / "recordings"),
+        "CAMERA_STREAM_AUTOSTART": False,
+        "CAMERA_STREAM_FILE_DIRS": [str(root / "videos")],
+        "LOG_FILE": "",
+        "WTF_CSRF_ENABLED": False,
+        "TESTING": True,
+    }
+    with pytest.MonkeyPatch.context() as mp:
+        for name, value in overrides.items():
+            mp.setattr(DevelopmentConfig, name, value, raising=False)
+        from app import create_app
+        app = create_app()
+    os.makedirs(root / "videos", exist_ok=True)
+    app.config["TEST_ROOT"] = str(root)
+    return app
+
+
+@pytest.fixture(autouse=True)
+def _clean_db(request):
+    if "app" not in request.fixturenames:
+        yield
+        return
+    app = request.getfixturevalue("app")
+    from app.extensions import db
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    yield
+    with app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    """make_user(username, is_admin=False) -> user id"""
+    from app.extensions import db
+    from app.models.user import User
+
+    def _make(username, is_admin=False):
+        with app.app_context():
+            user = User(username=username, email=f"{username}@example.com", is_admin=is_admin)
+            user.set_password("password")
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+    return _make
+
+
+def login(client, user_id):
+    """Authenticate a test client's session cookie as user_id (Flask-Login)."""
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+        session["_fresh"] = True
+
+
+def jwt_headers(app, user_id, is_admin=False):
+    from app.utils.jwt import generate_jwt
+    with app.app_context():
+        return {"Authorization": f"Bearer {generate_jwt(user_id, is_admin)}"}
@@ -0,0 +1,124 @@
+# backend/tests/test_adaptive_augmentation.py
+"""
+Adaptive query augmentation in _run_recognition (app/routes/recognition_api.py):
+the original crop is embedded first, the families its measured degradations
+call for next, everything else last, stopping as soon as the result is clear.
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from app.routes import recognition_api
+from app.services.recognition_engine import GalleryMatcher
+from app.utils import gallery_store
+
+DIM = gallery_store.EMBEDDING_DIM
+CROP = np.full((128, 128, 3), 128, dtype=np.uint8)
+
+
+def _unit(vector):
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def recognition(app, monkeypatch, tmp_path):
+    """
+    run(*embeddings) -> (result, families embedded per stage): _run_recognition
+    on a fixed crop against a two-inmate gallery, the embedding service
+    returning the given embeddings in order.
+    """
+    rng = np.random.default_rng(0)
+    identities = [_unit(rng.normal(size=DIM)) for _ in range(2)]
+    inmates = [{"id": i + 1, "inmate_id": f"I{i}", "name": f"inmate {i}", "status": "Incarcerated",
+                "risk_level": "Low"} for i in range(2)]
+    version = gallery_store.write_gallery(str(tmp_path), [(inmate, [v], []) for inmate, v in zip(inmates, identities)])
+    matcher = GalleryMatcher(gallery_store.open_gallery(str(tmp_path), version))
+
+    monkeypatch.setattr(recognition_api, "_detect_and_crop_face", lambda frame, use_detection=True: CROP)
+    monkeypatch.setattr(recognition_api, "_load_inmate_encodings", lambda: matcher)
+    monkeypatch.setattr(recognition_api, "_detection_location", lambda camera_id: (None, None))
+    monkeypatch.setattr(recognition_api, "_select_augmentation_families",
+                        lambda crop: (["geometry"], {}))
+    monkeypatch.setattr(recognition_api, "_handle_confirmed_match",
+                        lambda inmate, confidence, camera_id=None: {"status": "match_found", "id": inmate["id"]})
+
+    def run(*embeddings):
+        stages, queue = [], list(embeddings)
+
+        def augment(crop, families):
+            stages.append(list(families))
+            return [crop] * sum(len(recognition_api.QUERY_AUGMENTATION_FAMILIES[f]) for f in families)
+
+        monkeypatch.setattr(recognition_api, "_generate_query_augmentations", augment)
+        monkeypatch.setattr(recognition_api, "extract_embedding_from_frame",
+                            lambda image: queue.pop(0) if queue else rng.normal(size=DIM).tolist())
+        with app.app_context():
+            return recognition_api._run_recognition(CROP), stages
+
+    run.identities = identities
+    return run
+
+
+def _at_distance(identity, distance, seed=1):
+    """A unit vector at the given cosine distance from identity."""
+    other = np.random.default_rng(seed).normal(size=DIM)
+    other = _unit(other - other @ identity * identity)
+    similarity = 1 - distance
+    return (similarity * identity + np.sqrt(1 - similarity ** 2) * other).tolist()
+
+
+def test_confident_original_stops_after_one_embedding(recognition):
+    result, stages = recognition(_at_distance(recognition.identities[0], 0.1))
+    assert stages == [["original"]]
+    assert result["status"] == "match_found" and result["id"] == 1
+
+
+def test_hopeless_original_stops_after_one_embedding(recognition):
+    result, stages = recognition(_at_distance(recognition.identities[0], 0.95))
+    assert stages == [["original"]]
+    assert result["status"] == "no_match"
+
+
+def test_ambiguous_original_embeds_the_selected_families_next(recognition):
+    close = _at_distance(recognition.identities[1], 0.05)
+    # original: ambiguous; first rotation: a clear match, so the rest is skipped
+    result, stages = recognition(_at_distance(recognition.identities[1], 0.5), close)
+    assert stages == [["original"], ["geometry"]]
+    assert result["status"] == "match_found" and result["id"] == 2
+
+
+def test_still_ambiguous_embeds_every_family(recognition):
+    ambiguous = _at_distance(recognition.identities[1], 0.5)
+    _, stages = recognition(*[ambiguous] * 4)  # The original and its three rotations
+    assert stages[:2] == [["original"], ["geometry"]]
+    assert sorted(stages[2]) == sorted(f for f in recognition_api.AUGMENTATION_FAMILIES
+                                       if f not in ("original", "geometry"))
+
+
+def test_fixed_set_without_adaptive_augmentation(recognition, monkeypatch):
+    monkeypatch.setattr(recognition_api, "ADAPTIVE_AUGMENTATION", False)
+    _, stages = recognition(_at_distance(recognition.identities[0], 0.1))
+    assert stages == [list(recognition_api.AUGMENTATION_FAMILIES)]
+
+
+def test_families_follow_the_measured_degradations():
+    rng = np.random.default_rng(0)
+    blocks = cv2.resize(rng.integers(0, 256, size=(32, 32, 3), dtype=np.uint8), (128, 128),
+                        interpolation=cv2.INTER_NEAREST)
+    face = cv2.GaussianBlur(blocks, (0, 0), 1.5)
+    # Rotations cannot be measured: always tried
+    assert recognition_api._select_augmentation_families(face)[0] == ["geometry"]
+
+    dark = (face * 0.2).astype(np.uint8)
+    assert "tone" in recognition_api._select_augmentation_families(dark)[0]
+
+    blurred = cv2.GaussianBlur(face, (0, 0), 4)
+    assert "blur" in recognition_api._select_augmentation_families(blurred)[0]
+
+    noisy = np.clip(face + rng.normal(0, 10, face.shape), 0, 255).astype(np.uint8)
+    assert recognition_api._select_augmentation_families(noisy)[0] == ["geometry", "noise"]
+
+    salted = face.copy()
+    salted[rng.random(face.shape[:2]) < 0.05] = 255
+    assert "salt_pepper" in recognition_api._select_augmentation_families(salted)[0]
@@ -0,0 +1,123 @@
+# backend/tests/test_alert_manager.py
+"""Write-behind persistence of alerts, matches and detections (app/services/alert_manager.py)."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services import alert_manager
+
+NOW = datetime(2026, 10, 1, 12)
+
+
+@pytest.fixture
+def queued(app, monkeypatch):
+    """Queue writes without the app's writer thread; flush() writes them."""
+    alert_manager.stop_alert_writer()  # It would flush behind the test's back
+    monkeypatch.setattr(alert_manager, "_writer", object())  # Not None: nothing is flushed inline
+    monkeypatch.setattr(alert_manager, "_batch_size", 1000)
+    monkeypatch.setattr(alert_manager, "_alerts", [])
+    monkeypatch.setattr(alert_manager, "_matches", [])
+    monkeypatch.setattr(alert_manager, "_touches", {})
+    monkeypatch.setattr(alert_manager, "_retries", [])
+    with app.app_context():
+        yield
+    monkeypatch.undo()
+    alert_manager.start_alert_writer(app)
+
+
+def _alert(inmate_id=7):
+    from app.models.alert import Alert
+    return Alert(message="match", level="warning", confidence=80.0, inmate_id=inmate_id, resolved=False)
+
+
+def _active(inmate_id=7):
+    from app.models.active_recognition import ActiveRecognition
+    return ActiveRecognition(inmate_id=inmate_id, camera_id=3, first_detected_at=NOW, last_detected_at=NOW)
+
+
+def test_writes_wait_for_one_batched_flush(queued):
+    from app.models import ActiveRecognition, Alert, Match
+
+    pending = alert_manager.queue_alert(_alert(), _active())
+    alert_manager.record_match(7, NOW)
+    alert_manager.record_match(8, NOW)
+    assert alert_manager.pending_writes() == 3
+    assert Alert.query.count() == Match.query.count() == 0
+
+    assert alert_manager.flush() == 4  # Alert, its active recognition and two matches
+    assert alert_manager.pending_writes() == 0
+    assert pending.alert_id == Alert.query.one().id
+    active = ActiveRecognition.query.one()
+    assert active.alert_id == pending.alert_id and Match.query.count() == 2
+    # Still readable by the thread that queued them
+    assert pending.active.last_detected_at == NOW
+
+
+def test_touches_coalesce_per_record(queued):
+    from app.models import ActiveRecognition
+
+    alert_manager.queue_alert(_alert(), _active())
+    alert_manager.flush()
+    active_id = ActiveRecognition.query.one().id
+
+    for minutes in (1, 2, 3):
+        alert_manager.touch_active_id(active_id, NOW + timedelta(minutes=minutes))
+    assert alert_manager.pending_writes() == 1
+    assert alert_manager.flush() == 1
+    assert ActiveRecognition.query.one().last_detected_at == NOW + timedelta(minutes=3)
+
+
+def test_full_batch_wakes_the_writer(queued, monkeypatch):
+    monkeypatch.setattr(alert_manager, "_batch_size", 2)
+    alert_manager._wake.clear()
+    alert_manager.record_match(7)
+    assert not alert_manager._wake.is_set()
+    alert_manager.record_match(8)
+    assert alert_manager._wake.is_set()
+
+
+def test_without_a_writer_writes_are_flushed_inline(queued, monkeypatch):
+    from app.models import Match
+
+    monkeypatch.setattr(alert_manager, "_writer", None)
+    alert_manager.record_match(7, NOW)
+    assert Match.query.count() == 1 and alert_manager.pending_writes() == 0
+
+
+def test_flush_leaves_the_callers_session_alone(queued):
+    from app.extensions import db
+    from app.models import Alert, Match
+
+    db.session.add(_alert(inmate_id=99))  # Request work not meant to be committed
+    alert_manager.record_match(7, NOW)
+    alert_manager.flush()
+    db.session.rollback()
+    assert Match.query.count() == 1
+    assert Alert.query.count() == 0
+
+
+def test_failed_batch_is_retried_then_dropped(queued, monkeypatch):
+    from app.models import Match
+
+    write = alert_manager._write_batch
+    failures = [RuntimeError("database is locked")] * alert_manager.MAX_FLUSH_ATTEMPTS
+
+    def flaky(*batch):
+        if failures:
+            raise failures.pop()
+        return write(*batch)
+
+    monkeypatch.setattr(alert_manager, "_write_batch", flaky)
+    alert_manager.record_match(7, NOW)
+    assert alert_manager.flush() == 0 and alert_manager.pending_writes() == 1  # Kept for a retry
+
+    failures[:] = [RuntimeError("database is locked")]
+    assert alert_manager.flush() == 0 and alert_manager.pending_writes() == 1
+    assert alert_manager.flush() == 1 and Match.query.count() == 1
+
+    failures[:] = [RuntimeError("database is locked")] * alert_manager.MAX_FLUSH_ATTEMPTS
+    alert_manager.record_match(8, NOW)
+    for _ in range(alert_manager.MAX_FLUSH_ATTEMPTS):
+        alert_manager.flush()
+    assert alert_manager.pending_writes() == 0 and Match.query.count() == 1  # Dropped
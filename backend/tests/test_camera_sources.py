@@ -0,0 +1,119 @@
+# backend/tests/test_camera_sources.py
+"""Camera sources the server may open (app/utils/camera_stream.py, camera routes)."""
+
+import os
+
+import pytest
+
+from conftest import jwt_headers, login
+from app.utils import camera_stream
+
+
+@pytest.fixture(autouse=True)
+def _no_streams(monkeypatch):
+    # Validation only: never actually open a source
+    monkeypatch.setattr(camera_stream, "sync_camera", lambda camera: None)
+
+
+@pytest.fixture
+def video_file(app):
+    path = os.path.join(app.config["TEST_ROOT"], "videos", "clip.mp4")
+    open(path, "wb").close()
+    return path
+
+
+@pytest.mark.parametrize("url", [
+    "http://169.254.169.254/latest/meta-data",
+    "/etc/passwd",
+    "file:///etc/passwd",
+    "concat:rtsp://a|/etc/passwd",
+    "tcp://10.0.0.1:22",
+    "rtsp://",
+    None,
+])
+def test_rtsp_camera_needs_rtsp_url(app, client, make_user, url):
+    login(client, make_user("alice"))
+    response = client.post("/api/cameras", json={"name": "c", "camera_type": "rtsp", "stream_url": url})
+    assert response.status_code == 400
+    assert "rtsp://" in response.get_json()["error"]
+
+
+def test_rtsp_camera_accepted(app, client, make_user):
+    login(client, make_user("alice"))
+    response = client.post("/api/cameras", json={
+        "name": "gate", "camera_type": "rtsp", "stream_url": "rtsps://user:pw@10.0.0.5:322/stream1",
+    })
+    assert response.status_code == 201
+
+
+def test_update_to_disallowed_url_is_refused(app, client, make_user):
+    login(client, make_user("alice"))
+    camera = client.post("/api/cameras", json={
+        "name": "gate", "camera_type": "rtsp", "stream_url": "rtsp://10.0.0.5/stream",
+    }).get_json()["camera"]
+    response = client.put(f"/api/cameras/{camera['id']}", json={"stream_url": "http://example.com/x"})
+    assert response.status_code == 400
+    assert client.get(f"/api/cameras/{camera['id']}").get_json()["stream_url"] == "rtsp://10.0.0.5/stream"
+
+
+def test_unknown_camera_type_is_refused(app, client, make_user):
+    login(client, make_user("alice"))
+    response = client.post("/api/cameras", json={"name": "c", "camera_type": "ffmpeg", "stream_url": "x"})
+    assert response.status_code == 400
+
+
+def test_file_camera_is_admin_only(app, client, make_user, video_file):
+    login(client, make_user("alice"))
+    response = client.post("/api/cameras", json={"name": "c", "camera_type": "file", "stream_url": video_file})
+    assert response.status_code == 400
+
+    login(client, make_user("root", is_admin=True))
+    response = client.post("/api/cameras", json={"name": "c", "camera_type": "file", "stream_url": video_file})
+    assert response.status_code == 201
+
+
+def test_file_camera_must_be_inside_file_dirs(app, client, make_user, video_file):
+    login(client, make_user("root", is_admin=True))
+    outside = os.path.join(os.path.dirname(video_file), "..", "test.db")
+    response = client.post("/api/cameras", json={"name": "c", "camera_type": "file", "stream_url": outside})
+    assert response.status_code == 400
+
+
+def test_stream_source_only_opens_admin_server_devices(app, make_user, video_file):
+    from app.extensions import db
+    from app.models.camera import Camera
+
+    user_id, admin_id = make_user("alice"), make_user("root", is_admin=True)
+    with app.app_context():
+        def source(owner, **fields):
+            camera = Camera(name="c", location="l", user_id=owner, **fields)
+            db.session.add(camera)
+            db.session.commit()
+            return camera_stream.stream_source(camera)
+
+        assert source(user_id, camera_type="usb", device_id="0") is None
+        assert source(admin_id, camera_type="usb", device_id="0") == 0
+        assert source(admin_id, camera_type="usb", device_id="/dev/video0") is None
+        assert source(user_id, camera_type="file", stream_url=video_file) is None
+        assert source(admin_id, camera_type="file", stream_url=video_file) == video_file
+        # Rows saved before validation existed are still not opened
+        assert source(admin_id, camera_type="rtsp", stream_url="/etc/passwd") is None
+        assert source(user_id, camera_type="rtsp", stream_url="rtsp://10.0.0.5/s") == "rtsp://10.0.0.5/s"
+        assert source(user_id, camera_type="webcam", device_id="0") is None
+
+
+def test_bearer_token_callers_are_validated_too(app, client, make_user, video_file):
+    user_id, admin_id = make_user("alice"), make_user("root", is_admin=True)
+    camera = {"name": "c", "camera_type": "file", "stream_url": video_file}
+    assert client.post("/api/cameras", json=camera, headers=jwt_headers(app, user_id)).status_code == 400
+    response = client.post("/api/cameras", json=camera, headers=jwt_headers(app, admin_id))
+    assert response.status_code == 201
+    camera_id = response.get_json()["camera"]["id"]
+    with app.app_context():
+        from app.extensions import db
+        from app.models.camera import Camera
+        assert db.session.get(Camera, camera_id).user_id == admin_id
+
+    response = client.put(f"/api/cameras/{camera_id}", json={"camera_type": "rtsp", "stream_url": "/etc/passwd"},
+                          headers=jwt_headers(app, admin_id))
+    assert response.status_code == 400
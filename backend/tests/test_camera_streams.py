@@ -0,0 +1,31 @@
+# backend/tests/test_camera_streams.py
+"""Only one server process runs the camera streams (app/utils/camera_stream.py)."""
+
+import fcntl
+
+from app.utils import camera_stream
+
+
+def test_streams_start_only_in_the_process_holding_the_lock(app, tmp_path, monkeypatch):
+    lock_path = str(tmp_path / "camera_streams.lock")
+    monkeypatch.setattr(camera_stream, "_app", None)
+    monkeypatch.setattr(camera_stream, "_lock_file", None)
+    monkeypatch.setitem(app.config, "CAMERA_STREAM_AUTOSTART", True)
+    monkeypatch.setitem(app.config, "CAMERA_STREAM_LOCK_FILE", lock_path)
+    monkeypatch.setitem(app.config, "CAMERA_STREAM_SYNC_SECONDS", 0)
+
+    # Another process holds the lock: this one leaves the cameras alone
+    with open(lock_path, "a+") as other:
+        fcntl.flock(other.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        camera_stream.start_camera_streams(app, process=lambda *args: {})
+        assert camera_stream._app is None
+        fcntl.flock(other.fileno(), fcntl.LOCK_UN)
+
+    camera_stream.start_camera_streams(app, process=lambda *args: {})
+    try:
+        assert camera_stream._app is app
+        assert open(lock_path).read().strip().isdigit()
+        assert not camera_stream._acquire_lock(lock_path)  # Held now, even against this process
+    finally:
+        camera_stream.stop_camera_streams()
+        camera_stream._lock_file.close()
@@ -0,0 +1,107 @@
+# backend/tests/test_dedup_index.py
+"""In-memory index of active sightings for alert deduplication (app/services/dedup_index.py)."""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services import alert_manager, dedup_index
+
+NOW = datetime(2026, 10, 1, 12)
+WINDOW_START = NOW - timedelta(hours=1)
+
+
+@pytest.fixture(autouse=True)
+def _empty_index(monkeypatch):
+    dedup_index.clear()
+    monkeypatch.setattr(dedup_index, "_touch_interval", 60)
+    yield
+    dedup_index.clear()
+
+
+@pytest.fixture
+def touches(monkeypatch):
+    calls = []
+    monkeypatch.setattr(alert_manager, "touch_active_id",
+                        lambda active_id, when=None: calls.append((active_id, when)))
+    return calls
+
+
+def _active(first_seen, inmate_id=7, **fields):
+    from app.models.active_recognition import ActiveRecognition
+    return ActiveRecognition(inmate_id=inmate_id, camera_id=3, latitude=1.0, longitude=2.0,
+                             first_detected_at=first_seen, last_detected_at=first_seen, **fields)
+
+
+def test_database_is_read_once_per_sighting(app):
+    from app.extensions import db
+    from app.models.active_recognition import ActiveRecognition
+
+    with app.app_context():
+        db.session.add(_active(NOW - timedelta(minutes=5), alert_id=11))
+        db.session.commit()
+        sighting = dedup_index.active_sighting(7, WINDOW_START)
+        assert (sighting.camera_id, sighting.alert_id, sighting.active_id) == (3, 11, 1)
+
+        ActiveRecognition.query.delete()
+        db.session.commit()
+        assert dedup_index.active_sighting(7, WINDOW_START) is sighting  # Served from memory
+        assert dedup_index.active_sighting(7, NOW) is None  # Outside the window: database again
+
+
+def test_recorded_sighting_is_found_before_its_batch_is_written(app):
+    with app.app_context():
+        pending = alert_manager.PendingAlert(alert=None, active=_active(NOW))
+        sighting = dedup_index.record_sighting(pending)
+        assert dedup_index.active_sighting(7, WINDOW_START) is sighting
+        assert sighting.active_id is None and sighting.alert_id is None
+
+        # Written by the alert writer: ids are picked up from the pending records
+        pending.active.id, pending.alert_id = 5, 9
+        assert (sighting.active_id, sighting.alert_id) == (5, 9)
+
+
+def test_touch_writes_behind_at_most_every_interval(app, touches):
+    with app.app_context():
+        pending = alert_manager.PendingAlert(alert=None, active=_active(NOW, id=5))
+        sighting = dedup_index.record_sighting(pending)
+
+        dedup_index.touch(sighting, NOW + timedelta(seconds=30))
+        assert sighting.last_seen == NOW + timedelta(seconds=30) and touches == []
+        dedup_index.touch(sighting, NOW + timedelta(seconds=61))
+        dedup_index.touch(sighting, NOW + timedelta(seconds=90))
+        assert touches == [(5, NOW + timedelta(seconds=61))]
+
+
+def test_touch_of_a_queued_sighting_updates_the_queued_record(app, touches):
+    with app.app_context():
+        pending = alert_manager.PendingAlert(alert=None, active=_active(NOW))
+        sighting = dedup_index.record_sighting(pending)
+        dedup_index.touch(sighting, NOW + timedelta(minutes=2))
+        assert pending.active.last_detected_at == NOW + timedelta(minutes=2)
+        assert touches == []
+
+
+def test_expire_drops_old_sightings(app):
+    with app.app_context():
+        old = alert_manager.PendingAlert(alert=None, active=_active(NOW - timedelta(hours=2)))
+        dedup_index.record_sighting(old)
+        assert dedup_index.expire(WINDOW_START) == 1
+        assert dedup_index.expire(WINDOW_START) == 0
+
+
+def test_alert_writer_expires_sightings_outside_the_window(app):
+    assert alert_manager._writer is not None  # Started with the app
+    with app.app_context():
+        old = alert_manager.PendingAlert(alert=None, active=_active(datetime.utcnow() - dedup_index.WINDOW))
+        recent = alert_manager.PendingAlert(alert=None, active=_active(datetime.utcnow(), inmate_id=8))
+        dedup_index.record_sighting(old)
+        dedup_index.record_sighting(recent)
+    alert_manager._wake.set()
+
+    deadline = time.monotonic() + 5
+    while 7 in dedup_index._index:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert list(dedup_index._index) == [8]
@@ -0,0 +1,64 @@
+# backend/tests/test_facility_index.py
+"""Grid index of facility locations for nearby-facility alarms (app/utils/geolocation.py)."""
+
+import numpy as np
+import pytest
+
+from app.utils import geolocation
+from app.utils.geolocation import FacilityIndex, haversine_distance
+
+
+def _brute_force(lats, lngs, lat, lng, radius_km):
+    distances = [round(haversine_distance(lat, lng, a, b), 2) for a, b in zip(lats, lngs)]
+    return sorted((d, i) for i, d in enumerate(distances) if d <= radius_km)
+
+
+@pytest.fixture(scope="module")
+def facilities():
+    rng = np.random.default_rng(0)
+    # Spread worldwide, plus clusters at a pole and across the antimeridian
+    lats = np.concatenate([rng.uniform(-90, 90, 2000), rng.uniform(88, 90, 100), rng.uniform(-10, 10, 200)])
+    lngs = np.concatenate([rng.uniform(-180, 180, 2000), rng.uniform(-180, 180, 100),
+                           rng.choice([-1, 1], 200) * rng.uniform(179, 180, 200)])
+    ids = np.arange(len(lats)) + 1
+    return ids, lats, lngs, FacilityIndex(ids, [f"{i}@example.com" for i in ids], lats, lngs)
+
+
+@pytest.mark.parametrize("lat, lng, radius_km", [
+    (0.0, 0.0, 50), (45.5, -73.6, 300), (89.5, 10.0, 400), (-89.9, 0.0, 1000),
+    (0.0, 179.9, 200), (5.0, -179.8, 100), (30.0, 60.0, 5000), (10.0, 10.0, 0.5),
+])
+def test_query_matches_brute_force_haversine(facilities, lat, lng, radius_km):
+    ids, lats, lngs, index = facilities
+    got = [(f["distance_km"], f["user_id"]) for f in index.query(lat, lng, radius_km)]
+    want = [(d, int(ids[i])) for d, i in _brute_force(lats, lngs, lat, lng, radius_km)]
+    assert sorted(got) == want
+    assert [d for d, _ in got] == [d for d, _ in want]  # Closest first
+
+
+def test_random_queries_match_brute_force(facilities):
+    ids, lats, lngs, index = facilities
+    rng = np.random.default_rng(1)
+    for lat, lng, radius_km in zip(rng.uniform(-90, 90, 50), rng.uniform(-180, 180, 50), rng.uniform(1, 2000, 50)):
+        got = {f["user_id"] for f in index.query(lat, lng, radius_km)}
+        assert got == {int(ids[i]) for _, i in _brute_force(lats, lngs, lat, lng, radius_km)}
+
+
+def test_empty_index():
+    assert FacilityIndex([], [], [], []).query(0.0, 0.0, 100) == []
+
+
+def test_index_is_rebuilt_when_a_facility_moves(app, make_user, monkeypatch):
+    from app.extensions import db
+    from app.models.user import User
+
+    monkeypatch.setattr(geolocation, "_facility_index", None)
+    user_id = make_user("gate")
+    with app.app_context():
+        assert geolocation.find_nearby_facilities(10.0, 10.0, radius_km=10) == []
+        user = db.session.get(User, user_id)
+        user.latitude, user.longitude = 10.0, 10.01
+        db.session.commit()
+
+        (nearby,) = geolocation.find_nearby_facilities(10.0, 10.0, radius_km=10)
+        assert nearby["user_id"] == user_id and nearby["distance_km"] == pytest.approx(1.1, abs=0.05)
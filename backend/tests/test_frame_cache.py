@@ -0,0 +1,77 @@
+# backend/tests/test_frame_cache.py
+"""Per-camera result reuse for near-identical frames (app/utils/frame_cache.py)."""
+
+import cv2
+import numpy as np
+import pytest
+
+from app.utils import frame_cache
+from app.utils.frame_cache import FrameResultCache, dhash, hamming_distance
+
+
+def _scene(seed):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, size=(48, 64, 3), dtype=np.uint8).repeat(8, axis=0).repeat(8, axis=1)
+
+
+def test_dhash_ignores_noise_but_not_a_new_scene():
+    scene = _scene(0)
+    noisy = np.clip(scene + np.random.default_rng(1).normal(0, 3, scene.shape), 0, 255).astype(np.uint8)
+    assert hamming_distance(dhash(scene), dhash(noisy)) <= frame_cache.DEFAULT_MAX_DISTANCE
+    assert hamming_distance(dhash(scene), dhash(_scene(2))) > frame_cache.DEFAULT_MAX_DISTANCE
+    assert dhash(scene) == dhash(cv2.cvtColor(scene, cv2.COLOR_BGR2GRAY))
+    assert dhash(scene).bit_length() <= 64
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(frame_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_hit_needs_same_camera_close_hash_and_gallery_version(clock):
+    cache = FrameResultCache(max_distance=2)
+    cache.store("camera:1", 0b1011, "v1", {"status": "match"})
+
+    result, age = cache.lookup("camera:1", 0b1000, "v1")  # 2 bits differ
+    assert result == {"status": "match"} and age == 0
+    assert cache.lookup("camera:1", 0b0100, "v1") == (None, None)  # 4 bits differ
+    assert cache.lookup("camera:2", 0b1011, "v1") == (None, None)
+    assert cache.lookup("camera:1", 0b1011, "v2") == (None, None)  # Gallery changed
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_entries_expire(clock):
+    cache = FrameResultCache(max_age_seconds=10)
+    cache.store("camera:1", 7, "v1", {"status": "match"})
+    clock[0] += 10
+    assert cache.lookup("camera:1", 7, "v1")[1] == 10
+    clock[0] += 0.5
+    assert cache.lookup("camera:1", 7, "v1") == (None, None)
+
+
+def test_results_are_copies(clock):
+    cache = FrameResultCache()
+    result = {"status": "match"}
+    cache.store("camera:1", 7, "v1", result)
+    result["status"] = "changed"
+    cache.lookup("camera:1", 7, "v1")[0]["status"] = "changed too"
+    assert cache.lookup("camera:1", 7, "v1")[0] == {"status": "match"}
+
+
+def test_bounded_per_camera_and_in_cameras(clock):
+    cache = FrameResultCache(max_distance=0, entries_per_camera=2, max_cameras=2)
+    for frame_hash in (1, 2, 3):
+        cache.store("camera:1", frame_hash, "v1", {"hash": frame_hash})
+    assert cache.lookup("camera:1", 1, "v1") == (None, None)  # Oldest frame dropped
+    assert cache.lookup("camera:1", 3, "v1")[0] == {"hash": 3}
+
+    cache.store("camera:2", 1, "v1", {})
+    cache.lookup("camera:1", 3, "v1")  # camera:1 is now the most recently used
+    cache.store("camera:3", 1, "v1", {})
+    assert cache.lookup("camera:2", 1, "v1") == (None, None)
+    assert cache.lookup("camera:1", 3, "v1")[0] == {"hash": 3}
+
+    cache.clear("camera:1")
+    assert cache.lookup("camera:1", 3, "v1") == (None, None)
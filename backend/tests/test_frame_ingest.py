@@ -0,0 +1,48 @@
+# backend/tests/test_frame_ingest.py
+"""Binary frame ingestion and per-connection backpressure (app/services/frame_ingest.py)."""
+
+import cv2
+import numpy as np
+import pytest
+
+from app.services import frame_ingest
+
+JPEG = cv2.imencode(".jpg", np.zeros((16, 16, 3), dtype=np.uint8))[1].tobytes()
+
+
+@pytest.fixture
+def connection(app, monkeypatch):
+    """Connection whose drain tasks are collected in connection.tasks instead of started."""
+    tasks = []
+    monkeypatch.setattr(frame_ingest.socketio, "start_background_task", lambda target, *args: tasks.append(args))
+    connection = frame_ingest.open_connection(app, "sid-1", 1, 3, lambda frame, camera_id, key: {"status": "ok"})
+    connection.tasks = tasks
+    yield connection
+    frame_ingest.close_connection("sid-1")
+
+
+def test_waiting_frame_is_replaced_by_the_latest(connection, monkeypatch):
+    sent = []
+    monkeypatch.setattr(frame_ingest.socketio, "emit", lambda event, result, **kwargs: sent.append(result["seq"]))
+
+    assert frame_ingest.submit_frame("sid-1", 1, JPEG) == {"seq": 1, "accepted": True, "dropped": None, "busy": False}
+    assert frame_ingest.submit_frame("sid-1", 2, JPEG)["busy"] is True
+    assert frame_ingest.submit_frame("sid-1", 3, JPEG)["dropped"] == 2
+    assert len(connection.tasks) == 1  # One drain per busy period
+    frame_ingest._drain(connection)
+    assert sent == [3] and not connection.busy
+    assert (connection.received, connection.processed, connection.dropped) == (3, 1, 2)
+
+
+def test_failed_emit_does_not_leave_the_connection_busy(connection, monkeypatch):
+    def emit(event, result, **kwargs):
+        raise ConnectionError("client gone")
+
+    monkeypatch.setattr(frame_ingest.socketio, "emit", emit)
+    frame_ingest.submit_frame("sid-1", 1, JPEG)
+    frame_ingest._drain(connection)
+    assert not connection.busy
+
+    # The next frame starts a new drain rather than waiting behind a dead one
+    assert frame_ingest.submit_frame("sid-1", 2, JPEG)["busy"] is False
+    assert len(connection.tasks) == 2
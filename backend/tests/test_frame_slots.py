@@ -0,0 +1,83 @@
+# backend/tests/test_frame_slots.py
+"""Latest-frame-wins ingestion slots per camera (app/utils/frame_slots.py)."""
+
+import threading
+import time
+
+from app.utils.frame_slots import LatestFrameSlots
+
+
+def _submit_in_thread(slots, camera_key, frame, process, results):
+    thread = threading.Thread(
+        target=lambda: results.__setitem__(frame, slots.submit(camera_key, frame, process)), daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def _wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_frames_waiting_behind_a_busy_camera_are_superseded():
+    slots = LatestFrameSlots()
+    started, release = threading.Event(), threading.Event()
+    processed = []
+
+    def process(frame):
+        processed.append(frame)
+        if frame == 1:
+            started.set()
+            release.wait(5)
+        return {"frame": frame}
+
+    results = {}
+    threads = [_submit_in_thread(slots, "camera:1", 1, process, results)]
+    assert started.wait(5)
+    # Frames 2 and 3 arrive while frame 1 is being recognized; 3 replaces 2
+    threads.append(_submit_in_thread(slots, "camera:1", 2, process, results))
+    _wait_until(lambda: slots._slots["camera:1"].pending is not None)
+    threads.append(_submit_in_thread(slots, "camera:1", 3, process, results))
+    _wait_until(lambda: slots.superseded == 1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert processed == [1, 3]
+    assert results == {1: ({"frame": 1}, False), 2: ({"frame": 3}, True), 3: ({"frame": 3}, False)}
+    assert slots.processed == 2
+
+
+def test_cameras_do_not_wait_for_each_other():
+    slots = LatestFrameSlots()
+    release = threading.Event()
+    results = {}
+    busy = _submit_in_thread(slots, "camera:1", 1, lambda frame: release.wait(5) and {"frame": frame}, results)
+    _wait_until(lambda: slots._slots.get("camera:1") is not None and slots._slots["camera:1"].busy)
+
+    assert slots.submit("camera:2", 2, lambda frame: {"frame": frame}) == ({"frame": 2}, False)
+    release.set()
+    busy.join(5)
+    assert results[1] == ({"frame": 1}, False)
+
+
+def test_processing_errors_become_results():
+    def process(frame):
+        raise RuntimeError("detector crashed")
+
+    result, superseded = LatestFrameSlots().submit("camera:1", 1, process)
+    assert result == {"error": "detector crashed", "status_code": 500} and not superseded
+
+
+def test_wait_times_out():
+    slots = LatestFrameSlots(wait_seconds=0.1)
+    release = threading.Event()
+    busy = _submit_in_thread(slots, "camera:1", 1, lambda frame: release.wait(5) and {}, {})
+    _wait_until(lambda: slots._slots.get("camera:1") is not None and slots._slots["camera:1"].busy)
+
+    assert slots.submit("camera:1", 2, lambda frame: {}) == (None, False)
+    release.set()
+    busy.join(5)
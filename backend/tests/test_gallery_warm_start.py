@@ -0,0 +1,96 @@
+# backend/tests/test_gallery_warm_start.py
+"""
+Gallery warm start (app/routes/recognition_api.py): a worker restarting on a
+snapshot whose database stamp still matches maps it as-is, a changed inmate
+is re-read on its own, and /api/recognition/status reports readiness.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from conftest import login
+from app.routes import recognition_api
+
+
+def _restart(monkeypatch):
+    """Forget this worker's gallery, as a fresh process would."""
+    monkeypatch.setattr(recognition_api, "_inmate_cache", None)
+    monkeypatch.setattr(recognition_api, "_matcher", None)
+    monkeypatch.setattr(recognition_api, "_last_db_check", 0.0)
+    monkeypatch.setattr(recognition_api, "_gallery_status", {
+        "state": "cold", "version": None, "inmates": 0, "db_version": None, "warmup_seconds": None, "error": None,
+    })
+
+
+@pytest.fixture
+def enrolled(app, monkeypatch, tmp_path):
+    """Three enrolled inmates (database ids) and a fresh worker on an empty gallery directory."""
+    from app.extensions import db
+    from app.models import Inmate
+
+    monkeypatch.setitem(app.config, "GALLERY_DIR", str(tmp_path / "gallery"))
+    _restart(monkeypatch)
+    rng = np.random.default_rng(0)
+    with app.app_context():
+        inmates = [Inmate(inmate_id=f"I{i}", name=f"inmate {i}", mugshot_path="m.jpg") for i in range(3)]
+        for inmate in inmates:
+            inmate.set_multi_encodings(list(rng.normal(size=(2, 512))))
+        db.session.add_all(inmates)
+        db.session.commit()
+        return [inmate.id for inmate in inmates]
+
+
+@pytest.fixture
+def vector_reads(monkeypatch):
+    """inmate_pks argument of every embedding read (None = everyone)."""
+    calls = []
+    read = recognition_api._query_inmate_vectors
+    monkeypatch.setattr(recognition_api, "_query_inmate_vectors",
+                        lambda index_by_id, inmate_pks=None: calls.append(inmate_pks) or read(index_by_id, inmate_pks))
+    return calls
+
+
+def test_current_snapshot_is_mapped_without_reading_embeddings(app, enrolled, monkeypatch, vector_reads):
+    with app.app_context():
+        version = recognition_api._load_inmate_encodings().gallery.version
+        assert vector_reads == [None]
+
+        _restart(monkeypatch)
+        matcher = recognition_api._load_inmate_encodings()
+    assert matcher.gallery.version == version and len(matcher.gallery) == 3
+    assert vector_reads == [None]
+
+
+def test_only_changed_inmates_are_read_again(app, enrolled, monkeypatch, vector_reads):
+    from app.extensions import db
+    from app.models import Inmate
+
+    with app.app_context():
+        version = recognition_api._load_inmate_encodings().gallery.version
+        inmate = db.session.get(Inmate, enrolled[1])
+        inmate.set_multi_encodings([np.ones(512)])
+        db.session.commit()
+
+        _restart(monkeypatch)
+        gallery = recognition_api._load_inmate_encodings().gallery
+    assert gallery.version != version
+    assert vector_reads == [None, [enrolled[1]]]
+    assert gallery.meta["num_face"] == 5
+
+
+def test_warmup_reports_readiness(app, client, make_user, enrolled, monkeypatch):
+    login(client, make_user("alice"))
+    assert client.get("/api/recognition/status").status_code == 503
+
+    monkeypatch.setitem(app.config, "GALLERY_WARM_START", True)
+    recognition_api.start_gallery_warmup(app)
+    deadline = time.monotonic() + 10
+    while recognition_api._gallery_status["warmup_seconds"] is None:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    response = client.get("/api/recognition/status")
+    assert response.status_code == 200
+    assert response.get_json()["ready"] and response.get_json()["inmates"] == 3
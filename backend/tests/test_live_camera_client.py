@@ -0,0 +1,125 @@
+# backend/tests/test_live_camera_client.py
+"""Motion-gated, pipelined edge capture client (app/utils/live_camera_client.py)."""
+
+import os
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from app.utils import live_camera_client
+from app.utils.live_camera_client import AdaptiveEncoder, LiveCameraClient
+
+BLACK = np.zeros((240, 320, 3), dtype=np.uint8)
+WHITE = np.full((240, 320, 3), 255, dtype=np.uint8)
+
+
+class _Capture:
+    """cv2.VideoCapture stand-in that plays a list of frames, then fails."""
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.read_at = []
+
+    def get(self, prop):
+        return BLACK.shape[1] if prop == cv2.CAP_PROP_FRAME_WIDTH else 0
+
+    def read(self):
+        self.read_at.append(time.monotonic())
+        if not self.frames:
+            return False, None
+        return True, self.frames.pop(0)
+
+
+class _Client:
+    def __init__(self):
+        self.jpegs = []
+
+    def recognize_jpeg(self, jpeg, camera_id=None):
+        self.jpegs.append((jpeg, camera_id))
+        return {"status": "no_match"}
+
+    def close(self):
+        pass
+
+
+def _run(frames, fps=50, **options):
+    live = LiveCameraClient(_Capture(frames), _Client(), camera_id=3, max_in_flight=1, fps=fps, **options)
+    live.start()
+    deadline = time.monotonic() + 10
+    while not live.stop.is_set():  # Set once the frames run out
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    live.close()
+    return live
+
+
+def test_only_frames_with_motion_are_uploaded():
+    live = _run([BLACK] * 15 + [WHITE] + [BLACK] * 15, keepalive=60)
+    # The first frame, the change to white and the change back
+    assert live.stats["motion"] == 3 and live.stats["keepalive"] == 0
+    assert live.stats["sent"] + live.stats["replaced"] == 3
+    assert all(camera_id == 3 for _, camera_id in live.client.jpegs)
+
+
+def test_static_scene_is_uploaded_at_the_keepalive_interval():
+    live = _run([BLACK] * 30, keepalive=0.1)  # 0.6 s of frames
+    assert live.stats["motion"] == 1
+    assert 3 <= live.stats["keepalive"] <= 6
+
+
+def test_waiting_upload_is_replaced_by_a_newer_frame():
+    live = LiveCameraClient(_Capture([]), _Client())
+    live._queue_upload(BLACK)
+    live._queue_upload(WHITE)
+    assert live.stats["replaced"] == 1 and live.uploads.get_nowait() is WHITE
+
+
+def test_video_files_are_read_at_their_frame_rate():
+    capture = _Capture([BLACK] * 10)
+    LiveCameraClient(capture, _Client(), fps=50)._capture_loop()
+    assert capture.read_at[-1] - capture.read_at[0] >= 0.9 * 10 / 50
+
+    capture = _Capture([BLACK] * 10)
+    LiveCameraClient(capture, _Client())._capture_loop()  # A live camera: read freely
+    assert capture.read_at[-1] - capture.read_at[0] < 0.1
+
+
+def test_encoder_trades_quality_then_resolution_for_round_trip_time(monkeypatch):
+    monkeypatch.setattr(live_camera_client, "ADAPT_INTERVAL_SECONDS", 0)
+    encoder = AdaptiveEncoder(target_rtt=0.1, max_width=1280)
+    settings = []
+    for _ in range(7):
+        encoder.record(1.0)
+        settings.append((encoder.quality, encoder.width))
+    assert settings == [(75, 1280), (65, 1280), (55, 1280), (45, 1280), (40, 1280), (40, 960), (40, 720)]
+
+    encoder.rtt = None
+    settings = []
+    for _ in range(4):
+        encoder.record(0.01)
+        settings.append((encoder.quality, encoder.width))
+    assert settings == [(40, 960), (40, 1280), (50, 1280), (60, 1280)]
+
+
+def test_encoder_downscales_but_never_upscales():
+    encoder = AdaptiveEncoder(target_rtt=0.1, max_width=1280)
+    encoder.width = 160
+    assert cv2.imdecode(np.frombuffer(encoder.encode(BLACK), np.uint8), cv2.IMREAD_COLOR).shape == (120, 160, 3)
+    encoder.width = 1280
+    assert cv2.imdecode(np.frombuffer(encoder.encode(BLACK), np.uint8), cv2.IMREAD_COLOR).shape == BLACK.shape
+
+
+@pytest.mark.parametrize("module", [False, True])
+def test_runs_as_a_script_and_as_a_module(module):
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if module:
+        command, cwd = [sys.executable, "-m", "app.utils.live_camera_client", "--help"], backend
+    else:
+        command, cwd = [sys.executable, "live_camera_client.py", "--help"], os.path.join(backend, "app", "utils")
+    result = subprocess.run(command, cwd=cwd, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert "--max-in-flight" in result.stdout
@@ -0,0 +1,69 @@
+# backend/tests/test_logger.py
+"""Queued, rotating structured logging (app/utils/logger.py)."""
+
+import json
+import logging
+import threading
+
+import pytest
+
+from app.utils import logger as heimdall_logging
+from app.utils.logger import configure_logging, get_logger, shutdown_logging
+
+
+@pytest.fixture
+def log_file(app, tmp_path):
+    yield tmp_path / "logs" / "recognition.jsonl"
+    configure_logging(app)  # Back to the test app's settings
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_records_are_written_by_the_listener_as_json_lines(log_file):
+    configure_logging(level="DEBUG", log_file=str(log_file))
+    log = get_logger("tests")
+    assert isinstance(logging.getLogger(heimdall_logging.ROOT_LOGGER).handlers[0],
+                      logging.handlers.QueueHandler)  # Callers only enqueue
+
+    log.info("Matched %s", "I001", extra={"fields": {"distance": 0.21, "camera_id": 3}})
+    try:
+        raise ValueError("bad frame")
+    except ValueError:
+        log.exception("Recognition failed")
+    shutdown_logging()  # Drains the queue
+
+    matched, failed = _lines(log_file)
+    assert (matched["level"], matched["logger"], matched["msg"]) == ("INFO", "tests", "Matched I001")
+    assert (matched["distance"], matched["camera_id"]) == (0.21, 3)
+    assert matched["thread"] == threading.current_thread().name
+    assert failed["msg"] == "Recognition failed" and "ValueError: bad frame" in failed["exc"]
+
+
+def test_level_filters_before_formatting(log_file):
+    configure_logging(level="INFO", log_file=str(log_file))
+    log = get_logger("tests")
+    assert not log.isEnabledFor(logging.DEBUG)
+
+    class Expensive:
+        def __str__(self):
+            raise AssertionError("formatted although DEBUG is off")
+
+    log.debug("%s", Expensive())
+    log.warning("kept")
+    shutdown_logging()
+    assert [line["msg"] for line in _lines(log_file)] == ["kept"]
+
+
+def test_file_is_rotated_by_size(log_file):
+    configure_logging(log_file=str(log_file), max_bytes=500, backup_count=2)
+    log = get_logger("tests")
+    for i in range(40):
+        log.info("line %d", i)
+    shutdown_logging()
+
+    assert sorted(p.name for p in log_file.parent.iterdir()) == \
+        ["recognition.jsonl", "recognition.jsonl.1", "recognition.jsonl.2"]
+    assert _lines(log_file)[-1]["msg"] == "line 39"
@@ -0,0 +1,100 @@
+# backend/tests/test_migrations.py
+"""
+Binary inmate embedding migration (migrations/versions/3f9c2a1b7d4e_*):
+legacy pickle / JSON encoding columns to inmate_embedding rows and back,
+on a database with the pre-migration inmate table.
+"""
+
+import importlib.util
+import json
+import os
+import pickle
+
+import numpy as np
+import pytest
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+MIGRATION = os.path.join(os.path.dirname(__file__), "..", "migrations", "versions",
+                         "3f9c2a1b7d4e_binary_inmate_embeddings.py")
+
+
+@pytest.fixture
+def migration():
+    spec = importlib.util.spec_from_file_location("binary_inmate_embeddings", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """Engine on an inmate table with the legacy columns, and the vectors stored in it."""
+    rng = np.random.default_rng(0)
+    face_a, face_b, periocular = (rng.normal(size=512).astype(np.float32) for _ in range(3))
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        connection.execute(sa.text(
+            "CREATE TABLE inmate (id INTEGER PRIMARY KEY, name VARCHAR(100), face_encoding BLOB, "
+            "face_encodings_json TEXT, periocular_encoding BLOB, periocular_encodings_json TEXT)"
+        ))
+        # Inmate 1: the pickle repeats the first JSON vector; inmate 2: periocular only
+        connection.execute(sa.text("INSERT INTO inmate VALUES (1, 'a', :pickled, :faces, NULL, NULL)"),
+                           {"pickled": pickle.dumps(face_a), "faces": json.dumps([face_a.tolist(), face_b.tolist()])})
+        connection.execute(sa.text("INSERT INTO inmate VALUES (2, 'b', NULL, NULL, NULL, :periocular)"),
+                           {"periocular": json.dumps([periocular.tolist()])})
+    yield engine, {"face": [face_a, face_b], "periocular": [periocular]}
+    engine.dispose()
+
+
+def _run(engine, step):
+    with engine.begin() as connection:
+        with Operations.context(MigrationContext.configure(connection)):
+            step()
+
+
+def _columns(engine, table):
+    return {c["name"] for c in sa.inspect(engine).get_columns(table)}
+
+
+def test_upgrade_moves_legacy_vectors_to_binary_rows(migration, legacy_db):
+    engine, vectors = legacy_db
+    _run(engine, migration.upgrade)
+
+    assert _columns(engine, "inmate") == {"id", "name"}
+    with engine.connect() as connection:
+        rows = connection.execute(sa.text(
+            "SELECT inmate_id, kind, dim, vector FROM inmate_embedding ORDER BY id")).all()
+    assert [(inmate_id, kind, dim) for inmate_id, kind, dim, _ in rows] == \
+        [(1, "face", 512), (1, "face", 512), (2, "periocular", 512)]
+    stored = [np.frombuffer(vector, dtype="<f4") for *_, vector in rows]
+    for got, want in zip(stored, vectors["face"] + vectors["periocular"]):
+        np.testing.assert_allclose(got, _unit(want), atol=1e-6)
+
+
+def test_downgrade_restores_the_json_columns(migration, legacy_db):
+    engine, vectors = legacy_db
+    _run(engine, migration.upgrade)
+    _run(engine, migration.downgrade)
+
+    assert "inmate_embedding" not in sa.inspect(engine).get_table_names()
+    assert _columns(engine, "inmate") == {"id", "name", "face_encoding", "face_encodings_json",
+                                          "periocular_encoding", "periocular_encodings_json"}
+    with engine.connect() as connection:
+        rows = connection.execute(sa.text(
+            "SELECT id, face_encodings_json, periocular_encodings_json FROM inmate ORDER BY id")).all()
+    (_, faces, no_periocular), (_, no_faces, periocular) = rows
+    assert no_periocular is None and no_faces is None
+    np.testing.assert_allclose(json.loads(faces), [_unit(v) for v in vectors["face"]], atol=1e-6)
+    np.testing.assert_allclose(json.loads(periocular), [_unit(v) for v in vectors["periocular"]], atol=1e-6)
+
+    # And up again from what the downgrade left
+    _run(engine, migration.upgrade)
+    with engine.connect() as connection:
+        assert connection.execute(sa.text("SELECT COUNT(*) FROM inmate_embedding")).scalar() == 3
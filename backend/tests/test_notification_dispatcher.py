@@ -0,0 +1,101 @@
+# backend/tests/test_notification_dispatcher.py
+"""Off-request Socket.IO notification dispatch (app/services/notification_dispatcher.py)."""
+
+import time
+
+import pytest
+
+from app.services import notification_dispatcher as dispatcher
+
+
+@pytest.fixture
+def emits(monkeypatch):
+    """(event, payload, room) of every emit; emits.failures makes the next ones raise."""
+    class _Emits(list):
+        failures = 0
+
+    sent = _Emits()
+
+    def emit(event, payload, room=None):
+        if sent.failures:
+            sent.failures -= 1
+            raise ConnectionError("message queue unavailable")
+        sent.append((event, payload, room))
+
+    monkeypatch.setattr(dispatcher.socketio, "emit", emit)
+    monkeypatch.setitem(dispatcher._config, "retry_delay", 0.01)
+    return sent
+
+
+def _wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def _event(lat=10.0, lng=20.0):
+    return {"kind": "escaped_alarm", "inmate": {"id": 7}, "alert_id": 3, "lat": lat, "lng": lng,
+            "radius_km": 50, "timestamp": "2026-10-01T12:00:00"}
+
+
+@pytest.fixture
+def nearby(monkeypatch):
+    facilities = [{"user_id": 1, "distance_km": 12.34}, {"user_id": 2, "distance_km": 12.34},
+                  {"user_id": 3, "distance_km": 12.71}]
+    monkeypatch.setattr(dispatcher, "find_nearby_facilities", lambda lat, lng, radius_km: facilities)
+    return facilities
+
+
+def test_facilities_at_the_same_distance_share_one_emit(nearby):
+    alarm, *facility_messages = dispatcher._escaped_alarm_messages(_event())
+    assert alarm[2] is None and alarm[1]["detection_location"] == {"lat": 10.0, "lng": 20.0}
+    # Every facility gets its exact distance
+    assert [(payload["distance_km"], rooms) for _, payload, rooms in facility_messages] == \
+        [(12.34, ["user_1", "user_2"]), (12.71, ["user_3"])]
+
+
+def test_distance_step_groups_coarser(nearby, monkeypatch):
+    monkeypatch.setitem(dispatcher._config, "distance_step", 1.0)
+    _, *facility_messages = dispatcher._escaped_alarm_messages(_event())
+    assert [(payload["distance_km"], rooms) for _, payload, rooms in facility_messages] == \
+        [(12.0, ["user_1", "user_2"]), (13.0, ["user_3"])]
+
+
+def test_unknown_location_sends_the_global_alarm_only(nearby):
+    (alarm,) = dispatcher._escaped_alarm_messages(_event(lat=None, lng=None))
+    assert alarm[1]["detection_location"] is None
+
+
+def test_failed_emits_are_retried_by_the_dispatcher_thread(app, emits):
+    assert dispatcher._worker is not None  # Started with the app
+    before = dict(dispatcher.dispatcher_stats())
+    emits.failures = 2
+    dispatcher.notify("camera_status", {"camera_id": 1}, room="user_1")
+
+    _wait_until(lambda: emits)
+    assert emits == [("camera_status", {"camera_id": 1}, "user_1")]
+    stats = dispatcher.dispatcher_stats()
+    assert stats["retries"] - before["retries"] == 2 and stats["failed"] == before["failed"]
+
+
+def test_emit_is_dropped_after_max_attempts(app, emits, monkeypatch):
+    monkeypatch.setitem(dispatcher._config, "max_attempts", 2)
+    before = dispatcher.dispatcher_stats()
+    emits.failures = 2
+    dispatcher.notify("camera_status", {"camera_id": 1})
+
+    _wait_until(lambda: dispatcher.dispatcher_stats()["failed"] > before["failed"])
+    assert emits == [] and dispatcher.dispatcher_stats()["retries"] - before["retries"] == 1
+
+
+def test_stats_report_dispatch_latency(emits, monkeypatch):
+    monkeypatch.setattr(dispatcher, "_worker", None)  # Dispatched on this thread
+    monkeypatch.setattr(dispatcher, "_latencies", dispatcher.deque(maxlen=dispatcher.LATENCY_SAMPLES))
+    for i in range(10):
+        dispatcher.notify("ping", {"i": i})
+
+    stats = dispatcher.dispatcher_stats()
+    latency = stats["latency_ms"]
+    assert len(emits) == 10 and latency["samples"] == 10
+    assert 0 <= latency["p50"] <= latency["p95"] <= latency["max"]
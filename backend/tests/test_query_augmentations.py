@@ -0,0 +1,81 @@
+# backend/tests/test_query_augmentations.py
+"""Query augmentations built from shared steps (app/utils/image_preprocessing.py)."""
+
+import cv2
+import numpy as np
+import pytest
+
+from app.utils import image_preprocessing as ip
+
+
+@pytest.fixture(scope="module")
+def crop():
+    rng = np.random.default_rng(0)
+    base = cv2.resize(rng.integers(0, 256, size=(12, 12, 3), dtype=np.uint8), (96, 96))
+    return np.clip(base + rng.normal(0, 8, base.shape), 0, 255).astype(np.uint8)
+
+
+def _rotate(image, angle):
+    h, w = image.shape[:2]
+    M = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+    return cv2.warpAffine(image, M, (w, h), borderMode=cv2.BORDER_REPLICATE)
+
+
+def _clahe(image):
+    l, a, b = cv2.split(cv2.cvtColor(image, cv2.COLOR_BGR2LAB))
+    merged = cv2.merge([cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(l), a, b])
+    return cv2.cvtColor(merged, cv2.COLOR_LAB2BGR)
+
+
+# Every output computed on its own from the primitives, as before the shared steps
+SEQUENTIAL = {
+    "original": lambda image: image,
+    "rotate_-15": lambda image: _rotate(image, -15),
+    "rotate_15": lambda image: _rotate(image, 15),
+    "rotate_180": lambda image: _rotate(image, 180),
+    "grayscale": lambda image: cv2.cvtColor(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), cv2.COLOR_GRAY2BGR),
+    "bright": lambda image: cv2.convertScaleAbs(image, alpha=1.3, beta=30),
+    "clahe": _clahe,
+    "denoised": ip.aggressive_denoise,
+    "sharpened": ip.strong_deblur,
+    "median": lambda image: ip.remove_salt_pepper_noise(image, kernel_size=5),
+    "motion_h": lambda image: ip.deblur_motion_horizontal(image, kernel_size=11),
+    "denoised_sharpened": lambda image: ip.strong_deblur(ip.aggressive_denoise(image)),
+}
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_outputs_match_the_sequential_primitives(crop, parallel, monkeypatch):
+    monkeypatch.setattr(ip, "AUGMENTATION_WORKERS", 2)  # A pool even on one CPU
+    monkeypatch.setattr(ip, "_augmentation_pool", None)
+    outputs = ip.generate_query_augmentations(crop, parallel=parallel)
+    assert len(outputs) == len(ip.QUERY_AUGMENTATIONS)
+    for name, got in zip(ip.QUERY_AUGMENTATIONS, outputs):
+        np.testing.assert_array_equal(got, SEQUENTIAL[name](crop), err_msg=name)
+
+
+def test_shared_intermediates_run_before_their_users():
+    waves = ip._augmentation_plan(("grayscale", "denoised", "denoised_sharpened", "clahe"))
+    assert [set(wave) for wave in waves] == [{"gray", "denoised", "lab"}, {"grayscale", "denoised_sharpened", "clahe"}]
+
+
+def test_denoising_runs_once_for_both_noise_outputs(crop, monkeypatch):
+    calls = []
+    function, inputs = ip.AUGMENTATION_STEPS["denoised"]
+    monkeypatch.setitem(ip.AUGMENTATION_STEPS, "denoised",
+                        (lambda image, dst=None: calls.append(1) or function(image, dst=dst), inputs))
+
+    outputs = ip.generate_query_augmentations(crop, families=["noise", "noise_blur"])
+    assert len(outputs) == 2 and len(calls) == 1
+    # An intermediate a family needs is computed but not returned
+    assert len(ip.generate_query_augmentations(crop, families=["noise_blur"])) == 1
+
+
+def test_failed_step_is_left_out(crop, monkeypatch):
+    def broken(image, dst=None):
+        raise cv2.error("boom")
+
+    monkeypatch.setitem(ip.AUGMENTATION_STEPS, "gray", (broken, ("image",)))
+    outputs = ip.generate_query_augmentations(crop, families=["original", "tone"])
+    assert len(outputs) == 3  # original, bright, clahe; grayscale depended on gray
+    np.testing.assert_array_equal(outputs[1], SEQUENTIAL["bright"](crop))
@@ -0,0 +1,211 @@
+# backend/tests/test_recognition_engine.py
+"""
+Gallery matching (app/services/recognition_engine.py) on a synthetic gallery:
+every inmate has a few noisy face embeddings around its own random identity
+vector, so a query near one identity has a single clear best match.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.services.recognition_engine import (
+    GalleryMatcher, MatchScores, QuantizedMatrix, assign_faces, partition_key,
+)
+from app.utils import gallery_store
+
+DIM = gallery_store.EMBEDDING_DIM
+STATUSES = [("Escaped", "High"), ("Incarcerated", "High"), ("Incarcerated", "Medium"),
+            ("Incarcerated", "Low"), ("Released", "Low")]
+
+
+def _unit(vectors):
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+@pytest.fixture(scope="module")
+def gallery(tmp_path_factory):
+    """(Gallery, identity vector per inmate index)"""
+    rng = np.random.default_rng(7)
+    inmates = [
+        {"id": i, "inmate_id": f"I{i:03d}", "status": status, "risk_level": risk}
+        for i, (status, risk) in enumerate(STATUSES * 12)
+    ]
+    inmates.sort(key=partition_key)
+    identities = _unit(rng.normal(size=(len(inmates), DIM)))
+    entries = []
+    for index, inmate in enumerate(inmates):
+        faces = _unit(identities[index] + 0.04 * rng.normal(size=(3, DIM)))
+        periocular = list(_unit(rng.normal(size=(1, DIM)))) if index % 2 == 0 else []
+        entries.append((inmate, list(faces), periocular))
+    gallery_dir = str(tmp_path_factory.mktemp("gallery"))
+    version = gallery_store.write_gallery(gallery_dir, entries)
+    return gallery_store.open_gallery(gallery_dir, version), identities
+
+
+def _query(identities, index, seed=0, count=1):
+    noise = np.random.default_rng(seed).normal(size=(count, DIM))
+    return _unit(identities[index] + 0.04 * noise).astype(np.float32)
+
+
+def test_quantized_dot_is_close_to_float32():
+    rng = np.random.default_rng(0)
+    matrix = _unit(rng.normal(size=(1000, DIM))).astype(np.float32)
+    queries = _unit(rng.normal(size=(3, DIM))).astype(np.float32)
+    exact = queries @ matrix.T
+    for mode, tolerance in [("float16", 1e-3), ("int8", 2e-2)]:
+        quantized = QuantizedMatrix(matrix, mode)
+        assert quantized.nbytes < matrix.nbytes
+        np.testing.assert_allclose(quantized.dot(queries), exact, atol=tolerance)
+        np.testing.assert_allclose(quantized.dot(queries, 100, 700), exact[:, 100:700], atol=tolerance)
+
+
+@pytest.mark.parametrize("mode", ["float16", "int8"])
+def test_quantized_matcher_reranks_to_exact_distances(gallery, mode):
+    gallery, identities = gallery
+    exact = GalleryMatcher(gallery)
+    quantized = GalleryMatcher(gallery, quantization=mode, rerank_candidates=8)
+    assert quantized.memory_bytes() < exact.memory_bytes()
+
+    for target in (0, 17, 59):
+        query = _query(identities, target, seed=target)
+        want = exact.score(query)
+        got = quantized.score(query)
+        assert got.ranked(limit=1)[0] == want.ranked(limit=1)[0] == target
+        # The re-ranked candidates carry float32 scores, not approximations
+        top = want.ranked(limit=8)
+        np.testing.assert_allclose(got.distances[top], want.distances[top], atol=1e-6)
+
+
+def test_unsupported_quantization_is_refused(gallery):
+    with pytest.raises(ValueError):
+        GalleryMatcher(gallery[0], quantization="int4")
+
+
+@pytest.mark.parametrize("settings", [{}, {"quantization": "int8"}])
+def test_score_batch_matches_scoring_each_face(gallery, settings):
+    gallery, identities = gallery
+    matcher = GalleryMatcher(gallery, **settings)
+    targets = [3, 30, 44]
+    faces = np.concatenate([_query(identities, t, seed=t) for t in targets])
+    periocular = [None, _unit(np.random.default_rng(1).normal(size=DIM)), None]
+    glasses = [False, True, False]
+
+    batch = matcher.score_batch(faces, periocular_queries=periocular, glasses_detected=glasses,
+                                glasses_confidence=[0.0, 0.8, 0.0])
+    for face, peri, glasses_detected, scores in zip(faces, periocular, glasses, batch):
+        single = matcher.score(face, periocular_query=peri, glasses_detected=glasses_detected,
+                               glasses_confidence=0.8 if glasses_detected else 0.0)
+        if settings:
+            # score() re-ranks per partition, score_batch() over the whole gallery:
+            # only the re-ranked (exact) best match is comparable
+            best = single.ranked(limit=1)
+            np.testing.assert_allclose(scores.distances[best], single.distances[best], atol=1e-5)
+        else:
+            np.testing.assert_allclose(scores.distances, single.distances, atol=1e-5)
+        np.testing.assert_array_equal(scores.fused, single.fused)
+    assert [int(scores.ranked(limit=1)[0]) for scores in batch] == targets
+
+
+def _scores(*distances):
+    distances = np.asarray(distances, dtype=np.float32)
+    flags = np.zeros(len(distances), dtype=bool)
+    return MatchScores(distances, distances, np.full(len(distances), np.inf), flags, flags, 1.0)
+
+
+def test_assign_faces_is_one_to_one():
+    # Both faces are closest to inmate 0; face 1 has no other candidate
+    scores = [_scores(0.2, 0.3, 0.9), _scores(0.25, 0.8, 0.9)]
+    assert assign_faces(scores, 0.5, method=None) == [0, 0]
+    assert assign_faces(scores, 0.5, method="greedy") == [0, None]
+    assert assign_faces(scores, 0.5, method="hungarian") == [1, 0]
+    assert assign_faces(scores, 0.1) == [None, None]
+    with pytest.raises(ValueError):
+        assign_faces(scores, 0.5, method="auction")
+
+
+def test_shortlist_scores_only_the_best_centroids_exactly(gallery):
+    gallery, identities = gallery
+    exact = GalleryMatcher(gallery)
+    shortlisted = GalleryMatcher(gallery, shortlist=5)
+    query = _query(identities, 21, seed=4)
+
+    want = exact.score_batch(query)[0]
+    got = shortlisted.score_batch(query)[0]
+    finite = np.flatnonzero(np.isfinite(got.distances))
+    assert len(finite) == 5 and 21 in finite
+    np.testing.assert_allclose(got.distances[finite], want.distances[finite], atol=1e-6)
+    assert got.comparisons < want.comparisons
+
+    assert shortlisted.score(query).ranked(limit=1)[0] == 21
+
+
+def test_shortlist_larger_than_gallery_is_exact(gallery):
+    assert GalleryMatcher(gallery[0], shortlist=10_000).shortlist is None
+
+
+def test_partitions_are_searched_escaped_first(gallery):
+    gallery, identities = gallery
+    matcher = GalleryMatcher(gallery)
+    assert [(p["status"], p["risk_level"]) for p in matcher.partitions] == STATUSES
+    escaped = matcher.partitions[0]
+    target = escaped["start"] + 2
+
+    events = []
+    scores = matcher.score(_query(identities, target), on_partition=lambda *event: events.append(event))
+    assert [stats["status"] for stats, _, _ in events] == [status for status, _ in STATUSES]
+    # The escaped tier already reports the final best match
+    stats, best, distance = events[0]
+    assert best == target == scores.ranked(limit=1)[0]
+    assert distance == pytest.approx(float(scores.distances[target]))
+    assert stats["inmates"] == escaped["end"] - escaped["start"]
+    assert [p["status"] for p in scores.partitions] == [status for status, _ in STATUSES]
+
+
+@pytest.fixture
+def escapes(tmp_path):
+    """Matcher over escaped inmates at 20, 100 and 200 km north of (0, 0), plus one inmate in custody."""
+    rng = np.random.default_rng(3)
+    inmates = [
+        {"id": 1, "status": "Escaped", "escape_latitude": 0.18, "escape_longitude": 0.0,
+         "escape_date": "2026-10-01T11:00:00"},
+        {"id": 2, "status": "Escaped", "escape_latitude": 0.9, "escape_longitude": 0.0,
+         "escape_date": "2026-10-01T11:00:00"},
+        {"id": 3, "status": "Escaped", "escape_latitude": 1.8, "escape_longitude": 0.0},
+        {"id": 4, "status": "Incarcerated"},
+    ]
+    identities = _unit(rng.normal(size=(len(inmates), DIM)))
+    entries = [(inmate, [identities[i]], []) for i, inmate in enumerate(inmates)]
+    gallery_dir = str(tmp_path / "gallery")
+    version = gallery_store.write_gallery(gallery_dir, entries)
+    matcher = GalleryMatcher(gallery_store.open_gallery(gallery_dir, version))
+    return matcher, identities
+
+
+def test_geo_candidates_radius_grows_with_time_since_escape(escapes):
+    matcher, _ = escapes
+    now = datetime(2026, 10, 1, 12)
+    # One hour after escaping: 10 km + 30 km/h; no escape date: the 300 km cap
+    indices, distances_km = matcher.geo_candidates(0.0, 0.0, now=now)
+    assert list(indices) == [0, 2]
+    assert distances_km[0] == pytest.approx(20.0, abs=0.5)
+    indices, _ = matcher.geo_candidates(0.0, 0.0, now=datetime(2026, 10, 1, 15))
+    assert list(indices) == [0, 1, 2]
+    assert len(matcher.geo_candidates(None, 0.0, now=now)[0]) == 0
+
+
+def test_geo_tier_stops_the_search_on_a_close_match(escapes):
+    matcher, identities = escapes
+    priority, _ = matcher.geo_candidates(0.0, 0.0, now=datetime(2026, 10, 1, 12))
+
+    scores = matcher.score(identities[0], priority=priority, stop_distance=0.1)
+    assert scores.stopped_early
+    assert [p["tier"] for p in scores.partitions] == ["geo"]
+    assert scores.ranked(limit=1)[0] == 0
+    assert np.isinf(scores.distances[[1, 3]]).all()
+
+    # No close match in the geo tier: the whole gallery is searched
+    scores = matcher.score(identities[3], priority=priority, stop_distance=0.1)
+    assert not scores.stopped_early
+    assert scores.partitions[0]["tier"] == "geo" and scores.ranked(limit=1)[0] == 3
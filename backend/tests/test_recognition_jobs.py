@@ -0,0 +1,84 @@
+# backend/tests/test_recognition_jobs.py
+"""
+Background recognition jobs (app/services/recognition_jobs.py): async=true
+requests return 202 at once and the result reaches the caller's Socket.IO
+room and GET /api/recognition/jobs/<id>.
+"""
+
+import io
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from conftest import login
+from app import socketio
+from app.routes import recognition_api
+from app.services import recognition_jobs
+
+JPEG = cv2.imencode(".jpg", np.zeros((32, 32, 3), dtype=np.uint8))[1].tobytes()
+
+
+@pytest.fixture
+def users(app, client, make_user, monkeypatch):
+    """alice (logged in on client, with a Socket.IO connection) and bob."""
+    monkeypatch.setattr(recognition_api, "recognize_live_frame",
+                        lambda frame, camera_id, camera_key: {"status": "no_match", "shape": list(frame.shape)})
+    ids = {"alice": make_user("alice"), "bob": make_user("bob")}
+    login(client, ids["alice"])
+    ids["socket"] = socketio.test_client(app, flask_test_client=client)
+    yield ids
+    ids["socket"].disconnect()
+
+
+def _match(client):
+    return client.post("/api/recognition/match?async=true", data={"frame": (io.BytesIO(JPEG), "frame.jpg")},
+                       content_type="multipart/form-data")
+
+
+def _received(sio, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        events = sio.get_received()
+        if events:
+            return events
+        time.sleep(0.01)
+    return []
+
+
+def test_result_is_pushed_to_the_callers_room(client, users):
+    response = _match(client)
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job["status"] in ("queued", "running", "done")  # The fake recognition is quick
+    assert job["status_url"].endswith(job["job_id"])
+    assert "user_id" not in job
+
+    (event,) = _received(users["socket"])
+    assert event["name"] == recognition_jobs.RESULT_EVENT
+    pushed = event["args"][0]
+    assert (pushed["job_id"], pushed["status"], pushed["status_code"]) == (job["job_id"], "done", 200)
+    assert pushed["result"] == {"status": "no_match", "shape": [32, 32, 3]}
+
+    polled = client.get(job["status_url"]).get_json()
+    assert polled["result"] == pushed["result"]
+
+
+def test_jobs_are_visible_to_their_owner_only(app, client, users):
+    job = _match(client).get_json()
+    _received(users["socket"])
+
+    other = app.test_client()
+    login(other, users["bob"])
+    assert other.get(job["status_url"]).status_code == 404
+
+
+def test_full_queue_is_refused(client, users, monkeypatch):
+    recognition_jobs._init_pool({})
+    monkeypatch.setattr(recognition_jobs, "_slots", threading.BoundedSemaphore(1))
+    recognition_jobs._slots.acquire()  # The only slot is taken
+
+    response = _match(client)
+    assert response.status_code == 503 and response.headers["Retry-After"] == "2"
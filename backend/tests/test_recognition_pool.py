@@ -0,0 +1,83 @@
+# backend/tests/test_recognition_pool.py
+"""
+Recognition process pool (app/services/recognition_pool.py): scoring in a
+worker returns what in-process scoring returns, and score()'s per-tier events
+reach the caller as the worker sends them.
+"""
+
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from app.services import recognition_pool
+from app.services.recognition_engine import GalleryMatcher, partition_key
+from app.utils import gallery_store
+
+
+def _entries(rng):
+    inmates = [
+        {"id": i, "status": status, "risk_level": risk}
+        for i, (status, risk) in enumerate([("Escaped", "High"), ("Incarcerated", "High"),
+                                            ("Incarcerated", "Low"), ("Released", "Low")] * 5)
+    ]
+    inmates.sort(key=partition_key)
+    return [(inmate, list(rng.normal(size=(2, gallery_store.EMBEDDING_DIM))), []) for inmate in inmates]
+
+
+@pytest.fixture(scope="module")
+def pool(tmp_path_factory):
+    gallery_dir = str(tmp_path_factory.mktemp("gallery"))
+    gallery_store.write_gallery(gallery_dir, _entries(np.random.default_rng(0)))
+    matcher = GalleryMatcher(gallery_store.open_gallery(gallery_dir))
+
+    class _App:
+        config = {"RECOGNITION_PROCESS_WORKERS": 1, "GALLERY_DIR": gallery_dir}
+        instance_path = gallery_dir
+
+    recognition_pool.start_pool(_App())
+    yield matcher
+    recognition_pool.stop_pool()
+
+
+def test_score_in_worker_matches_in_process(pool):
+    queries = np.random.default_rng(1).normal(size=(3, gallery_store.EMBEDDING_DIM))
+    events = []
+    scores = recognition_pool.score(pool, queries, on_partition=lambda *event: events.append(event))
+
+    expected_events = []
+    expected = pool.score(queries, on_partition=lambda *event: expected_events.append(event))
+    np.testing.assert_allclose(scores.distances, expected.distances, rtol=1e-6)
+    assert [(stats["status"], best) for stats, best, _ in events] == \
+        [(stats["status"], best) for stats, best, _ in expected_events]
+    assert events[0][0]["status"] == "Escaped"
+
+
+def test_score_batch_in_worker_matches_in_process(pool):
+    queries = np.random.default_rng(2).normal(size=(4, gallery_store.EMBEDDING_DIM)).astype(np.float32)
+    scores = recognition_pool.score_batch(pool, queries, glasses_detected=[False, True, False, False])
+    expected = pool.score_batch(queries, glasses_detected=[False, True, False, False])
+    assert len(scores) == 4
+    for got, want in zip(scores, expected):
+        np.testing.assert_allclose(got.distances, want.distances, rtol=1e-6)
+
+
+def test_events_are_delivered_before_the_reply():
+    worker = object.__new__(recognition_pool._Worker)
+    worker.reader, child_writer = multiprocessing.Pipe(duplex=False)
+    child_reader, worker.writer = multiprocessing.Pipe(duplex=False)
+    # What a worker sends: one message per scored tier, then the reply
+    child_writer.send(("event", ({"status": "Escaped"}, 0, 0.2)))
+    child_writer.send(("event", ({"status": "Incarcerated"}, 5, 0.4)))
+    child_writer.send((True, "scores"))
+
+    seen = []
+
+    def on_event(stats, best, distance):
+        seen.append(stats["status"])
+        if len(seen) == 1:
+            raise RuntimeError("alarm failed")  # Logged; the call stays in step with the worker
+
+    assert worker.call("score", on_event=on_event) == "scores"
+    assert seen == ["Escaped", "Incarcerated"]
+    assert child_reader.recv() == ("score", ())
@@ -0,0 +1,151 @@
+# backend/tests/test_recording_indexer_claims.py
+"""
+Recording index claims (app/services/recording_indexer.py): with several
+indexer processes on one database, each recording is indexed by exactly one
+of them. Processes are simulated by switching the module's owner id.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import login
+from app.services import recording_indexer
+
+
+class _FakeJob:
+    def __init__(self, recording_id, *messages):
+        self.recording_id = recording_id
+        self.messages = list(messages)
+        self.closed = False
+        self.reader = self
+
+    def recv(self):
+        return self.messages.pop(0)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def index(app, make_user, monkeypatch):
+    from app.extensions import db
+    from app.models import Camera, Recording, RecordingIndex
+
+    monkeypatch.setattr(recording_indexer, "_settings", {"lease_seconds": 120, "max_attempts": 3, "workers": 1})
+    monkeypatch.setattr(recording_indexer, "_jobs", {})
+    user_id = make_user("alice")
+    with app.app_context():
+        camera = Camera(name="c", location="l", user_id=user_id)
+        db.session.add(camera)
+        db.session.commit()
+        recording = Recording(camera_id=camera.id, filename="r.webm", file_path="r.webm",
+                              start_time=datetime(2026, 10, 1, 12), status="completed")
+        db.session.add(recording)
+        db.session.commit()
+        db.session.add(RecordingIndex(recording_id=recording.id))
+        db.session.commit()
+        return recording.id
+
+
+def _as(monkeypatch, owner):
+    monkeypatch.setattr(recording_indexer, "_owner", owner)
+
+
+def _chunk(seconds, *detections):
+    return ("chunk", seconds, list(detections), {"frames_sampled": 1, "frames_analyzed": 1, "faces": len(detections)})
+
+
+def test_only_one_process_claims_a_recording(app, index, monkeypatch):
+    with app.app_context():
+        _as(monkeypatch, "a")
+        assert recording_indexer._claim(index)
+        _as(monkeypatch, "b")
+        assert not recording_indexer._claim(index)
+
+
+def test_expired_claim_is_taken_over_and_old_owner_cannot_write(app, index, monkeypatch):
+    from app.extensions import db
+    from app.models import RecordingDetection, RecordingIndex
+
+    with app.app_context():
+        _as(monkeypatch, "a")
+        assert recording_indexer._claim(index)
+        recording_indexer._jobs[index] = job_a = _FakeJob(index, _chunk(10.0, (1.0, 0, 0, 10, 10, None, None)))
+        recording_indexer._handle(job_a)
+        assert RecordingDetection.query.count() == 1
+
+        # "a" stops reporting; after the lease "b" takes over from the committed chunk
+        db.session.get(RecordingIndex, index).heartbeat_at = datetime.utcnow() - timedelta(seconds=121)
+        db.session.commit()
+        _as(monkeypatch, "b")
+        assert recording_indexer._claim(index)
+
+        # A late chunk from "a" is dropped and its job stopped
+        _as(monkeypatch, "a")
+        recording_indexer._jobs[index] = job_a = _FakeJob(index, _chunk(20.0, (11.0, 0, 0, 10, 10, None, None)))
+        recording_indexer._handle(job_a)
+        assert job_a.closed and index not in recording_indexer._jobs
+        assert RecordingDetection.query.count() == 1
+        row = db.session.get(RecordingIndex, index)
+        assert (row.owner, row.processed_seconds, row.attempts) == ("b", 10.0, 2)
+
+
+def test_done_releases_the_claim(app, index, monkeypatch):
+    from app.extensions import db
+    from app.models import RecordingIndex
+
+    with app.app_context():
+        _as(monkeypatch, "a")
+        assert recording_indexer._claim(index)
+        job = _FakeJob(index, ("done", 42.0))
+        recording_indexer._jobs[index] = job
+        recording_indexer._handle(job)
+        row = db.session.get(RecordingIndex, index)
+        assert (row.status, row.owner) == ("indexed", None)
+        assert row.recording.duration == 42
+        _as(monkeypatch, "b")
+        assert not recording_indexer._claim(index)  # Indexed rows are not claimable
+
+
+def test_failure_returns_the_recording_to_the_queue(app, index, monkeypatch):
+    from app.extensions import db
+    from app.models import RecordingIndex
+
+    with app.app_context():
+        _as(monkeypatch, "a")
+        assert recording_indexer._claim(index)
+        job = _FakeJob(index, ("error", "boom"))
+        recording_indexer._jobs[index] = job
+        recording_indexer._handle(job)
+        row = db.session.get(RecordingIndex, index)
+        assert (row.status, row.owner, row.error) == ("pending", None, "boom")
+        _as(monkeypatch, "b")
+        assert recording_indexer._claim(index)
+
+
+def test_reindex_resets_the_row_and_voids_the_claim(app, client, index, monkeypatch):
+    from app.extensions import db
+    from app.models import Camera, RecordingDetection, RecordingIndex
+
+    woken = []
+    monkeypatch.setattr(recording_indexer, "wake", lambda: woken.append(True))
+    with app.app_context():
+        _as(monkeypatch, "a")
+        assert recording_indexer._claim(index)
+        recording_indexer._jobs[index] = job = _FakeJob(index, _chunk(10.0, (1.0, 0, 0, 10, 10, None, None)),
+                                                        _chunk(20.0, (11.0, 0, 0, 10, 10, None, None)))
+        recording_indexer._handle(job)
+        login(client, db.session.get(Camera, 1).user_id)
+
+    # Served by any process: the reset is written to the database, not queued in memory
+    response = client.post(f"/api/recordings/{index}/index")
+    assert response.status_code == 202 and woken == [True]
+
+    with app.app_context():
+        row = db.session.get(RecordingIndex, index)
+        assert (row.status, row.owner, row.heartbeat_at, row.processed_seconds, row.attempts) == \
+            ("pending", None, None, 0.0, 0)
+        assert RecordingDetection.query.count() == 0
+        recording_indexer._handle(job)  # The old owner's next chunk is dropped
+        assert job.closed and RecordingDetection.query.count() == 0
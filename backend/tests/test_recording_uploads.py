@@ -0,0 +1,162 @@
+# backend/tests/test_recording_uploads.py
+"""
+Recording streaming with Range requests and chunked, resumable uploads
+(app/routes/api/recording_routes.py, app/services/recording_uploads.py).
+"""
+
+import multiprocessing
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+from conftest import login
+from app.services import recording_uploads
+
+
+@pytest.fixture
+def recording(app, client, make_user):
+    """make(status, content) -> recording id, with the client logged in."""
+    from app.extensions import db
+    from app.models import Camera, Recording
+
+    user_id = make_user("alice")
+    login(client, user_id)
+
+    def _make(status="completed", content=None):
+        with app.app_context():
+            camera = Camera(name="gate", location="north", user_id=user_id)
+            db.session.add(camera)
+            db.session.commit()
+            recording = Recording(camera_id=camera.id, filename="r.webm", file_path=f"cam{camera.id}/r.webm",
+                                  start_time=datetime(2026, 10, 1, 12), status=status)
+            db.session.add(recording)
+            db.session.commit()
+            if content is not None:
+                path = os.path.join(app.config["RECORDINGS_DIR"], recording.file_path)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(content)
+            return recording.id
+    return _make
+
+
+CONTENT = bytes(range(256)) * 4  # 1024 bytes
+
+
+def _stream(client, recording_id, **headers):
+    return client.get(f"/api/recordings/{recording_id}/stream", headers=headers)
+
+
+def test_range_returns_partial_content(client, recording):
+    recording_id = recording(content=CONTENT)
+    response = _stream(client, recording_id, Range="bytes=100-199")
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == "bytes 100-199/1024"
+    assert response.headers["Content-Length"] == "100"
+    assert response.data == CONTENT[100:200]
+
+    response = _stream(client, recording_id, Range="bytes=-24")
+    assert response.status_code == 206
+    assert response.data == CONTENT[-24:]
+
+
+def test_range_outside_the_file_is_416(client, recording):
+    response = _stream(client, recording(content=CONTENT), Range="bytes=2048-")
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == "bytes */1024"
+
+
+def test_if_range_mismatch_sends_the_whole_file(client, recording):
+    recording_id = recording(content=CONTENT)
+    etag = _stream(client, recording_id).headers["ETag"]
+
+    response = _stream(client, recording_id, Range="bytes=0-9", **{"If-Range": etag})
+    assert response.status_code == 206 and response.data == CONTENT[:10]
+
+    response = _stream(client, recording_id, Range="bytes=0-9", **{"If-Range": '"stale"'})
+    assert response.status_code == 200 and response.data == CONTENT
+
+
+def test_zero_length_file(client, recording):
+    recording_id = recording(content=b"")
+    for headers in ({}, {"Range": "bytes=0-"}):
+        response = _stream(client, recording_id, **headers)
+        assert response.status_code == 200
+        assert response.headers["Content-Length"] == "0"
+        assert response.data == b""
+
+
+def _open_session(client, recording_id, **body):
+    response = client.post(f"/api/recordings/{recording_id}/uploads", json=body)
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def _put(client, session, index, data):
+    return client.put(session["chunk_url"].format(index=index), data=data)
+
+
+def test_chunk_retries_are_idempotent(app, client, recording):
+    recording_id = recording(status="recording")
+    session = _open_session(client, recording_id, size=6)
+
+    first = _put(client, session, 0, b"abc")
+    assert first.status_code == 200 and first.get_json()["duplicate"] is False
+    retry = _put(client, session, 0, b"abc")
+    assert retry.status_code == 200 and retry.get_json()["duplicate"] is True
+    assert retry.get_json()["next_chunk"] == 1 and retry.get_json()["received_bytes"] == 3
+
+    conflict = _put(client, session, 0, b"xyz")
+    assert conflict.status_code == 409
+    skipped = _put(client, session, 2, b"ghi")
+    assert skipped.status_code == 409 and skipped.get_json()["next_chunk"] == 1
+
+    assert _put(client, session, 1, b"def").status_code == 200
+    done = client.post(session["complete_url"], json={"chunks": 2})
+    assert done.status_code == 200
+    assert done.get_json()["recording"]["status"] == "completed"
+    # A completion retried after its response was lost
+    assert client.post(session["complete_url"], json={"chunks": 2}).status_code == 200
+
+    file_path = done.get_json()["recording"]["file_path"]
+    with open(os.path.join(app.config["RECORDINGS_DIR"], file_path), "rb") as f:
+        assert f.read() == b"abcdef"
+
+
+def test_incomplete_chunk_is_discarded(app, client, recording):
+    recording_id = recording(status="recording")
+    session = _open_session(client, recording_id)
+
+    class _Broken:
+        def read(self, size=-1):
+            raise OSError("connection reset")
+
+    with app.app_context():
+        with pytest.raises(recording_uploads.UploadError):
+            recording_uploads.write_chunk(app.config["RECORDINGS_DIR"], session["session_id"], recording_id,
+                                          0, _Broken(), 3)
+    assert _put(client, session, 0, b"abc").get_json()["received_bytes"] == 3
+
+
+def _hold_lock(recordings_dir, session_id, locked, seconds):
+    with recording_uploads._session_lock(recordings_dir, session_id):
+        locked.set()
+        time.sleep(seconds)
+
+
+def test_session_lock_is_held_across_processes(app, client, recording):
+    recording_id = recording(status="recording")
+    session = _open_session(client, recording_id)
+    recordings_dir = app.config["RECORDINGS_DIR"]
+
+    context = multiprocessing.get_context("fork")
+    locked = context.Event()
+    holder = context.Process(target=_hold_lock, args=(recordings_dir, session["session_id"], locked, 0.5))
+    holder.start()
+    assert locked.wait(5)
+    started = time.monotonic()
+    assert _put(client, session, 0, b"abc").status_code == 200
+    assert time.monotonic() - started >= 0.3  # Waited for the other process's chunk
+    holder.join()
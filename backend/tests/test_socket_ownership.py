@@ -0,0 +1,92 @@
+# backend/tests/test_socket_ownership.py
+"""
+Socket.IO handlers (app/socket_events.py) only act on cameras the connected
+user owns, and JWT connections join the same per-user rooms as sessions.
+"""
+
+import pytest
+
+from conftest import jwt_headers, login
+from app import socketio
+from app.services import frame_relay
+
+
+@pytest.fixture
+def cameras(app, make_user):
+    from app.extensions import db
+    from app.models.camera import Camera
+
+    ids = {"alice": make_user("alice"), "bob": make_user("bob"), "root": make_user("root", is_admin=True)}
+    with app.app_context():
+        camera = Camera(name="gate", location="north", user_id=ids["alice"])
+        db.session.add(camera)
+        db.session.commit()
+        ids["camera"] = camera.id
+    return ids
+
+
+def _socket(app, user_id, **kwargs):
+    client = app.test_client()
+    login(client, user_id)
+    return socketio.test_client(app, flask_test_client=client, **kwargs)
+
+
+@pytest.fixture
+def published(monkeypatch):
+    keys = []
+    monkeypatch.setattr(frame_relay, "publish", lambda camera_key, frame, timestamp=None: keys.append(camera_key))
+    return keys
+
+
+@pytest.mark.parametrize("sender, expected", [
+    ("alice", "camera"),  # Owner
+    ("root", "camera"),   # Admin
+    ("bob", "user"),      # Someone else: relayed as bob's own browser camera
+])
+def test_send_frame_only_publishes_to_owned_cameras(app, cameras, published, sender, expected):
+    sio = _socket(app, cameras[sender])
+    sio.emit("send_frame", {"frame": b"\xff\xd8jpeg", "camera_id": cameras["camera"]})
+    sio.disconnect()
+    want = f"camera:{cameras['camera']}" if expected == "camera" else f"user:{cameras[sender]}"
+    assert published == [want]
+
+
+def test_subscribe_requires_ownership(app, cameras):
+    sio = _socket(app, cameras["bob"])
+    ack = sio.emit("subscribe_camera", {"camera_id": cameras["camera"]}, callback=True)
+    assert ack == {"ok": False, "error": "forbidden"}
+    sio.disconnect()
+
+
+@pytest.mark.parametrize("user, allowed", [("alice", True), ("root", True), ("bob", False)])
+def test_camera_namespace_requires_ownership(app, cameras, user, allowed):
+    from app.services import frame_ingest
+
+    sio = _socket(app, cameras[user], namespace=frame_ingest.NAMESPACE, auth={"camera_id": cameras["camera"]})
+    assert sio.is_connected(frame_ingest.NAMESPACE) is allowed
+    if allowed:
+        sio.disconnect(namespace=frame_ingest.NAMESPACE)
+
+
+def test_camera_namespace_checks_jwt_users_too(app, cameras):
+    from app.services import frame_ingest
+
+    sio = socketio.test_client(app, namespace=frame_ingest.NAMESPACE,
+                               auth={"camera_id": cameras["camera"]}, headers=jwt_headers(app, cameras["bob"]))
+    assert not sio.is_connected(frame_ingest.NAMESPACE)
+
+    sio = socketio.test_client(app, namespace=frame_ingest.NAMESPACE, headers=jwt_headers(app, cameras["bob"]))
+    assert sio.is_connected(frame_ingest.NAMESPACE)  # No camera: frames are attributed to bob
+    sio.disconnect(namespace=frame_ingest.NAMESPACE)
+
+
+def test_jwt_connection_receives_its_users_job_results(app, cameras):
+    from app.services import recognition_jobs
+
+    sio = socketio.test_client(app, headers=jwt_headers(app, cameras["bob"]))
+    other = socketio.test_client(app, auth={"token": "not-a-jwt"})
+    socketio.emit(recognition_jobs.RESULT_EVENT, {"job_id": "j"}, room=f"user_{cameras['bob']}")
+    assert [event["name"] for event in sio.get_received()] == [recognition_jobs.RESULT_EVENT]
+    assert other.get_received() == []
+    sio.disconnect()
+    other.disconnect()
@@ -0,0 +1,86 @@
+# backend/tests/test_status_auth.py
+"""
+Status endpoints (app/routes/recognition_api.py, app/routes/api/camera_routes.py)
+need a logged-in caller, by session or bearer token.
+"""
+
+import pytest
+
+from conftest import jwt_headers, login
+from app.services import frame_ingest, frame_relay
+
+
+@pytest.fixture
+def users(make_user, monkeypatch):
+    ids = {"alice": make_user("alice"), "bob": make_user("bob"), "root": make_user("root", is_admin=True)}
+    monkeypatch.setattr(frame_ingest, "_connections", {})
+    for sid, user_id, camera_id in [("a", ids["alice"], 10), ("b", ids["bob"], 20)]:
+        frame_ingest._connections[sid] = frame_ingest.CameraConnection(None, sid, user_id, camera_id, None)
+    return ids
+
+
+def test_ingest_status_requires_login(app, client, users):
+    assert client.get("/api/recognition/ingest/status").status_code == 401
+
+
+@pytest.mark.parametrize("user, cameras", [("alice", [10]), ("root", [10, 20])])
+def test_ingest_status_shows_other_users_only_to_admins(app, client, users, user, cameras):
+    login(client, users[user])
+    stats = client.get("/api/recognition/ingest/status").get_json()
+    assert sorted(c["camera_id"] for c in stats["cameras"]) == cameras
+
+
+def test_ingest_status_checks_admin_from_the_user_row(app, client, users):
+    # A token claiming admin does not make a non-admin user one
+    headers = jwt_headers(app, users["alice"], is_admin=True)
+    stats = client.get("/api/recognition/ingest/status", headers=headers).get_json()
+    assert [c["camera_id"] for c in stats["cameras"]] == [10]
+
+
+def test_gallery_status_requires_login(app, client, users):
+    assert client.get("/api/recognition/status").status_code == 401
+    login(client, users["alice"])
+    assert client.get("/api/recognition/status").status_code in (200, 503)
+
+
+@pytest.mark.parametrize("user, status_code", [(None, 401), ("alice", 403), ("root", 200)])
+def test_notification_status_is_admin_only(app, client, users, user, status_code):
+    if user:
+        login(client, users[user])
+    assert client.get("/api/recognition/notifications/status").status_code == status_code
+
+
+@pytest.mark.parametrize("user, subscribers", [("alice", ["camera:10"]), ("root", ["camera:10", "camera:20"])])
+def test_relay_status_with_a_bearer_token(app, client, users, monkeypatch, user, subscribers):
+    monkeypatch.setattr(frame_relay, "_subscriptions", {})
+    frame_relay.subscribe("a", users["alice"], "camera:10")
+    frame_relay.subscribe("b", users["bob"], "camera:20")
+    response = client.get("/api/cameras/relay/status", headers=jwt_headers(app, users[user]))
+    assert response.status_code == 200
+    assert sorted(s["camera"] for s in response.get_json()["subscribers"]) == subscribers
+
+
+class _Stream:
+    def __init__(self, camera_id):
+        self.camera_id = camera_id
+
+    def stats(self):
+        return {"camera_id": self.camera_id}
+
+
+@pytest.mark.parametrize("user, cameras", [("alice", ["alice"]), ("bob", []), ("root", ["alice", "root"])])
+def test_streams_status_with_a_bearer_token(app, client, users, monkeypatch, user, cameras):
+    from app.extensions import db
+    from app.models.camera import Camera
+    from app.utils import camera_stream
+
+    with app.app_context():
+        owned = {owner: Camera(name=owner, location="l", user_id=users[owner]) for owner in ("alice", "root")}
+        db.session.add_all(owned.values())
+        db.session.commit()
+        by_id = {camera.id: owner for owner, camera in owned.items()}
+    monkeypatch.setattr(camera_stream, "_streams", {camera_id: _Stream(camera_id) for camera_id in by_id})
+
+    response = client.get("/api/cameras/streams/status", headers=jwt_headers(app, users[user]))
+    assert response.status_code == 200
+    assert sorted(by_id[c["camera_id"]] for c in response.get_json()["cameras"]) == cameras
@@ -76,9 +76,16 @@ export default function LiveMonitoring() {
   // Socket reference
   const socketRef = useRef(null);
 
-  // Basic UI-only feeds (safe fallback if API for cameras isn't ready)
+  // Binary frame channel for recognition ('/camera' namespace)
+  const cameraSocketRef = useRef(null);
+  const frameSeqRef = useRef(0);
+  const frameSentAtRef = useRef(null);  // Set while a frame awaits its result
+
+  // Basic UI-only feeds (safe fallback if API for cameras isn't ready).
+  // The placeholder is not a database camera: its id is not a number, so no
+  // camera_id is sent for it and frames are attributed to the user instead.
   const [feeds, setFeeds] = useState([
-    { id: 1, name: "Default Webcam", location: "Local Device", online: true, camera_type: "webcam" },
+    { id: "local-webcam", name: "Default Webcam", location: "Local Device", online: true, camera_type: "webcam", placeholder: true },
   ]);
 
   useEffect(() => {
@@ -258,12 +265,80 @@ export default function LiveMonitoring() {
     }
   }, [stopStream]);
 
+  // Show a recognition result (from the '/camera' socket or the HTTP fallback)
+  const applyRecognitionResult = useCallback((data, ok) => {
+    if (!ok) {
+      setRecognitionStatus(`Error: ${data.error || "Recognition failed"}`);
+      console.error('Recognition API error:', data);
+      return;
+    }
+    if (data.status === 'escaped_inmate_detected') {
+      // CRITICAL: Escaped inmate detected - trigger alarm via AlarmContext!
+      setRecognitionResult(data.inmate);
+      setRecognitionStatus("ESCAPED INMATE DETECTED!");
+      triggerAlarm({
+        inmate: data.inmate,
+        alert_id: data.alert_id,
+        timestamp: new Date().toISOString(),
+        requires_acknowledgment: true
+      });
+    } else if (data.status === 'match_found') {
+      setRecognitionResult(data.inmate);
+      setRecognitionStatus("Match found!");
+    } else if (data.status === 'no_match') {
+      setRecognitionResult(null);
+      setRecognitionStatus("No match - scanning...");
+    } else if (data.status === 'no_face_detected') {
+      setRecognitionResult(null);
+      setRecognitionStatus("No face detected - position face in frame");
+    } else if (data.status === 'low_confidence') {
+      setRecognitionResult(null);
+      setRecognitionStatus(`Low confidence (${data.confidence}%) - no reliable match`);
+    } else {
+      setRecognitionStatus(data.error || "Unknown response");
+    }
+  }, [triggerAlarm]);
+
+  // While recognizing, frames go to the server as binary JPEG over a
+  // '/camera' Socket.IO connection and results come back on it
+  const cameraId = !selectedFeed?.placeholder && Number.isInteger(selectedFeed?.id) ? selectedFeed.id : null;
+  useEffect(() => {
+    if (!recognizing) return undefined;
+
+    const socket = io(`${API_BASE || window.location.origin}/camera`, {
+      withCredentials: true,
+      transports: ['websocket', 'polling'],
+      auth: cameraId ? { camera_id: cameraId } : {}
+    });
+    socket.on('recognition_result', (data) => {
+      frameSentAtRef.current = null;
+      applyRecognitionResult(data, (data.status_code || 200) < 400);
+    });
+    socket.on('disconnect', () => {
+      frameSentAtRef.current = null;
+    });
+    cameraSocketRef.current = socket;
+
+    return () => {
+      socket.disconnect();
+      cameraSocketRef.current = null;
+      frameSentAtRef.current = null;
+    };
+  }, [recognizing, cameraId, applyRecognitionResult]);
+
   // Capture frame and send to recognition API
   const captureAndRecognize = useCallback(async () => {
     if (!videoRef.current || !canvasRef.current || !isStreaming || !videoReady) {
       return;
     }
 
+    // Backpressure: one frame at a time on the socket (give up on a result after 10s)
+    const socket = cameraSocketRef.current;
+    const useSocket = socket && socket.connected;
+    if (useSocket && frameSentAtRef.current && Date.now() - frameSentAtRef.current < 10000) {
+      return;
+    }
+
     const video = videoRef.current;
     const canvas = canvasRef.current;
 
@@ -288,8 +363,24 @@ export default function LiveMonitoring() {
         return;
       }
 
+      if (useSocket && socket.connected) {
+        const seq = ++frameSeqRef.current;
+        frameSentAtRef.current = Date.now();
+        socket.emit('frame', { frame: await blob.arrayBuffer(), seq }, (ack) => {
+          if (!ack || !ack.accepted) {
+            frameSentAtRef.current = null;
+            setRecognitionStatus(`Frame not accepted: ${(ack && ack.error) || "no acknowledgement"}`);
+          }
+        });
+        return;
+      }
+
+      // Fallback while the socket is not connected
       const formData = new FormData();
       formData.append('frame', blob, 'frame.jpg');
+      if (cameraId) {
+        formData.append('camera_id', cameraId);
+      }
 
       try {
         const res = await fetch('/api/recognition/match', {
@@ -299,44 +390,13 @@ export default function LiveMonitoring() {
         });
 
         const data = await res.json();
-
-        if (res.ok) {
-          if (data.status === 'escaped_inmate_detected') {
-            // CRITICAL: Escaped inmate detected - trigger alarm via AlarmContext!
-            setRecognitionResult(data.inmate);
-            setRecognitionStatus("ESCAPED INMATE DETECTED!");
-            triggerAlarm({
-              inmate: data.inmate,
-              alert_id: data.alert_id,
-              timestamp: new Date().toISOString(),
-              requires_acknowledgment: true
-            });
-          } else if (data.status === 'match_found') {
-            setRecognitionResult(data.inmate);
-            setRecognitionStatus("Match found!");
-          } else if (data.status === 'no_match') {
-            setRecognitionResult(null);
-            setRecognitionStatus("No match - scanning...");
-          } else if (data.status === 'no_face_detected') {
-            setRecognitionResult(null);
-            setRecognitionStatus("No face detected - position face in frame");
-          } else if (data.status === 'low_confidence') {
-            setRecognitionResult(null);
-            setRecognitionStatus(`Low confidence (${data.confidence}%) - no reliable match`);
-          } else {
-            setRecognitionStatus(data.error || "Unknown response");
-          }
-        } else {
-          // Handle HTTP errors
-          setRecognitionStatus(`Error: ${data.error || res.statusText}`);
-          console.error('Recognition API error:', data);
-        }
+        applyRecognitionResult(data, res.ok);
       } catch (err) {
         console.error('Recognition fetch error:', err);
         setRecognitionStatus(`Network error: ${err.message}`);
       }
     }, 'image/jpeg', 0.85);
-  }, [isStreaming, videoReady, triggerAlarm]);
+  }, [isStreaming, videoReady, cameraId, applyRecognitionResult]);
 
   // Start facial recognition
   const startRecognition = useCallback(() => {
@@ -383,14 +443,62 @@ export default function LiveMonitoring() {
 
     try {
       const blob = new Blob(chunks, { type: 'video/webm' });
-      const formData = new FormData();
-      formData.append('video', blob, `recording_${recordId}.webm`);
-      formData.append('duration', Math.round(duration));
 
-      const res = await fetch(`/api/recordings/${recordId}/upload`, {
+      // Chunked upload session: each chunk is retried on its own, so a
+      // dropped connection only costs the chunk in flight
+      const sessionRes = await fetch(`/api/recordings/${recordId}/uploads`, {
         method: 'POST',
         credentials: 'include',
-        body: formData
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ size: blob.size, mime_type: 'video/webm' })
+      });
+      const session = await sessionRes.json();
+      if (!sessionRes.ok) {
+        setRecordingStatus(`Upload failed: ${session.error || 'Unknown error'}`);
+        return;
+      }
+
+      const chunkSize = session.chunk_size;
+      const totalChunks = Math.ceil(blob.size / chunkSize);
+      let index = session.next_chunk;
+      let failures = 0;
+      while (index < totalChunks) {
+        setRecordingStatus(`Uploading recording... ${Math.round(100 * index / totalChunks)}%`);
+        let res = null;
+        try {
+          res = await fetch(session.chunk_url.replace('{index}', index), {
+            method: 'PUT',
+            credentials: 'include',
+            headers: { 'Content-Type': 'application/octet-stream' },
+            body: blob.slice(index * chunkSize, (index + 1) * chunkSize)
+          });
+        } catch (err) {
+          console.warn(`Chunk ${index} failed:`, err);
+        }
+        if (res && res.ok) {
+          index += 1;
+          failures = 0;
+          continue;
+        }
+        const state = res ? await res.json().catch(() => ({})) : {};
+        if (res && res.status !== 409 && res.status < 500) {
+          setRecordingStatus(`Upload failed: ${state.error || res.status}`);
+          return;
+        }
+        if (++failures > 5) {
+          setRecordingStatus("Upload failed: too many retries");
+          return;
+        }
+        // Resume where the server says it is
+        if (typeof state.next_chunk === 'number') index = state.next_chunk;
+        await new Promise((resolve) => setTimeout(resolve, 1000 * failures));
+      }
+
+      const res = await fetch(session.complete_url, {
+        method: 'POST',
+        credentials: 'include',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ chunks: totalChunks, size: blob.size, duration: Math.round(duration) })
       });
 
       if (res.ok) {